@@ -308,6 +308,7 @@ pub fn build(b: *Builder) !void {
     zeam_network.addImport("@zeam/types", zeam_types);
     zeam_network.addImport("@zeam/utils", zeam_utils);
     zeam_network.addImport("@zeam/params", zeam_params);
+    zeam_network.addImport("@zeam/metrics", zeam_metrics);
     zeam_network.addImport("xev", xev);
     zeam_network.addImport("ssz", ssz);
     zeam_network.addImport("multiformats", multiformats);
@@ -334,6 +335,7 @@ pub fn build(b: *Builder) !void {
     zeam_beam_node.addImport("@zeam/api", zeam_api);
     zeam_beam_node.addImport("@zeam/key-manager", zeam_key_manager);
     zeam_beam_node.addImport("@zeam/xmss", zeam_xmss);
+    zeam_beam_node.addImport("snappyframesz", snappyframesz);
 
     const zeam_spectests = b.addModule("zeam_spectests", .{
         .target = target,
@@ -432,6 +434,42 @@ pub fn build(b: *Builder) !void {
     const install_tools_cli = b.addInstallArtifact(tools_cli_exe, .{});
     tools_step.dependOn(&install_tools_cli.step);
 
+    const bench_step = b.step("bench", "Build and run zeam benchmarks");
+
+    const bench_exe = b.addExecutable(.{
+        .name = "zeam-bench",
+        .root_module = b.createModule(.{
+            .target = target,
+            .optimize = optimize,
+            .root_source_file = b.path("pkgs/bench/src/main.zig"),
+        }),
+    });
+    bench_exe.root_module.addImport("build_options", build_options_module);
+    bench_exe.root_module.addImport("simargs", simargs);
+    bench_exe.root_module.addImport("ssz", ssz);
+    bench_exe.root_module.addImport("@zeam/utils", zeam_utils);
+    bench_exe.root_module.addImport("@zeam/params", zeam_params);
+    bench_exe.root_module.addImport("@zeam/types", zeam_types);
+    bench_exe.root_module.addImport("@zeam/configs", zeam_configs);
+    bench_exe.root_module.addImport("@zeam/state-transition", zeam_state_transition);
+    bench_exe.root_module.addImport("@zeam/node", zeam_beam_node);
+    bench_exe.root_module.addImport("@zeam/xmss", zeam_xmss);
+    bench_exe.root_module.addImport("@zeam/network", zeam_network);
+    bench_exe.root_module.addImport("@zeam/database", zeam_database);
+    bench_exe.root_module.addImport("xev", xev);
+    bench_exe.root_module.addImport("snappyz", snappyz);
+    bench_exe.step.dependOn(&build_rust_lib_steps.step);
+    addRustGlueLib(b, bench_exe, target, prover);
+    bench_exe.linkLibCpp(); // for rocksdb C++ library to link
+
+    const install_bench = b.addInstallArtifact(bench_exe, .{});
+    const run_bench = b.addRunArtifact(bench_exe);
+    run_bench.step.dependOn(&install_bench.step);
+    if (b.args) |args| {
+        run_bench.addArgs(args);
+    }
+    bench_step.dependOn(&run_bench.step);
+
     const all_step = b.step("all", "Build all executables and tools");
     all_step.dependOn(&cli_exe.step);
     all_step.dependOn(tools_step);
@@ -558,6 +596,13 @@ pub fn build(b: *Builder) !void {
     setTestRunLabelFromCompile(b, run_utils_tests, utils_tests);
     test_step.dependOn(&run_utils_tests.step);
 
+    const metrics_tests = b.addTest(.{
+        .root_module = zeam_metrics,
+    });
+    const run_metrics_tests = b.addRunArtifact(metrics_tests);
+    setTestRunLabelFromCompile(b, run_metrics_tests, metrics_tests);
+    test_step.dependOn(&run_metrics_tests.step);
+
     const database_tests = b.addTest(.{
         .root_module = zeam_database,
     });
@@ -1,152 +1,399 @@
 const std = @import("std");
+const Allocator = std.mem.Allocator;
 
 const types = @import("@zeam/types");
+const zeam_metrics = @import("@zeam/metrics");
+const zeam_utils = @import("@zeam/utils");
 
 const events = @import("./events.zig");
 
 const Checkpoint = types.Checkpoint;
 const Mutex = Thread.Mutex;
 const Thread = std.Thread;
+const MpscRing = zeam_utils.MpscRing;
 
-/// Maximum size of the SSE send buffer in event_broadcaster.zig. Serialized events
-/// must not exceed this to avoid buffer overflow when sending.
+/// Upper bound on the size of one serialized chain event, keeps the SSE frames queued per
+/// client small.
 pub const sse_send_buffer_size = 512;
 
-/// SSE connection wrapper
+const heartbeat_frame = ": heartbeat\n\n";
+// queued frames handed to one writev
+const max_iovecs = 16;
+// how long the writer waits on backlogged sockets before it looks for new events again
+const writable_poll_ms: i32 = 10;
+
+pub const Options = struct {
+    /// Chain events buffered between the publishing threads and the writer thread.
+    event_capacity: usize = 256,
+    /// Frames a client may fall behind before it is disconnected.
+    client_queue_capacity: usize = 64,
+    max_connections: usize = 32,
+    heartbeat_interval_ns: u64 = 30 * std.time.ns_per_s,
+};
+
+/// A serialized SSE frame queued for any number of clients. Every event is serialized once
+/// and its frame is freed when the last client wrote or dropped it. Frames are only retained
+/// and released on the writer thread, so the count is a plain integer.
+pub const SharedFrame = struct {
+    allocator: Allocator,
+    bytes: []u8,
+    refs: u32,
+
+    /// Takes ownership of `bytes`, the caller holds the first reference.
+    pub fn create(allocator: Allocator, bytes: []u8) !*SharedFrame {
+        const frame = try allocator.create(SharedFrame);
+        frame.* = .{ .allocator = allocator, .bytes = bytes, .refs = 1 };
+        return frame;
+    }
+
+    pub fn retain(self: *SharedFrame) *SharedFrame {
+        self.refs += 1;
+        return self;
+    }
+
+    pub fn release(self: *SharedFrame) void {
+        self.refs -= 1;
+        if (self.refs > 0) return;
+        self.allocator.free(self.bytes);
+        self.allocator.destroy(self);
+    }
+};
+
+/// A subscribed SSE client. Its socket is non-blocking and only the writer thread writes to
+/// it, from a bounded queue of shared frames.
 pub const SSEConnection = struct {
     stream: std.net.Stream,
-    allocator: std.mem.Allocator,
-    mutex: Mutex,
-
-    pub fn init(stream: std.net.Stream, allocator: std.mem.Allocator) SSEConnection {
-        return SSEConnection{
+    // queued frames, the oldest at `head`
+    frames: []*SharedFrame,
+    head: usize,
+    len: usize,
+    // bytes of the oldest frame already written
+    offset: usize,
+
+    pub fn init(allocator: Allocator, stream: std.net.Stream, capacity: usize) !SSEConnection {
+        return .{
             .stream = stream,
-            .allocator = allocator,
-            .mutex = Mutex{},
+            .frames = try allocator.alloc(*SharedFrame, @max(capacity, 1)),
+            .head = 0,
+            .len = 0,
+            .offset = 0,
         };
     }
 
-    pub fn sendRaw(self: *SSEConnection, data: []const u8) !void {
-        self.mutex.lock();
-        defer self.mutex.unlock();
+    pub fn deinit(self: *SSEConnection, allocator: Allocator) void {
+        self.releaseFrames(allocator);
+        self.stream.close();
+    }
 
-        try self.stream.writeAll(data);
+    /// Queues a reference to `frame`, returns false when the queue is full.
+    pub fn enqueue(self: *SSEConnection, frame: *SharedFrame) bool {
+        if (self.len == self.frames.len) return false;
+        self.frames[(self.head + self.len) % self.frames.len] = frame.retain();
+        self.len += 1;
+        return true;
     }
 
-    pub fn sendEvent(self: *SSEConnection, event_json: []const u8) !void {
-        self.mutex.lock();
-        defer self.mutex.unlock();
+    /// Writes queued frames until the socket would block, returns whether the queue drained.
+    pub fn flush(self: *SSEConnection) !bool {
+        while (self.len > 0) {
+            var iovecs: [max_iovecs]std.posix.iovec_const = undefined;
+            const count = @min(self.len, max_iovecs);
+            for (iovecs[0..count], 0..) |*iovec, i| {
+                const bytes = self.frames[(self.head + i) % self.frames.len].bytes;
+                const start = if (i == 0) self.offset else 0;
+                iovec.* = .{ .base = bytes[start..].ptr, .len = bytes.len - start };
+            }
+            var written = std.posix.writev(self.stream.handle, iovecs[0..count]) catch |err| switch (err) {
+                error.WouldBlock => return false,
+                else => return err,
+            };
+
+            // retire the frames written completely, remember how far into the next one we got
+            while (self.len > 0) {
+                const remaining = self.frames[self.head].bytes.len - self.offset;
+                if (written < remaining) {
+                    self.offset += written;
+                    break;
+                }
+                written -= remaining;
+                self.offset = 0;
+                self.popFrame().release();
+            }
+        }
+        return true;
+    }
 
-        var write_buf: [sse_send_buffer_size]u8 = undefined;
-        var writer = self.stream.writer(&write_buf);
-        try writer.interface.writeAll(event_json);
-        try writer.interface.flush();
+    fn popFrame(self: *SSEConnection) *SharedFrame {
+        const frame = self.frames[self.head];
+        self.head = (self.head + 1) % self.frames.len;
+        self.len -= 1;
+        return frame;
     }
 
-    pub fn deinit(self: *SSEConnection) void {
-        self.stream.close();
+    /// Drops the queued frames without touching the stream.
+    fn releaseFrames(self: *SSEConnection, allocator: Allocator) void {
+        while (self.len > 0) self.popFrame().release();
+        allocator.free(self.frames);
     }
 };
 
-/// Thread-safe event broadcaster for SSE connections
+/// Fans chain events out to the SSE clients without blocking the publishing thread.
+/// Publishers push events into a lock-free ring and wake the writer thread, which serializes
+/// every event once, queues the shared frame for each client and writes to the non-blocking
+/// client sockets. A client whose queue is full has fallen too far behind and is
+/// disconnected, it catches up by reconnecting.
 pub const EventBroadcaster = struct {
+    allocator: Allocator,
+    options: Options,
+    // events published by any thread, drained by the writer thread
+    ring: MpscRing(events.ChainEvent),
+    // connections added by the api server, adopted by the writer thread
+    pending: std.ArrayList(*SSEConnection),
+    pending_mutex: Mutex,
+    // subscribed connections and scratch below, only touched by the writer thread
     connections: std.ArrayList(*SSEConnection),
-    mutex: Mutex,
-    allocator: std.mem.Allocator,
+    poll_fds: std.ArrayList(std.posix.pollfd),
+    heartbeat: *SharedFrame,
+    connection_count: std.atomic.Value(usize),
+    wake: Thread.ResetEvent,
+    stopped: std.atomic.Value(bool),
+    thread: ?Thread,
 
     const Self = @This();
 
-    pub fn init(allocator: std.mem.Allocator) Self {
+    pub fn init(allocator: Allocator, options: Options) !Self {
+        var ring = try MpscRing(events.ChainEvent).init(allocator, options.event_capacity);
+        errdefer ring.deinit();
+        var connections: std.ArrayList(*SSEConnection) = .empty;
+        errdefer connections.deinit(allocator);
+        try connections.ensureTotalCapacity(allocator, options.max_connections);
+        var poll_fds: std.ArrayList(std.posix.pollfd) = .empty;
+        errdefer poll_fds.deinit(allocator);
+        try poll_fds.ensureTotalCapacity(allocator, options.max_connections);
+
+        const heartbeat_bytes = try allocator.dupe(u8, heartbeat_frame);
+        errdefer allocator.free(heartbeat_bytes);
+        const heartbeat = try SharedFrame.create(allocator, heartbeat_bytes);
+
         return Self{
-            .connections = .empty,
-            .mutex = Mutex{},
             .allocator = allocator,
+            .options = options,
+            .ring = ring,
+            .pending = .empty,
+            .pending_mutex = Mutex{},
+            .connections = connections,
+            .poll_fds = poll_fds,
+            .heartbeat = heartbeat,
+            .connection_count = std.atomic.Value(usize).init(0),
+            .wake = .{},
+            .stopped = std.atomic.Value(bool).init(false),
+            .thread = null,
         };
     }
 
     pub fn deinit(self: *Self) void {
-        self.mutex.lock();
-        defer self.mutex.unlock();
+        self.stop();
 
-        for (self.connections.items) |connection| {
-            connection.deinit();
-            self.allocator.destroy(connection);
+        self.adoptPending();
+        while (self.ring.pop()) |event| {
+            var chain_event = event;
+            chain_event.deinit(self.allocator);
         }
+        while (self.connections.items.len > 0) self.disconnect(self.connections.items.len - 1);
+
+        self.heartbeat.release();
+        self.ring.deinit();
+        self.pending.deinit(self.allocator);
         self.connections.deinit(self.allocator);
+        self.poll_fds.deinit(self.allocator);
+    }
+
+    /// Spawns the writer thread. The broadcaster must not move afterwards.
+    pub fn start(self: *Self) !void {
+        const clock = try std.time.Timer.start();
+        self.thread = try Thread.spawn(.{}, runWriter, .{ self, clock });
+    }
+
+    fn stop(self: *Self) void {
+        const thread = self.thread orelse return;
+        self.stopped.store(true, .release);
+        self.wake.set();
+        thread.join();
+        self.thread = null;
     }
 
-    /// Add a new SSE connection
-    pub fn addConnection(self: *Self, stream: std.net.Stream) !void {
+    /// Subscribes the client on `stream` to chain events, `preamble` (the response head and
+    /// any greeting event) is written to it first. Takes ownership of the stream on success.
+    pub fn addConnection(self: *Self, stream: std.net.Stream, preamble: []const u8) !void {
         const connection = try self.allocator.create(SSEConnection);
-        connection.* = SSEConnection.init(stream, self.allocator);
+        errdefer self.allocator.destroy(connection);
+        connection.* = try SSEConnection.init(self.allocator, stream, self.options.client_queue_capacity);
+        errdefer connection.releaseFrames(self.allocator);
+
+        const frame = blk: {
+            const bytes = try self.allocator.dupe(u8, preamble);
+            errdefer self.allocator.free(bytes);
+            break :blk try SharedFrame.create(self.allocator, bytes);
+        };
+        // the queue is empty, it always has room for the preamble
+        _ = connection.enqueue(frame);
+        frame.release();
+
+        const flags = try std.posix.fcntl(stream.handle, std.posix.F.GETFL, 0);
+        const nonblock: usize = @as(u32, @bitCast(std.posix.O{ .NONBLOCK = true }));
+        _ = try std.posix.fcntl(stream.handle, std.posix.F.SETFL, flags | nonblock);
+
+        self.pending_mutex.lock();
+        defer self.pending_mutex.unlock();
+        if (self.connection_count.load(.monotonic) >= self.options.max_connections) return error.TooManyConnections;
+        try self.pending.append(self.allocator, connection);
+        _ = self.connection_count.fetchAdd(1, .monotonic);
+        self.wake.set();
+    }
 
-        self.mutex.lock();
-        defer self.mutex.unlock();
+    /// Whether another client may subscribe right now.
+    pub fn hasCapacity(self: *Self) bool {
+        return self.connection_count.load(.monotonic) < self.options.max_connections;
+    }
 
-        try self.connections.append(self.allocator, connection);
+    /// Publishes `event` to the subscribed clients and takes ownership of it on success.
+    /// Never blocks on the clients: the event is queued for the writer thread, so any thread
+    /// may publish, including the chain thread on the block import path.
+    pub fn broadcastEvent(self: *Self, event: *events.ChainEvent) !void {
+        if (self.connection_count.load(.monotonic) == 0) {
+            event.deinit(self.allocator);
+            return;
+        }
+        if (!self.ring.push(event.*)) {
+            zeam_metrics.metrics.lean_sse_events_dropped_total.incr();
+            return error.EventQueueFull;
+        }
+        self.wake.set();
     }
 
-    /// Remove a connection (typically when it's closed)
-    pub fn removeConnection(self: *Self, connection: *SSEConnection) void {
-        self.mutex.lock();
-        defer self.mutex.unlock();
+    /// Get the number of connected clients
+    pub fn getConnectionCount(self: *Self) usize {
+        return self.connection_count.load(.monotonic);
+    }
 
-        for (self.connections.items, 0..) |conn, i| {
-            if (conn == connection) {
-                _ = self.connections.swapRemove(i);
-                connection.deinit();
-                self.allocator.destroy(connection);
-                break;
-            }
+    /// Adopts new connections, queues the published events for every client and writes as
+    /// much as the sockets take without blocking. Returns whether a client still has frames
+    /// queued. Writer thread only, tests call it directly instead of starting the thread.
+    pub fn drain(self: *Self) bool {
+        self.adoptPending();
+        while (self.ring.pop()) |event| {
+            var chain_event = event;
+            self.fanOut(&chain_event);
         }
+        return self.flushConnections();
     }
 
-    pub fn removeConnectionByHandle(self: *Self, stream: std.net.Stream) void {
-        self.mutex.lock();
-        defer self.mutex.unlock();
+    fn runWriter(self: *Self, clock: std.time.Timer) void {
+        var timer = clock;
+        var next_heartbeat_ns = self.options.heartbeat_interval_ns;
+        while (true) {
+            // reset before draining, a publish from here on wakes the wait below
+            self.wake.reset();
+            if (self.stopped.load(.acquire)) break;
+            var backlogged = self.drain();
+
+            const now_ns = timer.read();
+            if (now_ns >= next_heartbeat_ns) {
+                self.queueHeartbeat();
+                next_heartbeat_ns = now_ns + self.options.heartbeat_interval_ns;
+                backlogged = self.flushConnections();
+            }
 
-        for (self.connections.items, 0..) |conn, i| {
-            if (conn.stream.handle == stream.handle) {
-                _ = self.connections.swapRemove(i);
-                conn.deinit();
-                self.allocator.destroy(conn);
-                break;
+            if (backlogged) {
+                self.waitWritable();
+            } else {
+                self.wake.timedWait(next_heartbeat_ns - now_ns) catch {};
             }
         }
     }
 
-    /// Broadcast an event to all connected clients
-    pub fn broadcastEvent(self: *Self, event: *events.ChainEvent) !void {
-        const event_json = try events.serializeEventToJson(self.allocator, event.*);
-        defer {
-            event.deinit(self.allocator);
-            self.allocator.free(event_json);
-        }
+    fn adoptPending(self: *Self) void {
+        self.pending_mutex.lock();
+        defer self.pending_mutex.unlock();
+        if (self.pending.items.len == 0) return;
+
+        // connection_count bounds the subscribed and pending connections together
+        self.connections.appendSliceAssumeCapacity(self.pending.items);
+        self.pending.clearRetainingCapacity();
+        zeam_metrics.metrics.lean_sse_connections.set(self.connections.items.len);
+    }
+
+    fn fanOut(self: *Self, event: *events.ChainEvent) void {
+        defer event.deinit(self.allocator);
+        if (self.connections.items.len == 0) return;
 
-        self.mutex.lock();
-        defer self.mutex.unlock();
+        const frame = blk: {
+            const bytes = events.serializeEventToJson(self.allocator, event.*) catch |err| {
+                std.log.warn("Failed to serialize SSE event: {}", .{err});
+                return;
+            };
+            break :blk SharedFrame.create(self.allocator, bytes) catch |err| {
+                self.allocator.free(bytes);
+                std.log.warn("Failed to queue SSE event: {}", .{err});
+                return;
+            };
+        };
+        defer frame.release();
 
         var i: usize = 0;
         while (i < self.connections.items.len) {
-            const connection = self.connections.items[i];
-
-            // Try to send the event
-            connection.sendEvent(event_json) catch |err| {
-                // If sending fails, log and keep connection; heartbeat thread will clean it up.
-                std.log.warn("Failed to send event to SSE connection: {}", .{err});
+            if (self.connections.items[i].enqueue(frame)) {
                 i += 1;
                 continue;
-            };
+            }
+            std.log.warn("Disconnecting SSE client lagging {d} events behind", .{self.options.client_queue_capacity});
+            zeam_metrics.metrics.lean_sse_clients_lagged_total.incr();
+            self.disconnect(i);
+        }
+    }
+
+    fn queueHeartbeat(self: *Self) void {
+        // clients with queued frames are written to anyway, the heartbeat keeps idle streams
+        // open and finds the closed ones
+        for (self.connections.items) |connection| {
+            if (connection.len == 0) _ = connection.enqueue(self.heartbeat);
+        }
+    }
 
+    fn flushConnections(self: *Self) bool {
+        var backlogged = false;
+        var i: usize = 0;
+        while (i < self.connections.items.len) {
+            const drained = self.connections.items[i].flush() catch |err| {
+                std.log.debug("SSE connection closed: {}", .{err});
+                self.disconnect(i);
+                continue;
+            };
+            if (!drained) backlogged = true;
             i += 1;
         }
+        return backlogged;
     }
 
-    /// Get the number of connected clients
-    pub fn getConnectionCount(self: *Self) usize {
-        self.mutex.lock();
-        defer self.mutex.unlock();
-        return self.connections.items.len;
+    /// Waits until a backlogged client socket takes more data or the poll interval passed.
+    fn waitWritable(self: *Self) void {
+        self.poll_fds.clearRetainingCapacity();
+        for (self.connections.items) |connection| {
+            if (connection.len == 0) continue;
+            self.poll_fds.appendAssumeCapacity(.{ .fd = connection.stream.handle, .events = std.posix.POLL.OUT, .revents = 0 });
+        }
+        _ = std.posix.poll(self.poll_fds.items, writable_poll_ms) catch |err| {
+            std.log.warn("Failed to poll SSE connections: {}", .{err});
+            std.Thread.sleep(@as(u64, writable_poll_ms) * std.time.ns_per_ms);
+        };
+    }
+
+    fn disconnect(self: *Self, index: usize) void {
+        const connection = self.connections.swapRemove(index);
+        connection.deinit(self.allocator);
+        self.allocator.destroy(connection);
+        _ = self.connection_count.fetchSub(1, .monotonic);
+        zeam_metrics.metrics.lean_sse_connections.set(self.connections.items.len);
     }
 };
 
@@ -154,13 +401,18 @@ pub const EventBroadcaster = struct {
 var global_broadcaster: ?EventBroadcaster = null;
 var broadcaster_mutex = Mutex{};
 
-/// Initialize the global event broadcaster
-pub fn initGlobalBroadcaster(allocator: std.mem.Allocator) !void {
+/// Initialize the global event broadcaster and start its writer thread
+pub fn initGlobalBroadcaster(allocator: Allocator, options: Options) !void {
     broadcaster_mutex.lock();
     defer broadcaster_mutex.unlock();
 
     if (global_broadcaster == null) {
-        global_broadcaster = EventBroadcaster.init(allocator);
+        global_broadcaster = try EventBroadcaster.init(allocator, options);
+        global_broadcaster.?.start() catch |err| {
+            global_broadcaster.?.deinit();
+            global_broadcaster = null;
+            return err;
+        };
     }
 }
 
@@ -183,24 +435,10 @@ pub fn getGlobalBroadcaster() ?*EventBroadcaster {
     return if (global_broadcaster) |*broadcaster| broadcaster else null;
 }
 
-/// Add a connection to the global broadcaster
-pub fn removeGlobalConnection(stream: std.net.Stream) void {
+/// Add a connection to the global broadcaster, see `EventBroadcaster.addConnection`
+pub fn addGlobalConnection(stream: std.net.Stream, preamble: []const u8) !void {
     if (getGlobalBroadcaster()) |broadcaster| {
-        broadcaster.removeConnectionByHandle(stream);
-    }
-}
-
-pub fn addGlobalConnection(stream: std.net.Stream) !*SSEConnection {
-    if (getGlobalBroadcaster()) |broadcaster| {
-        const connection = try broadcaster.allocator.create(SSEConnection);
-        errdefer broadcaster.allocator.destroy(connection);
-        connection.* = SSEConnection.init(stream, broadcaster.allocator);
-
-        broadcaster.mutex.lock();
-        defer broadcaster.mutex.unlock();
-
-        try broadcaster.connections.append(broadcaster.allocator, connection);
-        return connection;
+        try broadcaster.addConnection(stream, preamble);
     } else {
         return error.BroadcasterNotInitialized;
     }
@@ -215,52 +453,94 @@ pub fn broadcastGlobalEvent(event: *events.ChainEvent) !void {
     }
 }
 
-test "event broadcaster basic functionality" {
+fn testHeadEvent(allocator: Allocator, slot: types.Slot) !events.ChainEvent {
+    const proto_block = types.ProtoBlock{
+        .slot = slot,
+        .blockRoot = [_]u8{1} ** 32,
+        .parentRoot = [_]u8{2} ** 32,
+        .stateRoot = [_]u8{3} ** 32,
+        .timeliness = true,
+        .confirmed = true,
+    };
+    return events.ChainEvent{ .new_head = try events.NewHeadEvent.fromProtoBlock(allocator, proto_block) };
+}
+
+// Socket pairs stand in for client connections, the broadcaster owns and closes fds[1].
+fn testSocketPair() ![2]std.posix.fd_t {
+    var fds: [2]std.posix.fd_t = undefined;
+    if (std.c.socketpair(std.posix.AF.UNIX, std.posix.SOCK.STREAM, 0, &fds) != 0) {
+        return error.SocketPairFailed;
+    }
+    return fds;
+}
+
+test "event broadcaster writes one serialized frame to every client" {
     const allocator = std.testing.allocator;
 
-    var broadcaster = EventBroadcaster.init(allocator);
+    var broadcaster = try EventBroadcaster.init(allocator, .{});
     defer broadcaster.deinit();
-
-    // Test initial state
     try std.testing.expect(broadcaster.getConnectionCount() == 0);
 
-    // Use a socket pair so the stream is a real socket (std.net.Stream's writer uses sendmsg, which requires a socket, not a pipe fd).
-    var fds: [2]std.posix.fd_t = undefined;
-    if (std.c.socketpair(std.posix.AF.UNIX, std.posix.SOCK.STREAM, 0, &fds) != 0) {
-        return error.SocketPairFailed;
+    var clients: [2][2]std.posix.fd_t = undefined;
+    for (&clients) |*fds| {
+        fds.* = try testSocketPair();
+        try broadcaster.addConnection(.{ .handle = fds[1] }, "hello\n\n");
+    }
+    defer for (clients) |fds| std.posix.close(fds[0]);
+    try std.testing.expect(broadcaster.getConnectionCount() == 2);
+
+    var chain_event = try testHeadEvent(allocator, 123);
+    try broadcaster.broadcastEvent(&chain_event);
+    try std.testing.expect(!broadcaster.drain());
+
+    var expected_chain_event = try testHeadEvent(allocator, 123);
+    defer expected_chain_event.deinit(allocator);
+    const expected_event = try events.serializeEventToJson(allocator, expected_chain_event);
+    defer allocator.free(expected_event);
+    for (clients) |fds| {
+        var received: [1024]u8 = undefined;
+        var len: usize = 0;
+        while (len < "hello\n\n".len + expected_event.len) {
+            len += try std.posix.read(fds[0], received[len..]);
+        }
+        try std.testing.expectEqualStrings("hello\n\n", received[0.."hello\n\n".len]);
+        try std.testing.expectEqualStrings(expected_event, received["hello\n\n".len..len]);
     }
-    defer std.posix.close(fds[0]); // read end; write end fds[1] is owned by the connection and closed in broadcaster.deinit()
+    // connections stay subscribed until they close or fall behind
+    try std.testing.expect(broadcaster.getConnectionCount() == 2);
+}
 
-    const stream = std.net.Stream{ .handle = fds[1] };
+test "event broadcaster disconnects a client that falls behind" {
+    const allocator = std.testing.allocator;
 
-    // Add connection
-    try broadcaster.addConnection(stream);
-    try std.testing.expect(broadcaster.getConnectionCount() == 1);
+    var broadcaster = try EventBroadcaster.init(allocator, .{ .client_queue_capacity = 2 });
+    defer broadcaster.deinit();
 
-    // Test broadcasting an event (writes to the socket; read end fds[0] is left open so the write succeeds)
-    const proto_block = types.ProtoBlock{
-        .slot = 123,
-        .blockRoot = [_]u8{1} ** 32,
-        .parentRoot = [_]u8{2} ** 32,
-        .stateRoot = [_]u8{3} ** 32,
-        .timeliness = true,
-        .confirmed = true,
-    };
+    const fds = try testSocketPair();
+    defer std.posix.close(fds[0]);
+    try broadcaster.addConnection(.{ .handle = fds[1] }, "hello\n\n");
 
-    const head_event = try events.NewHeadEvent.fromProtoBlock(allocator, proto_block);
+    // the preamble and the first event fill the queue before the writer gets to flush
+    for (0..2) |i| {
+        var chain_event = try testHeadEvent(allocator, @intCast(i));
+        try broadcaster.broadcastEvent(&chain_event);
+    }
+    try std.testing.expect(!broadcaster.drain());
+    try std.testing.expect(broadcaster.getConnectionCount() == 0);
 
-    var chain_event = events.ChainEvent{ .new_head = head_event };
+    var received: [16]u8 = undefined;
+    try std.testing.expectEqual(@as(usize, 0), try std.posix.read(fds[0], &received));
 
+    // publishing without clients frees the event right away
+    var chain_event = try testHeadEvent(allocator, 3);
     try broadcaster.broadcastEvent(&chain_event);
-
-    // Connection remains until explicitly removed (e.g., by SSE heartbeat cleanup)
-    try std.testing.expect(broadcaster.getConnectionCount() == 1);
+    try std.testing.expect(broadcaster.ring.len() == 0);
 }
 
 test "global broadcaster functionality" {
     const allocator = std.testing.allocator;
 
-    try initGlobalBroadcaster(allocator);
+    try initGlobalBroadcaster(allocator, .{});
     defer deinitGlobalBroadcaster();
 
     try std.testing.expect(getGlobalBroadcaster() != null);
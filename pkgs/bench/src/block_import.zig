@@ -0,0 +1,118 @@
+const std = @import("std");
+const Allocator = std.mem.Allocator;
+
+const types = @import("@zeam/types");
+const zeam_utils = @import("@zeam/utils");
+const stf = @import("@zeam/state-transition");
+
+pub const BlockImportAllocsCmd = struct {
+    blocks: usize = 16,
+    help: bool = false,
+
+    pub const __shorts__ = .{
+        .blocks = .b,
+        .help = .h,
+    };
+
+    pub const __messages__ = .{
+        .blocks = "Number of mock chain blocks imported through the state transition",
+        .help = "Show help information for the block-import-allocs command",
+    };
+};
+
+/// Allocator wrapper counting the allocation calls and bytes requested from its child.
+pub const CountingAllocator = struct {
+    child: Allocator,
+    allocations: usize = 0,
+    requested_bytes: usize = 0,
+
+    const Self = @This();
+
+    pub fn allocator(self: *Self) Allocator {
+        return .{
+            .ptr = self,
+            .vtable = &.{
+                .alloc = alloc,
+                .resize = resize,
+                .remap = remap,
+                .free = free,
+            },
+        };
+    }
+
+    pub fn reset(self: *Self) void {
+        self.allocations = 0;
+        self.requested_bytes = 0;
+    }
+
+    fn alloc(ctx: *anyopaque, len: usize, alignment: std.mem.Alignment, ret_addr: usize) ?[*]u8 {
+        const self: *Self = @ptrCast(@alignCast(ctx));
+        self.allocations += 1;
+        self.requested_bytes += len;
+        return self.child.rawAlloc(len, alignment, ret_addr);
+    }
+
+    fn resize(ctx: *anyopaque, memory: []u8, alignment: std.mem.Alignment, new_len: usize, ret_addr: usize) bool {
+        const self: *Self = @ptrCast(@alignCast(ctx));
+        return self.child.rawResize(memory, alignment, new_len, ret_addr);
+    }
+
+    fn remap(ctx: *anyopaque, memory: []u8, alignment: std.mem.Alignment, new_len: usize, ret_addr: usize) ?[*]u8 {
+        const self: *Self = @ptrCast(@alignCast(ctx));
+        return self.child.rawRemap(memory, alignment, new_len, ret_addr);
+    }
+
+    fn free(ctx: *anyopaque, memory: []u8, alignment: std.mem.Alignment, ret_addr: usize) void {
+        const self: *Self = @ptrCast(@alignCast(ctx));
+        self.child.rawFree(memory, alignment, ret_addr);
+    }
+};
+
+/// Imports the blocks of a mock chain through the state transition with the logger at info,
+/// the level nodes run with, and reports the allocations made per block. Debug-only log
+/// arguments must not show up here.
+pub fn runBlockImportAllocs(allocator: Allocator, cmd: BlockImportAllocsCmd) !void {
+    var mock_chain = try stf.genMockChain(allocator, @max(cmd.blocks, 2), null);
+    defer mock_chain.deinit(allocator);
+    defer mock_chain.genesis_state.deinit();
+
+    var logger_config = zeam_utils.getLoggerConfig(.info, null);
+    const module_logger = logger_config.logger(.state_transition);
+
+    var counting = CountingAllocator{ .child = allocator };
+    const counting_allocator = counting.allocator();
+
+    var state: types.BeamState = undefined;
+    try mock_chain.genesis_state.clone(counting_allocator, &state);
+    defer state.deinit();
+
+    std.debug.print("block import allocations: blocks={d} log_level=info\n", .{mock_chain.blocks.len - 1});
+    std.debug.print("{s:>8} {s:>12} {s:>14} {s:>12}\n", .{ "slot", "allocations", "requested_kib", "import_ms" });
+
+    var total_allocations: usize = 0;
+    var total_ns: u64 = 0;
+    // block 0 is genesis so we have to apply block 1 onwards
+    for (mock_chain.blocks[1..]) |signed_block| {
+        const block = signed_block.message.block;
+        counting.reset();
+
+        var timer = try std.time.Timer.start();
+        try stf.apply_transition(counting_allocator, &state, block, .{ .logger = module_logger });
+        const elapsed_ns = timer.read();
+
+        total_allocations += counting.allocations;
+        total_ns += elapsed_ns;
+        std.debug.print("{d:>8} {d:>12} {d:>14} {d:>12.3}\n", .{
+            block.slot,
+            counting.allocations,
+            counting.requested_bytes / 1024,
+            @as(f64, @floatFromInt(elapsed_ns)) / std.time.ns_per_ms,
+        });
+    }
+
+    const imported = mock_chain.blocks.len - 1;
+    std.debug.print("avg allocations/block={d} avg import_ms={d:.3}\n", .{
+        total_allocations / imported,
+        @as(f64, @floatFromInt(total_ns / imported)) / std.time.ns_per_ms,
+    });
+}
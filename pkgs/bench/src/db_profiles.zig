@@ -0,0 +1,144 @@
+const std = @import("std");
+const Allocator = std.mem.Allocator;
+
+const types = @import("@zeam/types");
+const database = @import("@zeam/database");
+const zeam_utils = @import("@zeam/utils");
+
+const dirSize = @import("state_storage.zig").dirSize;
+
+pub const DbProfilesCmd = struct {
+    slots: usize = 4096,
+    @"block-bytes": usize = 4 * 1024,
+    @"state-bytes": usize = 256 * 1024,
+    reads: usize = 20_000,
+    @"data-dir": []const u8 = "/tmp/zeam-bench-db-profiles",
+    help: bool = false,
+
+    pub const __shorts__ = .{
+        .slots = .n,
+        .reads = .r,
+        .@"data-dir" = .d,
+        .help = .h,
+    };
+
+    pub const __messages__ = .{
+        .slots = "Number of slots written, each one block, one state and one finalized slot index entry",
+        .@"block-bytes" = "Size of the stored block values",
+        .@"state-bytes" = "Size of the stored state values",
+        .reads = "Number of random slot lookups (index, block, state) measured after writing",
+        .@"data-dir" = "Scratch directory the benchmark databases are created in and removed from",
+        .help = "Show help information for the db-profiles command",
+    };
+};
+
+fn slotRoot(slot: usize) types.Root {
+    var root = std.mem.zeroes(types.Root);
+    std.mem.writeInt(u64, root[0..8], @intCast(slot + 1), .little);
+    root[31] = 0xdb;
+    return root;
+}
+
+/// Fills `value` like ssz encoded chain data: random roots and keys with runs of zero padding
+/// and small integers between them, so compression has about as much to work with as it does
+/// on real blocks and states.
+fn fillValue(random: std.Random, value: []u8) void {
+    var i: usize = 0;
+    while (i < value.len) {
+        const random_len = @min(32, value.len - i);
+        random.bytes(value[i .. i + random_len]);
+        i += random_len;
+        const zero_len = @min(random.uintLessThan(usize, 24), value.len - i);
+        @memset(value[i .. i + zero_len], 0);
+        i += zero_len;
+    }
+}
+
+/// Writes the same block, state and finalized slot index data under every database profile
+/// the node command accepts, then looks up random slots the way block and state requests
+/// are served, reporting write and read throughput and the size on disk per profile.
+pub fn runDbProfiles(allocator: Allocator, cmd: DbProfilesCmd) !void {
+    var logger_config = zeam_utils.getLoggerConfig(.warn, null);
+    const module_logger = logger_config.logger(.database);
+
+    try std.fs.cwd().makePath(cmd.@"data-dir");
+    defer std.fs.cwd().deleteTree(cmd.@"data-dir") catch {};
+
+    const block_value = try allocator.alloc(u8, cmd.@"block-bytes");
+    defer allocator.free(block_value);
+    const state_value = try allocator.alloc(u8, cmd.@"state-bytes");
+    defer allocator.free(state_value);
+
+    const slots = @max(cmd.slots, 1);
+    std.debug.print("db profiles: slots={d} block_bytes={d} state_bytes={d} reads={d}\n", .{ slots, cmd.@"block-bytes", cmd.@"state-bytes", cmd.reads });
+    std.debug.print("{s:>11} {s:>12} {s:>14} {s:>14} {s:>12}\n", .{ "profile", "write_ms", "write_mib_s", "reads_per_s", "disk_mib" });
+
+    inline for (comptime std.enums.values(database.DbProfile)) |profile| {
+        const db_path = try std.fs.path.join(allocator, &.{ cmd.@"data-dir", @tagName(profile) });
+        defer allocator.free(db_path);
+        var db = try database.Db.openWithOptions(allocator, module_logger, db_path, .{ .profile = profile });
+        defer db.deinit();
+
+        // every profile sees the same values
+        var prng = std.Random.DefaultPrng.init(0xdb);
+        const random = prng.random();
+
+        var written: u64 = 0;
+        var timer = try std.time.Timer.start();
+        for (0..slots) |slot| {
+            const root = slotRoot(slot);
+            fillValue(random, block_value);
+            fillValue(random, state_value);
+
+            const block_key = try database.formatBlockKey(allocator, &root);
+            defer allocator.free(block_key);
+            const state_key = try database.formatStateKey(allocator, &root);
+            defer allocator.free(state_key);
+            const slot_key = try database.formatFinalizedSlotKey(allocator, slot);
+            defer allocator.free(slot_key);
+
+            var batch = db.initWriteBatch();
+            defer batch.deinit();
+            batch.put(database.DbBlocksNamespace, block_key, block_value);
+            batch.put(database.DbStatesNamespace, state_key, state_value);
+            batch.put(database.DbFinalizedSlotsNamespace, slot_key, &root);
+            db.commit(&batch);
+            written += block_value.len + state_value.len + root.len;
+        }
+        try db.flush(database.DbBlocksNamespace);
+        try db.flush(database.DbStatesNamespace);
+        try db.flush(database.DbFinalizedSlotsNamespace);
+        const write_ns = timer.lap();
+
+        for (0..cmd.reads) |_| {
+            const slot = random.uintLessThan(usize, slots);
+            const slot_key = try database.formatFinalizedSlotKey(allocator, slot);
+            defer allocator.free(slot_key);
+            const root_value = try db.get(database.DbFinalizedSlotsNamespace, slot_key) orelse return error.MissingSlotIndex;
+            defer root_value.deinit();
+            const root: types.Root = root_value.data[0..32].*;
+
+            const block_key = try database.formatBlockKey(allocator, &root);
+            defer allocator.free(block_key);
+            const block = try db.get(database.DbBlocksNamespace, block_key) orelse return error.MissingBlock;
+            block.deinit();
+            const state_key = try database.formatStateKey(allocator, &root);
+            defer allocator.free(state_key);
+            const state = try db.get(database.DbStatesNamespace, state_key) orelse return error.MissingState;
+            state.deinit();
+        }
+        const read_ns = timer.read();
+
+        var data_dir = try std.fs.cwd().openDir(db_path, .{ .iterate = true });
+        defer data_dir.close();
+        const disk_bytes = try dirSize(allocator, data_dir);
+
+        std.debug.print("{s:>11} {d:>12.0} {d:>14.1} {d:>14.0} {d:>12.1}\n", .{
+            @tagName(profile),
+            @as(f64, @floatFromInt(write_ns)) / std.time.ns_per_ms,
+            @as(f64, @floatFromInt(written)) / (1024 * 1024) / (@as(f64, @floatFromInt(@max(write_ns, 1))) / std.time.ns_per_s),
+            @as(f64, @floatFromInt(cmd.reads)) / (@as(f64, @floatFromInt(@max(read_ns, 1))) / std.time.ns_per_s),
+            @as(f64, @floatFromInt(disk_bytes)) / (1024 * 1024),
+        });
+    }
+}
@@ -0,0 +1,286 @@
+const std = @import("std");
+const Allocator = std.mem.Allocator;
+
+const types = @import("@zeam/types");
+const configs = @import("@zeam/configs");
+const params = @import("@zeam/params");
+const zeam_utils = @import("@zeam/utils");
+const stf = @import("@zeam/state-transition");
+const node_lib = @import("@zeam/node");
+
+const ForkChoice = node_lib.fcFactory.ForkChoice;
+const ProtoBlock = types.ProtoBlock;
+
+pub const RebaseCmd = struct {
+    sizes: []const u8 = "10000,25000,50000,100000",
+    @"fork-every": usize = 8,
+    @"fork-length": usize = 4,
+    @"finalize-percent": u8 = 75,
+    iterations: usize = 3,
+    help: bool = false,
+
+    pub const __shorts__ = .{
+        .sizes = .s,
+        .iterations = .n,
+        .help = .h,
+    };
+
+    pub const __messages__ = .{
+        .sizes = "Comma separated forkchoice tree sizes (number of nodes) to benchmark",
+        .@"fork-every" = "Branch a side fork off every N canonical blocks (0 disables forks)",
+        .@"fork-length" = "Number of blocks in every side fork",
+        .@"finalize-percent" = "Position of the new finalized anchor along the canonical chain (percent)",
+        .iterations = "Number of rebases to run per tree size",
+        .help = "Show help information for the forkchoice-rebase command",
+    };
+};
+
+/// Deterministic block root for the synthetic tree, index 0 is never used as it is the anchor.
+fn benchRoot(idx: usize) types.Root {
+    var root = std.mem.zeroes(types.Root);
+    std.mem.writeInt(u64, root[0..8], @intCast(idx), .little);
+    root[31] = 0xbe;
+    return root;
+}
+
+/// Populates the forkchoice with `num_nodes` blocks: a canonical chain with a side fork of
+/// `fork_length` blocks branching off every `fork_every` canonical blocks. Forks are inserted
+/// right after their branch point so pruned nodes are spread across the whole array, which is
+/// the worst case for element-by-element removal. Returns the root of the new finalized anchor.
+fn populateTree(fork_choice: *ForkChoice, cmd: RebaseCmd, num_nodes: usize) !types.Root {
+    const anchor = fork_choice.head;
+    var canonical_parent = anchor.blockRoot;
+    var canonical_slot = anchor.slot;
+    var canonical_len: usize = 0;
+    var next_idx: usize = 1;
+
+    var canonical_roots: std.ArrayList(types.Root) = .empty;
+    defer canonical_roots.deinit(fork_choice.allocator);
+
+    while (next_idx < num_nodes) {
+        canonical_slot += 1;
+        const block_root = benchRoot(next_idx);
+        next_idx += 1;
+        try fork_choice.protoArray.onBlock(ProtoBlock{
+            .slot = canonical_slot,
+            .blockRoot = block_root,
+            .parentRoot = canonical_parent,
+            .stateRoot = anchor.stateRoot,
+            .timeliness = true,
+            .confirmed = true,
+        }, canonical_slot);
+        try canonical_roots.append(fork_choice.allocator, block_root);
+        canonical_parent = block_root;
+        canonical_len += 1;
+
+        if (cmd.@"fork-every" == 0 or canonical_len % cmd.@"fork-every" != 0) continue;
+
+        var fork_parent = block_root;
+        var fork_slot = canonical_slot;
+        for (0..cmd.@"fork-length") |_| {
+            if (next_idx >= num_nodes) break;
+            fork_slot += 1;
+            const fork_root = benchRoot(next_idx);
+            next_idx += 1;
+            try fork_choice.protoArray.onBlock(ProtoBlock{
+                .slot = fork_slot,
+                .blockRoot = fork_root,
+                .parentRoot = fork_parent,
+                .stateRoot = anchor.stateRoot,
+                .timeliness = true,
+                .confirmed = true,
+            }, fork_slot);
+            fork_parent = fork_root;
+        }
+    }
+
+    if (canonical_roots.items.len == 0) return anchor.blockRoot;
+    const finalize_percent: usize = @min(cmd.@"finalize-percent", 100);
+    const target_pos = (canonical_roots.items.len * finalize_percent) / 100;
+    return canonical_roots.items[@min(target_pos, canonical_roots.items.len - 1)];
+}
+
+pub fn runRebase(allocator: Allocator, cmd: RebaseCmd) !void {
+    var mock_chain = try stf.genMockChain(allocator, 1, null);
+    defer mock_chain.deinit(allocator);
+    defer mock_chain.genesis_state.deinit();
+
+    const spec_name = try allocator.dupe(u8, "beamdev");
+    defer allocator.free(spec_name);
+    const chain_config = configs.ChainConfig{
+        .id = configs.Chain.custom,
+        .genesis = mock_chain.genesis_config,
+        .spec = .{
+            .preset = params.Preset.mainnet,
+            .name = spec_name,
+            .attestation_committee_count = 1,
+        },
+    };
+
+    var logger_config = zeam_utils.getLoggerConfig(.info, null);
+    const module_logger = logger_config.logger(.forkchoice);
+
+    std.debug.print("forkchoice rebase: fork_every={d} fork_length={d} finalize_percent={d} iterations={d}\n", .{
+        cmd.@"fork-every",
+        cmd.@"fork-length",
+        cmd.@"finalize-percent",
+        cmd.iterations,
+    });
+    std.debug.print("{s:>10} {s:>10} {s:>12} {s:>12} {s:>12}\n", .{ "nodes", "kept", "min_ms", "avg_ms", "ns/node" });
+
+    var sizes_it = std.mem.tokenizeScalar(u8, cmd.sizes, ',');
+    while (sizes_it.next()) |size_str| {
+        const num_nodes = try std.fmt.parseInt(usize, std.mem.trim(u8, size_str, " "), 10);
+
+        var min_ns: u64 = std.math.maxInt(u64);
+        var total_ns: u64 = 0;
+        var kept: usize = 0;
+        for (0..@max(cmd.iterations, 1)) |_| {
+            var fork_choice = try ForkChoice.init(allocator, .{
+                .config = chain_config,
+                .anchorState = &mock_chain.genesis_state,
+                .logger = module_logger,
+            });
+            defer fork_choice.deinit();
+
+            const target_root = try populateTree(&fork_choice, cmd, num_nodes);
+            // size the deltas like a live node would have after a head update
+            _ = try fork_choice.computeDeltas(true);
+
+            var timer = try std.time.Timer.start();
+            try fork_choice.rebase(target_root, null);
+            const elapsed_ns = timer.read();
+
+            min_ns = @min(min_ns, elapsed_ns);
+            total_ns += elapsed_ns;
+            kept = fork_choice.protoArray.nodes.items.len;
+        }
+
+        const runs: u64 = @max(cmd.iterations, 1);
+        const avg_ns = total_ns / runs;
+        std.debug.print("{d:>10} {d:>10} {d:>12.3} {d:>12.3} {d:>12}\n", .{
+            num_nodes,
+            kept,
+            @as(f64, @floatFromInt(min_ns)) / std.time.ns_per_ms,
+            @as(f64, @floatFromInt(avg_ns)) / std.time.ns_per_ms,
+            avg_ns / @max(num_nodes, 1),
+        });
+    }
+}
+
+pub const AggregatesCmd = struct {
+    validators: []const u8 = "128,512,1024,4096",
+    blocks: usize = 32,
+    @"aggregates-per-block": usize = 4,
+    @"proof-bytes": usize = 64 * 1024,
+    help: bool = false,
+
+    pub const __shorts__ = .{
+        .validators = .s,
+        .blocks = .b,
+        .help = .h,
+    };
+
+    pub const __messages__ = .{
+        .validators = "Comma separated number of participants per aggregate to benchmark",
+        .blocks = "Number of blocks imported per run",
+        .@"aggregates-per-block" = "Number of aggregated attestations carried by every block",
+        .@"proof-bytes" = "Size of the synthetic aggregated proof payload in bytes",
+        .help = "Show help information for the forkchoice-aggregates command",
+    };
+};
+
+/// Imports `cmd.blocks` blocks worth of aggregated attestations into the forkchoice payload
+/// maps the way chain.onBlock does, reporting import throughput and the memory retained by
+/// the payload maps afterwards.
+pub fn runAggregates(allocator: Allocator, cmd: AggregatesCmd) !void {
+    var mock_chain = try stf.genMockChain(allocator, 1, null);
+    defer mock_chain.deinit(allocator);
+    defer mock_chain.genesis_state.deinit();
+
+    const spec_name = try allocator.dupe(u8, "beamdev");
+    defer allocator.free(spec_name);
+    const chain_config = configs.ChainConfig{
+        .id = configs.Chain.custom,
+        .genesis = mock_chain.genesis_config,
+        .spec = .{
+            .preset = params.Preset.mainnet,
+            .name = spec_name,
+            .attestation_committee_count = 1,
+        },
+    };
+
+    var logger_config = zeam_utils.getLoggerConfig(.info, null);
+    const module_logger = logger_config.logger(.forkchoice);
+
+    std.debug.print("forkchoice aggregates: blocks={d} aggregates_per_block={d} proof_bytes={d}\n", .{
+        cmd.blocks,
+        cmd.@"aggregates-per-block",
+        cmd.@"proof-bytes",
+    });
+    std.debug.print("{s:>10} {s:>12} {s:>14} {s:>12} {s:>14}\n", .{ "validators", "import_ms", "aggregates/s", "proofs", "retained_kib" });
+
+    var validators_it = std.mem.tokenizeScalar(u8, cmd.validators, ',');
+    while (validators_it.next()) |count_str| {
+        const num_validators = try std.fmt.parseInt(usize, std.mem.trim(u8, count_str, " "), 10);
+
+        const validator_ids = try allocator.alloc(types.ValidatorIndex, num_validators);
+        defer allocator.free(validator_ids);
+        for (validator_ids, 0..) |*validator_id, i| validator_id.* = @intCast(i);
+
+        var proof = try types.AggregatedSignatureProof.init(allocator);
+        defer proof.deinit();
+        for (0..num_validators) |i| {
+            try types.aggregationBitsSet(&proof.participants, i, true);
+        }
+
+        // payload maps are allocated from their own tracking allocator so the retained
+        // footprint can be read back after the import
+        var tracking = std.heap.GeneralPurposeAllocator(.{ .enable_memory_limit = true }){};
+        defer _ = tracking.deinit();
+        const fc_allocator = tracking.allocator();
+
+        var fork_choice = try ForkChoice.init(fc_allocator, .{
+            .config = chain_config,
+            .anchorState = &mock_chain.genesis_state,
+            .logger = module_logger,
+        });
+        defer fork_choice.deinit();
+        const baseline_bytes = tracking.total_requested_bytes;
+
+        var timer = try std.time.Timer.start();
+        for (0..cmd.blocks) |block_idx| {
+            for (0..cmd.@"aggregates-per-block") |agg_idx| {
+                // every aggregate signs distinct data with a distinct proof, like real blocks
+                proof.proof_data.deinit();
+                proof.proof_data = try @TypeOf(proof.proof_data).init(allocator);
+                const seed: u8 = @truncate(block_idx * cmd.@"aggregates-per-block" + agg_idx);
+                for (0..cmd.@"proof-bytes") |i| {
+                    try proof.proof_data.append(seed ^ @as(u8, @truncate(i)));
+                }
+
+                const slot: types.Slot = @intCast(block_idx + 1);
+                var head_root = fork_choice.head.blockRoot;
+                head_root[0] = seed;
+                const attestation_data = types.AttestationData{
+                    .slot = slot,
+                    .head = .{ .root = head_root, .slot = slot },
+                    .target = .{ .root = head_root, .slot = slot },
+                    .source = .{ .root = fork_choice.head.blockRoot, .slot = 0 },
+                };
+                try fork_choice.storeAggregatedPayload(validator_ids, &attestation_data, proof, true);
+            }
+        }
+        const elapsed_ns = timer.read();
+
+        const total_aggregates = cmd.blocks * cmd.@"aggregates-per-block";
+        const retained_bytes = tracking.total_requested_bytes - baseline_bytes;
+        std.debug.print("{d:>10} {d:>12.3} {d:>14.1} {d:>12} {d:>14}\n", .{
+            num_validators,
+            @as(f64, @floatFromInt(elapsed_ns)) / std.time.ns_per_ms,
+            @as(f64, @floatFromInt(total_aggregates)) * std.time.ns_per_s / @as(f64, @floatFromInt(@max(elapsed_ns, 1))),
+            fork_choice.aggregated_proofs.count(),
+            retained_bytes / 1024,
+        });
+    }
+}
@@ -0,0 +1,135 @@
+const std = @import("std");
+const Allocator = std.mem.Allocator;
+
+const snappyz = @import("snappyz");
+const types = @import("@zeam/types");
+const stf = @import("@zeam/state-transition");
+const networks = @import("@zeam/network");
+
+const CountingAllocator = @import("block_import.zig").CountingAllocator;
+
+pub const GossipDecodeCmd = struct {
+    messages: usize = 20_000,
+    @"proof-bytes": usize = 1024,
+    help: bool = false,
+
+    pub const __shorts__ = .{
+        .messages = .n,
+        .@"proof-bytes" = .p,
+        .help = .h,
+    };
+
+    pub const __messages__ = .{
+        .messages = "Number of messages decoded per gossip topic and decode path",
+        .@"proof-bytes" = "Size of the aggregated signature proof in the aggregation message",
+        .help = "Show help information for the gossip-decode command",
+    };
+};
+
+const network_name = "devnet0";
+
+/// Decodes a message the way the bridge did before the scratch decoder: an owned topic, a
+/// heap copy of the decompressed bytes and the deserialized message, all freed per message.
+fn decodeWithHeap(allocator: Allocator, topic_str: [*:0]const u8, compressed: []const u8) !networks.GossipMessage {
+    var topic = try networks.LeanNetworkTopic.decode(allocator, topic_str);
+    defer topic.deinit();
+
+    const uncompressed = try snappyz.decode(allocator, compressed);
+    defer allocator.free(uncompressed);
+
+    // only the deserialize step of the decoder, its scratch stays untouched
+    var decoder = networks.GossipDecoder.init(allocator);
+    defer decoder.deinit();
+    return decoder.deserialize(topic.gossip_topic, uncompressed);
+}
+
+fn decodeWithScratch(decoder: *networks.GossipDecoder, topic_str: [*:0]const u8, compressed: []const u8) !networks.GossipMessage {
+    const scratch = decoder.beginMessage();
+    const topic = try networks.LeanNetworkTopic.decode(scratch, topic_str);
+    const uncompressed = try decoder.decompress(compressed);
+    return decoder.deserialize(topic.gossip_topic, uncompressed);
+}
+
+/// Decodes compressed messages of every gossip topic through the per message heap path and
+/// the scratch decoder used by the libp2p bridge, reporting throughput and the allocations
+/// each message costs. Scratch growth is counted too, so its warm up shows in the average.
+pub fn runGossipDecode(allocator: Allocator, cmd: GossipDecodeCmd) !void {
+    var mock_chain = try stf.genMockChain(allocator, 2, null);
+    defer mock_chain.deinit(allocator);
+    defer mock_chain.genesis_state.deinit();
+
+    const signed_block = mock_chain.blocks[1];
+    const attestation_data = types.AttestationData{
+        .slot = signed_block.message.block.slot,
+        .head = .{ .root = mock_chain.blockRoots[1], .slot = signed_block.message.block.slot },
+        .target = .{ .root = mock_chain.blockRoots[1], .slot = signed_block.message.block.slot },
+        .source = .{ .root = mock_chain.blockRoots[0], .slot = 0 },
+    };
+
+    // the proof is owned by the aggregation message once built
+    var aggregation = blk: {
+        var proof = try types.AggregatedSignatureProof.init(allocator);
+        errdefer proof.deinit();
+        for (0..64) |i| {
+            try types.aggregationBitsSet(&proof.participants, i, true);
+        }
+        for (0..cmd.@"proof-bytes") |i| {
+            try proof.proof_data.append(@truncate(i));
+        }
+        break :blk networks.GossipMessage{ .aggregation = .{ .data = attestation_data, .proof = proof } };
+    };
+    defer aggregation.deinit();
+
+    const samples = [_]networks.GossipMessage{
+        .{ .block = signed_block },
+        .{ .attestation = .{ .subnet_id = 0, .message = .{
+            .validator_id = 1,
+            .message = attestation_data,
+            .signature = types.ZERO_SIGBYTES,
+        } } },
+        aggregation,
+    };
+
+    var counting = CountingAllocator{ .child = allocator };
+    const counting_allocator = counting.allocator();
+
+    std.debug.print("gossip decode: messages={d} per topic and path\n", .{cmd.messages});
+    std.debug.print("{s:>12} {s:>8} {s:>12} {s:>14} {s:>16} {s:>14}\n", .{ "topic", "path", "raw_bytes", "msgs_per_sec", "allocs_per_msg", "kib_per_msg" });
+
+    for (&samples) |*sample| {
+        var topic = try sample.getLeanNetworkTopic(allocator, network_name);
+        defer topic.deinit();
+        const topic_str = try topic.encodeZ();
+        defer allocator.free(topic_str);
+
+        const serialized = try sample.serialize(allocator);
+        defer allocator.free(serialized);
+        const compressed = try snappyz.encode(allocator, serialized);
+        defer allocator.free(compressed);
+
+        inline for (.{ "heap", "scratch" }) |path| {
+            var decoder = networks.GossipDecoder.init(counting_allocator);
+            defer decoder.deinit();
+            counting.reset();
+
+            var timer = try std.time.Timer.start();
+            for (0..cmd.messages) |_| {
+                var message = if (comptime std.mem.eql(u8, path, "heap"))
+                    try decodeWithHeap(counting_allocator, topic_str.ptr, compressed)
+                else
+                    try decodeWithScratch(&decoder, topic_str.ptr, compressed);
+                message.deinit();
+            }
+            const elapsed_ns = timer.read();
+
+            std.debug.print("{s:>12} {s:>8} {d:>12} {d:>14.0} {d:>16.2} {d:>14.2}\n", .{
+                @tagName(std.meta.activeTag(sample.*)),
+                path,
+                serialized.len,
+                @as(f64, @floatFromInt(cmd.messages)) * std.time.ns_per_s / @as(f64, @floatFromInt(@max(elapsed_ns, 1))),
+                @as(f64, @floatFromInt(counting.allocations)) / @as(f64, @floatFromInt(cmd.messages)),
+                @as(f64, @floatFromInt(counting.requested_bytes)) / 1024 / @as(f64, @floatFromInt(cmd.messages)),
+            });
+        }
+    }
+}
@@ -0,0 +1,180 @@
+const std = @import("std");
+const Allocator = std.mem.Allocator;
+
+pub const HttpLoadCmd = struct {
+    targets: []const u8 = "127.0.0.1:9668/metrics,127.0.0.1:9667/lean/v0/health,127.0.0.1:9667/lean/v0/checkpoints/justified,127.0.0.1:9667/lean/v0/fork_choice",
+    connections: usize = 16,
+    requests: usize = 20_000,
+    @"keep-alive": bool = true,
+    help: bool = false,
+
+    pub const __shorts__ = .{
+        .targets = .t,
+        .connections = .c,
+        .requests = .n,
+        .help = .h,
+    };
+
+    pub const __messages__ = .{
+        .targets = "Comma separated host:port/path targets of a running node, loaded one after another",
+        .connections = "Number of concurrent client connections per target",
+        .requests = "Number of requests sent per target, spread over the connections",
+        .@"keep-alive" = "Reuse connections between requests, otherwise connect once per request",
+        .help = "Show help information for the http-load command",
+    };
+};
+
+const Target = struct {
+    address: std.net.Address,
+    host: []const u8,
+    path: []const u8,
+
+    fn parse(spec: []const u8) !Target {
+        const path_start = std.mem.indexOfScalar(u8, spec, '/') orelse return error.InvalidTarget;
+        const host_port = spec[0..path_start];
+        const colon = std.mem.lastIndexOfScalar(u8, host_port, ':') orelse return error.InvalidTarget;
+        const port = try std.fmt.parseInt(u16, host_port[colon + 1 ..], 10);
+        return .{
+            .address = try std.net.Address.parseIp(host_port[0..colon], port),
+            .host = host_port,
+            .path = spec[path_start..],
+        };
+    }
+};
+
+const Worker = struct {
+    target: Target,
+    keep_alive: bool,
+    latencies_ns: []u64,
+    failures: usize = 0,
+    response_bytes: u64 = 0,
+
+    fn run(self: *Worker, allocator: Allocator) void {
+        self.runRequests(allocator) catch |err| {
+            std.debug.print("http load worker against {s}{s} failed: {}\n", .{ self.target.host, self.target.path, err });
+            self.failures += 1;
+        };
+    }
+
+    fn runRequests(self: *Worker, allocator: Allocator) !void {
+        var request_buf: [512]u8 = undefined;
+        const request = try std.fmt.bufPrint(&request_buf, "GET {s} HTTP/1.1\r\nhost: {s}\r\nconnection: {s}\r\n\r\n", .{
+            self.target.path,
+            self.target.host,
+            if (self.keep_alive) "keep-alive" else "close",
+        });
+
+        var response: std.ArrayList(u8) = .empty;
+        defer response.deinit(allocator);
+        var stream: ?std.net.Stream = null;
+        defer if (stream) |s| s.close();
+
+        for (self.latencies_ns) |*latency_ns| {
+            var timer = try std.time.Timer.start();
+            if (stream == null) stream = try std.net.tcpConnectToAddress(self.target.address);
+            const conn = stream.?;
+
+            try conn.writeAll(request);
+            const status_ok = readResponse(allocator, conn, &response) catch |err| {
+                // the server closed a kept alive connection, reconnect for the next request
+                self.failures += 1;
+                conn.close();
+                stream = null;
+                if (err == error.EndOfStream) continue;
+                return err;
+            };
+            latency_ns.* = timer.read();
+            if (!status_ok) self.failures += 1;
+            self.response_bytes += response.items.len;
+
+            if (!self.keep_alive) {
+                conn.close();
+                stream = null;
+            }
+        }
+    }
+};
+
+/// Reads one content-length delimited response into `response`, returns whether it was a 2xx.
+fn readResponse(allocator: Allocator, stream: std.net.Stream, response: *std.ArrayList(u8)) !bool {
+    response.clearRetainingCapacity();
+    var head_end: ?usize = null;
+    var total_len: usize = std.math.maxInt(usize);
+    while (response.items.len < total_len) {
+        try response.ensureUnusedCapacity(allocator, 16 * 1024);
+        const n = try stream.read(response.unusedCapacitySlice());
+        if (n == 0) return error.EndOfStream;
+        response.items.len += n;
+
+        if (head_end == null) {
+            head_end = std.mem.indexOf(u8, response.items, "\r\n\r\n") orelse continue;
+            const head = response.items[0..head_end.?];
+            const length_start = (std.ascii.indexOfIgnoreCase(head, "content-length: ") orelse return error.MissingContentLength) + "content-length: ".len;
+            const length_end = std.mem.indexOfScalarPos(u8, head, length_start, '\r') orelse head.len;
+            total_len = head_end.? + 4 + try std.fmt.parseInt(usize, head[length_start..length_end], 10);
+        }
+    }
+    return std.mem.startsWith(u8, response.items, "HTTP/1.1 2");
+}
+
+fn percentile(sorted: []const u64, p: f64) f64 {
+    if (sorted.len == 0) return 0;
+    const idx: usize = @intFromFloat(@as(f64, @floatFromInt(sorted.len - 1)) * p);
+    return @as(f64, @floatFromInt(sorted[idx])) / std.time.ns_per_ms;
+}
+
+/// Loads each target of a running node with concurrent clients and reports requests per
+/// second and latency percentiles. Start a node with its api and metrics servers first,
+/// e.g. `zeam beam`, the defaults hit the default ports.
+pub fn runHttpLoad(allocator: Allocator, cmd: HttpLoadCmd) !void {
+    const connections = @max(cmd.connections, 1);
+    const per_connection = @max(cmd.requests / connections, 1);
+    std.debug.print("http load: connections={d} requests_per_connection={d} keep_alive={}\n", .{ connections, per_connection, cmd.@"keep-alive" });
+    std.debug.print("{s:<48} {s:>12} {s:>10} {s:>10} {s:>10} {s:>10} {s:>9}\n", .{ "target", "req_per_s", "p50_ms", "p99_ms", "max_ms", "kib_resp", "failures" });
+
+    var specs = std.mem.tokenizeScalar(u8, cmd.targets, ',');
+    while (specs.next()) |spec| {
+        const target = try Target.parse(spec);
+
+        const latencies_ns = try allocator.alloc(u64, connections * per_connection);
+        defer allocator.free(latencies_ns);
+        @memset(latencies_ns, 0);
+        const workers = try allocator.alloc(Worker, connections);
+        defer allocator.free(workers);
+        const threads = try allocator.alloc(std.Thread, connections);
+        defer allocator.free(threads);
+
+        var timer = try std.time.Timer.start();
+        for (workers, threads, 0..) |*worker, *thread, i| {
+            worker.* = .{
+                .target = target,
+                .keep_alive = cmd.@"keep-alive",
+                .latencies_ns = latencies_ns[i * per_connection .. (i + 1) * per_connection],
+            };
+            thread.* = try std.Thread.spawn(.{}, Worker.run, .{ worker, allocator });
+        }
+        for (threads) |thread| thread.join();
+        const elapsed_ns = timer.read();
+
+        var failures: usize = 0;
+        var response_bytes: u64 = 0;
+        for (workers) |worker| {
+            failures += worker.failures;
+            response_bytes += worker.response_bytes;
+        }
+        std.mem.sort(u64, latencies_ns, {}, std.sort.asc(u64));
+        // requests that never completed kept a zero latency and sort first
+        const first_done = std.mem.indexOfNone(u64, latencies_ns, &.{0}) orelse latencies_ns.len;
+        const done = latencies_ns[first_done..];
+
+        std.debug.print("{s:<48} {d:>12.0} {d:>10.3} {d:>10.3} {d:>10.3} {d:>10.1} {d:>9}\n", .{
+            spec,
+            @as(f64, @floatFromInt(done.len)) / (@as(f64, @floatFromInt(@max(elapsed_ns, 1))) / std.time.ns_per_s),
+            percentile(done, 0.50),
+            percentile(done, 0.99),
+            percentile(done, 1.0),
+            @as(f64, @floatFromInt(response_bytes)) / 1024 / @as(f64, @floatFromInt(@max(done.len, 1))),
+            failures,
+        });
+    }
+}
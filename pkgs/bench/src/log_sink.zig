@@ -0,0 +1,86 @@
+const std = @import("std");
+const Allocator = std.mem.Allocator;
+
+const zeam_utils = @import("@zeam/utils");
+
+pub const LogSinkCmd = struct {
+    threads: usize = 4,
+    lines: usize = 100_000,
+    @"data-dir": []const u8 = "/tmp/zeam-bench-log-sink",
+    help: bool = false,
+
+    pub const __shorts__ = .{
+        .threads = .t,
+        .lines = .n,
+        .@"data-dir" = .d,
+        .help = .h,
+    };
+
+    pub const __messages__ = .{
+        .threads = "Number of threads logging concurrently",
+        .lines = "Number of debug lines logged per thread",
+        .@"data-dir" = "Scratch directory the log files are written to and removed from",
+        .help = "Show help information for the log-sink command",
+    };
+};
+
+const Producer = struct {
+    logger: zeam_utils.ModuleLogger,
+    lines: usize,
+
+    fn run(self: *Producer) void {
+        for (0..self.lines) |i| {
+            self.logger.debug("processed attestation validator={d} slot={d} head=0x{x}", .{ i % 4096, i / 8, i *% 0x9e3779b97f4a7c15 });
+        }
+    }
+};
+
+/// Logs debug lines from concurrent threads into a debug level log file, once writing every
+/// line synchronously and once through the async log sink. `log_lines_per_s` is what the
+/// logging threads see, `total_lines_per_s` also waits for the sink to write everything out.
+pub fn runLogSink(allocator: Allocator, cmd: LogSinkCmd) !void {
+    try std.fs.cwd().makePath(cmd.@"data-dir");
+    defer std.fs.cwd().deleteTree(cmd.@"data-dir") catch {};
+    var data_dir = try std.fs.cwd().openDir(cmd.@"data-dir", .{});
+    defer data_dir.close();
+
+    const threads = @max(cmd.threads, 1);
+    const total_lines = threads * cmd.lines;
+    std.debug.print("log sink: threads={d} lines_per_thread={d}\n", .{ threads, cmd.lines });
+    std.debug.print("{s:>6} {s:>16} {s:>18} {s:>12} {s:>10}\n", .{ "mode", "log_lines_per_s", "total_lines_per_s", "dropped", "file_mib" });
+
+    inline for (.{ "sync", "async" }) |mode| {
+        var sink = try zeam_utils.LogSink.init(allocator, .{});
+        defer sink.deinit();
+        if (comptime std.mem.eql(u8, mode, "async")) try sink.start();
+
+        // the console only takes errors, every line goes to the log file
+        var logger_config = zeam_utils.getLoggerConfig(.err, .{ .fileActiveLevel = .debug, .filePath = cmd.@"data-dir", .fileName = mode, .monocolorFile = true });
+        defer logger_config.deinit();
+
+        const producers = try allocator.alloc(Producer, threads);
+        defer allocator.free(producers);
+        const handles = try allocator.alloc(std.Thread, threads);
+        defer allocator.free(handles);
+
+        var timer = try std.time.Timer.start();
+        for (producers, handles) |*producer, *handle| {
+            producer.* = .{ .logger = logger_config.logger(.chain), .lines = cmd.lines };
+            handle.* = try std.Thread.spawn(.{}, Producer.run, .{producer});
+        }
+        for (handles) |handle| handle.join();
+        const log_ns = timer.read();
+        sink.flush();
+        sink.stop();
+        const total_ns = timer.read();
+
+        const stat = try data_dir.statFile(mode ++ ".log");
+        std.debug.print("{s:>6} {d:>16.0} {d:>18.0} {d:>12} {d:>10.1}\n", .{
+            mode,
+            @as(f64, @floatFromInt(total_lines)) / (@as(f64, @floatFromInt(@max(log_ns, 1))) / std.time.ns_per_s),
+            @as(f64, @floatFromInt(total_lines)) / (@as(f64, @floatFromInt(@max(total_ns, 1))) / std.time.ns_per_s),
+            sink.droppedCount(.debug),
+            @as(f64, @floatFromInt(stat.size)) / (1024 * 1024),
+        });
+    }
+}
@@ -0,0 +1,156 @@
+const std = @import("std");
+const build_options = @import("build_options");
+const simargs = @import("simargs");
+
+const forkchoice_bench = @import("forkchoice.zig");
+const state_root_bench = @import("state_root.zig");
+const state_clone_bench = @import("state_clone.zig");
+const block_import_bench = @import("block_import.zig");
+const signatures_bench = @import("signatures.zig");
+const range_sync_bench = @import("range_sync.zig");
+const gossip_decode_bench = @import("gossip_decode.zig");
+const state_storage_bench = @import("state_storage.zig");
+const db_profiles_bench = @import("db_profiles.zig");
+const http_load_bench = @import("http_load.zig");
+const log_sink_bench = @import("log_sink.zig");
+
+const BenchArgs = struct {
+    help: bool = false,
+    version: bool = false,
+
+    __commands__: union(enum) {
+        @"forkchoice-rebase": forkchoice_bench.RebaseCmd,
+        @"forkchoice-aggregates": forkchoice_bench.AggregatesCmd,
+        @"state-root": state_root_bench.StateRootCmd,
+        @"state-clone": state_clone_bench.StateCloneCmd,
+        @"block-import-allocs": block_import_bench.BlockImportAllocsCmd,
+        @"signature-verify": signatures_bench.SignatureVerifyCmd,
+        @"range-sync": range_sync_bench.RangeSyncCmd,
+        @"gossip-decode": gossip_decode_bench.GossipDecodeCmd,
+        @"state-storage": state_storage_bench.StateStorageCmd,
+        @"db-profiles": db_profiles_bench.DbProfilesCmd,
+        @"http-load": http_load_bench.HttpLoadCmd,
+        @"log-sink": log_sink_bench.LogSinkCmd,
+
+        pub const __messages__ = .{
+            .@"forkchoice-rebase" = "Benchmark forkchoice rebase (finalization pruning) on large trees",
+            .@"forkchoice-aggregates" = "Benchmark storing block aggregated attestations in the forkchoice payload maps",
+            .@"state-root" = "Benchmark cached against uncached BeamState hash tree roots",
+            .@"state-clone" = "Benchmark BeamState.clone against the ssz round trip of sszClone",
+            .@"block-import-allocs" = "Count allocations per block import through the state transition at info log level",
+            .@"signature-verify" = "Benchmark block signature verification latency against attestations and verifier workers",
+            .@"range-sync" = "Benchmark catching up a slot gap with pipelined blocks_by_range requests over the mock network",
+            .@"gossip-decode" = "Benchmark gossip decode throughput and allocations per message for each gossip topic",
+            .@"state-storage" = "Benchmark database growth of full states per block against snapshots plus state diffs",
+            .@"db-profiles" = "Benchmark database read and write throughput and size on disk for each db profile",
+            .@"http-load" = "Load test the metrics and api endpoints of a running node, reporting requests/sec and p99 latency",
+            .@"log-sink" = "Benchmark debug logging throughput in lines/sec, written synchronously against through the async log sink",
+        };
+    },
+
+    pub const __shorts__ = .{
+        .help = .h,
+        .version = .v,
+    };
+
+    pub const __messages__ = .{
+        .help = "Show help information",
+        .version = "Show version information",
+    };
+};
+
+pub fn main() !void {
+    var gpa = std.heap.GeneralPurposeAllocator(.{}){};
+    defer _ = gpa.deinit();
+    const allocator = gpa.allocator();
+
+    const app_description = "Zeam Bench - Micro benchmarks for Beam Chain hot paths";
+    const app_version = build_options.version;
+
+    const opts = simargs.parse(allocator, BenchArgs, app_description, app_version) catch |err| switch (err) {
+        error.MissingSubCommand => {
+            std.debug.print("Error: Missing subcommand. Use --help for usage information.\n", .{});
+            std.process.exit(1);
+        },
+        else => {
+            std.debug.print("Error parsing arguments: {}. Use --help for usage information.\n", .{err});
+            std.process.exit(1);
+        },
+    };
+    defer opts.deinit();
+
+    switch (opts.args.__commands__) {
+        .@"forkchoice-rebase" => |cmd| {
+            forkchoice_bench.runRebase(allocator, cmd) catch |err| {
+                std.debug.print("Error running forkchoice rebase benchmark: {}\n", .{err});
+                std.process.exit(1);
+            };
+        },
+        .@"forkchoice-aggregates" => |cmd| {
+            forkchoice_bench.runAggregates(allocator, cmd) catch |err| {
+                std.debug.print("Error running forkchoice aggregates benchmark: {}\n", .{err});
+                std.process.exit(1);
+            };
+        },
+        .@"state-root" => |cmd| {
+            state_root_bench.runStateRoot(allocator, cmd) catch |err| {
+                std.debug.print("Error running state root benchmark: {}\n", .{err});
+                std.process.exit(1);
+            };
+        },
+        .@"state-clone" => |cmd| {
+            state_clone_bench.runStateClone(allocator, cmd) catch |err| {
+                std.debug.print("Error running state clone benchmark: {}\n", .{err});
+                std.process.exit(1);
+            };
+        },
+        .@"block-import-allocs" => |cmd| {
+            block_import_bench.runBlockImportAllocs(allocator, cmd) catch |err| {
+                std.debug.print("Error running block import allocations benchmark: {}\n", .{err});
+                std.process.exit(1);
+            };
+        },
+        .@"signature-verify" => |cmd| {
+            signatures_bench.runSignatureVerify(allocator, cmd) catch |err| {
+                std.debug.print("Error running signature verify benchmark: {}\n", .{err});
+                std.process.exit(1);
+            };
+        },
+        .@"range-sync" => |cmd| {
+            range_sync_bench.runRangeSync(allocator, cmd) catch |err| {
+                std.debug.print("Error running range sync benchmark: {}\n", .{err});
+                std.process.exit(1);
+            };
+        },
+        .@"gossip-decode" => |cmd| {
+            gossip_decode_bench.runGossipDecode(allocator, cmd) catch |err| {
+                std.debug.print("Error running gossip decode benchmark: {}\n", .{err});
+                std.process.exit(1);
+            };
+        },
+        .@"state-storage" => |cmd| {
+            state_storage_bench.runStateStorage(allocator, cmd) catch |err| {
+                std.debug.print("Error running state storage benchmark: {}\n", .{err});
+                std.process.exit(1);
+            };
+        },
+        .@"db-profiles" => |cmd| {
+            db_profiles_bench.runDbProfiles(allocator, cmd) catch |err| {
+                std.debug.print("Error running db profiles benchmark: {}\n", .{err});
+                std.process.exit(1);
+            };
+        },
+        .@"http-load" => |cmd| {
+            http_load_bench.runHttpLoad(allocator, cmd) catch |err| {
+                std.debug.print("Error running http load benchmark: {}\n", .{err});
+                std.process.exit(1);
+            };
+        },
+        .@"log-sink" => |cmd| {
+            log_sink_bench.runLogSink(allocator, cmd) catch |err| {
+                std.debug.print("Error running log sink benchmark: {}\n", .{err});
+                std.process.exit(1);
+            };
+        },
+    }
+}
@@ -0,0 +1,223 @@
+const std = @import("std");
+const Allocator = std.mem.Allocator;
+
+const types = @import("@zeam/types");
+const params = @import("@zeam/params");
+const zeam_utils = @import("@zeam/utils");
+const stf = @import("@zeam/state-transition");
+const networks = @import("@zeam/network");
+const node_lib = @import("@zeam/node");
+const xev = @import("xev");
+
+const RangeSync = node_lib.RangeSync;
+
+pub const RangeSyncCmd = struct {
+    slots: u64 = 10_000,
+    peers: usize = 4,
+    pipeline: []const u8 = "1,2,4,8,16",
+    @"batch-slots": u64 = node_lib.constants.RANGE_SYNC_BATCH_SLOTS,
+    help: bool = false,
+
+    pub const __shorts__ = .{
+        .slots = .s,
+        .peers = .p,
+        .pipeline = .d,
+        .@"batch-slots" = .b,
+        .help = .h,
+    };
+
+    pub const __messages__ = .{
+        .slots = "Number of slots the syncing node is behind its peers",
+        .peers = "Number of mock peers serving blocks_by_range",
+        .pipeline = "Comma separated maximum numbers of range sync batches in flight to benchmark",
+        .@"batch-slots" = "Slots requested per blocks_by_range request",
+        .help = "Show help information for the range-sync command",
+    };
+};
+
+/// Mock peer serving a block for every slot up to its head. The blocks are copies of one
+/// template block with the slot rewritten, the mock network clones every response anyway.
+const ServingPeer = struct {
+    template: *const types.SignedBlockWithAttestation,
+    head_slot: types.Slot,
+
+    const Self = @This();
+
+    fn onReqRespRequest(ptr: *anyopaque, request: *const networks.ReqRespRequest, stream: networks.ReqRespServerStream) anyerror!void {
+        const self: *Self = @ptrCast(@alignCast(ptr));
+        switch (request.*) {
+            .blocks_by_range => |range| {
+                const end_slot = @min(range.start_slot +| range.count, self.head_slot + 1);
+                var slot = range.start_slot;
+                while (slot < end_slot) : (slot += 1) {
+                    var block = self.template.*;
+                    block.message.block.slot = slot;
+                    const response = networks.ReqRespResponse{ .blocks_by_range = block };
+                    try stream.sendResponse(&response);
+                }
+                try stream.finish();
+            },
+            .blocks_by_root, .status => try stream.sendError(1, "unsupported"),
+        }
+    }
+
+    fn onPeerConnected(_: *anyopaque, _: []const u8, _: networks.PeerDirection) anyerror!void {}
+
+    fn onPeerDisconnected(_: *anyopaque, _: []const u8, _: networks.PeerDirection, _: networks.DisconnectionReason) anyerror!void {}
+};
+
+/// Syncing side driving `RangeSync` over the mock network. Batches are spread round robin over
+/// the peers and "imported" by counting their blocks in slot order.
+const SyncingPeer = struct {
+    allocator: Allocator,
+    backend: networks.NetworkInterface,
+    range_sync: RangeSync,
+    peers: std.ArrayList([]const u8) = .empty,
+    next_peer: usize = 0,
+    requests: usize = 0,
+    imported_blocks: u64 = 0,
+    failure: ?anyerror = null,
+
+    const Self = @This();
+
+    fn deinit(self: *Self) void {
+        for (self.peers.items) |peer_id| self.allocator.free(peer_id);
+        self.peers.deinit(self.allocator);
+        self.range_sync.deinit();
+    }
+
+    fn schedule(self: *Self) !void {
+        while (try self.range_sync.nextBatch()) |range| {
+            const peer_id = self.peers.items[self.next_peer % self.peers.items.len];
+            self.next_peer += 1;
+
+            const request = networks.ReqRespRequest{
+                .blocks_by_range = .{ .start_slot = range.start_slot, .count = range.count },
+            };
+            const request_id = try self.backend.reqresp.sendRequest(peer_id, &request, .{
+                .ptr = self,
+                .onReqRespResponseCb = onReqRespResponse,
+            });
+            try self.range_sync.setBatchRequest(range.start_slot, peer_id, request_id);
+            self.requests += 1;
+        }
+    }
+
+    fn handleResponse(self: *Self, event: *const networks.ReqRespResponseEvent) !void {
+        switch (event.payload) {
+            .success => |response| switch (response) {
+                .blocks_by_range => |signed_block| {
+                    _ = try self.range_sync.onBlock(event.request_id, &signed_block);
+                },
+                .blocks_by_root, .status => return error.UnexpectedResponse,
+            },
+            .failure => |err_payload| {
+                std.debug.print("range request_id={d} failed: {s}\n", .{ event.request_id, err_payload.message });
+                if (self.range_sync.onRequestFailed(event.request_id) == .aborted) return error.RangeSyncAborted;
+                try self.schedule();
+            },
+            .completed => {
+                _ = self.range_sync.onRequestCompleted(event.request_id);
+                while (self.range_sync.popReadyBatch()) |ready_batch| {
+                    var batch = ready_batch;
+                    self.imported_blocks += batch.blocks.items.len;
+                    self.range_sync.onBatchImported(&batch);
+                }
+                try self.schedule();
+            },
+        }
+    }
+
+    fn onReqRespResponse(ptr: *anyopaque, event: *const networks.ReqRespResponseEvent) anyerror!void {
+        const self: *Self = @ptrCast(@alignCast(ptr));
+        if (self.failure != null) return;
+        self.handleResponse(event) catch |err| {
+            self.failure = err;
+        };
+    }
+
+    fn onReqRespRequest(_: *anyopaque, _: *const networks.ReqRespRequest, stream: networks.ReqRespServerStream) anyerror!void {
+        try stream.sendError(1, "unsupported");
+    }
+
+    fn onPeerConnected(ptr: *anyopaque, peer_id: []const u8, _: networks.PeerDirection) anyerror!void {
+        const self: *Self = @ptrCast(@alignCast(ptr));
+        try self.peers.append(self.allocator, try self.allocator.dupe(u8, peer_id));
+    }
+
+    fn onPeerDisconnected(_: *anyopaque, _: []const u8, _: networks.PeerDirection, _: networks.DisconnectionReason) anyerror!void {}
+};
+
+/// Measures how long a node needs to catch up a gap of `slots` blocks with range sync over the
+/// mock network, for each pipelining depth. The mock delivers every response after a 1ms timer,
+/// so a depth of one shows the cost of a request round trip per batch that pipelining hides.
+pub fn runRangeSync(allocator: Allocator, cmd: RangeSyncCmd) !void {
+    if (cmd.peers == 0 or cmd.slots == 0) return error.InvalidArguments;
+    if (cmd.@"batch-slots" == 0 or cmd.@"batch-slots" > params.MAX_REQUEST_BLOCKS) return error.InvalidBatchSlots;
+
+    var mock_chain = try stf.genMockChain(allocator, 2, null);
+    defer mock_chain.deinit(allocator);
+    defer mock_chain.genesis_state.deinit();
+    // the genesis block has an empty body, keeping the clone cost per served block low
+    const template = &mock_chain.blocks[0];
+
+    var logger_config = zeam_utils.getLoggerConfig(.warn, null);
+
+    std.debug.print("range sync: slots={d} peers={d} batch_slots={d}\n", .{ cmd.slots, cmd.peers, cmd.@"batch-slots" });
+    std.debug.print("{s:>8} {s:>10} {s:>12} {s:>14}\n", .{ "pipeline", "requests", "elapsed_ms", "blocks_per_s" });
+
+    var pipeline_it = std.mem.tokenizeScalar(u8, cmd.pipeline, ',');
+    while (pipeline_it.next()) |pipeline_str| {
+        const max_batches = try std.fmt.parseInt(usize, std.mem.trim(u8, pipeline_str, " "), 10);
+
+        var loop = try xev.Loop.init(.{});
+        defer loop.deinit();
+
+        var mock = try networks.Mock.init(allocator, &loop, logger_config.logger(.mock), null);
+        defer mock.deinit();
+
+        const servers = try allocator.alloc(ServingPeer, cmd.peers);
+        defer allocator.free(servers);
+        for (servers) |*server| {
+            server.* = .{ .template = template, .head_slot = cmd.slots };
+            const backend = mock.getNetworkInterface();
+            try backend.peers.subscribe(.{
+                .ptr = server,
+                .onPeerConnectedCb = ServingPeer.onPeerConnected,
+                .onPeerDisconnectedCb = ServingPeer.onPeerDisconnected,
+            });
+            try backend.reqresp.subscribe(.{ .ptr = server, .onReqRespRequestCb = ServingPeer.onReqRespRequest });
+        }
+
+        var client = SyncingPeer{
+            .allocator = allocator,
+            .backend = mock.getNetworkInterface(),
+            .range_sync = RangeSync.init(allocator, .{ .batch_slots = cmd.@"batch-slots", .max_batches = @max(max_batches, 1) }),
+        };
+        defer client.deinit();
+        try client.backend.peers.subscribe(.{
+            .ptr = &client,
+            .onPeerConnectedCb = SyncingPeer.onPeerConnected,
+            .onPeerDisconnectedCb = SyncingPeer.onPeerDisconnected,
+        });
+        try client.backend.reqresp.subscribe(.{ .ptr = &client, .onReqRespRequestCb = SyncingPeer.onReqRespRequest });
+        if (client.peers.items.len == 0) return error.NoPeersConnected;
+
+        var timer = try std.time.Timer.start();
+        client.range_sync.extendTarget(1, cmd.slots);
+        try client.schedule();
+        try loop.run(.until_done);
+        const elapsed_ns = timer.read();
+
+        if (client.failure) |err| return err;
+        if (client.range_sync.isActive() or client.imported_blocks != cmd.slots) return error.RangeSyncIncomplete;
+
+        const elapsed_s = @as(f64, @floatFromInt(elapsed_ns)) / std.time.ns_per_s;
+        std.debug.print("{d:>8} {d:>10} {d:>12.1} {d:>14.0}\n", .{
+            max_batches,
+            client.requests,
+            @as(f64, @floatFromInt(elapsed_ns)) / std.time.ns_per_ms,
+            @as(f64, @floatFromInt(client.imported_blocks)) / elapsed_s,
+        });
+    }
+}
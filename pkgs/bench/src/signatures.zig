@@ -0,0 +1,95 @@
+const std = @import("std");
+const Allocator = std.mem.Allocator;
+
+const types = @import("@zeam/types");
+const xmss = @import("@zeam/xmss");
+const stf = @import("@zeam/state-transition");
+const node_lib = @import("@zeam/node");
+
+const SignatureVerifier = node_lib.SignatureVerifier;
+
+pub const SignatureVerifyCmd = struct {
+    attestations: []const u8 = "1,4,16,64",
+    workers: []const u8 = "0,2,4,8",
+    iterations: usize = 3,
+    help: bool = false,
+
+    pub const __shorts__ = .{
+        .attestations = .a,
+        .workers = .w,
+        .iterations = .n,
+        .help = .h,
+    };
+
+    pub const __messages__ = .{
+        .attestations = "Comma separated number of aggregated attestations per block to benchmark",
+        .workers = "Comma separated verifier worker counts to benchmark, 0 verifies on the calling thread",
+        .iterations = "Number of block verifications per configuration",
+        .help = "Show help information for the signature-verify command",
+    };
+};
+
+/// Measures block signature verification latency against the number of aggregated
+/// attestations in the block, for each verifier worker count. Blocks are synthesized by
+/// repeating a valid aggregated attestation of a mock chain block, every copy costs a full
+/// proof verification.
+pub fn runSignatureVerify(allocator: Allocator, cmd: SignatureVerifyCmd) !void {
+    var mock_chain = try stf.genMockChain(allocator, 4, null);
+    defer mock_chain.deinit(allocator);
+    defer mock_chain.genesis_state.deinit();
+
+    const source_block = for (mock_chain.blocks[1..]) |*signed_block| {
+        if (signed_block.message.block.body.attestations.len() > 0) break signed_block;
+    } else return error.NoAttestationsInMockChain;
+    const source_attestation = source_block.message.block.body.attestations.constSlice()[0];
+    const source_proof = source_block.signature.attestation_signatures.constSlice()[0];
+
+    var pubkey_cache = xmss.PublicKeyCache.init(allocator);
+    defer pubkey_cache.deinit();
+
+    std.debug.print("signature verify: iterations={d}\n", .{cmd.iterations});
+    std.debug.print("{s:>12} {s:>8} {s:>12} {s:>12}\n", .{ "attestations", "workers", "min_ms", "avg_ms" });
+
+    var attestations_it = std.mem.tokenizeScalar(u8, cmd.attestations, ',');
+    while (attestations_it.next()) |count_str| {
+        const num_attestations = try std.fmt.parseInt(usize, std.mem.trim(u8, count_str, " "), 10);
+
+        // shallow copies share the source lists, so only the outer lists are freed
+        var block = source_block.*;
+        block.message.block.body.attestations = try types.AggregatedAttestations.init(allocator);
+        defer block.message.block.body.attestations.deinit();
+        block.signature.attestation_signatures = try types.AttestationSignatures.init(allocator);
+        defer block.signature.attestation_signatures.deinit();
+        for (0..num_attestations) |_| {
+            try block.message.block.body.attestations.append(source_attestation);
+            try block.signature.attestation_signatures.append(source_proof);
+        }
+
+        var workers_it = std.mem.tokenizeScalar(u8, cmd.workers, ',');
+        while (workers_it.next()) |workers_str| {
+            const num_workers = try std.fmt.parseInt(usize, std.mem.trim(u8, workers_str, " "), 10);
+
+            var verifier: SignatureVerifier = undefined;
+            try verifier.init(allocator, num_workers);
+            defer verifier.deinit();
+
+            var min_ns: u64 = std.math.maxInt(u64);
+            var total_ns: u64 = 0;
+            const iterations = @max(cmd.iterations, 1);
+            for (0..iterations) |_| {
+                var timer = try std.time.Timer.start();
+                try verifier.verifyBlock(allocator, &mock_chain.genesis_state, &block, &pubkey_cache);
+                const elapsed_ns = timer.read();
+                min_ns = @min(min_ns, elapsed_ns);
+                total_ns += elapsed_ns;
+            }
+
+            std.debug.print("{d:>12} {d:>8} {d:>12.3} {d:>12.3}\n", .{
+                num_attestations,
+                num_workers,
+                @as(f64, @floatFromInt(min_ns)) / std.time.ns_per_ms,
+                @as(f64, @floatFromInt(total_ns / iterations)) / std.time.ns_per_ms,
+            });
+        }
+    }
+}
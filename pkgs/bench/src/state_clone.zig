@@ -0,0 +1,84 @@
+const std = @import("std");
+const Allocator = std.mem.Allocator;
+
+const types = @import("@zeam/types");
+
+pub const StateCloneCmd = struct {
+    @"history-sizes": []const u8 = "1024,16384,65536,196608",
+    validators: usize = 1024,
+    iterations: usize = 16,
+    help: bool = false,
+
+    pub const __shorts__ = .{
+        .@"history-sizes" = .s,
+        .iterations = .n,
+        .help = .h,
+    };
+
+    pub const __messages__ = .{
+        .@"history-sizes" = "Comma separated historical_block_hashes lengths to benchmark",
+        .validators = "Number of validators in the benchmarked state",
+        .iterations = "Number of clones measured per size and method",
+        .help = "Show help information for the state-clone command",
+    };
+};
+
+fn benchRoot(idx: usize) types.Root {
+    var root = std.mem.zeroes(types.Root);
+    std.mem.writeInt(u64, root[0..8], @intCast(idx + 1), .little);
+    root[31] = 0x5e;
+    return root;
+}
+
+/// Compares BeamState.clone against the ssz serialize/deserialize round trip of sszClone on
+/// states of growing history, as the chain clones the parent state for every imported block.
+pub fn runStateClone(allocator: Allocator, cmd: StateCloneCmd) !void {
+    const pubkeys = try allocator.alloc(types.Bytes52, cmd.validators);
+    defer allocator.free(pubkeys);
+    for (pubkeys, 0..) |*pubkey, i| {
+        pubkey.* = std.mem.zeroes(types.Bytes52);
+        std.mem.writeInt(u64, pubkey[0..8], @intCast(i), .little);
+    }
+
+    std.debug.print("state clone: validators={d} iterations={d}\n", .{ cmd.validators, cmd.iterations });
+    std.debug.print("{s:>10} {s:>14} {s:>14} {s:>10}\n", .{ "history", "ssz_clone_ms", "clone_ms", "speedup" });
+
+    var sizes_it = std.mem.tokenizeScalar(u8, cmd.@"history-sizes", ',');
+    while (sizes_it.next()) |size_str| {
+        const history_len = try std.fmt.parseInt(usize, std.mem.trim(u8, size_str, " "), 10);
+
+        var state: types.BeamState = undefined;
+        try state.genGenesisState(allocator, .{ .genesis_time = 0, .validator_pubkeys = pubkeys });
+        defer state.deinit();
+        for (0..history_len) |i| {
+            try state.historical_block_hashes.append(benchRoot(i));
+            try state.justified_slots.append(i % 3 == 0);
+        }
+
+        var ssz_clone_ns: u64 = 0;
+        var clone_ns: u64 = 0;
+        const iterations = @max(cmd.iterations, 1);
+        for (0..iterations) |_| {
+            var timer = try std.time.Timer.start();
+            var ssz_cloned: types.BeamState = undefined;
+            try types.sszClone(allocator, types.BeamState, state, &ssz_cloned);
+            ssz_clone_ns += timer.lap();
+            defer ssz_cloned.deinit();
+
+            timer.reset();
+            var cloned: types.BeamState = undefined;
+            try state.clone(allocator, &cloned);
+            clone_ns += timer.read();
+            defer cloned.deinit();
+
+            if (cloned.historical_block_hashes.len() != ssz_cloned.historical_block_hashes.len()) return error.StateCloneMismatch;
+        }
+
+        std.debug.print("{d:>10} {d:>14.3} {d:>14.3} {d:>9.1}x\n", .{
+            history_len,
+            @as(f64, @floatFromInt(ssz_clone_ns / iterations)) / std.time.ns_per_ms,
+            @as(f64, @floatFromInt(clone_ns / iterations)) / std.time.ns_per_ms,
+            @as(f64, @floatFromInt(ssz_clone_ns)) / @as(f64, @floatFromInt(@max(clone_ns, 1))),
+        });
+    }
+}
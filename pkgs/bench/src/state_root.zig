@@ -0,0 +1,87 @@
+const std = @import("std");
+const Allocator = std.mem.Allocator;
+
+const types = @import("@zeam/types");
+const zeam_utils = @import("@zeam/utils");
+
+pub const StateRootCmd = struct {
+    @"history-sizes": []const u8 = "1024,16384,65536,196608",
+    validators: usize = 1024,
+    iterations: usize = 16,
+    help: bool = false,
+
+    pub const __shorts__ = .{
+        .@"history-sizes" = .s,
+        .iterations = .n,
+        .help = .h,
+    };
+
+    pub const __messages__ = .{
+        .@"history-sizes" = "Comma separated historical_block_hashes lengths to benchmark",
+        .validators = "Number of validators in the benchmarked state",
+        .iterations = "Number of appended blocks (state roots) measured per size",
+        .help = "Show help information for the state-root command",
+    };
+};
+
+fn benchRoot(idx: usize) types.Root {
+    var root = std.mem.zeroes(types.Root);
+    std.mem.writeInt(u64, root[0..8], @intCast(idx + 1), .little);
+    root[31] = 0x5e;
+    return root;
+}
+
+/// Compares the full ssz hash tree root of a BeamState against BeamStateRootCache while the
+/// state grows by one historical block hash per iteration, as it does per imported block.
+pub fn runStateRoot(allocator: Allocator, cmd: StateRootCmd) !void {
+    const pubkeys = try allocator.alloc(types.Bytes52, cmd.validators);
+    defer allocator.free(pubkeys);
+    for (pubkeys, 0..) |*pubkey, i| {
+        pubkey.* = std.mem.zeroes(types.Bytes52);
+        std.mem.writeInt(u64, pubkey[0..8], @intCast(i), .little);
+    }
+
+    std.debug.print("state root: validators={d} iterations={d}\n", .{ cmd.validators, cmd.iterations });
+    std.debug.print("{s:>10} {s:>14} {s:>14} {s:>10}\n", .{ "history", "uncached_ms", "cached_ms", "speedup" });
+
+    var sizes_it = std.mem.tokenizeScalar(u8, cmd.@"history-sizes", ',');
+    while (sizes_it.next()) |size_str| {
+        const history_len = try std.fmt.parseInt(usize, std.mem.trim(u8, size_str, " "), 10);
+
+        var state: types.BeamState = undefined;
+        try state.genGenesisState(allocator, .{ .genesis_time = 0, .validator_pubkeys = pubkeys });
+        defer state.deinit();
+        for (0..history_len) |i| {
+            try state.historical_block_hashes.append(benchRoot(i));
+        }
+
+        var root_cache = types.BeamStateRootCache.init(allocator);
+        defer root_cache.deinit();
+        // warm the cache the way a running node has after its first block
+        var cached_root: types.Root = undefined;
+        try root_cache.hashTreeRoot(&state, &cached_root);
+
+        var uncached_ns: u64 = 0;
+        var cached_ns: u64 = 0;
+        const iterations = @max(cmd.iterations, 1);
+        for (0..iterations) |i| {
+            try state.historical_block_hashes.append(benchRoot(history_len + i));
+
+            var uncached_root: types.Root = undefined;
+            var timer = try std.time.Timer.start();
+            try zeam_utils.hashTreeRoot(types.BeamState, state, &uncached_root, allocator);
+            uncached_ns += timer.lap();
+            try root_cache.hashTreeRoot(&state, &cached_root);
+            cached_ns += timer.read();
+
+            if (!std.mem.eql(u8, &uncached_root, &cached_root)) return error.StateRootMismatch;
+        }
+
+        std.debug.print("{d:>10} {d:>14.3} {d:>14.3} {d:>9.1}x\n", .{
+            history_len,
+            @as(f64, @floatFromInt(uncached_ns / iterations)) / std.time.ns_per_ms,
+            @as(f64, @floatFromInt(cached_ns / iterations)) / std.time.ns_per_ms,
+            @as(f64, @floatFromInt(uncached_ns)) / @as(f64, @floatFromInt(@max(cached_ns, 1))),
+        });
+    }
+}
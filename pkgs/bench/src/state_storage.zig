@@ -0,0 +1,182 @@
+const std = @import("std");
+const Allocator = std.mem.Allocator;
+
+const ssz = @import("ssz");
+const types = @import("@zeam/types");
+const database = @import("@zeam/database");
+const zeam_utils = @import("@zeam/utils");
+
+pub const StateStorageCmd = struct {
+    slots: usize = 10_000,
+    validators: usize = 1024,
+    @"data-dir": []const u8 = "/tmp/zeam-bench-state-storage",
+    help: bool = false,
+
+    pub const __shorts__ = .{
+        .slots = .n,
+        .@"data-dir" = .d,
+        .help = .h,
+    };
+
+    pub const __messages__ = .{
+        .slots = "Number of slots, one block and post state each, written to the database",
+        .validators = "Number of validators in the stored states",
+        .@"data-dir" = "Scratch directory the benchmark databases are created in and removed from",
+        .help = "Show help information for the state-storage command",
+    };
+};
+
+// finalization advances by this many slots at once, shifting justified_slots the same way
+const finality_step: types.Slot = 32;
+
+fn benchRoot(idx: usize) types.Root {
+    var root = std.mem.zeroes(types.Root);
+    std.mem.writeInt(u64, root[0..8], @intCast(idx + 1), .little);
+    root[31] = 0x5d;
+    return root;
+}
+
+/// Advances `state` by one slot the way the state transition changes the stored fields: one
+/// historical block hash and justified slot bit appended, fresh justification votes, and
+/// periodic finalization that drops the front of justified_slots.
+fn advanceState(allocator: Allocator, state: *types.BeamState, slot: types.Slot) !void {
+    state.slot = slot;
+    state.latest_block_header.slot = slot;
+    state.latest_block_header.parent_root = benchRoot(@intCast(slot - 1));
+    try state.historical_block_hashes.append(benchRoot(@intCast(slot - 1)));
+    try state.justified_slots.append(slot % 3 == 0);
+
+    if (slot % finality_step == 0 and slot > finality_step) {
+        state.latest_finalized = .{ .root = benchRoot(@intCast(slot - finality_step)), .slot = slot - finality_step };
+        var shifted = try types.JustifiedSlots.init(allocator);
+        errdefer shifted.deinit();
+        const step: usize = @intCast(finality_step);
+        for (step..state.justified_slots.len()) |i| {
+            try shifted.append(try state.justified_slots.get(i));
+        }
+        state.justified_slots.deinit();
+        state.justified_slots = shifted;
+    }
+
+    state.justifications_roots.deinit();
+    state.justifications_roots = try types.JustificationRoots.init(allocator);
+    state.justifications_validators.deinit();
+    state.justifications_validators = try types.JustificationValidators.init(allocator);
+    for (0..2) |target| {
+        try state.justifications_roots.append(benchRoot(@as(usize, @intCast(slot)) + target));
+        for (0..state.validatorCount()) |i| {
+            try state.justifications_validators.append((i + target + @as(usize, @intCast(slot))) % 4 != 0);
+        }
+    }
+}
+
+/// Total size of the files below `dir`.
+pub fn dirSize(allocator: Allocator, dir: std.fs.Dir) !u64 {
+    var walker = try dir.walk(allocator);
+    defer walker.deinit();
+    var total: u64 = 0;
+    while (try walker.next()) |entry| {
+        if (entry.kind != .file) continue;
+        const stat = try entry.dir.statFile(entry.basename);
+        total += stat.size;
+    }
+    return total;
+}
+
+/// Writes the post state of every slot of a linear chain the way `BeamChain.updateBlockDb`
+/// does, once as a full state per block and once as snapshots plus diffs, and reports the
+/// bytes handed to RocksDB, the size on disk after a flush, and the cost of loading the head
+/// state back. `vs_full` is the write volume relative to full states per block.
+pub fn runStateStorage(allocator: Allocator, cmd: StateStorageCmd) !void {
+    const pubkeys = try allocator.alloc(types.Bytes52, cmd.validators);
+    defer allocator.free(pubkeys);
+    for (pubkeys, 0..) |*pubkey, i| {
+        pubkey.* = std.mem.zeroes(types.Bytes52);
+        std.mem.writeInt(u64, pubkey[0..8], @intCast(i), .little);
+    }
+
+    var logger_config = zeam_utils.getLoggerConfig(.warn, null);
+    const module_logger = logger_config.logger(.database);
+
+    try std.fs.cwd().makePath(cmd.@"data-dir");
+    defer std.fs.cwd().deleteTree(cmd.@"data-dir") catch {};
+
+    std.debug.print("state storage: slots={d} validators={d} snapshot_interval={d}\n", .{ cmd.slots, cmd.validators, database.STATE_SNAPSHOT_INTERVAL });
+    std.debug.print("{s:>6} {s:>12} {s:>12} {s:>12} {s:>10} {s:>12} {s:>12}\n", .{ "mode", "put_mib", "disk_mib", "kib_per_slot", "vs_full", "write_ms", "load_ms" });
+
+    var full_put_bytes: u64 = 0;
+    inline for (.{ "full", "diff" }) |mode| {
+        const db_path = try std.fs.path.join(allocator, &.{ cmd.@"data-dir", mode });
+        defer allocator.free(db_path);
+        var db = try database.Db.open(allocator, module_logger, db_path);
+        defer db.deinit();
+
+        var encoded: std.ArrayList(u8) = .empty;
+        defer encoded.deinit(allocator);
+
+        var prev: types.BeamState = undefined;
+        try prev.genGenesisState(allocator, .{ .genesis_time = 0, .validator_pubkeys = pubkeys });
+        defer prev.deinit();
+
+        var put_bytes: u64 = 0;
+        var timer = try std.time.Timer.start();
+        for (1..cmd.slots + 1) |i| {
+            const slot: types.Slot = @intCast(i);
+            var next: types.BeamState = undefined;
+            try types.sszClone(allocator, types.BeamState, prev, &next);
+            errdefer next.deinit();
+            try advanceState(allocator, &next, slot);
+
+            var batch = db.initWriteBatch();
+            defer batch.deinit();
+            encoded.clearRetainingCapacity();
+            // the genesis state is the anchor and is never in the database
+            if (comptime std.mem.eql(u8, mode, "diff")) {
+                if (slot > 1 and !database.isStateSnapshotSlot(prev.slot, slot)) {
+                    var diff: types.BeamStateDiff = undefined;
+                    try diff.compute(allocator, benchRoot(@intCast(slot - 1)), &prev, &next);
+                    defer diff.deinit();
+                    batch.putStateDiff(database.DbStateDiffsNamespace, benchRoot(@intCast(slot)), diff);
+                    try ssz.serialize(types.BeamStateDiff, diff, &encoded, allocator);
+                } else {
+                    batch.putState(database.DbStatesNamespace, benchRoot(@intCast(slot)), next);
+                    try ssz.serialize(types.BeamState, next, &encoded, allocator);
+                }
+            } else {
+                batch.putState(database.DbStatesNamespace, benchRoot(@intCast(slot)), next);
+                try ssz.serialize(types.BeamState, next, &encoded, allocator);
+            }
+            db.commit(&batch);
+            put_bytes += encoded.items.len;
+
+            prev.deinit();
+            prev = next;
+        }
+        try db.flush(database.DbStatesNamespace);
+        try db.flush(database.DbStateDiffsNamespace);
+        const write_ns = timer.lap();
+
+        // the head is the state furthest from its snapshot when the chain ends mid interval
+        var loaded = db.loadState(database.DbStatesNamespace, benchRoot(cmd.slots)) orelse return error.StateNotLoaded;
+        const load_ns = timer.read();
+        defer loaded.deinit();
+        if (loaded.slot != prev.slot or loaded.historical_block_hashes.len() != prev.historical_block_hashes.len()) {
+            return error.LoadedStateMismatch;
+        }
+
+        var data_dir = try std.fs.cwd().openDir(db_path, .{ .iterate = true });
+        defer data_dir.close();
+        const disk_bytes = try dirSize(allocator, data_dir);
+
+        if (comptime std.mem.eql(u8, mode, "full")) full_put_bytes = put_bytes;
+        std.debug.print("{s:>6} {d:>12.1} {d:>12.1} {d:>12.2} {d:>10.3} {d:>12.0} {d:>12.3}\n", .{
+            mode,
+            @as(f64, @floatFromInt(put_bytes)) / (1024 * 1024),
+            @as(f64, @floatFromInt(disk_bytes)) / (1024 * 1024),
+            @as(f64, @floatFromInt(put_bytes)) / 1024 / @as(f64, @floatFromInt(@max(cmd.slots, 1))),
+            @as(f64, @floatFromInt(put_bytes)) / @as(f64, @floatFromInt(@max(full_put_bytes, 1))),
+            @as(f64, @floatFromInt(write_ns)) / std.time.ns_per_ms,
+            @as(f64, @floatFromInt(load_ns)) / std.time.ns_per_ms,
+        });
+    }
+}
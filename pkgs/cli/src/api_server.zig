@@ -5,16 +5,30 @@ const event_broadcaster = api.event_broadcaster;
 const types = @import("@zeam/types");
 const ssz = @import("ssz");
 const utils_lib = @import("@zeam/utils");
+const zeam_metrics = @import("@zeam/metrics");
 const LoggerConfig = utils_lib.ZeamLoggerConfig;
 const ModuleLogger = utils_lib.ModuleLogger;
 const node_lib = @import("@zeam/node");
 const BeamChain = node_lib.BeamChain;
+const http_loop = @import("http_loop.zig");
+const HttpLoop = http_loop.HttpLoop;
 
-const QUERY_SLOTS_PREFIX = "?slots=";
+const QUERY_SLOTS = "slots";
+const QUERY_SINCE = "since";
 const DEFAULT_MAX_SLOTS: usize = 50;
 const MAX_ALLOWED_SLOTS: usize = 200;
-const ACCEPT_POLL_NS: u64 = 50 * std.time.ns_per_ms;
 const STARTUP_POLL_NS: u64 = 1 * std.time.ns_per_ms;
+// SSE response head and greeting event, queued ahead of the chain events
+const SSE_PREAMBLE = "HTTP/1.1 200 OK\r\n" ++
+    "Content-Type: text/event-stream\r\n" ++
+    "Cache-Control: no-cache\r\n" ++
+    "Connection: keep-alive\r\n" ++
+    "Access-Control-Allow-Origin: *\r\n" ++
+    "Access-Control-Allow-Headers: Cache-Control\r\n" ++
+    "\r\n" ++
+    "event: connection\ndata: {\"status\":\"connected\"}\n\n";
+// threads answering the requests too slow for the loop thread, see OffloadedRequest
+const API_WORKER_THREADS: usize = 2;
 // Conservative defaults for a local metrics server.
 const MAX_SSE_CONNECTIONS: usize = 32;
 const MAX_GRAPH_INFLIGHT: usize = 2;
@@ -40,7 +54,10 @@ const StartupStatus = enum(u8) {
 pub fn startAPIServer(allocator: std.mem.Allocator, port: u16, logger_config: *LoggerConfig, chain: ?*BeamChain) !*ApiServer {
     // Initialize the global event broadcaster for SSE events
     // This is idempotent - safe to call even if already initialized elsewhere (e.g., node.zig)
-    try event_broadcaster.initGlobalBroadcaster(allocator);
+    try event_broadcaster.initGlobalBroadcaster(allocator, .{
+        .max_connections = MAX_SSE_CONNECTIONS,
+        .heartbeat_interval_ns = constants.SSE_HEARTBEAT_SECONDS * std.time.ns_per_s,
+    });
 
     var rate_limiter = try RateLimiter.init(allocator);
 
@@ -59,9 +76,10 @@ pub fn startAPIServer(allocator: std.mem.Allocator, port: u16, logger_config: *L
         .chain = std.atomic.Value(?*BeamChain).init(chain),
         .stopped = std.atomic.Value(bool).init(false),
         .startup_status = std.atomic.Value(StartupStatus).init(.pending),
-        .sse_active = 0,
         .graph_inflight = 0,
         .rate_limiter = rate_limiter,
+        .http_loop = undefined,
+        .workers = undefined,
         .thread = undefined,
     };
 
@@ -88,84 +106,106 @@ pub fn startAPIServer(allocator: std.mem.Allocator, port: u16, logger_config: *L
     return ctx;
 }
 
-fn routeConnection(connection: std.net.Server.Connection, allocator: std.mem.Allocator, ctx: *ApiServer) void {
-    const read_buffer = allocator.alloc(u8, 4096) catch {
-        ctx.logger.err("failed to allocate read buffer", .{});
-        return;
-    };
-    defer allocator.free(read_buffer);
-    const write_buffer = allocator.alloc(u8, 4096) catch {
-        ctx.logger.err("failed to allocate write buffer", .{});
-        return;
-    };
-    defer allocator.free(write_buffer);
-
-    var stream_reader = connection.stream.reader(read_buffer);
-    var stream_writer = connection.stream.writer(write_buffer);
-
-    var http_server = std.http.Server.init(stream_reader.interface(), &stream_writer.interface);
-    var request = http_server.receiveHead() catch |err| {
-        ctx.logger.warn("failed to receive HTTP head: {}", .{err});
-        connection.stream.close();
-        return;
-    };
+/// Routes one request read by the server's event loop. Cheap handlers respond on the loop
+/// thread, the ones serializing chain state are offloaded to the worker pool and `/events`
+/// is detached to the event broadcaster.
+fn routeExchange(ctx_ptr: *anyopaque, exchange: *http_loop.Exchange) void {
+    const ctx: *ApiServer = @ptrCast(@alignCast(ctx_ptr));
+    const request = exchange.request;
 
     if (std.mem.eql(u8, request.head.target, "/events")) {
-        if (!ctx.tryAcquireSSE()) {
+        const broadcaster = event_broadcaster.getGlobalBroadcaster() orelse {
+            _ = request.respond("Service Unavailable\n", .{ .status = .service_unavailable }) catch {};
+            return;
+        };
+        // Limit long-lived SSE connections, each one holds a socket and a frame queue.
+        if (!broadcaster.hasCapacity()) {
             _ = request.respond("Service Unavailable\n", .{ .status = .service_unavailable }) catch {};
-            connection.stream.close();
             return;
         }
-        _ = std.Thread.spawn(.{}, ApiServer.handleSSEConnection, .{ connection.stream, ctx }) catch |err| {
-            ctx.logger.warn("failed to spawn SSE handler: {}", .{err});
-            ctx.releaseSSE();
-            connection.stream.close();
+        const stream = exchange.detach();
+        broadcaster.addConnection(stream, SSE_PREAMBLE) catch |err| {
+            ctx.logger.warn("failed to subscribe SSE connection: {}", .{err});
+            stream.close();
         };
         return;
-    } else {
-        var arena = std.heap.ArenaAllocator.init(allocator);
-        defer arena.deinit();
-        const request_allocator = arena.allocator();
-
-        if (std.mem.eql(u8, request.head.target, "/lean/v0/health")) {
-            ctx.handleHealth(&request);
-        } else if (std.mem.eql(u8, request.head.target, "/lean/v0/states/finalized")) {
-            ctx.handleFinalizedCheckpointState(&request) catch |err| {
-                ctx.logger.warn("failed to handle finalized checkpoint state request: {}", .{err});
-                _ = request.respond("Internal Server Error\n", .{ .status = .internal_server_error }) catch {};
-            };
-        } else if (std.mem.eql(u8, request.head.target, "/lean/v0/checkpoints/justified")) {
-            ctx.handleJustifiedCheckpoint(&request) catch |err| {
-                ctx.logger.warn("failed to handle justified checkpoint request: {}", .{err});
-                _ = request.respond("Internal Server Error\n", .{ .status = .internal_server_error }) catch {};
-            };
-        } else if (std.mem.eql(u8, request.head.target, "/lean/v0/fork_choice")) {
-            ctx.handleForkChoice(&request, request_allocator) catch |err| {
-                ctx.logger.warn("failed to handle fork choice request: {}", .{err});
-                _ = request.respond("Internal Server Error\n", .{ .status = .internal_server_error }) catch {};
-            };
-        } else if (std.mem.startsWith(u8, request.head.target, "/api/forkchoice/graph")) {
-            const chain = ctx.getChain() orelse {
-                _ = request.respond("Service Unavailable: Chain not initialized\n", .{ .status = .service_unavailable }) catch {};
-                connection.stream.close();
-                return;
-            };
-            if (!ctx.rate_limiter.allow(connection.address) or !ctx.tryAcquireGraph()) {
-                _ = request.respond("Too Many Requests\n", .{ .status = .too_many_requests }) catch {};
-            } else {
-                defer ctx.releaseGraph();
-                handleForkChoiceGraph(&request, request_allocator, chain) catch |err| {
-                    ctx.logger.warn("fork choice graph request failed: {}", .{err});
-                    _ = request.respond("Internal Server Error\n", .{}) catch {};
-                };
-            }
+    }
+
+    if (std.mem.eql(u8, request.head.target, "/lean/v0/health")) {
+        ctx.handleHealth(request);
+    } else if (std.mem.eql(u8, request.head.target, "/lean/v0/states/finalized")) {
+        ctx.routeFinalizedCheckpointState(exchange);
+    } else if (std.mem.eql(u8, request.head.target, "/lean/v0/checkpoints/justified")) {
+        ctx.handleJustifiedCheckpoint(request) catch |err| {
+            ctx.logger.warn("failed to handle justified checkpoint request: {}", .{err});
+            _ = request.respond("Internal Server Error\n", .{ .status = .internal_server_error }) catch {};
+        };
+    } else if (std.mem.eql(u8, request.head.target, "/lean/v0/fork_choice")) {
+        _ = ctx.offload(exchange, .fork_choice, false);
+    } else if (std.mem.startsWith(u8, request.head.target, "/api/forkchoice/graph")) {
+        if (ctx.getChain() == null) {
+            _ = request.respond("Service Unavailable: Chain not initialized\n", .{ .status = .service_unavailable }) catch {};
+            return;
+        }
+        if (!ctx.rate_limiter.allow(exchange.address) or !ctx.tryAcquireGraph()) {
+            _ = request.respond("Too Many Requests\n", .{ .status = .too_many_requests }) catch {};
+        } else if (!ctx.offload(exchange, .forkchoice_graph, false)) {
+            ctx.releaseGraph();
+        }
+    } else if (std.mem.eql(u8, request.head.target, "/api/trace")) {
+        if (!ctx.rate_limiter.allow(exchange.address)) {
+            _ = request.respond("Too Many Requests\n", .{ .status = .too_many_requests }) catch {};
         } else {
-            _ = request.respond("Not Found\n", .{ .status = .not_found }) catch {};
+            _ = ctx.offload(exchange, .trace, false);
         }
+    } else {
+        _ = request.respond("Not Found\n", .{ .status = .not_found }) catch {};
     }
-    connection.stream.close();
 }
 
+/// Request answered on a worker thread. The request itself is gone once routing returns, so
+/// the job owns a copy of the target and of the headers its handler reads.
+const OffloadedRequest = struct {
+    server: *ApiServer,
+    response: http_loop.Deferred,
+    kind: Kind,
+    target: []u8,
+    accepts_snappy: bool,
+
+    const Kind = enum {
+        finalized_state,
+        fork_choice,
+        forkchoice_graph,
+        trace,
+    };
+
+    fn run(self: *OffloadedRequest) void {
+        const server = self.server;
+        defer {
+            server.allocator.free(self.target);
+            server.allocator.destroy(self);
+        }
+        // handlers only fail before responding, so the error response is the only one
+        var arena = std.heap.ArenaAllocator.init(server.allocator);
+        defer arena.deinit();
+        const allocator = arena.allocator();
+
+        const result = switch (self.kind) {
+            .finalized_state => server.handleFinalizedCheckpointState(self.response, self.accepts_snappy),
+            .fork_choice => server.handleForkChoice(self.response, allocator),
+            .forkchoice_graph => blk: {
+                defer server.releaseGraph();
+                break :blk handleForkChoiceGraph(self.response, self.target, allocator, server.getChain().?);
+            },
+            .trace => handleTrace(self.response, allocator),
+        };
+        result catch |err| {
+            server.logger.warn("failed to handle {s} request: {}", .{ @tagName(self.kind), err });
+            self.response.respond("Internal Server Error\n", .{ .status = .internal_server_error });
+        };
+    }
+};
+
 /// API server context
 pub const ApiServer = struct {
     allocator: std.mem.Allocator,
@@ -174,11 +214,11 @@ pub const ApiServer = struct {
     chain: std.atomic.Value(?*BeamChain),
     stopped: std.atomic.Value(bool),
     startup_status: std.atomic.Value(StartupStatus),
-    sse_active: usize,
     graph_inflight: usize,
     rate_limiter: RateLimiter,
-    sse_mutex: std.Thread.Mutex = .{},
     graph_mutex: std.Thread.Mutex = .{},
+    http_loop: HttpLoop,
+    workers: std.Thread.Pool,
     thread: std.Thread,
 
     const Self = @This();
@@ -187,6 +227,7 @@ pub const ApiServer = struct {
         // Use swap to atomically set stopped=true and check if already stopped
         // This prevents double-stop causing undefined behavior (double join/destroy)
         if (self.stopped.swap(true, .seq_cst)) return;
+        self.http_loop.stop();
         self.thread.join();
         self.rate_limiter.deinit();
         self.allocator.destroy(self);
@@ -206,39 +247,27 @@ pub const ApiServer = struct {
             self.startup_status.store(.failed, .release);
             return;
         };
-        var server = address.listen(.{ .reuse_address = true, .force_nonblocking = true }) catch |err| {
+        self.http_loop.init(self.allocator, self.logger, address, .{ .ctx = self, .handleFn = routeExchange }) catch |err| {
             self.logger.err("failed to listen on port {d}: {}", .{ self.port, err });
             self.startup_status.store(.failed, .release);
             return;
         };
-        defer server.deinit();
+        defer self.http_loop.deinit();
+        self.workers.init(.{ .allocator = self.allocator, .n_jobs = API_WORKER_THREADS }) catch |err| {
+            self.logger.err("failed to start API worker threads: {}", .{err});
+            self.startup_status.store(.failed, .release);
+            return;
+        };
+        // runs the queued requests to completion, before the loop holding their connections goes
+        defer self.workers.deinit();
 
         // Signal successful startup to the spawning thread
         self.startup_status.store(.success, .release);
         self.logger.info("API server listening on http://0.0.0.0:{d}", .{self.port});
 
-        while (true) {
-            if (self.stopped.load(.acquire)) break;
-            const connection = server.accept() catch |err| {
-                if (err == error.WouldBlock) {
-                    std.Thread.sleep(ACCEPT_POLL_NS);
-                    continue;
-                }
-                self.logger.warn("failed to accept connection: {}", .{err});
-                continue;
-            };
-
-            routeConnection(connection, self.allocator, self);
-        }
-
-        // Allow active SSE threads to drain before destroying context
-        while (blk: {
-            self.sse_mutex.lock();
-            defer self.sse_mutex.unlock();
-            break :blk self.sse_active != 0;
-        }) {
-            std.Thread.sleep(ACCEPT_POLL_NS);
-        }
+        self.http_loop.run() catch |err| {
+            self.logger.err("API server loop failed: {}", .{err});
+        };
     }
 
     /// Handle health check endpoint
@@ -251,45 +280,129 @@ pub const ApiServer = struct {
         }) catch {};
     }
 
+    /// Hands a slow request to the worker pool so the loop thread keeps answering the other
+    /// connections meanwhile. Returns false, after responding, if the job could not be queued.
+    fn offload(self: *Self, exchange: *http_loop.Exchange, kind: OffloadedRequest.Kind, accepts_snappy: bool) bool {
+        const job = self.allocator.create(OffloadedRequest) catch {
+            _ = exchange.request.respond("Service Unavailable\n", .{ .status = .service_unavailable }) catch {};
+            return false;
+        };
+        const target = self.allocator.dupe(u8, exchange.request.head.target) catch {
+            self.allocator.destroy(job);
+            _ = exchange.request.respond("Service Unavailable\n", .{ .status = .service_unavailable }) catch {};
+            return false;
+        };
+        job.* = .{
+            .server = self,
+            .response = exchange.deferResponse(),
+            .kind = kind,
+            .target = target,
+            .accepts_snappy = accepts_snappy,
+        };
+        self.workers.spawn(OffloadedRequest.run, .{job}) catch |err| {
+            self.logger.warn("failed to queue {s} request: {}", .{ @tagName(kind), err });
+            job.response.close();
+            self.allocator.free(target);
+            self.allocator.destroy(job);
+            return false;
+        };
+        return true;
+    }
+
     /// Handle finalized checkpoint state endpoint
     /// Serves the finalized checkpoint lean state (BeamState) as SSZ octet-stream at /lean/v0/states/finalized
-    fn handleFinalizedCheckpointState(self: *const Self, request: *std.http.Server.Request) !void {
+    /// The encoding is cached per finalized checkpoint, so only the first request after finalization
+    /// serializes the state, on a worker thread; later ones are answered on the loop thread from the
+    /// cached blob without touching chain state.
+    /// The finalized root is the ETag, and clients sending `accept-encoding: snappy` get the framed snappy variant.
+    fn routeFinalizedCheckpointState(self: *Self, exchange: *http_loop.Exchange) void {
+        const request = exchange.request;
         // Get the chain (may be null if API server started before chain initialization)
         const chain = self.getChain() orelse {
             _ = request.respond("Service Unavailable: Chain not initialized\n", .{ .status = .service_unavailable }) catch {};
             return;
         };
+        const cache = &chain.finalized_state_cache;
+
+        var if_none_match: ?[]const u8 = null;
+        var accepts_snappy = false;
+        var headers = request.iterateHeaders();
+        while (headers.next()) |header| {
+            if (std.ascii.eqlIgnoreCase(header.name, "if-none-match")) {
+                if_none_match = header.value;
+            } else if (std.ascii.eqlIgnoreCase(header.name, "accept-encoding")) {
+                accepts_snappy = acceptsEncoding(header.value, "snappy");
+            }
+        }
 
-        // Get finalized state from chain (chain handles its own locking internally)
-        const finalized_lean_state = chain.getFinalizedState() orelse {
-            _ = request.respond("Not Found: Finalized checkpoint lean state not available\n", .{ .status = .not_found }) catch {};
-            return;
-        };
+        const finalized = cache.finalizedCheckpoint();
+        const etag = node_lib.finalizedStateEtag(finalized);
+        if (if_none_match) |value| {
+            if (etagMatches(value, &etag)) {
+                _ = request.respond("", .{
+                    .status = .not_modified,
+                    .extra_headers = &.{.{ .name = "etag", .value = &etag }},
+                }) catch {};
+                return;
+            }
+        }
 
-        // Serialize lean state (BeamState) to SSZ
-        var ssz_output: std.ArrayList(u8) = .empty;
-        defer ssz_output.deinit(self.allocator);
+        if (cache.acquire()) |blob| {
+            const cached_body = if (accepts_snappy) blob.cachedSnappyBytes() else blob.ssz_bytes;
+            if (cached_body) |body| {
+                const blob_headers = finalizedStateHeaders(blob);
+                exchange.respondBorrowed(blobBody(blob, body), .{
+                    .extra_headers = blob_headers[0 .. if (accepts_snappy) blob_headers.len else blob_headers.len - 1],
+                }) catch |err| {
+                    self.logger.warn("failed to respond with finalized lean state: {}", .{err});
+                };
+                return;
+            }
+            blob.release();
+        }
+        _ = self.offload(exchange, .finalized_state, accepts_snappy);
+    }
 
-        ssz.serialize(types.BeamState, finalized_lean_state.*, &ssz_output, self.allocator) catch |err| {
-            self.logger.err("failed to serialize finalized lean state to SSZ: {}", .{err});
-            _ = request.respond("Internal Server Error: Serialization failed\n", .{ .status = .internal_server_error }) catch {};
+    /// Serializes, or compresses, the finalized state the loop thread found no cached encoding
+    /// of, and answers with the blob's bytes as they are in the cache.
+    fn handleFinalizedCheckpointState(self: *const Self, response: http_loop.Deferred, accepts_snappy: bool) !void {
+        const chain = self.getChain() orelse {
+            response.respond("Service Unavailable: Chain not initialized\n", .{ .status = .service_unavailable });
             return;
         };
-
-        // Format content-length header value
-        var content_length_buf: [32]u8 = undefined;
-        const content_length_str = try std.fmt.bufPrint(&content_length_buf, "{d}", .{ssz_output.items.len});
-
-        // Respond with lean state (BeamState) as SSZ octet-stream
-        _ = request.respond(ssz_output.items, .{
-            .extra_headers = &.{
-                .{ .name = "content-type", .value = "application/octet-stream" },
-                .{ .name = "content-length", .value = content_length_str },
-            },
-        }) catch |err| {
-            self.logger.warn("failed to respond with finalized lean state: {}", .{err});
-            return err;
+        const cache = &chain.finalized_state_cache;
+        // read before the state, put drops the blob if finalization moves on in between
+        const finalized = cache.finalizedCheckpoint();
+
+        const blob = cache.acquire() orelse blk: {
+            // Get finalized state from chain (chain handles its own locking internally)
+            const finalized_lean_state = chain.getFinalizedState() orelse {
+                response.respond("Not Found: Finalized checkpoint lean state not available\n", .{ .status = .not_found });
+                return;
+            };
+            break :blk cache.put(finalized, finalized_lean_state) catch |err| {
+                self.logger.err("failed to serialize finalized lean state to SSZ: {}", .{err});
+                response.respond("Internal Server Error: Serialization failed\n", .{ .status = .internal_server_error });
+                return;
+            };
         };
+
+        const body = if (accepts_snappy)
+            blob.snappyBytes() catch |err| {
+                blob.release();
+                self.logger.err("failed to snappy compress finalized lean state: {}", .{err});
+                response.respond("Internal Server Error: Compression failed\n", .{ .status = .internal_server_error });
+                return;
+            }
+        else
+            blob.ssz_bytes;
+
+        // Respond with lean state (BeamState) as SSZ octet-stream. The body is written to the
+        // socket straight from the cached blob, whose reference the response holds until then.
+        const blob_headers = finalizedStateHeaders(blob);
+        response.respondBorrowed(blobBody(blob, body), .{
+            .extra_headers = blob_headers[0 .. if (accepts_snappy) blob_headers.len else blob_headers.len - 1],
+        });
     }
 
     /// Handle justified checkpoint endpoint
@@ -327,15 +440,15 @@ pub const ApiServer = struct {
     /// Handle fork choice endpoint
     /// Returns full fork choice state as JSON at /lean/v0/fork_choice
     /// Includes head, justified, finalized checkpoints, safe target, and all proto nodes
-    fn handleForkChoice(self: *const Self, request: *std.http.Server.Request, allocator: std.mem.Allocator) !void {
+    fn handleForkChoice(self: *const Self, response: http_loop.Deferred, allocator: std.mem.Allocator) !void {
         const chain = self.getChain() orelse {
-            _ = request.respond("Service Unavailable: Chain not initialized\n", .{ .status = .service_unavailable }) catch {};
+            response.respond("Service Unavailable: Chain not initialized\n", .{ .status = .service_unavailable });
             return;
         };
 
         const snapshot = chain.forkChoice.snapshot(allocator) catch |err| {
             self.logger.err("failed to get fork choice snapshot: {}", .{err});
-            _ = request.respond("Internal Server Error: Snapshot failed\n", .{ .status = .internal_server_error }) catch {};
+            response.respond("Internal Server Error: Snapshot failed\n", .{ .status = .internal_server_error });
             return;
         };
         defer snapshot.deinit(allocator);
@@ -345,86 +458,15 @@ pub const ApiServer = struct {
 
         node_lib.tree_visualizer.buildForkChoiceJSON(snapshot, &json_output, allocator) catch |err| {
             self.logger.err("failed to build fork choice JSON: {}", .{err});
-            _ = request.respond("Internal Server Error: JSON serialization failed\n", .{ .status = .internal_server_error }) catch {};
+            response.respond("Internal Server Error: JSON serialization failed\n", .{ .status = .internal_server_error });
             return;
         };
 
-        _ = request.respond(json_output.items, .{
+        response.respond(json_output.items, .{
             .extra_headers = &.{
                 .{ .name = "content-type", .value = "application/json; charset=utf-8" },
             },
-        }) catch |err| {
-            self.logger.warn("failed to respond with fork choice: {}", .{err});
-            return err;
-        };
-    }
-
-    /// Handle SSE events endpoint
-    fn handleSSEEvents(self: *Self, stream: std.net.Stream) !void {
-        var registered = false;
-        errdefer if (!registered) stream.close();
-        // Set SSE headers manually by writing HTTP response
-        const sse_headers = "HTTP/1.1 200 OK\r\n" ++
-            "Content-Type: text/event-stream\r\n" ++
-            "Cache-Control: no-cache\r\n" ++
-            "Connection: keep-alive\r\n" ++
-            "Access-Control-Allow-Origin: *\r\n" ++
-            "Access-Control-Allow-Headers: Cache-Control\r\n" ++
-            "\r\n";
-
-        var write_buf: [4096]u8 = undefined;
-        var stream_writer = stream.writer(&write_buf);
-
-        // Send initial response with SSE headers
-        try stream_writer.interface.writeAll(sse_headers);
-        try stream_writer.interface.flush();
-
-        // Send initial connection event
-        const connection_event = "event: connection\ndata: {\"status\":\"connected\"}\n\n";
-        try stream_writer.interface.writeAll(connection_event);
-        try stream_writer.interface.flush();
-
-        // Register this connection with the global event broadcaster
-        const connection = try event_broadcaster.addGlobalConnection(stream);
-        registered = true;
-
-        // Keep the connection alive - the broadcaster will handle event streaming
-        // This thread will stay alive as long as the connection is active
-        while (true) {
-            if (self.stopped.load(.acquire)) break;
-            // Send periodic heartbeat to keep connection alive
-            const heartbeat = ": heartbeat\n\n";
-            connection.sendRaw(heartbeat) catch |err| {
-                self.logger.warn("SSE connection closed: {}", .{err});
-                break;
-            };
-
-            // Wait between SSE heartbeats
-            std.Thread.sleep(constants.SSE_HEARTBEAT_SECONDS * std.time.ns_per_s);
-        }
-    }
-
-    fn handleSSEConnection(stream: std.net.Stream, ctx: *Self) void {
-        ctx.handleSSEEvents(stream) catch |err| {
-            ctx.logger.warn("SSE connection failed: {}", .{err});
-        };
-        event_broadcaster.removeGlobalConnection(stream);
-        ctx.releaseSSE();
-    }
-
-    fn tryAcquireSSE(self: *Self) bool {
-        self.sse_mutex.lock();
-        defer self.sse_mutex.unlock();
-        // Limit long-lived SSE connections to avoid unbounded threads.
-        if (self.sse_active >= MAX_SSE_CONNECTIONS) return false;
-        self.sse_active += 1;
-        return true;
-    }
-
-    fn releaseSSE(self: *Self) void {
-        self.sse_mutex.lock();
-        defer self.sse_mutex.unlock();
-        if (self.sse_active > 0) self.sse_active -= 1;
+        });
     }
 
     fn tryAcquireGraph(self: *Self) bool {
@@ -443,19 +485,19 @@ pub const ApiServer = struct {
     }
 };
 
+/// Serves the forkchoice graph from the chain's graph cache, so polling at an unchanged
+/// forkchoice generation doesn't touch the forkchoice lock. `?since=<generation>` returns the
+/// nodes changed after that generation only, the generation of every response is sent in the
+/// `x-forkchoice-generation` header.
 fn handleForkChoiceGraph(
-    request: *std.http.Server.Request,
+    response: http_loop.Deferred,
+    target: []const u8,
     allocator: std.mem.Allocator,
     chain: *BeamChain,
 ) !void {
     var max_slots: usize = DEFAULT_MAX_SLOTS;
-    if (std.mem.indexOf(u8, request.head.target, QUERY_SLOTS_PREFIX)) |query_start| {
-        const slots_param = request.head.target[query_start + QUERY_SLOTS_PREFIX.len ..];
-        if (std.mem.indexOf(u8, slots_param, "&")) |end| {
-            max_slots = std.fmt.parseInt(usize, slots_param[0..end], 10) catch DEFAULT_MAX_SLOTS;
-        } else {
-            max_slots = std.fmt.parseInt(usize, slots_param, 10) catch DEFAULT_MAX_SLOTS;
-        }
+    if (queryParam(target, QUERY_SLOTS)) |slots_param| {
+        max_slots = std.fmt.parseInt(usize, slots_param, 10) catch DEFAULT_MAX_SLOTS;
     }
 
     if (max_slots > MAX_ALLOWED_SLOTS) max_slots = MAX_ALLOWED_SLOTS;
@@ -463,14 +505,75 @@ fn handleForkChoiceGraph(
     var graph_json: std.ArrayList(u8) = .empty;
     defer graph_json.deinit(allocator);
 
-    try node_lib.tree_visualizer.buildForkChoiceGraphJSON(&chain.forkChoice, &graph_json, max_slots, allocator);
+    const since: ?u64 = if (queryParam(target, QUERY_SINCE)) |since_param|
+        std.fmt.parseInt(u64, since_param, 10) catch {
+            response.respond("Bad Request: invalid since generation\n", .{ .status = .bad_request });
+            return;
+        }
+    else
+        null;
+    const generation = if (since) |since_generation|
+        try chain.forkchoice_graph.writeGraphDelta(&chain.forkChoice, max_slots, since_generation, &graph_json, allocator)
+    else
+        try chain.forkchoice_graph.writeGraph(&chain.forkChoice, max_slots, &graph_json, allocator);
+
+    var generation_buf: [20]u8 = undefined;
+    const generation_value = std.fmt.bufPrint(&generation_buf, "{d}", .{generation}) catch unreachable;
 
-    _ = request.respond(graph_json.items, .{
+    response.respond(graph_json.items, .{
         .extra_headers = &.{
             .{ .name = "content-type", .value = "application/json; charset=utf-8" },
             .{ .name = "access-control-allow-origin", .value = "*" },
+            .{ .name = "access-control-expose-headers", .value = "x-forkchoice-generation" },
+            .{ .name = "x-forkchoice-generation", .value = generation_value },
         },
-    }) catch {};
+    });
+}
+
+/// Dumps the spans recorded by the tracer as Chrome trace-event JSON, load the response
+/// in Perfetto or chrome://tracing.
+fn handleTrace(response: http_loop.Deferred, allocator: std.mem.Allocator) !void {
+    var trace_json: std.Io.Writer.Allocating = .init(allocator);
+    defer trace_json.deinit();
+    try zeam_metrics.tracing.writeChromeTrace(allocator, &trace_json.writer);
+
+    response.respond(trace_json.written(), .{
+        .extra_headers = &.{
+            .{ .name = "content-type", .value = "application/json; charset=utf-8" },
+            .{ .name = "access-control-allow-origin", .value = "*" },
+        },
+    });
+}
+
+/// Response headers of a finalized state blob, the last one only for the snappy encoding.
+fn finalizedStateHeaders(blob: *const node_lib.FinalizedStateBlob) [4]std.http.Header {
+    return .{
+        .{ .name = "content-type", .value = "application/octet-stream" },
+        .{ .name = "etag", .value = &blob.etag },
+        .{ .name = "vary", .value = "accept-encoding" },
+        .{ .name = "content-encoding", .value = "x-snappy-framed" },
+    };
+}
+
+/// Borrowed response body pointing into `blob`, the response takes over the blob reference.
+fn blobBody(blob: *node_lib.FinalizedStateBlob, bytes: []const u8) http_loop.BorrowedBody {
+    return .{ .bytes = bytes, .ctx = blob, .releaseFn = releaseBlob };
+}
+
+fn releaseBlob(ctx: *anyopaque) void {
+    const blob: *node_lib.FinalizedStateBlob = @ptrCast(@alignCast(ctx));
+    blob.release();
+}
+
+/// Value of the query parameter `name` in the request target, if present.
+fn queryParam(target: []const u8, name: []const u8) ?[]const u8 {
+    const query_start = std.mem.indexOfScalar(u8, target, '?') orelse return null;
+    var params = std.mem.splitScalar(u8, target[query_start + 1 ..], '&');
+    while (params.next()) |param| {
+        const eq = std.mem.indexOfScalar(u8, param, '=') orelse continue;
+        if (std.mem.eql(u8, param[0..eq], name)) return param[eq + 1 ..];
+    }
+    return null;
 }
 
 const RateLimitEntry = struct {
@@ -580,3 +683,54 @@ fn addrToKey(buf: []u8, addr: std.net.Address) ?[]const u8 {
         else => null,
     };
 }
+
+/// True if the `if-none-match` header value lists `etag` (weak tags compare equal) or is `*`.
+fn etagMatches(if_none_match: []const u8, etag: []const u8) bool {
+    var tags = std.mem.tokenizeAny(u8, if_none_match, ", \t");
+    while (tags.next()) |tag| {
+        if (std.mem.eql(u8, tag, "*")) return true;
+        const strong = if (std.mem.startsWith(u8, tag, "W/")) tag[2..] else tag;
+        if (std.mem.eql(u8, strong, etag)) return true;
+    }
+    return false;
+}
+
+/// True if the `accept-encoding` header value lists `encoding` without `q=0`.
+fn acceptsEncoding(accept_encoding: []const u8, encoding: []const u8) bool {
+    var entries = std.mem.splitScalar(u8, accept_encoding, ',');
+    while (entries.next()) |entry| {
+        var parts = std.mem.splitScalar(u8, entry, ';');
+        const name = std.mem.trim(u8, parts.first(), " \t");
+        if (!std.ascii.eqlIgnoreCase(name, encoding)) continue;
+        while (parts.next()) |param| {
+            const trimmed = std.mem.trim(u8, param, " \t");
+            if (std.mem.eql(u8, trimmed, "q=0") or std.mem.startsWith(u8, trimmed, "q=0.0")) {
+                if (std.mem.trimRight(u8, trimmed[3..], "0.").len == 0) return false;
+            }
+        }
+        return true;
+    }
+    return false;
+}
+
+test "finalized state conditional request and encoding negotiation" {
+    const etag = "\"0a0b\"";
+    try std.testing.expect(etagMatches("\"0a0b\"", etag));
+    try std.testing.expect(etagMatches("\"ffff\", W/\"0a0b\"", etag));
+    try std.testing.expect(etagMatches("*", etag));
+    try std.testing.expect(!etagMatches("\"ffff\"", etag));
+
+    try std.testing.expect(acceptsEncoding("gzip, snappy", "snappy"));
+    try std.testing.expect(acceptsEncoding("Snappy;q=0.5", "snappy"));
+    try std.testing.expect(!acceptsEncoding("snappy;q=0", "snappy"));
+    try std.testing.expect(!acceptsEncoding("snappy;q=0.00", "snappy"));
+    try std.testing.expect(!acceptsEncoding("gzip, identity", "snappy"));
+}
+
+test "query parameters of the forkchoice graph endpoint" {
+    try std.testing.expectEqualStrings("20", queryParam("/api/forkchoice/graph?slots=20", QUERY_SLOTS).?);
+    try std.testing.expectEqualStrings("7", queryParam("/api/forkchoice/graph?slots=20&since=7", QUERY_SINCE).?);
+    try std.testing.expectEqualStrings("20", queryParam("/api/forkchoice/graph?since=7&slots=20", QUERY_SLOTS).?);
+    try std.testing.expect(queryParam("/api/forkchoice/graph", QUERY_SLOTS) == null);
+    try std.testing.expect(queryParam("/api/forkchoice/graph?maxslots=20", QUERY_SLOTS) == null);
+}
@@ -24,5 +24,11 @@ pub const SSE_HEARTBEAT_SECONDS: u64 = 30;
 /// Default node key file path
 pub const DEFAULT_NODE_KEY: []const u8 = "./key";
 
+/// Upper bound on block signature verification workers when the node command does not set a count
+pub const DEFAULT_MAX_SIGNATURE_VERIFICATION_WORKERS: usize = 8;
+
 /// Maximum size (in bytes) for hash-sig key blobs (JSON or SSZ) ingested by the CLI
 pub const MAX_HASH_SIG_ENCODED_KEY_SIZE: usize = 128 * 1024 * 1024;
+
+/// Upper bound on a checkpoint state download when the server sends no content-length
+pub const MAX_CHECKPOINT_STATE_BYTES: usize = 1024 * 1024 * 1024;
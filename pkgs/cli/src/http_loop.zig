@@ -0,0 +1,710 @@
+const std = @import("std");
+const xev = @import("xev");
+const utils_lib = @import("@zeam/utils");
+const ModuleLogger = utils_lib.ModuleLogger;
+
+// request heads must fit the read buffer of their connection, longer ones are rejected
+const READ_BUFFER_SIZE: usize = 8 * 1024;
+// response buffers grown past this by a large body are released before pooling the connection
+const MAX_POOLED_RESPONSE_CAPACITY: usize = 256 * 1024;
+const MAX_CONNECTIONS: usize = 512;
+const MAX_POOLED_CONNECTIONS: usize = 64;
+const KEEP_ALIVE_TIMEOUT_MS: i64 = 30 * std.time.ms_per_s;
+const SWEEP_INTERVAL_MS: u64 = 1 * std.time.ms_per_s;
+const LISTEN_BACKLOG: u31 = 128;
+
+/// Response body the loop writes straight from memory owned elsewhere, e.g. a shared cache
+/// blob, instead of copying it into the connection's response buffer. `releaseFn` is called
+/// once the body is written or the connection is dropped.
+pub const BorrowedBody = struct {
+    bytes: []const u8,
+    ctx: *anyopaque,
+    releaseFn: *const fn (ctx: *anyopaque) void,
+
+    fn release(self: BorrowedBody) void {
+        self.releaseFn(self.ctx);
+    }
+};
+
+/// Options of the responses whose head the loop writes itself rather than std.http.Server.
+pub const ResponseOptions = struct {
+    status: std.http.Status = .ok,
+    extra_headers: []const std.http.Header = &.{},
+};
+
+fn writeHead(writer: *std.Io.Writer, keep_alive: bool, content_length: usize, options: ResponseOptions) std.Io.Writer.Error!void {
+    try writer.print("HTTP/1.1 {d} {s}\r\n", .{ @intFromEnum(options.status), options.status.phrase() orelse "" });
+    if (!keep_alive) try writer.writeAll("connection: close\r\n");
+    try writer.print("content-length: {d}\r\n", .{content_length});
+    for (options.extra_headers) |header| try writer.print("{s}: {s}\r\n", .{ header.name, header.value });
+    try writer.writeAll("\r\n");
+}
+
+/// One request head read by the loop and handed to the server's handler. The handler answers
+/// with `request.respond` or `respondBorrowed`, which buffer the response for the loop to
+/// write, hands the answer to another thread with `deferResponse`, or takes the connection
+/// out of the loop with `detach`.
+pub const Exchange = struct {
+    request: *std.http.Server.Request,
+    address: std.net.Address,
+    connection: *Connection,
+    detached: bool = false,
+    deferred: bool = false,
+
+    /// Responds with `body` written from where it lives once the head is sent. Takes over the
+    /// body reference even on error.
+    pub fn respondBorrowed(self: *Exchange, body: BorrowedBody, options: ResponseOptions) !void {
+        errdefer body.release();
+        try writeHead(self.request.server.out, self.connection.keep_alive, body.bytes.len, options);
+        self.connection.body = body;
+    }
+
+    /// Leaves the answer to another thread, e.g. a worker running a slow handler, so the loop
+    /// keeps serving other connections meanwhile. Nothing of `request` may be used after the
+    /// handler returns, the worker gets copies of what it needs.
+    pub fn deferResponse(self: *Exchange) Deferred {
+        self.deferred = true;
+        return .{ .connection = self.connection };
+    }
+
+    /// Hands the socket to the caller, e.g. a thread streaming server-sent events. The loop
+    /// forgets the connection without closing it and the socket is switched back to blocking.
+    pub fn detach(self: *Exchange) std.net.Stream {
+        self.detached = true;
+        const fd = self.connection.tcp.fd;
+        const nonblock: usize = @as(u32, @bitCast(std.posix.O{ .NONBLOCK = true }));
+        if (std.posix.fcntl(fd, std.posix.F.GETFL, 0)) |flags| {
+            _ = std.posix.fcntl(fd, std.posix.F.SETFL, flags & ~nonblock) catch {};
+        } else |_| {}
+        return .{ .handle = fd };
+    }
+};
+
+/// Exchange answered off the loop thread, exactly one of `respond`, `respondBorrowed` or
+/// `close` must be called. The response is built in a buffer the loop doesn't touch until the
+/// loop is woken up to write it.
+pub const Deferred = struct {
+    connection: *Connection,
+
+    pub fn respond(self: Deferred, content: []const u8, options: ResponseOptions) void {
+        self.finish(content, null, options);
+    }
+
+    /// Takes over the body reference.
+    pub fn respondBorrowed(self: Deferred, body: BorrowedBody, options: ResponseOptions) void {
+        self.finish("", body, options);
+    }
+
+    /// Drops the connection without a response, e.g. when the handler failed.
+    pub fn close(self: Deferred) void {
+        self.connection.deferred_response.clearRetainingCapacity();
+        self.connection.server.completeDeferred(self.connection);
+    }
+
+    fn finish(self: Deferred, content: []const u8, body: ?BorrowedBody, options: ResponseOptions) void {
+        const connection = self.connection;
+        const content_length = if (body) |borrowed| borrowed.bytes.len else content.len;
+
+        connection.deferred_response.clearRetainingCapacity();
+        var out = std.Io.Writer.Allocating.fromArrayList(connection.server.allocator, &connection.deferred_response);
+        const complete = blk: {
+            writeHead(&out.writer, connection.keep_alive, content_length, options) catch break :blk false;
+            out.writer.writeAll(content) catch break :blk false;
+            break :blk true;
+        };
+        connection.deferred_response = out.toArrayList();
+
+        if (complete) {
+            connection.body = body;
+        } else {
+            // an empty response makes the loop close the connection
+            connection.deferred_response.clearRetainingCapacity();
+            if (body) |borrowed| borrowed.release();
+        }
+        connection.server.completeDeferred(connection);
+    }
+};
+
+pub const Handler = struct {
+    ctx: *anyopaque,
+    handleFn: *const fn (ctx: *anyopaque, exchange: *Exchange) void,
+};
+
+/// Pooled per connection state. Buffers are kept across keep-alive requests and across
+/// connections through the pool, so a steady scrape load doesn't allocate per request.
+pub const Connection = struct {
+    server: *HttpLoop,
+    tcp: xev.TCP,
+    address: std.net.Address,
+    read_buffer: []u8,
+    // bytes of read_buffer received so far, the head being answered and pipelined requests
+    filled: usize,
+    head_len: usize,
+    response: std.ArrayList(u8),
+    // written after response, see BorrowedBody
+    body: ?BorrowedBody,
+    // response built off the loop thread for a deferred exchange, swapped into response once
+    // the loop picks it up
+    deferred_response: std.ArrayList(u8),
+    // next connection in HttpLoop.completed
+    next_completed: ?*Connection,
+    written: usize,
+    keep_alive: bool,
+    last_active_ms: i64,
+    // waiting for request bytes, the only state idle connections are shut down in
+    reading: bool,
+    shutdown_pending: bool,
+    closed: bool,
+    // index into HttpLoop.open
+    open_index: usize,
+    io_c: xev.Completion,
+    shutdown_c: xev.Completion,
+
+    const Self = @This();
+
+    fn startRead(self: *Self) void {
+        self.reading = true;
+        self.tcp.read(&self.server.loop, &self.io_c, .{ .slice = self.read_buffer[self.filled..] }, Self, self, onRead);
+    }
+
+    fn onRead(ud: ?*Self, _: *xev.Loop, _: *xev.Completion, _: xev.TCP, _: xev.ReadBuffer, r: xev.ReadError!usize) xev.CallbackAction {
+        const self = ud orelse return .disarm;
+        self.reading = false;
+        const n = r catch 0;
+        if (n == 0) {
+            self.close();
+            return .disarm;
+        }
+        self.filled += n;
+        self.last_active_ms = std.time.milliTimestamp();
+        self.processBuffered();
+        return .disarm;
+    }
+
+    /// Serves the next complete request head in the read buffer or reads more of it.
+    fn processBuffered(self: *Self) void {
+        const head_end = std.mem.indexOf(u8, self.read_buffer[0..self.filled], "\r\n\r\n") orelse {
+            if (self.filled == self.read_buffer.len) {
+                self.respondRaw("HTTP/1.1 431 Request Header Fields Too Large\r\ncontent-length: 0\r\nconnection: close\r\n\r\n");
+            } else {
+                self.startRead();
+            }
+            return;
+        };
+        self.head_len = head_end + 4;
+        self.serve();
+    }
+
+    fn serve(self: *Self) void {
+        const allocator = self.server.allocator;
+        var in = std.Io.Reader.fixed(self.read_buffer[0..self.head_len]);
+        var out = std.Io.Writer.Allocating.fromArrayList(allocator, &self.response);
+        var http_server = std.http.Server.init(&in, &out.writer);
+
+        var request = http_server.receiveHead() catch {
+            self.response = out.toArrayList();
+            self.respondRaw("HTTP/1.1 400 Bad Request\r\ncontent-length: 0\r\nconnection: close\r\n\r\n");
+            return;
+        };
+        // only bodyless requests are served, a body would be parsed as the next request
+        if ((request.head.content_length orelse 0) > 0 or request.head.transfer_encoding != .none) {
+            self.response = out.toArrayList();
+            self.respondRaw("HTTP/1.1 413 Content Too Large\r\ncontent-length: 0\r\nconnection: close\r\n\r\n");
+            return;
+        }
+        self.keep_alive = request.head.keep_alive and !self.server.stopping;
+
+        var exchange = Exchange{ .request = &request, .address = self.address, .connection = self };
+        self.server.handler.handleFn(self.server.handler.ctx, &exchange);
+        self.response = out.toArrayList();
+
+        if (exchange.detached) {
+            self.server.release(self);
+            return;
+        }
+        // the connection waits without reading until the deferred response is completed
+        if (exchange.deferred) return;
+        self.writeResponse();
+    }
+
+    /// Writes the deferred response completed by another thread, on the loop thread.
+    fn writeDeferred(self: *Self) void {
+        std.mem.swap(std.ArrayList(u8), &self.response, &self.deferred_response);
+        self.writeResponse();
+    }
+
+    fn writeResponse(self: *Self) void {
+        if (self.response.items.len == 0) {
+            // the handler failed before responding
+            self.close();
+            return;
+        }
+        self.written = 0;
+        self.startWrite();
+    }
+
+    /// Writes a fixed response and closes the connection after it.
+    fn respondRaw(self: *Self, response: []const u8) void {
+        self.keep_alive = false;
+        self.head_len = self.filled;
+        self.releaseBody();
+        self.response.clearRetainingCapacity();
+        self.response.appendSlice(self.server.allocator, response) catch {
+            self.close();
+            return;
+        };
+        self.written = 0;
+        self.startWrite();
+    }
+
+    fn responseLen(self: *const Self) usize {
+        return self.response.items.len + if (self.body) |body| body.bytes.len else 0;
+    }
+
+    fn startWrite(self: *Self) void {
+        const head_len = self.response.items.len;
+        const pending = if (self.written < head_len)
+            self.response.items[self.written..]
+        else
+            self.body.?.bytes[self.written - head_len ..];
+        self.tcp.write(&self.server.loop, &self.io_c, .{ .slice = pending }, Self, self, onWrite);
+    }
+
+    fn releaseBody(self: *Self) void {
+        if (self.body) |body| body.release();
+        self.body = null;
+    }
+
+    fn onWrite(ud: ?*Self, _: *xev.Loop, _: *xev.Completion, _: xev.TCP, _: xev.WriteBuffer, r: xev.WriteError!usize) xev.CallbackAction {
+        const self = ud orelse return .disarm;
+        const n = r catch {
+            self.close();
+            return .disarm;
+        };
+        self.written += n;
+        self.last_active_ms = std.time.milliTimestamp();
+        if (self.written < self.responseLen()) {
+            self.startWrite();
+            return .disarm;
+        }
+        self.releaseBody();
+
+        if (!self.keep_alive or self.server.stopping) {
+            self.close();
+            return .disarm;
+        }
+        // keep pipelined bytes behind the answered head for the next request
+        const rest = self.filled - self.head_len;
+        std.mem.copyForwards(u8, self.read_buffer[0..rest], self.read_buffer[self.head_len..self.filled]);
+        self.filled = rest;
+        self.head_len = 0;
+        self.response.clearRetainingCapacity();
+        self.processBuffered();
+        return .disarm;
+    }
+
+    /// Shuts an idle connection down, its pending read then completes and closes it.
+    fn shutdown(self: *Self) void {
+        if (self.shutdown_pending) return;
+        self.shutdown_pending = true;
+        self.tcp.shutdown(&self.server.loop, &self.shutdown_c, Self, self, onShutdown);
+    }
+
+    fn onShutdown(ud: ?*Self, _: *xev.Loop, _: *xev.Completion, _: xev.TCP, r: xev.ShutdownError!void) xev.CallbackAction {
+        const self = ud orelse return .disarm;
+        r catch {};
+        self.shutdown_pending = false;
+        if (self.closed) self.server.release(self);
+        return .disarm;
+    }
+
+    fn close(self: *Self) void {
+        self.tcp.close(&self.server.loop, &self.io_c, Self, self, onClose);
+    }
+
+    fn onClose(ud: ?*Self, _: *xev.Loop, _: *xev.Completion, _: xev.TCP, r: xev.CloseError!void) xev.CallbackAction {
+        const self = ud orelse return .disarm;
+        r catch {};
+        self.closed = true;
+        // the shutdown completion still references the connection
+        if (!self.shutdown_pending) self.server.release(self);
+        return .disarm;
+    }
+};
+
+/// HTTP/1.1 server on an xev loop. One thread serves every connection: reads, writes and
+/// accepts are completions on the loop, connections are kept alive between requests and
+/// closed after KEEP_ALIVE_TIMEOUT_MS idle, and connection state with its buffers is pooled.
+/// Handlers run on the loop thread and must not block, slow ones defer their response to a
+/// worker and long-lived streams are detached.
+pub const HttpLoop = struct {
+    allocator: std.mem.Allocator,
+    logger: ModuleLogger,
+    handler: Handler,
+    loop: xev.Loop,
+    listener: xev.TCP,
+    accept_c: xev.Completion,
+    stop_notifier: xev.Async,
+    stop_c: xev.Completion,
+    sweep_timer: xev.Timer,
+    sweep_c: xev.Completion,
+    // deferred responses completed by other threads, linked through Connection.next_completed
+    completed_mutex: std.Thread.Mutex,
+    completed: ?*Connection,
+    completed_notifier: xev.Async,
+    completed_c: xev.Completion,
+    open: std.ArrayList(*Connection),
+    pool: std.ArrayList(*Connection),
+    stopping: bool,
+
+    const Self = @This();
+
+    /// Binds `address` and prepares the loop, completions point into `self` so it may not move.
+    pub fn init(self: *Self, allocator: std.mem.Allocator, logger: ModuleLogger, address: std.net.Address, handler: Handler) !void {
+        var loop = try xev.Loop.init(.{});
+        errdefer loop.deinit();
+        const listener = try xev.TCP.init(address);
+        errdefer std.posix.close(listener.fd);
+        try listener.bind(address);
+        try listener.listen(LISTEN_BACKLOG);
+        var stop_notifier = try xev.Async.init();
+        errdefer stop_notifier.deinit();
+        var completed_notifier = try xev.Async.init();
+        errdefer completed_notifier.deinit();
+        const sweep_timer = try xev.Timer.init();
+
+        self.* = .{
+            .allocator = allocator,
+            .logger = logger,
+            .handler = handler,
+            .loop = loop,
+            .listener = listener,
+            .accept_c = undefined,
+            .stop_notifier = stop_notifier,
+            .stop_c = undefined,
+            .sweep_timer = sweep_timer,
+            .sweep_c = undefined,
+            .completed_mutex = .{},
+            .completed = null,
+            .completed_notifier = completed_notifier,
+            .completed_c = undefined,
+            .open = .empty,
+            .pool = .empty,
+            .stopping = false,
+        };
+    }
+
+    /// Deferred exchanges must all have been completed, their connections are still open.
+    pub fn deinit(self: *Self) void {
+        for (self.open.items) |connection| {
+            std.posix.close(connection.tcp.fd);
+            self.destroyConnection(connection);
+        }
+        self.open.deinit(self.allocator);
+        for (self.pool.items) |connection| self.destroyConnection(connection);
+        self.pool.deinit(self.allocator);
+        std.posix.close(self.listener.fd);
+        self.sweep_timer.deinit();
+        self.completed_notifier.deinit();
+        self.stop_notifier.deinit();
+        self.loop.deinit();
+    }
+
+    /// Port the listener is bound to, useful when binding port 0.
+    pub fn port(self: *const Self) !u16 {
+        var address: std.net.Address = undefined;
+        var len: std.posix.socklen_t = @sizeOf(std.net.Address);
+        try std.posix.getsockname(self.listener.fd, &address.any, &len);
+        return address.getPort();
+    }
+
+    /// Serves connections on the calling thread until `stop` is called.
+    pub fn run(self: *Self) !void {
+        self.listener.accept(&self.loop, &self.accept_c, Self, self, onAccept);
+        self.stop_notifier.wait(&self.loop, &self.stop_c, Self, self, onStop);
+        self.completed_notifier.wait(&self.loop, &self.completed_c, Self, self, onCompleted);
+        self.sweep_timer.run(&self.loop, &self.sweep_c, SWEEP_INTERVAL_MS, Self, self, onSweep);
+        try self.loop.run(.until_done);
+    }
+
+    /// Stops the loop, safe to call from any thread.
+    pub fn stop(self: *Self) void {
+        self.stop_notifier.notify() catch |err| {
+            self.logger.err("failed to notify http loop to stop: {}", .{err});
+        };
+    }
+
+    fn onStop(ud: ?*Self, loop: *xev.Loop, _: *xev.Completion, r: xev.Async.WaitError!void) xev.CallbackAction {
+        _ = r catch return .rearm;
+        const self = ud orelse return .disarm;
+        self.stopping = true;
+        loop.stop();
+        return .disarm;
+    }
+
+    /// Queues a connection whose deferred response is ready, safe to call from any thread.
+    fn completeDeferred(self: *Self, connection: *Connection) void {
+        {
+            self.completed_mutex.lock();
+            defer self.completed_mutex.unlock();
+            connection.next_completed = self.completed;
+            self.completed = connection;
+        }
+        // wakeups coalesce, every wakeup drains all completed connections
+        self.completed_notifier.notify() catch |err| {
+            self.logger.err("failed to notify http loop of a completed response: {}", .{err});
+        };
+    }
+
+    fn onCompleted(ud: ?*Self, _: *xev.Loop, _: *xev.Completion, r: xev.Async.WaitError!void) xev.CallbackAction {
+        _ = r catch return .rearm;
+        const self = ud orelse return .disarm;
+        var next = blk: {
+            self.completed_mutex.lock();
+            defer self.completed_mutex.unlock();
+            const completed = self.completed;
+            self.completed = null;
+            break :blk completed;
+        };
+        while (next) |connection| {
+            next = connection.next_completed;
+            connection.next_completed = null;
+            connection.writeDeferred();
+        }
+        return .rearm;
+    }
+
+    fn onAccept(ud: ?*Self, _: *xev.Loop, _: *xev.Completion, r: xev.AcceptError!xev.TCP) xev.CallbackAction {
+        const self = ud orelse return .disarm;
+        const tcp = r catch |err| {
+            self.logger.warn("failed to accept connection: {}", .{err});
+            return .rearm;
+        };
+        if (self.open.items.len >= MAX_CONNECTIONS) {
+            std.posix.close(tcp.fd);
+            return .rearm;
+        }
+        const connection = self.acquireConnection(tcp) catch |err| {
+            self.logger.warn("failed to set up connection: {}", .{err});
+            std.posix.close(tcp.fd);
+            return .rearm;
+        };
+        connection.startRead();
+        return .rearm;
+    }
+
+    fn onSweep(ud: ?*Self, loop: *xev.Loop, c: *xev.Completion, r: xev.Timer.RunError!void) xev.CallbackAction {
+        _ = r catch {};
+        const self = ud orelse return .disarm;
+        const now_ms = std.time.milliTimestamp();
+        for (self.open.items) |connection| {
+            if (connection.reading and now_ms - connection.last_active_ms > KEEP_ALIVE_TIMEOUT_MS) {
+                connection.shutdown();
+            }
+        }
+        self.sweep_timer.run(loop, c, SWEEP_INTERVAL_MS, Self, self, onSweep);
+        return .disarm;
+    }
+
+    fn acquireConnection(self: *Self, tcp: xev.TCP) !*Connection {
+        try self.open.ensureUnusedCapacity(self.allocator, 1);
+        const connection = self.pool.pop() orelse blk: {
+            const connection = try self.allocator.create(Connection);
+            errdefer self.allocator.destroy(connection);
+            connection.read_buffer = try self.allocator.alloc(u8, READ_BUFFER_SIZE);
+            connection.response = .empty;
+            connection.deferred_response = .empty;
+            break :blk connection;
+        };
+
+        var address: std.net.Address = undefined;
+        var address_len: std.posix.socklen_t = @sizeOf(std.net.Address);
+        std.posix.getpeername(tcp.fd, &address.any, &address_len) catch {
+            address = std.net.Address.initIp4(.{ 0, 0, 0, 0 }, 0);
+        };
+
+        connection.* = .{
+            .server = self,
+            .tcp = tcp,
+            .address = address,
+            .read_buffer = connection.read_buffer,
+            .filled = 0,
+            .head_len = 0,
+            .response = connection.response,
+            .body = null,
+            .deferred_response = connection.deferred_response,
+            .next_completed = null,
+            .written = 0,
+            .keep_alive = false,
+            .last_active_ms = std.time.milliTimestamp(),
+            .reading = false,
+            .shutdown_pending = false,
+            .closed = false,
+            .open_index = self.open.items.len,
+            .io_c = undefined,
+            .shutdown_c = undefined,
+        };
+        self.open.appendAssumeCapacity(connection);
+        return connection;
+    }
+
+    /// Takes a closed or detached connection off the open list and pools its buffers.
+    fn release(self: *Self, connection: *Connection) void {
+        const index = connection.open_index;
+        _ = self.open.swapRemove(index);
+        if (index < self.open.items.len) self.open.items[index].open_index = index;
+
+        if (self.pool.items.len >= MAX_POOLED_CONNECTIONS) {
+            self.destroyConnection(connection);
+            return;
+        }
+        connection.releaseBody();
+        for ([_]*std.ArrayList(u8){ &connection.response, &connection.deferred_response }) |response| {
+            response.clearRetainingCapacity();
+            if (response.capacity > MAX_POOLED_RESPONSE_CAPACITY) response.clearAndFree(self.allocator);
+        }
+        self.pool.append(self.allocator, connection) catch self.destroyConnection(connection);
+    }
+
+    fn destroyConnection(self: *Self, connection: *Connection) void {
+        connection.releaseBody();
+        self.allocator.free(connection.read_buffer);
+        connection.response.deinit(self.allocator);
+        connection.deferred_response.deinit(self.allocator);
+        self.allocator.destroy(connection);
+    }
+};
+
+const TestHandler = struct {
+    worker: ?std.Thread = null,
+    released: std.atomic.Value(u32) = std.atomic.Value(u32).init(0),
+
+    const borrowed_body = "borrowed body";
+
+    fn handle(ptr: *anyopaque, exchange: *Exchange) void {
+        const self: *TestHandler = @ptrCast(@alignCast(ptr));
+        if (std.mem.eql(u8, exchange.request.head.target, "/ping")) {
+            _ = exchange.request.respond("pong", .{}) catch {};
+        } else if (std.mem.eql(u8, exchange.request.head.target, "/deferred")) {
+            const deferred = exchange.deferResponse();
+            self.worker = std.Thread.spawn(.{}, respondLater, .{ self, deferred }) catch {
+                deferred.close();
+                return;
+            };
+        } else {
+            _ = exchange.request.respond("Not Found\n", .{ .status = .not_found }) catch {};
+        }
+    }
+
+    fn respondLater(self: *TestHandler, deferred: Deferred) void {
+        // the loop keeps serving while the worker is busy
+        std.Thread.sleep(20 * std.time.ns_per_ms);
+        deferred.respondBorrowed(.{ .bytes = borrowed_body, .ctx = self, .releaseFn = release }, .{
+            .extra_headers = &.{.{ .name = "content-type", .value = "text/plain" }},
+        });
+    }
+
+    fn release(ptr: *anyopaque) void {
+        const self: *TestHandler = @ptrCast(@alignCast(ptr));
+        _ = self.released.fetchAdd(1, .release);
+    }
+};
+
+/// Blocking keep-alive client reading content-length delimited responses.
+const TestClient = struct {
+    stream: std.net.Stream,
+    buffer: [1024]u8 = undefined,
+    filled: usize = 0,
+    consumed: usize = 0,
+
+    fn readResponse(self: *TestClient) ![]const u8 {
+        std.mem.copyForwards(u8, self.buffer[0 .. self.filled - self.consumed], self.buffer[self.consumed..self.filled]);
+        self.filled -= self.consumed;
+        self.consumed = 0;
+        while (true) {
+            if (std.mem.indexOf(u8, self.buffer[0..self.filled], "\r\n\r\n")) |head_end| {
+                const head = self.buffer[0..head_end];
+                const length_start = (std.ascii.indexOfIgnoreCase(head, "content-length: ") orelse return error.MissingContentLength) + "content-length: ".len;
+                const length_end = std.mem.indexOfScalarPos(u8, head, length_start, '\r') orelse head.len;
+                const content_length = try std.fmt.parseInt(usize, head[length_start..length_end], 10);
+                if (self.filled >= head_end + 4 + content_length) {
+                    self.consumed = head_end + 4 + content_length;
+                    return self.buffer[0..self.consumed];
+                }
+            }
+            const n = try self.stream.read(self.buffer[self.filled..]);
+            if (n == 0) return error.EndOfStream;
+            self.filled += n;
+        }
+    }
+};
+
+test "http loop serves pipelined keep-alive requests on one connection" {
+    const allocator = std.testing.allocator;
+    var logger_config = utils_lib.getTestLoggerConfig();
+
+    var handler = TestHandler{};
+    var http_loop: HttpLoop = undefined;
+    try http_loop.init(
+        allocator,
+        logger_config.logger(.metrics_server),
+        std.net.Address.initIp4(.{ 127, 0, 0, 1 }, 0),
+        .{ .ctx = &handler, .handleFn = TestHandler.handle },
+    );
+    defer http_loop.deinit();
+    const port = try http_loop.port();
+
+    const thread = try std.Thread.spawn(.{}, HttpLoop.run, .{&http_loop});
+    defer thread.join();
+    defer http_loop.stop();
+
+    var client = TestClient{ .stream = try std.net.tcpConnectToAddress(std.net.Address.initIp4(.{ 127, 0, 0, 1 }, port)) };
+    defer client.stream.close();
+
+    try client.stream.writeAll("GET /ping HTTP/1.1\r\nhost: localhost\r\n\r\n");
+    const first = try client.readResponse();
+    try std.testing.expect(std.mem.startsWith(u8, first, "HTTP/1.1 200"));
+    try std.testing.expect(std.mem.endsWith(u8, first, "pong"));
+
+    // two pipelined requests on the same kept alive connection, answered in order
+    try client.stream.writeAll("GET /missing HTTP/1.1\r\nhost: localhost\r\n\r\nGET /ping HTTP/1.1\r\nhost: localhost\r\n\r\n");
+    try std.testing.expect(std.mem.startsWith(u8, try client.readResponse(), "HTTP/1.1 404"));
+    const third = try client.readResponse();
+    try std.testing.expect(std.mem.startsWith(u8, third, "HTTP/1.1 200"));
+    try std.testing.expect(std.mem.endsWith(u8, third, "pong"));
+}
+
+test "http loop writes a deferred borrowed response before the requests pipelined behind it" {
+    const allocator = std.testing.allocator;
+    var logger_config = utils_lib.getTestLoggerConfig();
+
+    var handler = TestHandler{};
+    var http_loop: HttpLoop = undefined;
+    try http_loop.init(
+        allocator,
+        logger_config.logger(.metrics_server),
+        std.net.Address.initIp4(.{ 127, 0, 0, 1 }, 0),
+        .{ .ctx = &handler, .handleFn = TestHandler.handle },
+    );
+    defer http_loop.deinit();
+    const port = try http_loop.port();
+
+    const thread = try std.Thread.spawn(.{}, HttpLoop.run, .{&http_loop});
+    defer thread.join();
+    defer http_loop.stop();
+
+    var client = TestClient{ .stream = try std.net.tcpConnectToAddress(std.net.Address.initIp4(.{ 127, 0, 0, 1 }, port)) };
+    defer client.stream.close();
+
+    try client.stream.writeAll("GET /deferred HTTP/1.1\r\nhost: localhost\r\n\r\nGET /ping HTTP/1.1\r\nhost: localhost\r\n\r\n");
+    const deferred = try client.readResponse();
+    try std.testing.expect(std.mem.startsWith(u8, deferred, "HTTP/1.1 200 OK\r\n"));
+    try std.testing.expect(std.mem.indexOf(u8, deferred, "content-type: text/plain\r\n") != null);
+    try std.testing.expect(std.mem.endsWith(u8, deferred, TestHandler.borrowed_body));
+    const pong = try client.readResponse();
+    try std.testing.expect(std.mem.endsWith(u8, pong, "pong"));
+
+    handler.worker.?.join();
+    // the body reference is given back once written
+    try std.testing.expectEqual(@as(u32, 1), handler.released.load(.acquire));
+}
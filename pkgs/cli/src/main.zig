@@ -72,6 +72,9 @@ pub const NodeCommand = struct {
     @"checkpoint-sync-url": ?[]const u8 = null,
     @"is-aggregator": bool = false,
     @"attestation-committee-count": ?u64 = null,
+    @"signature-verification-workers": ?usize = null,
+    @"db-profile": database.DbProfile = .default,
+    @"db-write-buffer-mb": ?u64 = null,
 
     pub const __shorts__ = .{
         .help = .h,
@@ -93,6 +96,9 @@ pub const NodeCommand = struct {
         .@"checkpoint-sync-url" = "URL to fetch finalized checkpoint state from for checkpoint sync (e.g., http://localhost:5052/lean/v0/states/finalized)",
         .@"is-aggregator" = "Enable aggregator mode for committee signature aggregation",
         .@"attestation-committee-count" = "Number of attestation committees (subnets); overrides config.yaml ATTESTATION_COMMITTEE_COUNT",
+        .@"signature-verification-workers" = "Worker threads verifying block signatures in parallel, 0 verifies on the chain thread (defaults to the CPU count minus one, at most 8)",
+        .@"db-profile" = "RocksDB column family tuning: default (RocksDB defaults), balanced (compression and blob files per column family) or throughput (balanced with larger write buffers)",
+        .@"db-write-buffer-mb" = "Write buffer size in MiB of every column family, overrides the db profile",
         .help = "Show help information for the node command",
     };
 };
@@ -279,6 +285,14 @@ fn mainInner() !void {
 
     std.debug.print("opts={any} genesis={d}\n", .{ opts.args, genesis });
 
+    // Logger configs created from here on write through the async log sink, which also owns
+    // and rotates their log files. It is stopped last, after every logging thread is done.
+    var log_sink = try utils_lib.LogSink.init(allocator, .{});
+    defer log_sink.deinit();
+    log_sink.start() catch |err| {
+        std.debug.print("WARNING: failed to start the log sink, logging synchronously: {any}\n", .{err});
+    };
+
     switch (opts.args.__commands__) {
         .clock => {
             var loop = xev.Loop.init(.{}) catch |err| {
@@ -3,13 +3,16 @@ const api = @import("@zeam/api");
 const utils_lib = @import("@zeam/utils");
 const LoggerConfig = utils_lib.ZeamLoggerConfig;
 const ModuleLogger = utils_lib.ModuleLogger;
+const http_loop = @import("http_loop.zig");
+const HttpLoop = http_loop.HttpLoop;
 
-const ACCEPT_POLL_NS: u64 = 50 * std.time.ns_per_ms;
 const STARTUP_POLL_NS: u64 = 1 * std.time.ns_per_ms;
 
 /// Simple metrics server that only serves Prometheus metrics at /metrics endpoint.
 /// This is a lightweight server separate from the main API server.
 /// It has no rate limiting, SSE support, or chain dependency.
+/// Connections are served by an event loop with keep-alive, so a slow scraper doesn't hold
+/// up other ones.
 pub fn startMetricsServer(
     allocator: std.mem.Allocator,
     port: u16,
@@ -24,6 +27,8 @@ pub fn startMetricsServer(
         .logger = logger,
         .stopped = std.atomic.Value(bool).init(false),
         .startup_status = std.atomic.Value(StartupStatus).init(.pending),
+        .http_loop = undefined,
+        .metrics_buffer = .empty,
         .thread = undefined,
     };
 
@@ -62,6 +67,9 @@ pub const MetricsServer = struct {
     logger: ModuleLogger,
     stopped: std.atomic.Value(bool),
     startup_status: std.atomic.Value(StartupStatus),
+    http_loop: HttpLoop,
+    // scrape output buffer, only touched on the loop thread
+    metrics_buffer: std.ArrayList(u8),
     thread: std.Thread,
 
     const Self = @This();
@@ -70,7 +78,9 @@ pub const MetricsServer = struct {
         // Use swap to atomically set stopped=true and check if already stopped
         // This prevents double-stop causing undefined behavior (double join/destroy)
         if (self.stopped.swap(true, .seq_cst)) return;
+        self.http_loop.stop();
         self.thread.join();
+        self.metrics_buffer.deinit(self.allocator);
         self.allocator.destroy(self);
     }
 
@@ -80,66 +90,37 @@ pub const MetricsServer = struct {
             self.startup_status.store(.failed, .release);
             return;
         };
-        var server = address.listen(.{ .reuse_address = true, .force_nonblocking = true }) catch |err| {
+        self.http_loop.init(self.allocator, self.logger, address, .{ .ctx = self, .handleFn = handleExchange }) catch |err| {
             self.logger.err("failed to listen on port {d}: {}", .{ self.port, err });
             self.startup_status.store(.failed, .release);
             return;
         };
-        defer server.deinit();
+        defer self.http_loop.deinit();
 
         // Signal successful startup to the spawning thread
         self.startup_status.store(.success, .release);
         self.logger.info("Metrics server listening on http://0.0.0.0:{d}", .{self.port});
 
-        while (true) {
-            if (self.stopped.load(.acquire)) break;
-            const connection = server.accept() catch |err| {
-                if (err == error.WouldBlock) {
-                    std.Thread.sleep(ACCEPT_POLL_NS);
-                    continue;
-                }
-                self.logger.warn("failed to accept connection: {}", .{err});
-                continue;
-            };
-
-            self.handleConnection(connection);
-        }
-    }
-
-    fn handleConnection(self: *Self, connection: std.net.Server.Connection) void {
-        defer connection.stream.close();
-
-        const read_buffer = self.allocator.alloc(u8, 4096) catch {
-            self.logger.err("failed to allocate read buffer", .{});
-            return;
-        };
-        defer self.allocator.free(read_buffer);
-        const write_buffer = self.allocator.alloc(u8, 4096) catch {
-            self.logger.err("failed to allocate write buffer", .{});
-            return;
-        };
-        defer self.allocator.free(write_buffer);
-
-        var stream_reader = connection.stream.reader(read_buffer);
-        var stream_writer = connection.stream.writer(write_buffer);
-
-        var http_server = std.http.Server.init(stream_reader.interface(), &stream_writer.interface);
-        var request = http_server.receiveHead() catch |err| {
-            self.logger.warn("failed to receive HTTP head: {}", .{err});
-            return;
+        self.http_loop.run() catch |err| {
+            self.logger.err("metrics server loop failed: {}", .{err});
         };
+    }
 
-        if (std.mem.eql(u8, request.head.target, "/metrics")) {
-            self.handleMetrics(&request);
+    fn handleExchange(ctx: *anyopaque, exchange: *http_loop.Exchange) void {
+        const self: *Self = @ptrCast(@alignCast(ctx));
+        if (std.mem.eql(u8, exchange.request.head.target, "/metrics")) {
+            self.handleMetrics(exchange.request);
         } else {
-            _ = request.respond("Not Found\n", .{ .status = .not_found }) catch {};
+            _ = exchange.request.respond("Not Found\n", .{ .status = .not_found }) catch {};
         }
     }
 
     /// Handle metrics endpoint - returns Prometheus metrics
-    fn handleMetrics(self: *const Self, request: *std.http.Server.Request) void {
-        var allocating_writer: std.Io.Writer.Allocating = .init(self.allocator);
-        defer allocating_writer.deinit();
+    fn handleMetrics(self: *Self, request: *std.http.Server.Request) void {
+        // the exposition is rendered into the same buffer on every scrape
+        self.metrics_buffer.clearRetainingCapacity();
+        var allocating_writer = std.Io.Writer.Allocating.fromArrayList(self.allocator, &self.metrics_buffer);
+        defer self.metrics_buffer = allocating_writer.toArrayList();
 
         api.writeMetrics(&allocating_writer.writer) catch {
             _ = request.respond("Internal Server Error\n", .{}) catch {};
@@ -147,7 +128,7 @@ pub const MetricsServer = struct {
         };
 
         // Get the written data from the allocating writer
-        const written_data = allocating_writer.writer.buffer[0..allocating_writer.writer.end];
+        const written_data = allocating_writer.written();
 
         _ = request.respond(written_data, .{
             .extra_headers = &.{
@@ -28,6 +28,7 @@ const json = std.json;
 const utils = @import("@zeam/utils");
 const ssz = @import("ssz");
 const zeam_metrics = @import("@zeam/metrics");
+const constants = @import("constants.zig");
 const build_options = @import("build_options");
 
 // Structure to hold parsed ENR fields from validator-config.yaml
@@ -84,10 +85,12 @@ pub const NodeOptions = struct {
     local_priv_key: []const u8,
     logger_config: *LoggerConfig,
     database_path: []const u8,
+    database_options: database.DbOptions = .{},
     hash_sig_key_dir: []const u8,
     node_registry: *node_lib.NodeNameRegistry,
     checkpoint_sync_url: ?[]const u8 = null,
     attestation_committee_count: ?u64 = null,
+    signature_verification_workers: usize = 0,
 
     pub fn deinit(self: *NodeOptions, allocator: std.mem.Allocator) void {
         for (self.bootnodes) |b| allocator.free(b);
@@ -183,7 +186,7 @@ pub const Node = struct {
         self.clock = try Clock.init(allocator, chain_config.genesis.genesis_time, &self.loop);
         errdefer self.clock.deinit(allocator);
 
-        var db = try database.Db.open(allocator, options.logger_config.logger(.database), options.database_path);
+        var db = try database.Db.openWithOptions(allocator, options.logger_config.logger(.database), options.database_path, options.database_options);
         errdefer db.deinit();
 
         self.logger = options.logger_config.logger(.node);
@@ -198,11 +201,12 @@ pub const Node = struct {
             self.logger.info("checkpoint sync enabled, downloading state from: {s}", .{checkpoint_url});
 
             // Try checkpoint sync, fall back to database/genesis on failure
-            if (downloadCheckpointState(allocator, checkpoint_url, self.logger)) |downloaded_state| {
+            var checkpoint_state_root: types.Root = undefined;
+            if (downloadCheckpointState(allocator, checkpoint_url, self.logger, &checkpoint_state_root)) |downloaded_state| {
                 self.anchor_state.* = downloaded_state;
 
                 // Verify state against genesis config
-                if (verifyCheckpointState(allocator, self.anchor_state, &chain_config.genesis, self.logger)) {
+                if (verifyCheckpointState(allocator, self.anchor_state, &checkpoint_state_root, &chain_config.genesis, self.logger)) {
                     self.logger.info("checkpoint sync completed successfully, using state at slot {d} as anchor", .{self.anchor_state.slot});
                     checkpoint_sync_succeeded = true;
                 } else |verify_err| {
@@ -252,6 +256,7 @@ pub const Node = struct {
             .logger_config = options.logger_config,
             .node_registry = options.node_registry,
             .is_aggregator = options.is_aggregator,
+            .signature_verification_workers = options.signature_verification_workers,
         });
         errdefer self.beam_node.deinit();
 
@@ -574,6 +579,11 @@ pub fn buildStartOptions(
     opts.hash_sig_key_dir = hash_sig_key_dir;
     opts.checkpoint_sync_url = node_cmd.@"checkpoint-sync-url";
     opts.is_aggregator = node_cmd.@"is-aggregator";
+    opts.signature_verification_workers = node_cmd.@"signature-verification-workers" orelse defaultSignatureVerificationWorkers();
+    opts.database_options = .{
+        .profile = node_cmd.@"db-profile",
+        .write_buffer_mb = node_cmd.@"db-write-buffer-mb",
+    };
 
     // Resolve attestation_committee_count: CLI flag takes precedence over config.yaml.
     if (node_cmd.@"attestation-committee-count") |count| {
@@ -596,12 +606,21 @@ pub fn buildStartOptions(
     }
 }
 
-/// Downloads finalized checkpoint state from the given URL and deserializes it
-/// Returns the deserialized state. The caller is responsible for calling deinit on it.
+/// Leaves one core to the chain thread, which also works through the verification jobs while
+/// waiting on the workers.
+fn defaultSignatureVerificationWorkers() usize {
+    const cpu_count = std.Thread.getCpuCount() catch 1;
+    return @min(cpu_count -| 1, constants.DEFAULT_MAX_SIGNATURE_VERIFICATION_WORKERS);
+}
+
+/// Downloads finalized checkpoint state from the given URL, decoding it as the body streams in
+/// Returns the decoded state and sets `state_root` to its hash tree root. The caller is
+/// responsible for calling deinit on it.
 fn downloadCheckpointState(
     allocator: std.mem.Allocator,
     url: []const u8,
     logger: zeam_utils.ModuleLogger,
+    state_root: *types.Root,
 ) !types.BeamState {
     logger.info("downloading checkpoint state from: {s}", .{url});
 
@@ -638,47 +657,30 @@ fn downloadCheckpointState(
         return error.HttpError;
     }
 
-    // Read response body
-    var ssz_data: std.ArrayList(u8) = .empty;
-    errdefer ssz_data.deinit(allocator);
-
+    // Decode the state while it downloads, straight into `allocator` and hashing each field
+    // as soon as it is complete, instead of buffering the body and cloning it out of an arena
+    const max_size: usize = if (response.head.content_length) |len| @intCast(len) else constants.MAX_CHECKPOINT_STATE_BYTES;
     var transfer_buffer: [8192]u8 = undefined;
     const body_reader = response.reader(&transfer_buffer);
-    var buffer: [8192]u8 = undefined;
-    while (true) {
-        const bytes_read = body_reader.readSliceShort(&buffer) catch |err| {
-            logger.err("failed to read response body: {any}", .{err});
-            return error.ReadFailed;
-        };
-        if (bytes_read == 0) break;
-        try ssz_data.appendSlice(allocator, buffer[0..bytes_read]);
-    }
-
-    logger.info("downloaded checkpoint state: {d} bytes", .{ssz_data.items.len});
-
-    // Deserialize SSZ state
-    // Use arena allocator for deserialization as SSZ types may allocate
-    var arena = std.heap.ArenaAllocator.init(allocator);
-    defer arena.deinit();
 
     var checkpoint_state: types.BeamState = undefined;
-    try ssz.deserialize(types.BeamState, ssz_data.items, &checkpoint_state, arena.allocator());
-
-    logger.info("successfully deserialized checkpoint state at slot {d}", .{checkpoint_state.slot});
+    checkpoint_state.sszDecodeStream(allocator, body_reader, max_size, state_root) catch |err| {
+        logger.err("failed to decode checkpoint state from response body: {any}", .{err});
+        return err;
+    };
 
-    // Clone the state to move it out of the arena using the proper cloning function
-    var cloned_state: types.BeamState = undefined;
-    try types.sszClone(allocator, types.BeamState, checkpoint_state, &cloned_state);
+    logger.info("successfully decoded checkpoint state at slot {d} state_root=0x{x}", .{ checkpoint_state.slot, state_root });
 
-    return cloned_state;
+    return checkpoint_state;
 }
 
 /// Verifies checkpoint state against the genesis configuration
 /// Validates that the downloaded state is consistent with expected genesis parameters
-/// Also computes and logs the state root and block root
+/// Also logs the state root, computed while downloading, and the block root
 fn verifyCheckpointState(
     allocator: std.mem.Allocator,
     state: *const types.BeamState,
+    state_root: *const types.Root,
     genesis_spec: *const types.GenesisSpec,
     logger: zeam_utils.ModuleLogger,
 ) !void {
@@ -718,9 +720,10 @@ fn verifyCheckpointState(
         }
     }
 
-    // Generate state block header with correct state_root
-    // (latest_block_header.state_root is zero; genStateBlockHeader computes and sets it)
-    const state_block_header = try state.genStateBlockHeader(allocator);
+    // Same header genStateBlockHeader builds (latest_block_header.state_root is zero), without
+    // hashing the whole state a second time
+    var state_block_header = state.latest_block_header;
+    state_block_header.state_root = state_root.*;
 
     // Calculate the block root from the properly constructed block header
     var block_root: types.Root = undefined;
@@ -1351,6 +1354,73 @@ test "populateNodeNameRegistry" {
     try std.testing.expectEqualStrings("quadrivium_0", registry.getNodeNameFromPeerId("16Uiu2HAmQj1RDNAxopeeeCFPRr3zhJYmH6DEPHYKmxLViLahWcFE").name.?);
 }
 
+/// Local stand-in for a checkpoint sync provider, serves one request for the finalized state.
+const CheckpointStateServer = struct {
+    server: std.net.Server,
+    body: []const u8,
+
+    fn serveOnce(self: *CheckpointStateServer) void {
+        const connection = self.server.accept() catch return;
+        defer connection.stream.close();
+
+        var read_buffer: [4096]u8 = undefined;
+        var write_buffer: [4096]u8 = undefined;
+        var stream_reader = connection.stream.reader(&read_buffer);
+        var stream_writer = connection.stream.writer(&write_buffer);
+        var http_server = std.http.Server.init(stream_reader.interface(), &stream_writer.interface);
+        var request = http_server.receiveHead() catch return;
+
+        if (!std.mem.eql(u8, request.head.target, "/lean/v0/states/finalized")) {
+            _ = request.respond("Not Found\n", .{ .status = .not_found }) catch {};
+            return;
+        }
+        request.respond(self.body, .{
+            .extra_headers = &.{.{ .name = "content-type", .value = "application/octet-stream" }},
+        }) catch {};
+    }
+};
+
+test "downloadCheckpointState streams the finalized state from a local server" {
+    const allocator = std.testing.allocator;
+    var logger_config = zeam_utils.getTestLoggerConfig();
+    const logger = logger_config.logger(.node);
+
+    var pubkeys: [8]types.Bytes52 = undefined;
+    for (&pubkeys, 0..) |*pubkey, i| @memset(pubkey, @intCast(i + 1));
+    var state: types.BeamState = undefined;
+    try state.genGenesisState(allocator, .{ .genesis_time = 1234, .validator_pubkeys = &pubkeys });
+    defer state.deinit();
+
+    var encoded: std.ArrayList(u8) = .empty;
+    defer encoded.deinit(allocator);
+    try ssz.serialize(types.BeamState, state, &encoded, allocator);
+
+    const address = try std.net.Address.parseIp("127.0.0.1", 0);
+    var stand_in = CheckpointStateServer{
+        .server = try address.listen(.{ .reuse_address = true }),
+        .body = encoded.items,
+    };
+    defer stand_in.server.deinit();
+    const server_thread = try std.Thread.spawn(.{}, CheckpointStateServer.serveOnce, .{&stand_in});
+
+    const url = try std.fmt.allocPrint(allocator, "http://127.0.0.1:{d}/lean/v0/states/finalized", .{stand_in.server.listen_address.getPort()});
+    defer allocator.free(url);
+
+    var state_root: types.Root = undefined;
+    var downloaded = downloadCheckpointState(allocator, url, logger, &state_root) catch |err| {
+        server_thread.join();
+        return err;
+    };
+    defer downloaded.deinit();
+    server_thread.join();
+
+    var expected_root: types.Root = undefined;
+    try zeam_utils.hashTreeRoot(types.BeamState, state, &expected_root, allocator);
+    try std.testing.expectEqualSlices(u8, &expected_root, &state_root);
+    try std.testing.expectEqual(@as(u64, 1234), downloaded.config.genesis_time);
+    try std.testing.expectEqual(@as(usize, 8), downloaded.validators.len());
+}
+
 test "checkpoint-sync-url parameter is optional" {
     // Verify that the NodeCommand struct has checkpoint-sync-url as optional
     const node_cmd = NodeCommand{
@@ -11,6 +11,7 @@ pub const DbColumnNamespaces = [_]interface.ColumnNamespace{
     .{ .namespace = "checkpoints", .Key = []const u8, .Value = []const u8 },
     .{ .namespace = "finalized_slots", .Key = []const u8, .Value = []const u8 },
     .{ .namespace = "unfinalized_slots", .Key = []const u8, .Value = []const u8 },
+    .{ .namespace = "state_diffs", .Key = []const u8, .Value = []const u8 },
 };
 
 pub const DbDefaultNamespace = DbColumnNamespaces[0];
@@ -21,4 +22,5 @@ pub const DbCheckpointsNamespace = DbColumnNamespaces[4];
 pub const DbFinalizedSlotsNamespace = DbColumnNamespaces[5];
 // TODO: uncomment this code if there is a need of slot to unfinalized index
 // pub const DbUnfinalizedSlotsNamespace = DbColumnNamespaces[6];
+pub const DbStateDiffsNamespace = DbColumnNamespaces[7];
 pub const Db = rocksdb.RocksDB(&DbColumnNamespaces);
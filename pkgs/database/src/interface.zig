@@ -14,6 +14,21 @@ pub fn formatStateKey(allocator: Allocator, state_root: *const types.Root) ![]co
     return std.fmt.allocPrint(allocator, "state:{x}", .{state_root.*});
 }
 
+/// Helper function to format state diff keys consistently
+pub fn formatStateDiffKey(allocator: Allocator, block_root: *const types.Root) ![]const u8 {
+    return std.fmt.allocPrint(allocator, "state_diff:{x}", .{block_root.*});
+}
+
+/// States are stored as a full snapshot once per this many slots and as a diff against the
+/// parent state otherwise, so rebuilding a state replays at most this many diffs.
+pub const STATE_SNAPSHOT_INTERVAL: types.Slot = 64;
+
+/// True if the state at `slot`, derived from the state at `base_slot`, is stored as a full
+/// snapshot. That is the case for the first state of every snapshot interval.
+pub fn isStateSnapshotSlot(base_slot: types.Slot, slot: types.Slot) bool {
+    return base_slot / STATE_SNAPSHOT_INTERVAL != slot / STATE_SNAPSHOT_INTERVAL;
+}
+
 /// Helper function to format finalized slot index keys
 pub fn formatFinalizedSlotKey(allocator: Allocator, slot: types.Slot) ![]const u8 {
     return std.fmt.allocPrint(allocator, "finalized_slot_{d}", .{slot});
@@ -4,12 +4,21 @@ pub const RocksDB = rocksDB.RocksDB;
 const interface = @import("./interface.zig");
 pub const formatBlockKey = interface.formatBlockKey;
 pub const formatStateKey = interface.formatStateKey;
+pub const formatStateDiffKey = interface.formatStateDiffKey;
+pub const STATE_SNAPSHOT_INTERVAL = interface.STATE_SNAPSHOT_INTERVAL;
+pub const isStateSnapshotSlot = interface.isStateSnapshotSlot;
 pub const formatFinalizedSlotKey = interface.formatFinalizedSlotKey;
 pub const formatUnfinalizedSlotKey = interface.formatUnfinalizedSlotKey;
 pub const ReturnType = interface.ReturnType;
 pub const ColumnNamespace = interface.ColumnNamespace;
 pub const IteratorDirection = interface.IteratorDirection;
 
+const tuning = @import("./tuning.zig");
+pub const DbOptions = tuning.DbOptions;
+pub const DbProfile = tuning.DbProfile;
+pub const ColumnFamilyTuning = tuning.ColumnFamilyTuning;
+pub const Compression = tuning.Compression;
+
 const database = @import("./database.zig");
 pub const DbColumnNamespaces = database.DbColumnNamespaces;
 pub const DbDefaultNamespace = database.DbDefaultNamespace;
@@ -20,6 +29,7 @@ pub const DbCheckpointsNamespace = database.DbCheckpointsNamespace;
 pub const DbFinalizedSlotsNamespace = database.DbFinalizedSlotsNamespace;
 // TODO: uncomment this code if there is a need of slot to unfinalized index
 // pub const DbUnfinalizedSlotsNamespace = database.DbUnfinalizedSlotsNamespace;
+pub const DbStateDiffsNamespace = database.DbStateDiffsNamespace;
 pub const Db = database.Db;
 
 test "get tests" {
@@ -7,8 +7,22 @@ const zeam_utils = @import("@zeam/utils");
 const ssz = @import("ssz");
 const types = @import("@zeam/types");
 const database = @import("./database.zig");
+const tuning = @import("./tuning.zig");
 const test_helpers = @import("./test_helpers.zig");
 
+// C API of the linked RocksDB library, the zig bindings do not pass column family options to
+// the open call. Mutable options are applied right after opening, before anything is written.
+extern fn rocksdb_set_options_cf(
+    db: *anyopaque,
+    handle: *anyopaque,
+    count: c_int,
+    keys: [*]const [*:0]const u8,
+    values: [*]const [*:0]const u8,
+    errptr: *?[*:0]u8,
+) void;
+extern fn rocksdb_free(ptr: ?*anyopaque) void;
+extern fn rocksdb_property_int_cf(db: *anyopaque, handle: *anyopaque, propname: [*:0]const u8, out_val: *u64) c_int;
+
 pub fn RocksDB(comptime column_namespaces: []const ColumnNamespace) type {
     return struct {
         db: rocksdb.DB,
@@ -25,14 +39,19 @@ pub fn RocksDB(comptime column_namespaces: []const ColumnNamespace) type {
         const OpenError = Error || std.posix.MakeDirError || std.fs.Dir.StatFileError;
 
         pub fn open(allocator: Allocator, logger: zeam_utils.ModuleLogger, path: []const u8) OpenError!Self {
-            logger.info("initializing RocksDB", .{});
+            return openWithOptions(allocator, logger, path, .{});
+        }
+
+        /// Opens the database and tunes every column family as `db_options` describes
+        pub fn openWithOptions(allocator: Allocator, logger: zeam_utils.ModuleLogger, path: []const u8, db_options: tuning.DbOptions) OpenError!Self {
+            logger.info("initializing RocksDB with profile={s}", .{@tagName(db_options.profile)});
 
             const owned_path = try std.fmt.allocPrintSentinel(allocator, "{s}/rocksdb", .{path}, 0);
             errdefer allocator.free(owned_path);
 
             try std.fs.cwd().makePath(owned_path);
 
-            // Ideally this should be configurable via cli args
+            // column family tuning is applied after the open, see `tuneColumnFamily`
             const options = rocksdb.DBOptions{
                 .create_if_missing = true,
                 .create_missing_column_families = true,
@@ -74,6 +93,13 @@ pub fn RocksDB(comptime column_namespaces: []const ColumnNamespace) type {
                 cf_handles[i] = cfs[i].handle;
             }
 
+            inline for (column_namespaces, 0..) |cn, i| {
+                const cf_tuning = db_options.columnFamilyTuning(cn.namespace);
+                if (!cf_tuning.isDefault()) {
+                    _ = tuneColumnFamily(allocator, logger, &db, cf_handles[i], cn.namespace, cf_tuning);
+                }
+            }
+
             return Self{
                 .db = db,
                 .allocator = allocator,
@@ -261,6 +287,29 @@ pub fn RocksDB(comptime column_namespaces: []const ColumnNamespace) type {
                 );
             }
 
+            /// Put a state diff to this write batch, keyed by the root of the block it is the post state of
+            pub fn putStateDiff(
+                self: *WriteBatch,
+                comptime cn: ColumnNamespace,
+                block_root: types.Root,
+                diff: types.BeamStateDiff,
+            ) void {
+                const key = interface.formatStateDiffKey(self.allocator, &block_root) catch |err| {
+                    self.logger.err("failed to format state diff key for putStateDiff: {any}", .{err});
+                    return;
+                };
+                defer self.allocator.free(key);
+
+                self.putToBatch(
+                    types.BeamStateDiff,
+                    key,
+                    diff,
+                    cn,
+                    "added state diff to batch: root=0x{x} base=0x{x}",
+                    .{ &block_root, &diff.base_root },
+                );
+            }
+
             /// Put a attestation to this write batch
             pub fn putAttestation(
                 self: *WriteBatch,
@@ -529,8 +578,8 @@ pub fn RocksDB(comptime column_namespaces: []const ColumnNamespace) type {
             );
         }
 
-        /// Load a state from the database
-        pub fn loadState(self: *Self, comptime cn: ColumnNamespace, state_root: types.Root) ?types.BeamState {
+        /// Load a state snapshot from the database
+        fn loadStateSnapshot(self: *Self, comptime cn: ColumnNamespace, state_root: types.Root) ?types.BeamState {
             const key = interface.formatStateKey(self.allocator, &state_root) catch |err| {
                 self.logger.err("failed to format state key for loadState: {any}", .{err});
                 return null;
@@ -546,6 +595,68 @@ pub fn RocksDB(comptime column_namespaces: []const ColumnNamespace) type {
             );
         }
 
+        /// Load a state diff from the database
+        pub fn loadStateDiff(self: *Self, comptime cn: ColumnNamespace, block_root: types.Root) ?types.BeamStateDiff {
+            const key = interface.formatStateDiffKey(self.allocator, &block_root) catch |err| {
+                self.logger.err("failed to format state diff key for loadStateDiff: {any}", .{err});
+                return null;
+            };
+            defer self.allocator.free(key);
+
+            return self.loadFromDatabase(
+                types.BeamStateDiff,
+                key,
+                cn,
+                "loaded state diff from database: root=0x{x}",
+                .{&block_root},
+            );
+        }
+
+        /// Load a state from the database
+        /// States not stored as a snapshot in `cn` are rebuilt by replaying their diffs onto the
+        /// nearest snapshot before them
+        pub fn loadState(self: *Self, comptime cn: ColumnNamespace, state_root: types.Root) ?types.BeamState {
+            var diffs: std.ArrayList(types.BeamStateDiff) = .empty;
+            defer {
+                for (diffs.items) |*diff| diff.deinit();
+                diffs.deinit(self.allocator);
+            }
+
+            // walk back to the snapshot, diffs holds the newest diff first
+            var root = state_root;
+            var state = while (true) {
+                if (self.loadStateSnapshot(cn, root)) |snapshot| break snapshot;
+                if (diffs.items.len > interface.STATE_SNAPSHOT_INTERVAL) {
+                    self.logger.err("no state snapshot within {d} diffs of root=0x{x}", .{ diffs.items.len, &state_root });
+                    return null;
+                }
+                var diff = self.loadStateDiff(database.DbStateDiffsNamespace, root) orelse return null;
+                diffs.append(self.allocator, diff) catch |err| {
+                    diff.deinit();
+                    self.logger.err("failed to queue state diff for root=0x{x}: {any}", .{ &root, err });
+                    return null;
+                };
+                root = diff.base_root;
+            };
+
+            var i = diffs.items.len;
+            while (i > 0) {
+                i -= 1;
+                var next: types.BeamState = undefined;
+                diffs.items[i].apply(self.allocator, &state, &next) catch |err| {
+                    state.deinit();
+                    self.logger.err("failed to apply state diff for root=0x{x}: {any}", .{ &state_root, err });
+                    return null;
+                };
+                state.deinit();
+                state = next;
+            }
+            if (diffs.items.len > 0) {
+                self.logger.debug("rebuilt state from {d} diffs: root=0x{x}", .{ diffs.items.len, &state_root });
+            }
+            return state;
+        }
+
         /// Save a attestation to the database
         pub fn saveAttestation(self: *Self, comptime cn: ColumnNamespace, attestation_key: []const u8, attestation: types.SignedAttestation) void {
             self.saveToDatabase(
@@ -660,6 +771,38 @@ pub fn RocksDB(comptime column_namespaces: []const ColumnNamespace) type {
     };
 }
 
+/// Applies `cf_tuning` to an open column family and returns how many options RocksDB rejected.
+/// Every option is set on its own, RocksDB rejects a whole set if any of it is not accepted
+/// (e.g. a compression the library was built without), and a rejected option keeps its default.
+fn tuneColumnFamily(
+    allocator: Allocator,
+    logger: zeam_utils.ModuleLogger,
+    db: *const rocksdb.DB,
+    handle: rocksdb.ColumnFamilyHandle,
+    namespace: []const u8,
+    cf_tuning: tuning.ColumnFamilyTuning,
+) usize {
+    var options = cf_tuning.toOptions(allocator) catch |err| {
+        logger.err("failed to render options of column family {s}: {any}", .{ namespace, err });
+        return 0;
+    };
+    defer options.deinit();
+
+    var rejected: usize = 0;
+    for (options.keys.items, options.values.items) |key, value| {
+        var err_str: ?[*:0]u8 = null;
+        rocksdb_set_options_cf(db.db, handle, 1, &.{key}, &.{value}, &err_str);
+        if (err_str) |message| {
+            defer rocksdb_free(message);
+            rejected += 1;
+            logger.warn("column family {s} keeps the default of {s}, {s} rejected: {s}", .{ namespace, key, value, message });
+            continue;
+        }
+        logger.debug("column family {s}: {s}={s}", .{ namespace, key, value });
+    }
+    return rejected;
+}
+
 fn callRocksDB(logger: zeam_utils.ModuleLogger, func: anytype, args: anytype) interface.ReturnType(@TypeOf(func)) {
     var err_str: ?rocksdb.Data = null;
     return @call(.auto, func, args ++ .{&err_str}) catch |e| {
@@ -1234,3 +1377,93 @@ test "loadLatestFinalizedState" {
         try std.testing.expect(std.mem.eql(u8, &expected_state.latest_finalized.root, &loaded_state.latest_finalized.root));
     }
 }
+
+test "loadState rebuilds states stored as diffs" {
+    var arena_allocator = std.heap.ArenaAllocator.init(std.testing.allocator);
+    defer arena_allocator.deinit();
+    const allocator = arena_allocator.allocator();
+
+    var zeam_logger_config = zeam_utils.getTestLoggerConfig();
+
+    var tmp_dir = std.testing.tmpDir(.{});
+    defer tmp_dir.cleanup();
+
+    const data_dir = try tmp_dir.dir.realpathAlloc(allocator, ".");
+    defer allocator.free(data_dir);
+
+    var db = try database.Db.open(allocator, zeam_logger_config.logger(.database_test), data_dir);
+    defer db.deinit();
+
+    var states: [3]types.BeamState = undefined;
+    states[0] = try test_helpers.createDummyState(allocator, 0, 4, 0, 0, 0, 0x01, 0x02);
+    const roots = [_]types.Root{
+        test_helpers.createDummyRoot(0xA0),
+        test_helpers.createDummyRoot(0xA1),
+        test_helpers.createDummyRoot(0xA2),
+    };
+    for (1..states.len) |i| {
+        try types.sszClone(allocator, types.BeamState, states[i - 1], &states[i]);
+        states[i].slot = i;
+        states[i].latest_block_header.slot = i;
+        try states[i].historical_block_hashes.append(roots[i - 1]);
+        try states[i].justified_slots.append(i % 2 == 0);
+    }
+
+    var batch = db.initWriteBatch();
+    defer batch.deinit();
+    batch.putState(database.DbStatesNamespace, roots[0], states[0]);
+    for (1..states.len) |i| {
+        var diff: types.BeamStateDiff = undefined;
+        try diff.compute(allocator, roots[i - 1], &states[i - 1], &states[i]);
+        batch.putStateDiff(database.DbStateDiffsNamespace, roots[i], diff);
+    }
+    db.commit(&batch);
+
+    for (states, roots) |expected, root| {
+        const loaded = db.loadState(database.DbStatesNamespace, root) orelse return error.StateNotRebuilt;
+        var expected_root: types.Root = undefined;
+        try expected.hashTreeRoot(allocator, null, &expected_root);
+        var loaded_root: types.Root = undefined;
+        try loaded.hashTreeRoot(allocator, null, &loaded_root);
+        try std.testing.expectEqualSlices(u8, &expected_root, &loaded_root);
+    }
+
+    // roots without a snapshot or a diff are not found
+    try std.testing.expect(db.loadState(database.DbStatesNamespace, test_helpers.createDummyRoot(0xA3)) == null);
+}
+
+test "balanced profile tuning is accepted by an open database" {
+    var arena_allocator = std.heap.ArenaAllocator.init(std.testing.allocator);
+    defer arena_allocator.deinit();
+    const allocator = arena_allocator.allocator();
+
+    var zeam_logger_config = zeam_utils.getTestLoggerConfig();
+    const logger = zeam_logger_config.logger(.database_test);
+
+    var tmp_dir = std.testing.tmpDir(.{});
+    defer tmp_dir.cleanup();
+
+    const data_dir = try tmp_dir.dir.realpathAlloc(allocator, ".");
+    defer allocator.free(data_dir);
+
+    const db_options = tuning.DbOptions{ .profile = .balanced };
+    var db = try database.Db.openWithOptions(allocator, logger, data_dir, db_options);
+    defer db.deinit();
+
+    // the slot index tuning names no compression library, so every option must be accepted,
+    // in particular its block based table option
+    const slots_index = database.DbFinalizedSlotsNamespace.find(&database.DbColumnNamespaces);
+    const slots_tuning = db_options.columnFamilyTuning(database.DbFinalizedSlotsNamespace.namespace);
+    try std.testing.expectEqual(@as(usize, 0), tuneColumnFamily(allocator, logger, &db.db, db.cf_handles[slots_index], "finalized_slots", slots_tuning));
+
+    // states move values from 64 KiB on into blob files, read the file count back after a flush
+    const state_bytes = try allocator.alloc(u8, 128 * 1024);
+    @memset(state_bytes, 0x5a);
+    try db.put(database.DbStatesNamespace, "state", state_bytes);
+    try db.flush(database.DbStatesNamespace);
+
+    const states_index = database.DbStatesNamespace.find(&database.DbColumnNamespaces);
+    var blob_files: u64 = 0;
+    try std.testing.expectEqual(@as(c_int, 0), rocksdb_property_int_cf(db.db.db, db.cf_handles[states_index], "rocksdb.num-blob-files", &blob_files));
+    try std.testing.expect(blob_files > 0);
+}
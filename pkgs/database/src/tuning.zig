@@ -0,0 +1,199 @@
+const std = @import("std");
+const Allocator = std.mem.Allocator;
+
+const MiB: u64 = 1024 * 1024;
+const KiB: u64 = 1024;
+
+pub const Compression = enum {
+    none,
+    snappy,
+    lz4,
+    zstd,
+
+    fn optionValue(self: Compression) []const u8 {
+        return switch (self) {
+            .none => "kNoCompression",
+            .snappy => "kSnappyCompression",
+            .lz4 => "kLZ4Compression",
+            .zstd => "kZSTD",
+        };
+    }
+};
+
+/// RocksDB options of one column family. Unset fields keep the RocksDB default. Only options
+/// RocksDB can change on an open column family are listed, the bindings do not pass column
+/// family options to the open call, so e.g. the block cache and filter policy stay at their
+/// defaults.
+pub const ColumnFamilyTuning = struct {
+    write_buffer_size: ?u64 = null,
+    max_write_buffer_number: ?u32 = null,
+    compression: ?Compression = null,
+    block_size: ?u64 = null,
+    // values of at least this many bytes are moved into blob files
+    min_blob_size: ?u64 = null,
+    blob_compression: ?Compression = null,
+
+    const Self = @This();
+
+    pub fn isDefault(self: Self) bool {
+        return std.meta.eql(self, Self{});
+    }
+
+    /// Renders the tuning as RocksDB option names and values, in the form accepted by
+    /// `rocksdb_set_options_cf`. Strings are allocated with `allocator`.
+    pub fn toOptions(self: Self, allocator: Allocator) !OptionList {
+        var options = OptionList{ .allocator = allocator };
+        errdefer options.deinit();
+
+        if (self.write_buffer_size) |size| try options.add("write_buffer_size", "{d}", .{size});
+        if (self.max_write_buffer_number) |number| try options.add("max_write_buffer_number", "{d}", .{number});
+        if (self.compression) |compression| try options.add("compression", "{s}", .{compression.optionValue()});
+        if (self.min_blob_size) |size| {
+            try options.add("enable_blob_files", "true", .{});
+            try options.add("min_blob_size", "{d}", .{size});
+            try options.add("enable_blob_garbage_collection", "true", .{});
+            if (self.blob_compression) |compression| try options.add("blob_compression_type", "{s}", .{compression.optionValue()});
+        }
+
+        // block_size is one of the few mutable block based table options
+        if (self.block_size) |size| try options.add("block_based_table_factory", "{{block_size={d};}}", .{size});
+
+        return options;
+    }
+};
+
+/// Option names and values as the parallel C string arrays the RocksDB C API takes.
+pub const OptionList = struct {
+    allocator: Allocator,
+    keys: std.ArrayList([*:0]const u8) = .empty,
+    values: std.ArrayList([*:0]const u8) = .empty,
+
+    pub fn deinit(self: *OptionList) void {
+        for (self.keys.items) |key| self.allocator.free(std.mem.span(key));
+        for (self.values.items) |value| self.allocator.free(std.mem.span(value));
+        self.keys.deinit(self.allocator);
+        self.values.deinit(self.allocator);
+    }
+
+    fn add(self: *OptionList, key: []const u8, comptime fmt: []const u8, args: anytype) !void {
+        const owned_key = try self.allocator.dupeZ(u8, key);
+        errdefer self.allocator.free(owned_key);
+        const value = try std.fmt.allocPrintSentinel(self.allocator, fmt, args, 0);
+        errdefer self.allocator.free(value);
+        try self.keys.ensureUnusedCapacity(self.allocator, 1);
+        try self.values.ensureUnusedCapacity(self.allocator, 1);
+        self.keys.appendAssumeCapacity(owned_key.ptr);
+        self.values.appendAssumeCapacity(value.ptr);
+    }
+};
+
+/// Preset tuning of all column families.
+/// - default: RocksDB defaults for every column family.
+/// - balanced: compression everywhere, zstd and blob files for the large state and block
+///   values, small uncompressed blocks for the slot indices.
+/// - throughput: balanced with larger and more write buffers for nodes with memory to spare.
+pub const DbProfile = enum {
+    default,
+    balanced,
+    throughput,
+};
+
+pub const DbOptions = struct {
+    profile: DbProfile = .default,
+    // overrides the write buffer size of every column family
+    write_buffer_mb: ?u64 = null,
+
+    const Self = @This();
+
+    /// Tuning of the column family `namespace` under these options.
+    pub fn columnFamilyTuning(self: Self, namespace: []const u8) ColumnFamilyTuning {
+        var tuning = profileTuning(self.profile, namespace);
+        if (self.write_buffer_mb) |mb| tuning.write_buffer_size = mb * MiB;
+        return tuning;
+    }
+};
+
+fn profileTuning(profile: DbProfile, namespace: []const u8) ColumnFamilyTuning {
+    const scale: u64 = switch (profile) {
+        .default => return .{},
+        .balanced => 1,
+        .throughput => 4,
+    };
+    const max_write_buffers: u32 = if (profile == .throughput) 4 else 2;
+
+    // full state snapshots, large values written once and read on restarts
+    if (std.mem.eql(u8, namespace, "states")) return .{
+        .write_buffer_size = 32 * MiB * scale,
+        .max_write_buffer_number = max_write_buffers,
+        .compression = .zstd,
+        .min_blob_size = 64 * KiB,
+        .blob_compression = .zstd,
+    };
+    if (std.mem.eql(u8, namespace, "state_diffs")) return .{
+        .write_buffer_size = 16 * MiB * scale,
+        .max_write_buffer_number = max_write_buffers,
+        .compression = .zstd,
+    };
+    // signed blocks carry aggregated signature proofs of several KiB
+    if (std.mem.eql(u8, namespace, "blocks")) return .{
+        .write_buffer_size = 32 * MiB * scale,
+        .max_write_buffer_number = max_write_buffers,
+        .compression = .lz4,
+        .min_blob_size = 4 * KiB,
+        .blob_compression = .lz4,
+    };
+    // tiny root values under "finalized_slot_<n>" keys, small blocks keep point reads cheap. No
+    // prefix extractor, every key of a slot index shares its text prefix and the decimal slot
+    // after it has no fixed width, so a fixed prefix wouldn't split the keys.
+    if (std.mem.eql(u8, namespace, "finalized_slots") or std.mem.eql(u8, namespace, "unfinalized_slots")) {
+        return .{
+            .write_buffer_size = 4 * MiB * scale,
+            .compression = .none,
+            .block_size = 4 * KiB,
+        };
+    }
+    return .{
+        .write_buffer_size = 8 * MiB * scale,
+        .compression = .lz4,
+    };
+}
+
+test "column family tuning renders rocksdb options" {
+    const allocator = std.testing.allocator;
+
+    try std.testing.expect((DbOptions{}).columnFamilyTuning("states").isDefault());
+
+    const tuning = (DbOptions{ .profile = .balanced, .write_buffer_mb = 8 }).columnFamilyTuning("states");
+    try std.testing.expectEqual(@as(?u64, 8 * MiB), tuning.write_buffer_size);
+
+    var options = try tuning.toOptions(allocator);
+    defer options.deinit();
+    try std.testing.expectEqual(options.keys.items.len, options.values.items.len);
+
+    var found_blob_files = false;
+    for (options.keys.items, options.values.items) |key_ptr, value_ptr| {
+        const key = std.mem.span(key_ptr);
+        const value = std.mem.span(value_ptr);
+        if (std.mem.eql(u8, key, "write_buffer_size")) try std.testing.expectEqualStrings("8388608", value);
+        if (std.mem.eql(u8, key, "compression")) try std.testing.expectEqualStrings("kZSTD", value);
+        if (std.mem.eql(u8, key, "blob_compression_type")) try std.testing.expectEqualStrings("kZSTD", value);
+        if (std.mem.eql(u8, key, "enable_blob_files")) found_blob_files = true;
+        // immutable table options are rejected by rocksdb_set_options_cf
+        try std.testing.expect(!std.mem.eql(u8, key, "block_based_table_factory"));
+    }
+    try std.testing.expect(found_blob_files);
+
+    const slots = (DbOptions{ .profile = .balanced }).columnFamilyTuning("finalized_slots");
+    try std.testing.expectEqual(@as(?Compression, .none), slots.compression);
+
+    var slot_options = try slots.toOptions(allocator);
+    defer slot_options.deinit();
+    var found_table = false;
+    for (slot_options.keys.items, slot_options.values.items) |key_ptr, value_ptr| {
+        try std.testing.expect(!std.mem.eql(u8, std.mem.span(key_ptr), "prefix_extractor"));
+        if (!std.mem.eql(u8, std.mem.span(key_ptr), "block_based_table_factory")) continue;
+        found_table = true;
+        try std.testing.expectEqualStrings("{block_size=4096;}", std.mem.span(value_ptr));
+    }
+    try std.testing.expect(found_table);
+}
@@ -1,6 +1,9 @@
 const std = @import("std");
 const metrics_lib = @import("metrics");
 
+/// Per thread span tracer, see tracing.zig.
+pub const tracing = @import("./tracing.zig");
+
 /// Returns true if the current target is a ZKVM environment.
 /// This is used to disable metrics in contexts where they don't make sense.
 pub fn isZKVM() bool {
@@ -67,6 +70,28 @@ const Metrics = struct {
     lean_fork_choice_reorg_depth: LeanForkChoiceReorgDepthHistogram,
     // Finalization metrics
     lean_finalizations_total: LeanFinalizationsTotalCounter,
+    // Gossip attestation ingest queue metrics
+    lean_gossip_attestation_queue_depth: GossipAttestationQueueDepthGauge,
+    lean_gossip_attestation_batch_size: GossipAttestationBatchSizeHistogram,
+    lean_gossip_attestations_dropped_total: GossipAttestationsDroppedCounter,
+    // Orphan block pool metrics
+    lean_orphan_blocks: OrphanBlocksGauge,
+    lean_orphan_blocks_bytes: OrphanBlocksBytesGauge,
+    lean_orphan_blocks_evicted_total: OrphanBlocksEvictedCounter,
+    lean_orphan_blocks_rejected_total: OrphanBlocksRejectedCounter,
+    // Gossip ingress queue metrics
+    lean_gossip_ingress_queue_depth: GossipIngressQueueDepthGauge,
+    lean_gossip_ingress_batch_size: GossipIngressBatchSizeHistogram,
+    lean_gossip_ingress_wait_seconds: GossipIngressWaitHistogram,
+    lean_gossip_ingress_dropped_total: GossipIngressDroppedCounter,
+    // Gossip seen message cache metrics
+    lean_gossip_seen_cache_hits_total: GossipSeenCacheHitsCounter,
+    lean_gossip_seen_cache_misses_total: GossipSeenCacheMissesCounter,
+    lean_gossip_seen_cache_entries: GossipSeenCacheEntriesGauge,
+    // SSE event stream metrics
+    lean_sse_connections: SseConnectionsGauge,
+    lean_sse_events_dropped_total: SseEventsDroppedCounter,
+    lean_sse_clients_lagged_total: SseClientsLaggedCounter,
 
     const ChainHistogram = metrics_lib.Histogram(f32, &[_]f32{ 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10 });
     const BlockProcessingHistogram = metrics_lib.Histogram(f32, &[_]f32{ 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10 });
@@ -107,6 +132,28 @@ const Metrics = struct {
     const LeanForkChoiceReorgDepthHistogram = metrics_lib.Histogram(f32, &[_]f32{ 1, 2, 3, 5, 7, 10, 20, 30, 50, 100 });
     // Finalization metric types
     const LeanFinalizationsTotalCounter = metrics_lib.CounterVec(u64, struct { result: []const u8 });
+    // Gossip attestation ingest queue metric types
+    const GossipAttestationQueueDepthGauge = metrics_lib.Gauge(u64);
+    const GossipAttestationBatchSizeHistogram = metrics_lib.Histogram(f32, &[_]f32{ 1, 4, 16, 64, 256, 1024, 4096 });
+    const GossipAttestationsDroppedCounter = metrics_lib.CounterVec(u64, struct { reason: []const u8 });
+    // Orphan block pool metric types
+    const OrphanBlocksGauge = metrics_lib.Gauge(u64);
+    const OrphanBlocksBytesGauge = metrics_lib.Gauge(u64);
+    const OrphanBlocksEvictedCounter = metrics_lib.Counter(u64);
+    const OrphanBlocksRejectedCounter = metrics_lib.CounterVec(u64, struct { reason: []const u8 });
+    // Gossip ingress queue metric types
+    const GossipIngressQueueDepthGauge = metrics_lib.Gauge(u64);
+    const GossipIngressBatchSizeHistogram = metrics_lib.Histogram(f32, &[_]f32{ 1, 4, 16, 64, 256 });
+    const GossipIngressWaitHistogram = metrics_lib.Histogram(f32, &[_]f32{ 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1 });
+    const GossipIngressDroppedCounter = metrics_lib.Counter(u64);
+    // Gossip seen message cache metric types
+    const GossipSeenCacheHitsCounter = metrics_lib.Counter(u64);
+    const GossipSeenCacheMissesCounter = metrics_lib.Counter(u64);
+    const GossipSeenCacheEntriesGauge = metrics_lib.Gauge(u64);
+    // SSE event stream metric types
+    const SseConnectionsGauge = metrics_lib.Gauge(u64);
+    const SseEventsDroppedCounter = metrics_lib.Counter(u64);
+    const SseClientsLaggedCounter = metrics_lib.Counter(u64);
 };
 
 /// Timer struct returned to the application.
@@ -318,6 +365,27 @@ pub fn init(allocator: std.mem.Allocator) !void {
         .lean_fork_choice_reorg_depth = Metrics.LeanForkChoiceReorgDepthHistogram.init("lean_fork_choice_reorg_depth", .{ .help = "Depth of fork choice reorgs in blocks." }, .{}),
         // Finalization metrics
         .lean_finalizations_total = try Metrics.LeanFinalizationsTotalCounter.init(allocator, "lean_finalizations_total", .{ .help = "Total finalization attempts by result." }, .{}),
+        // Gossip attestation ingest queue metrics
+        .lean_gossip_attestation_queue_depth = Metrics.GossipAttestationQueueDepthGauge.init("lean_gossip_attestation_queue_depth", .{ .help = "Gossip attestations waiting for batched signature verification." }, .{}),
+        .lean_gossip_attestation_batch_size = Metrics.GossipAttestationBatchSizeHistogram.init("lean_gossip_attestation_batch_size", .{ .help = "Number of gossip attestations verified per batch." }, .{}),
+        .lean_gossip_attestations_dropped_total = try Metrics.GossipAttestationsDroppedCounter.init(allocator, "lean_gossip_attestations_dropped_total", .{ .help = "Gossip attestations dropped before verification labeled by reason (duplicate, validator_limit or queue_full)." }, .{}),
+        .lean_orphan_blocks = Metrics.OrphanBlocksGauge.init("lean_orphan_blocks", .{ .help = "Blocks held in the orphan pool waiting for their parent or slot." }, .{}),
+        .lean_orphan_blocks_bytes = Metrics.OrphanBlocksBytesGauge.init("lean_orphan_blocks_bytes", .{ .help = "Estimated memory held by the orphan block pool in bytes." }, .{}),
+        .lean_orphan_blocks_evicted_total = Metrics.OrphanBlocksEvictedCounter.init("lean_orphan_blocks_evicted_total", .{ .help = "Orphan blocks evicted to make room for orphans with lower slots." }, .{}),
+        .lean_orphan_blocks_rejected_total = try Metrics.OrphanBlocksRejectedCounter.init(allocator, "lean_orphan_blocks_rejected_total", .{ .help = "Orphan blocks rejected labeled by reason (pool_full or peer_quota)." }, .{}),
+        // Gossip ingress queue metrics
+        .lean_gossip_ingress_queue_depth = Metrics.GossipIngressQueueDepthGauge.init("lean_gossip_ingress_queue_depth", .{ .help = "Decoded gossip messages waiting for the chain loop thread." }, .{}),
+        .lean_gossip_ingress_batch_size = Metrics.GossipIngressBatchSizeHistogram.init("lean_gossip_ingress_batch_size", .{ .help = "Gossip messages handled per drain of the ingress queue." }, .{}),
+        .lean_gossip_ingress_wait_seconds = Metrics.GossipIngressWaitHistogram.init("lean_gossip_ingress_wait_seconds", .{ .help = "Time a gossip message spent in the ingress queue before being handled." }, .{}),
+        .lean_gossip_ingress_dropped_total = Metrics.GossipIngressDroppedCounter.init("lean_gossip_ingress_dropped_total", .{ .help = "Gossip messages dropped because the ingress queue was full." }, .{}),
+        // Gossip seen message cache metrics
+        .lean_gossip_seen_cache_hits_total = Metrics.GossipSeenCacheHitsCounter.init("lean_gossip_seen_cache_hits_total", .{ .help = "Gossip payloads dropped as duplicates before decoding." }, .{}),
+        .lean_gossip_seen_cache_misses_total = Metrics.GossipSeenCacheMissesCounter.init("lean_gossip_seen_cache_misses_total", .{ .help = "Gossip payloads not seen before and passed on to decoding." }, .{}),
+        .lean_gossip_seen_cache_entries = Metrics.GossipSeenCacheEntriesGauge.init("lean_gossip_seen_cache_entries", .{ .help = "Gossip payload hashes held in the seen message cache." }, .{}),
+        // SSE event stream metrics
+        .lean_sse_connections = Metrics.SseConnectionsGauge.init("lean_sse_connections", .{ .help = "Clients subscribed to the SSE chain event stream." }, .{}),
+        .lean_sse_events_dropped_total = Metrics.SseEventsDroppedCounter.init("lean_sse_events_dropped_total", .{ .help = "Chain events dropped because the SSE event ring was full." }, .{}),
+        .lean_sse_clients_lagged_total = Metrics.SseClientsLaggedCounter.init("lean_sse_clients_lagged_total", .{ .help = "SSE clients disconnected for falling too far behind the event stream." }, .{}),
     };
 
     // Initialize validators count to 0 by default (spec requires "On scrape" availability)
@@ -337,6 +405,9 @@ pub fn init(allocator: std.mem.Allocator) !void {
     lean_pq_sig_attestation_signatures_building_time_seconds.context = @ptrCast(&metrics.lean_pq_sig_attestation_signatures_building_time_seconds);
     lean_pq_sig_aggregated_signatures_verification_time_seconds.context = @ptrCast(&metrics.lean_pq_sig_aggregated_signatures_verification_time_seconds);
 
+    // spans go along with the metrics, they cost two clock reads each
+    tracing.enable();
+
     g_initialized = true;
 }
 
@@ -352,3 +423,7 @@ pub fn writeMetrics(writer: *std.Io.Writer) !void {
 
     try metrics_lib.write(&metrics, writer);
 }
+
+test {
+    _ = tracing;
+}
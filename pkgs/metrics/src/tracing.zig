@@ -0,0 +1,236 @@
+//! Span tracer for following single blocks through import, where the histograms only show
+//! aggregates. Every thread records the spans it closes into its own fixed size ring, stamped
+//! with the monotonic clock, and `writeChromeTrace` dumps what the rings hold as Chrome
+//! trace-event JSON for chrome://tracing or Perfetto. Nothing is recorded until `enable()`,
+//! and on ZKVM targets spans compile down to empty structs.
+
+const std = @import("std");
+const Allocator = std.mem.Allocator;
+
+const isZKVM = @import("./lib.zig").isZKVM;
+
+/// Spans kept per thread, once a thread closed more the oldest ones are overwritten.
+pub const ring_capacity = 4096;
+/// Threads that get a ring, spans closed on any further thread are not recorded.
+pub const max_threads = 64;
+
+/// Traced code paths. Names are fixed so a record is a few integers and needs no allocation.
+pub const SpanName = enum(u8) {
+    chain_on_block,
+    chain_on_gossip,
+    chain_state_clone,
+    chain_update_block_db,
+    verify_signatures,
+    stf_apply_transition,
+    stf_process_slots,
+    stf_process_block,
+    stf_process_attestations,
+    stf_state_root,
+    forkchoice_update_head,
+
+    pub fn label(self: SpanName) []const u8 {
+        return switch (self) {
+            .chain_on_block => "BeamChain.onBlock",
+            .chain_on_gossip => "BeamChain.onGossip",
+            .chain_state_clone => "BeamState.clone",
+            .chain_update_block_db => "BeamChain.updateBlockDb",
+            .verify_signatures => "verifySignatures",
+            .stf_apply_transition => "stf.apply_transition",
+            .stf_process_slots => "BeamState.process_slots",
+            .stf_process_block => "BeamState.process_block",
+            .stf_process_attestations => "BeamState.process_attestations",
+            .stf_state_root => "BeamState.hashTreeRoot",
+            .forkchoice_update_head => "ForkChoice.updateHead",
+        };
+    }
+};
+
+/// An open span, call `end` (usually deferred) to record it on the current thread.
+pub const Span = if (isZKVM()) struct {
+    pub fn end(_: Span) void {}
+} else struct {
+    name: SpanName,
+    /// null when tracing was off as the span was opened
+    start_ns: ?u64,
+
+    pub fn end(self: Span) void {
+        const start_ns = self.start_ns orelse return;
+        const end_ns = now() orelse return;
+        const ring = threadRing() orelse return;
+        ring.record(.{ .name = self.name, .start_ns = start_ns, .duration_ns = end_ns -| start_ns });
+    }
+};
+
+/// Opens a span, costing a flag check while tracing is off.
+pub fn span(name: SpanName) Span {
+    if (comptime isZKVM()) {
+        return .{};
+    } else {
+        if (!enabled.load(.acquire)) return .{ .name = name, .start_ns = null };
+        return .{ .name = name, .start_ns = now() };
+    }
+}
+
+const Record = struct {
+    name: SpanName,
+    /// nanoseconds since `enable()`
+    start_ns: u64,
+    duration_ns: u64,
+};
+
+const ThreadRing = struct {
+    tid: std.Thread.Id,
+    /// Only ever contended by a dump copying the records out.
+    mutex: std.Thread.Mutex = .{},
+    /// Spans recorded so far, the next one goes to `records[written % ring_capacity]`.
+    written: u64 = 0,
+    records: [ring_capacity]Record = undefined,
+
+    fn record(self: *ThreadRing, rec: Record) void {
+        self.mutex.lock();
+        defer self.mutex.unlock();
+        self.records[self.written % ring_capacity] = rec;
+        self.written += 1;
+    }
+
+    /// Copies the records still held into `out`, oldest first.
+    fn snapshot(self: *ThreadRing, out: []Record) []Record {
+        self.mutex.lock();
+        defer self.mutex.unlock();
+        const len: usize = @intCast(@min(self.written, ring_capacity));
+        const oldest = self.written - len;
+        for (out[0..len], oldest..) |*rec, i| rec.* = self.records[i % ring_capacity];
+        return out[0..len];
+    }
+};
+
+var enabled = std.atomic.Value(bool).init(false);
+/// Set once before `enabled` is, span timestamps are relative to it.
+var epoch: std.time.Instant = undefined;
+
+/// Rings of the threads that recorded spans, appended under `rings_mutex` and published
+/// through `ring_count`. Rings stay around after their thread exits so its spans can
+/// still be dumped.
+var rings: [max_threads]*ThreadRing = undefined;
+var ring_count = std.atomic.Value(usize).init(0);
+var rings_mutex: std.Thread.Mutex = .{};
+
+threadlocal var thread_ring: ?*ThreadRing = null;
+/// Set when this thread could not get a ring, so it does not try again on every span.
+threadlocal var thread_ring_unavailable: bool = false;
+
+/// Starts recording spans, later calls are no-ops.
+pub fn enable() void {
+    if (comptime !isZKVM()) {
+        rings_mutex.lock();
+        defer rings_mutex.unlock();
+        if (enabled.load(.monotonic)) return;
+        epoch = std.time.Instant.now() catch return;
+        enabled.store(true, .release);
+    }
+}
+
+pub fn isEnabled() bool {
+    if (comptime isZKVM()) {
+        return false;
+    } else {
+        return enabled.load(.acquire);
+    }
+}
+
+fn now() ?u64 {
+    const instant = std.time.Instant.now() catch return null;
+    return instant.since(epoch);
+}
+
+fn threadRing() ?*ThreadRing {
+    if (thread_ring) |ring| return ring;
+    if (thread_ring_unavailable) return null;
+
+    rings_mutex.lock();
+    defer rings_mutex.unlock();
+    const count = ring_count.load(.monotonic);
+    // rings live as long as the process, they come straight from the page allocator
+    const ring = if (count < max_threads) std.heap.page_allocator.create(ThreadRing) catch null else null;
+    if (ring == null) {
+        thread_ring_unavailable = true;
+        return null;
+    }
+    ring.?.* = .{ .tid = std.Thread.getCurrentId() };
+    rings[count] = ring.?;
+    ring_count.store(count + 1, .release);
+    thread_ring = ring;
+    return ring;
+}
+
+/// Writes the spans held by all threads as a Chrome trace-event JSON object, timestamps
+/// in microseconds since tracing was enabled. Threads keep recording while this runs.
+pub fn writeChromeTrace(allocator: Allocator, writer: *std.Io.Writer) !void {
+    try writer.writeAll("{\"traceEvents\":[");
+    if (comptime !isZKVM()) {
+        try writeEvents(allocator, writer);
+    }
+    try writer.writeAll("],\"displayTimeUnit\":\"ms\"}");
+}
+
+fn writeEvents(allocator: Allocator, writer: *std.Io.Writer) !void {
+    const scratch = try allocator.alloc(Record, ring_capacity);
+    defer allocator.free(scratch);
+
+    var first = true;
+    for (rings[0..ring_count.load(.acquire)]) |ring| {
+        for (ring.snapshot(scratch)) |rec| {
+            if (!first) try writer.writeByte(',');
+            first = false;
+            try writer.print("{{\"name\":\"{s}\",\"cat\":\"zeam\",\"ph\":\"X\",\"ts\":{d}.{d:0>3},\"dur\":{d}.{d:0>3},\"pid\":1,\"tid\":{d}}}", .{
+                rec.name.label(),
+                rec.start_ns / std.time.ns_per_us,
+                rec.start_ns % std.time.ns_per_us,
+                rec.duration_ns / std.time.ns_per_us,
+                rec.duration_ns % std.time.ns_per_us,
+                ring.tid,
+            });
+        }
+    }
+}
+
+test "spans of several threads end up in the chrome trace" {
+    const allocator = std.testing.allocator;
+    enable();
+
+    const Worker = struct {
+        fn run() void {
+            for (0..ring_capacity + 10) |_| {
+                const outer = span(.chain_on_block);
+                defer outer.end();
+                const inner = span(.stf_apply_transition);
+                inner.end();
+            }
+        }
+    };
+    var threads: [2]std.Thread = undefined;
+    for (&threads) |*thread| thread.* = try std.Thread.spawn(.{}, Worker.run, .{});
+    for (threads) |thread| thread.join();
+
+    var out: std.Io.Writer.Allocating = .init(allocator);
+    defer out.deinit();
+    try writeChromeTrace(allocator, &out.writer);
+
+    const Event = struct { name: []const u8, ph: []const u8, ts: f64, dur: f64, tid: u64 };
+    const parsed = try std.json.parseFromSlice(struct { traceEvents: []const Event }, allocator, out.written(), .{ .ignore_unknown_fields = true });
+    defer parsed.deinit();
+
+    // each ring holds its newest spans, inner and outer alternating
+    const events = parsed.value.traceEvents;
+    try std.testing.expectEqual(2 * ring_capacity, events.len);
+    var outer_count: usize = 0;
+    for (events) |event| {
+        try std.testing.expectEqualStrings("X", event.ph);
+        if (std.mem.eql(u8, event.name, "BeamChain.onBlock")) {
+            outer_count += 1;
+        } else {
+            try std.testing.expectEqualStrings("stf.apply_transition", event.name);
+        }
+    }
+    try std.testing.expectEqual(ring_capacity, outer_count);
+}
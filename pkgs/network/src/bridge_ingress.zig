@@ -0,0 +1,292 @@
+const std = @import("std");
+const Allocator = std.mem.Allocator;
+
+const xev = @import("xev");
+const types = @import("@zeam/types");
+const zeam_metrics = @import("@zeam/metrics");
+const zeam_utils = @import("@zeam/utils");
+
+const interface = @import("./interface.zig");
+
+const MpscRing = zeam_utils.MpscRing;
+
+/// A decoded gossip message waiting in the ingress queue, owns the message and the peer id.
+pub const QueuedGossip = struct {
+    allocator: Allocator,
+    message: interface.GossipMessage,
+    sender_peer_id: []const u8,
+    enqueued_at_ns: i128,
+
+    pub fn deinit(self: *QueuedGossip) void {
+        self.message.deinit();
+        self.allocator.free(self.sender_peer_id);
+    }
+};
+
+pub const GossipDispatchFn = *const fn (ctx: *anyopaque, message: *const interface.GossipMessage, sender_peer_id: []const u8) void;
+
+/// Hands everything a foreign thread (the libp2p bridge thread) reports to the xev loop thread,
+/// which also runs the interval ticks, so the chain, forkchoice and the network's request
+/// bookkeeping only ever see one thread. Both queues wake the loop through one `xev.Async`.
+///
+/// Gossip goes through a bounded `MpscRing` and is dropped once the loop falls behind, the loop
+/// drains it in bounded batches so interval ticks are not starved under a gossip flood. The
+/// other events (`Event`, e.g. RPC responses, stream ends and peer events) must not be lost, a
+/// pending request is only released by its end of stream, so they queue in order in a list
+/// under a mutex and are all handled on every wakeup. `Event` must provide
+/// `deinit(*Event, Allocator)`.
+pub fn BridgeIngress(comptime Event: type) type {
+    return struct {
+        allocator: Allocator,
+        ring: MpscRing(*QueuedGossip),
+        events_mutex: std.Thread.Mutex,
+        // appended by any thread under `events_mutex`
+        events: std.ArrayList(Event),
+        // swapped with `events` by the loop thread, handled outside the lock
+        draining: std.ArrayList(Event),
+        notifier: xev.Async,
+        completion: xev.Completion,
+        max_batch: usize,
+        ctx: *anyopaque,
+        dispatchGossipFn: GossipDispatchFn,
+        dispatchEventFn: EventDispatchFn,
+        started: bool,
+
+        pub const EventDispatchFn = *const fn (ctx: *anyopaque, event: *Event) void;
+
+        const Self = @This();
+
+        pub fn init(
+            allocator: Allocator,
+            capacity: usize,
+            max_batch: usize,
+            ctx: *anyopaque,
+            dispatchGossipFn: GossipDispatchFn,
+            dispatchEventFn: EventDispatchFn,
+        ) !Self {
+            var ring = try MpscRing(*QueuedGossip).init(allocator, capacity);
+            errdefer ring.deinit();
+
+            const notifier = try xev.Async.init();
+            return .{
+                .allocator = allocator,
+                .ring = ring,
+                .events_mutex = .{},
+                .events = .empty,
+                .draining = .empty,
+                .notifier = notifier,
+                .completion = undefined,
+                .max_batch = max_batch,
+                .ctx = ctx,
+                .dispatchGossipFn = dispatchGossipFn,
+                .dispatchEventFn = dispatchEventFn,
+                .started = false,
+            };
+        }
+
+        pub fn deinit(self: *Self) void {
+            while (self.ring.pop()) |queued| {
+                self.destroyQueued(queued);
+            }
+            self.ring.deinit();
+            for (self.events.items) |*event| event.deinit(self.allocator);
+            self.events.deinit(self.allocator);
+            self.draining.deinit(self.allocator);
+            self.notifier.deinit();
+        }
+
+        /// Starts waiting for gossip and events on `loop`, neither `self` nor `ctx` may move afterwards.
+        pub fn start(self: *Self, loop: *xev.Loop, ctx: *anyopaque) void {
+            self.ctx = ctx;
+            if (self.started) return;
+            self.started = true;
+            self.notifier.wait(loop, &self.completion, Self, self, onNotify);
+        }
+
+        /// Queues `message` for the loop thread, taking ownership of it even on error. Safe to
+        /// call from any thread, a full queue drops the message with error.GossipIngressFull.
+        pub fn push(self: *Self, message: interface.GossipMessage, sender_peer_id: []const u8) !void {
+            var owned_message = message;
+            const queued = self.allocator.create(QueuedGossip) catch |err| {
+                owned_message.deinit();
+                return err;
+            };
+            const owned_peer_id = self.allocator.dupe(u8, sender_peer_id) catch |err| {
+                owned_message.deinit();
+                self.allocator.destroy(queued);
+                return err;
+            };
+            queued.* = .{
+                .allocator = self.allocator,
+                .message = owned_message,
+                .sender_peer_id = owned_peer_id,
+                .enqueued_at_ns = std.time.nanoTimestamp(),
+            };
+
+            if (!self.ring.push(queued)) {
+                self.destroyQueued(queued);
+                zeam_metrics.metrics.lean_gossip_ingress_dropped_total.incr();
+                return error.GossipIngressFull;
+            }
+            // wakeups coalesce, a failed notify is picked up by the next push
+            self.notifier.notify() catch {};
+        }
+
+        /// Queues `event` for the loop thread behind the events pushed before it, taking
+        /// ownership of it even on error. Safe to call from any thread.
+        pub fn pushEvent(self: *Self, event: Event) !void {
+            {
+                self.events_mutex.lock();
+                defer self.events_mutex.unlock();
+                self.events.append(self.allocator, event) catch |err| {
+                    var owned_event = event;
+                    owned_event.deinit(self.allocator);
+                    return err;
+                };
+            }
+            self.notifier.notify() catch {};
+        }
+
+        fn destroyQueued(self: *Self, queued: *QueuedGossip) void {
+            queued.deinit();
+            self.allocator.destroy(queued);
+        }
+
+        fn onNotify(
+            ud: ?*Self,
+            _: *xev.Loop,
+            _: *xev.Completion,
+            r: xev.Async.WaitError!void,
+        ) xev.CallbackAction {
+            _ = r catch return .rearm;
+            const self = ud orelse return .disarm;
+            self.drainEvents();
+            self.drainGossip();
+            return .rearm;
+        }
+
+        fn drainEvents(self: *Self) void {
+            {
+                self.events_mutex.lock();
+                defer self.events_mutex.unlock();
+                std.mem.swap(std.ArrayList(Event), &self.events, &self.draining);
+            }
+            defer self.draining.clearRetainingCapacity();
+            for (self.draining.items) |*event| {
+                defer event.deinit(self.allocator);
+                self.dispatchEventFn(self.ctx, event);
+            }
+        }
+
+        fn drainGossip(self: *Self) void {
+            var handled: usize = 0;
+            while (handled < self.max_batch) : (handled += 1) {
+                const queued = self.ring.pop() orelse break;
+                defer self.destroyQueued(queued);
+
+                const waited_ns = @max(std.time.nanoTimestamp() - queued.enqueued_at_ns, 0);
+                zeam_metrics.metrics.lean_gossip_ingress_wait_seconds.observe(@as(f32, @floatFromInt(waited_ns)) / std.time.ns_per_s);
+                self.dispatchGossipFn(self.ctx, &queued.message, queued.sender_peer_id);
+            }
+
+            const remaining = self.ring.len();
+            zeam_metrics.metrics.lean_gossip_ingress_queue_depth.set(remaining);
+            if (handled > 0) zeam_metrics.metrics.lean_gossip_ingress_batch_size.observe(@floatFromInt(handled));
+            // yield to the timers between batches, the rearmed wait picks up the rest
+            if (remaining > 0) self.notifier.notify() catch {};
+        }
+    };
+}
+
+test "gossip and events pushed from two threads are all handled on the loop thread in order" {
+    const allocator = std.testing.allocator;
+    const per_thread = 1000;
+
+    const TestEvent = struct {
+        seq: usize,
+
+        pub fn deinit(_: *@This(), _: Allocator) void {}
+    };
+
+    const Handler = struct {
+        loop_thread: std.Thread.Id,
+        // set while a dispatch runs, a second dispatch entering meanwhile means they raced
+        dispatching: std.atomic.Value(bool) = std.atomic.Value(bool).init(false),
+        concurrent: bool = false,
+        foreign_thread: bool = false,
+        next_validator: usize = 0,
+        next_event: usize = 0,
+        out_of_order: bool = false,
+
+        fn enter(self: *@This()) void {
+            if (self.dispatching.swap(true, .acquire)) self.concurrent = true;
+            if (std.Thread.getCurrentId() != self.loop_thread) self.foreign_thread = true;
+        }
+
+        fn leave(self: *@This()) void {
+            self.dispatching.store(false, .release);
+        }
+
+        fn onGossip(ptr: *anyopaque, message: *const interface.GossipMessage, _: []const u8) void {
+            const self: *@This() = @ptrCast(@alignCast(ptr));
+            self.enter();
+            defer self.leave();
+            if (message.attestation.message.validator_id != self.next_validator) self.out_of_order = true;
+            self.next_validator += 1;
+        }
+
+        fn onEvent(ptr: *anyopaque, event: *TestEvent) void {
+            const self: *@This() = @ptrCast(@alignCast(ptr));
+            self.enter();
+            defer self.leave();
+            if (event.seq != self.next_event) self.out_of_order = true;
+            self.next_event += 1;
+        }
+    };
+
+    const Ingress = BridgeIngress(TestEvent);
+    const Producers = struct {
+        fn gossip(ingress: *Ingress) void {
+            for (0..per_thread) |i| {
+                const message = interface.GossipMessage{ .attestation = .{
+                    .subnet_id = 0,
+                    .message = .{
+                        .validator_id = @intCast(i),
+                        .message = .{
+                            .slot = 1,
+                            .head = .{ .root = [_]u8{1} ** 32, .slot = 1 },
+                            .target = .{ .root = [_]u8{1} ** 32, .slot = 1 },
+                            .source = .{ .root = [_]u8{0} ** 32, .slot = 0 },
+                        },
+                        .signature = [_]u8{0} ** types.SIGSIZE,
+                    },
+                } };
+                ingress.push(message, "peer") catch unreachable;
+            }
+        }
+
+        fn events(ingress: *Ingress) void {
+            for (0..per_thread) |i| ingress.pushEvent(.{ .seq = i }) catch unreachable;
+        }
+    };
+
+    var loop = try xev.Loop.init(.{});
+    defer loop.deinit();
+
+    var handler = Handler{ .loop_thread = std.Thread.getCurrentId() };
+    var ingress = try Ingress.init(allocator, per_thread, 64, &handler, Handler.onGossip, Handler.onEvent);
+    defer ingress.deinit();
+    ingress.start(&loop, &handler);
+
+    const gossip_thread = try std.Thread.spawn(.{}, Producers.gossip, .{&ingress});
+    const events_thread = try std.Thread.spawn(.{}, Producers.events, .{&ingress});
+    while (handler.next_validator < per_thread or handler.next_event < per_thread) {
+        try loop.run(.once);
+    }
+    gossip_thread.join();
+    events_thread.join();
+
+    try std.testing.expect(!handler.concurrent);
+    try std.testing.expect(!handler.foreign_thread);
+    try std.testing.expect(!handler.out_of_order);
+}
@@ -10,6 +10,7 @@ const multiaddr_mod = @import("multiaddr");
 const Multiaddr = multiaddr_mod.Multiaddr;
 const uvarint = multiformats.uvarint;
 const zeam_utils = @import("@zeam/utils");
+const consensus_params = @import("@zeam/params");
 
 const interface = @import("./interface.zig");
 const NetworkInterface = interface.NetworkInterface;
@@ -17,6 +18,9 @@ const snappyz = @import("snappyz");
 const snappyframesz = @import("snappyframesz");
 const node_registry = @import("./node_registry.zig");
 const NodeNameRegistry = node_registry.NodeNameRegistry;
+const bridge_ingress = @import("./bridge_ingress.zig");
+const gossip_decode = @import("./gossip_decode.zig");
+const gossip_seen_cache = @import("./gossip_seen_cache.zig");
 
 const ServerStreamError = error{
     StreamAlreadyFinished,
@@ -24,6 +28,13 @@ const ServerStreamError = error{
 };
 
 const MAX_RPC_MESSAGE_SIZE: usize = 4 * 1024 * 1024;
+// decoded gossip waiting for the loop thread, beyond this the bridge thread drops messages
+const GOSSIP_INGRESS_CAPACITY: usize = 4096;
+// gossip messages handled per loop wakeup before yielding to the timers
+const GOSSIP_INGRESS_MAX_BATCH: usize = 256;
+// gossip payloads are remembered for at least (buckets - 1) slots to drop duplicates early
+const GOSSIP_SEEN_CACHE_BUCKETS: usize = 3;
+const GOSSIP_SEEN_CACHE_MAX_ENTRIES: usize = 1 << 16;
 const MAX_VARINT_BYTES: usize = uvarint.bufferSize(usize);
 
 const FrameDecodeError = error{
@@ -234,7 +245,8 @@ fn serverStreamIsFinished(ptr: *anyopaque) bool {
 }
 
 /// Writes failed deserialization bytes to disk for debugging purposes
-/// Returns the filename if the file was successfully created, null otherwise
+/// Returns the filename, allocated with `allocator` and owned by the caller, if the file was
+/// successfully created, null otherwise
 /// If timestamp is null, generates a new timestamp automatically
 fn writeFailedBytes(message_bytes: []const u8, message_type: []const u8, allocator: Allocator, timestamp: ?i64, logger: zeam_utils.ModuleLogger) ?[]const u8 {
     // Create dumps directory if it doesn't exist
@@ -252,7 +264,8 @@ fn writeFailedBytes(message_bytes: []const u8, message_type: []const u8, allocat
         logger.err("Failed to allocate filename for {s} deserialization dump: {any}", .{ message_type, e });
         return null;
     };
-    defer allocator.free(filename);
+    var keep_filename = false;
+    defer if (!keep_filename) allocator.free(filename);
 
     // Write bytes to file
     const file = std.fs.cwd().createFile(filename, .{ .truncate = true }) catch |e| {
@@ -273,80 +286,51 @@ fn writeFailedBytes(message_bytes: []const u8, message_type: []const u8, allocat
     };
 
     logger.warn("SSZ deserialization failed for {s} message - written {d} bytes to debug file: {s}", .{ message_type, message_bytes.len, filename });
+    keep_filename = true;
     return filename;
 }
 
-/// Generic SSZ deserializer for gossip messages. Returns null on failure (with
-/// error logging and debug-file creation), so callers can simply `orelse return`.
-fn deserializeGossipMessage(
-    comptime T: type,
-    comptime label: []const u8,
-    data: []const u8,
-    allocator: Allocator,
-    logger: zeam_utils.ModuleLogger,
-) ?T {
-    var message_data: T = undefined;
-    ssz.deserialize(T, data, &message_data, allocator) catch |e| {
-        logger.err("Error in deserializing the signed {s} message: {any}", .{ label, e });
-        if (writeFailedBytes(data, label, allocator, null, logger)) |filename| {
-            logger.err("{s} deserialization failed - debug file created: {s}", .{ label, filename });
-        } else {
-            logger.err("{s} deserialization failed - could not create debug file", .{label});
-        }
-        return null;
-    };
-    return message_data;
-}
-
 export fn handleMsgFromRustBridge(zigHandler: *EthLibp2p, topic_str: [*:0]const u8, message_ptr: [*]const u8, message_len: usize, sender_peer_id: [*:0]const u8) void {
-    const topic = interface.LeanNetworkTopic.decode(zigHandler.allocator, topic_str) catch |err| {
+    const message_bytes: []const u8 = message_ptr[0..message_len];
+
+    // copies of an accepted message that reached us from another peer cost only the hash
+    const now_ns: u64 = @intCast(@max(std.time.nanoTimestamp(), 0));
+    const seen_key = zigHandler.gossipSeenCache.key(std.mem.span(topic_str), message_bytes);
+    if (zigHandler.gossipSeenCache.contains(seen_key, now_ns)) {
+        return;
+    }
+
+    // transient buffers of this message live in the decoder scratch, only this thread decodes gossip
+    const decoder = &zigHandler.gossipDecoder;
+    const scratch = decoder.beginMessage();
+
+    const topic = interface.LeanNetworkTopic.decode(scratch, topic_str) catch |err| {
         zigHandler.logger.err("Ignoring Invalid topic_id={s} sent in handleMsgFromRustBridge: {any}", .{ std.mem.span(topic_str), err });
         return;
     };
 
-    const message_bytes: []const u8 = message_ptr[0..message_len];
-
-    const uncompressed_message = snappyz.decode(zigHandler.allocator, message_bytes) catch |e| {
+    const uncompressed_message = decoder.decompress(message_bytes) catch |e| {
         zigHandler.logger.err("Error in snappyz decoding the message for topic={s}: {any}", .{ std.mem.span(topic_str), e });
-        if (writeFailedBytes(message_bytes, "snappyz_decode", zigHandler.allocator, null, zigHandler.logger)) |filename| {
+        if (writeFailedBytes(message_bytes, "snappyz_decode", scratch, null, zigHandler.logger)) |filename| {
             zigHandler.logger.err("Snappyz decode failed - debug file created: {s}", .{filename});
         } else {
             zigHandler.logger.err("Snappyz decode failed - could not create debug file", .{});
         }
         return;
     };
-    defer zigHandler.allocator.free(uncompressed_message);
-    var message: interface.GossipMessage = switch (topic.gossip_topic.kind) {
-        .block => .{ .block = deserializeGossipMessage(
-            types.SignedBlockWithAttestation,
-            "block",
-            uncompressed_message,
-            zigHandler.allocator,
-            zigHandler.logger,
-        ) orelse return },
-        .attestation => blk: {
-            const subnet_id = topic.gossip_topic.subnet_id orelse {
-                zigHandler.logger.err("attestation topic missing subnet id: {s}", .{std.mem.span(topic_str)});
-                return;
-            };
-            const msg = deserializeGossipMessage(
-                types.SignedAttestation,
-                "attestation",
-                uncompressed_message,
-                zigHandler.allocator,
-                zigHandler.logger,
-            ) orelse return;
-            break :blk .{ .attestation = .{ .subnet_id = subnet_id, .message = msg } };
-        },
-        .aggregation => .{ .aggregation = deserializeGossipMessage(
-            types.SignedAggregatedAttestation,
-            "aggregation",
-            uncompressed_message,
-            zigHandler.allocator,
-            zigHandler.logger,
-        ) orelse return },
+    var message = decoder.deserialize(topic.gossip_topic, uncompressed_message) catch |e| {
+        const label = @tagName(topic.gossip_topic.kind);
+        zigHandler.logger.err("Error in deserializing the signed {s} message for topic={s}: {any}", .{ label, std.mem.span(topic_str), e });
+        if (e == error.MissingSubnetId) return;
+        if (writeFailedBytes(uncompressed_message, label, scratch, null, zigHandler.logger)) |filename| {
+            zigHandler.logger.err("{s} deserialization failed - debug file created: {s}", .{ label, filename });
+        } else {
+            zigHandler.logger.err("{s} deserialization failed - could not create debug file", .{label});
+        }
+        return;
     };
-    defer message.deinit();
+    var message_owned = true;
+    defer if (message_owned) message.deinit();
 
     const sender_peer_id_slice = std.mem.span(sender_peer_id);
     const node_name = zigHandler.node_registry.getNodeNameFromPeerId(sender_peer_id_slice);
@@ -410,10 +394,14 @@ export fn handleMsgFromRustBridge(zigHandler: *EthLibp2p, topic_str: [*:0]const
         },
     );
 
-    // TODO: figure out why scheduling on the loop is not working
-    zigHandler.gossipHandler.onGossip(&message, sender_peer_id_slice, false) catch |e| {
-        zigHandler.logger.err("onGossip handling of message failed with error e={any} from sender_peer_id={s}{f}", .{ e, sender_peer_id_slice, node_name });
+    // handed over to the loop thread, which owns the chain, instead of running the handlers here
+    message_owned = false;
+    zigHandler.bridgeIngress.push(message, sender_peer_id_slice) catch |e| {
+        zigHandler.logger.warn("dropping gossip message from sender_peer_id={s}{f}: {any}", .{ sender_peer_id_slice, node_name, e });
+        return;
     };
+    // only a message that made it into the queue shadows its later copies
+    zigHandler.gossipSeenCache.insert(seen_key, now_ns);
 }
 
 export fn handleRPCRequestFromRustBridge(
@@ -424,9 +412,21 @@ export fn handleRPCRequestFromRustBridge(
     request_ptr: [*]const u8,
     request_len: usize,
 ) void {
-    const peer_id_slice = std.mem.span(peer_id);
-    const protocol_slice = std.mem.span(protocol_id);
+    zigHandler.queueBridgeEvent(.rpc_request, .{
+        .channel_id = channel_id,
+        .peer_id = std.mem.span(peer_id),
+        .protocol_id = std.mem.span(protocol_id),
+        .frame = request_ptr[0..request_len],
+    });
+}
 
+fn handleRPCRequest(
+    zigHandler: *EthLibp2p,
+    channel_id: u64,
+    peer_id_slice: []const u8,
+    protocol_slice: []const u8,
+    request_frame: []const u8,
+) void {
     const node_name = zigHandler.node_registry.getNodeNameFromPeerId(peer_id_slice);
     const rpc_protocol = LeanSupportedProtocol.fromSlice(protocol_slice) orelse {
         zigHandler.logger.warn(
@@ -437,8 +437,6 @@ export fn handleRPCRequestFromRustBridge(
         return;
     };
 
-    const request_frame: []const u8 = request_ptr[0..request_len];
-
     const request_frame_info = parseRequestFrame(request_frame) catch |err| {
         zigHandler.logger.err(
             "network-{d}:: Invalid RPC request frame from peer={s}{f} protocol={s}: {any}",
@@ -481,6 +479,7 @@ export fn handleRPCRequestFromRustBridge(
             .{ label, peer_id_slice, node_name, err },
         );
         if (writeFailedBytes(request_bytes, label, zigHandler.allocator, null, zigHandler.logger)) |filename| {
+            defer zigHandler.allocator.free(filename);
             zigHandler.logger.err("RPC {s} deserialization failed - debug file created: {s} from peer={s}{f}", .{ label, filename, peer_id_slice, node_name });
         } else {
             zigHandler.logger.err("RPC {s} deserialization failed - could not create debug file from peer={s}{f}", .{ label, peer_id_slice, node_name });
@@ -572,8 +571,21 @@ export fn handleRPCResponseFromRustBridge(
     response_ptr: [*]const u8,
     response_len: usize,
 ) void {
-    const protocol_slice = std.mem.span(protocol_id);
-    const peer_id_slice = std.mem.span(peer_id);
+    zigHandler.queueBridgeEvent(.rpc_response, .{
+        .request_id = request_id,
+        .peer_id = std.mem.span(peer_id),
+        .protocol_id = std.mem.span(protocol_id),
+        .frame = response_ptr[0..response_len],
+    });
+}
+
+fn handleRPCResponse(
+    zigHandler: *EthLibp2p,
+    request_id: u64,
+    peer_id_slice: []const u8,
+    protocol_slice: []const u8,
+    response_frame: []const u8,
+) void {
     const node_name = zigHandler.node_registry.getNodeNameFromPeerId(peer_id_slice);
 
     const callback_ptr = zigHandler.rpcCallbacks.getPtr(request_id) orelse {
@@ -605,8 +617,6 @@ export fn handleRPCResponseFromRustBridge(
         );
     }
 
-    const response_frame = response_ptr[0..response_len];
-
     const parsed_frame = parseResponseFrame(response_frame) catch |err| {
         zigHandler.notifyRpcErrorFmt(
             request_id,
@@ -703,8 +713,19 @@ export fn handleRPCEndOfStreamFromRustBridge(
     peer_id: [*:0]const u8,
     protocol_id: [*:0]const u8,
 ) void {
-    const protocol_slice = std.mem.span(protocol_id);
-    const peer_id_slice = std.mem.span(peer_id);
+    zigHandler.queueBridgeEvent(.rpc_end_of_stream, .{
+        .request_id = request_id,
+        .peer_id = std.mem.span(peer_id),
+        .protocol_id = std.mem.span(protocol_id),
+    });
+}
+
+fn handleRPCEndOfStream(
+    zigHandler: *EthLibp2p,
+    request_id: u64,
+    peer_id_slice: []const u8,
+    protocol_slice: []const u8,
+) void {
     const node_name = zigHandler.node_registry.getNodeNameFromPeerId(peer_id_slice);
     const protocol_str = if (LeanSupportedProtocol.fromSlice(protocol_slice)) |proto| proto.protocolId() else protocol_slice;
 
@@ -744,9 +765,22 @@ export fn handleRPCErrorFromRustBridge(
     code: u32,
     message_ptr: [*:0]const u8,
 ) void {
-    const protocol_slice = std.mem.span(protocol_id);
+    zigHandler.queueBridgeEvent(.rpc_error, .{
+        .request_id = request_id,
+        .protocol_id = std.mem.span(protocol_id),
+        .code = code,
+        .message = std.mem.span(message_ptr),
+    });
+}
+
+fn handleRPCError(
+    zigHandler: *EthLibp2p,
+    request_id: u64,
+    protocol_slice: []const u8,
+    code: u32,
+    message_slice: []const u8,
+) void {
     const protocol_str = if (LeanSupportedProtocol.fromSlice(protocol_slice)) |proto| proto.protocolId() else protocol_slice;
-    const message_slice = std.mem.span(message_ptr);
 
     if (zigHandler.rpcCallbacks.fetchRemove(request_id)) |entry| {
         var callback = entry.value;
@@ -794,9 +828,14 @@ export fn handlePeerConnectedFromRustBridge(
     peer_id: [*:0]const u8,
     direction: u32,
 ) void {
-    const peer_id_slice = std.mem.span(peer_id);
+    zigHandler.queueBridgeEvent(.peer_connected, .{
+        .peer_id = std.mem.span(peer_id),
+        .direction = @enumFromInt(direction),
+    });
+}
+
+fn handlePeerConnected(zigHandler: *EthLibp2p, peer_id_slice: []const u8, dir: interface.PeerDirection) void {
     const node_name = zigHandler.node_registry.getNodeNameFromPeerId(peer_id_slice);
-    const dir = @as(interface.PeerDirection, @enumFromInt(direction));
     zigHandler.logger.info("network-{d}:: Peer connected: {s}{f} direction={s}", .{
         zigHandler.params.networkId,
         peer_id_slice,
@@ -815,10 +854,20 @@ export fn handlePeerDisconnectedFromRustBridge(
     direction: u32,
     reason: u32,
 ) void {
-    const peer_id_slice = std.mem.span(peer_id);
+    zigHandler.queueBridgeEvent(.peer_disconnected, .{
+        .peer_id = std.mem.span(peer_id),
+        .direction = @enumFromInt(direction),
+        .reason = @enumFromInt(reason),
+    });
+}
+
+fn handlePeerDisconnected(
+    zigHandler: *EthLibp2p,
+    peer_id_slice: []const u8,
+    dir: interface.PeerDirection,
+    rsn: interface.DisconnectionReason,
+) void {
     const node_name = zigHandler.node_registry.getNodeNameFromPeerId(peer_id_slice);
-    const dir = @as(interface.PeerDirection, @enumFromInt(direction));
-    const rsn = @as(interface.DisconnectionReason, @enumFromInt(reason));
     zigHandler.logger.info("network-{d}:: Peer disconnected: {s}{f} direction={s} reason={s}", .{
         zigHandler.params.networkId,
         peer_id_slice,
@@ -838,9 +887,19 @@ export fn handlePeerConnectionFailedFromRustBridge(
     direction: u32,
     result: u32,
 ) void {
-    const peer_id_slice = if (peer_id) |p| std.mem.span(p) else "unknown";
-    const dir = @as(interface.PeerDirection, @enumFromInt(direction));
-    const res = @as(interface.ConnectionResult, @enumFromInt(result));
+    zigHandler.queueBridgeEvent(.peer_connection_failed, .{
+        .peer_id = if (peer_id) |p| std.mem.span(p) else "unknown",
+        .direction = @enumFromInt(direction),
+        .result = @enumFromInt(result),
+    });
+}
+
+fn handlePeerConnectionFailed(
+    zigHandler: *EthLibp2p,
+    peer_id_slice: []const u8,
+    dir: interface.PeerDirection,
+    res: interface.ConnectionResult,
+) void {
     zigHandler.logger.info("network-{d}:: Peer connection failed: {s} direction={s} result={s}", .{
         zigHandler.params.networkId,
         peer_id_slice,
@@ -923,6 +982,48 @@ pub extern fn send_rpc_error_response(
     message_ptr: [*:0]const u8,
 ) callconv(.c) void;
 
+/// A callback of the rust bridge thread waiting to be handled on the loop thread. The bridge only
+/// lends its buffers for the duration of the callback, the queued event owns copies of them.
+const BridgeEvent = union(enum) {
+    rpc_request: struct { channel_id: u64, peer_id: []const u8, protocol_id: []const u8, frame: []const u8 },
+    rpc_response: struct { request_id: u64, peer_id: []const u8, protocol_id: []const u8, frame: []const u8 },
+    rpc_end_of_stream: struct { request_id: u64, peer_id: []const u8, protocol_id: []const u8 },
+    rpc_error: struct { request_id: u64, protocol_id: []const u8, code: u32, message: []const u8 },
+    peer_connected: struct { peer_id: []const u8, direction: interface.PeerDirection },
+    peer_disconnected: struct { peer_id: []const u8, direction: interface.PeerDirection, reason: interface.DisconnectionReason },
+    peer_connection_failed: struct { peer_id: []const u8, direction: interface.PeerDirection, result: interface.ConnectionResult },
+
+    /// Replaces the borrowed byte slices of the event with owned copies.
+    fn own(self: *BridgeEvent, allocator: Allocator) !void {
+        switch (self.*) {
+            inline else => |*payload| {
+                const fields = std.meta.fields(@TypeOf(payload.*));
+                inline for (fields, 0..) |field, index| {
+                    if (field.type != []const u8) continue;
+                    @field(payload, field.name) = allocator.dupe(u8, @field(payload, field.name)) catch |err| {
+                        inline for (fields[0..index]) |copied| {
+                            if (copied.type == []const u8) allocator.free(@field(payload, copied.name));
+                        }
+                        return err;
+                    };
+                }
+            },
+        }
+    }
+
+    pub fn deinit(self: *BridgeEvent, allocator: Allocator) void {
+        switch (self.*) {
+            inline else => |payload| {
+                inline for (std.meta.fields(@TypeOf(payload))) |field| {
+                    if (field.type == []const u8) allocator.free(@field(payload, field.name));
+                }
+            },
+        }
+    }
+};
+
+const BridgeIngress = bridge_ingress.BridgeIngress(BridgeEvent);
+
 pub const EthLibp2pParams = struct {
     networkId: u32,
     network_name: []const u8,
@@ -936,6 +1037,11 @@ pub const EthLibp2pParams = struct {
 pub const EthLibp2p = struct {
     allocator: Allocator,
     gossipHandler: interface.GenericGossipHandler,
+    // everything the rust bridge thread reports is handled on the loop thread
+    bridgeIngress: BridgeIngress,
+    // only used by the rust bridge thread
+    gossipDecoder: gossip_decode.GossipDecoder,
+    gossipSeenCache: gossip_seen_cache.SeenMessageCache,
     peerEventHandler: interface.PeerEventHandler,
     reqrespHandler: interface.ReqRespRequestHandler,
     params: EthLibp2pParams,
@@ -963,6 +1069,25 @@ pub const EthLibp2p = struct {
         const gossip_handler = try interface.GenericGossipHandler.init(allocator, loop, params.networkId, logger, params.node_registry);
         errdefer gossip_handler.deinit();
 
+        // the context is set once the network is at its final address in `run`
+        var ingress = try BridgeIngress.init(
+            allocator,
+            GOSSIP_INGRESS_CAPACITY,
+            GOSSIP_INGRESS_MAX_BATCH,
+            undefined,
+            dispatchQueuedGossip,
+            dispatchBridgeEvent,
+        );
+        errdefer ingress.deinit();
+
+        var seen_cache = try gossip_seen_cache.SeenMessageCache.init(
+            allocator,
+            GOSSIP_SEEN_CACHE_BUCKETS,
+            consensus_params.SECONDS_PER_SLOT * std.time.ns_per_s,
+            GOSSIP_SEEN_CACHE_MAX_ENTRIES,
+        );
+        errdefer seen_cache.deinit();
+
         const peer_event_handler = try interface.PeerEventHandler.init(allocator, params.networkId, logger, params.node_registry);
         errdefer peer_event_handler.deinit();
 
@@ -981,6 +1106,9 @@ pub const EthLibp2p = struct {
                 .attestation_committee_count = params.attestation_committee_count,
             },
             .gossipHandler = gossip_handler,
+            .bridgeIngress = ingress,
+            .gossipDecoder = gossip_decode.GossipDecoder.init(allocator),
+            .gossipSeenCache = seen_cache,
             .peerEventHandler = peer_event_handler,
             .reqrespHandler = reqresp_handler,
             .rpcCallbacks = std.AutoHashMapUnmanaged(u64, interface.ReqRespRequestCallback).empty,
@@ -990,6 +1118,9 @@ pub const EthLibp2p = struct {
     }
 
     pub fn deinit(self: *Self) void {
+        self.bridgeIngress.deinit();
+        self.gossipDecoder.deinit();
+        self.gossipSeenCache.deinit();
         self.gossipHandler.deinit();
         self.peerEventHandler.deinit();
 
@@ -1050,6 +1181,9 @@ pub const EthLibp2p = struct {
         }
         const topics_str = try std.mem.joinZ(self.allocator, ",", topics_list.items);
 
+        // bridge callbacks are handled on the loop, same thread as the interval ticks
+        self.bridgeIngress.start(self.gossipHandler.loop, self);
+
         self.rustBridgeThread = try Thread.spawn(.{}, create_and_run_network, .{ self.params.networkId, self, local_private_key.ptr, listen_addresses_str.ptr, connect_peers_str.ptr, topics_str.ptr });
 
         // Wait for the network to be fully initialized before returning
@@ -1093,6 +1227,42 @@ pub const EthLibp2p = struct {
         return self.gossipHandler.onGossip(data, sender_peer_id, false);
     }
 
+    fn dispatchQueuedGossip(ptr: *anyopaque, data: *const interface.GossipMessage, sender_peer_id: []const u8) void {
+        const self: *Self = @ptrCast(@alignCast(ptr));
+        self.gossipHandler.onGossip(data, sender_peer_id, false) catch |e| {
+            self.logger.err("onGossip handling of message failed with error e={any} from sender_peer_id={s}{f}", .{
+                e,
+                sender_peer_id,
+                self.node_registry.getNodeNameFromPeerId(sender_peer_id),
+            });
+        };
+    }
+
+    /// Copies `payload` out of the bridge callback and queues it for the loop thread.
+    fn queueBridgeEvent(self: *Self, comptime tag: std.meta.Tag(BridgeEvent), payload: @FieldType(BridgeEvent, @tagName(tag))) void {
+        var event = @unionInit(BridgeEvent, @tagName(tag), payload);
+        event.own(self.allocator) catch |err| {
+            self.logger.err("network-{d}:: dropping {s} event of the rust bridge: {any}", .{ self.params.networkId, @tagName(tag), err });
+            return;
+        };
+        self.bridgeIngress.pushEvent(event) catch |err| {
+            self.logger.err("network-{d}:: dropping {s} event of the rust bridge: {any}", .{ self.params.networkId, @tagName(tag), err });
+        };
+    }
+
+    fn dispatchBridgeEvent(ptr: *anyopaque, event: *BridgeEvent) void {
+        const self: *Self = @ptrCast(@alignCast(ptr));
+        switch (event.*) {
+            .rpc_request => |e| handleRPCRequest(self, e.channel_id, e.peer_id, e.protocol_id, e.frame),
+            .rpc_response => |e| handleRPCResponse(self, e.request_id, e.peer_id, e.protocol_id, e.frame),
+            .rpc_end_of_stream => |e| handleRPCEndOfStream(self, e.request_id, e.peer_id, e.protocol_id),
+            .rpc_error => |e| handleRPCError(self, e.request_id, e.protocol_id, e.code, e.message),
+            .peer_connected => |e| handlePeerConnected(self, e.peer_id, e.direction),
+            .peer_disconnected => |e| handlePeerDisconnected(self, e.peer_id, e.direction, e.reason),
+            .peer_connection_failed => |e| handlePeerConnectionFailed(self, e.peer_id, e.direction, e.result),
+        }
+    }
+
     pub fn sendRPCRequest(
         ptr: *anyopaque,
         peer_id: []const u8,
@@ -0,0 +1,112 @@
+const std = @import("std");
+const Allocator = std.mem.Allocator;
+
+const ssz = @import("ssz");
+const snappyz = @import("snappyz");
+const types = @import("@zeam/types");
+
+const interface = @import("./interface.zig");
+
+// scratch capacity kept between messages, a burst of large blocks should not pin memory forever
+pub const GOSSIP_DECODE_SCRATCH_RETAIN_BYTES: usize = 4 * 1024 * 1024;
+
+/// Decodes snappy compressed gossip payloads without heap churn on the receiving thread.
+/// Everything that only lives for one message (the decoded topic, the decompressed bytes,
+/// debug dump names) goes into a scratch arena that is reset, keeping its capacity, when the
+/// next message begins. Only the deserialized message is allocated with `allocator` since it
+/// outlives the call, and fixed size messages like `SignedAttestation` are copied straight
+/// out of the scratch bytes without allocating at all.
+///
+/// Not thread safe, every decoding thread owns its own decoder.
+pub const GossipDecoder = struct {
+    allocator: Allocator,
+    scratch: std.heap.ArenaAllocator,
+
+    const Self = @This();
+
+    pub fn init(allocator: Allocator) Self {
+        return .{
+            .allocator = allocator,
+            .scratch = std.heap.ArenaAllocator.init(allocator),
+        };
+    }
+
+    pub fn deinit(self: *Self) void {
+        self.scratch.deinit();
+    }
+
+    /// Releases the scratch memory of the previous message and returns the scratch
+    /// allocator for the new one, valid until the next call.
+    pub fn beginMessage(self: *Self) Allocator {
+        _ = self.scratch.reset(.{ .retain_with_limit = GOSSIP_DECODE_SCRATCH_RETAIN_BYTES });
+        return self.scratch.allocator();
+    }
+
+    /// Decompresses a raw snappy block into scratch memory.
+    pub fn decompress(self: *Self, compressed: []const u8) ![]const u8 {
+        return snappyz.decode(self.scratch.allocator(), compressed);
+    }
+
+    /// Deserializes the uncompressed ssz bytes of a message received on `topic`. The result
+    /// does not reference scratch memory and is freed with `GossipMessage.deinit`.
+    pub fn deserialize(self: *Self, topic: interface.GossipTopic, data: []const u8) !interface.GossipMessage {
+        return switch (topic.kind) {
+            .block => .{ .block = try self.deserializeAs(types.SignedBlockWithAttestation, data) },
+            .attestation => .{ .attestation = .{
+                .subnet_id = topic.subnet_id orelse return error.MissingSubnetId,
+                .message = try self.deserializeAs(types.SignedAttestation, data),
+            } },
+            .aggregation => .{ .aggregation = try self.deserializeAs(types.SignedAggregatedAttestation, data) },
+        };
+    }
+
+    fn deserializeAs(self: *Self, comptime T: type, data: []const u8) !T {
+        var message: T = undefined;
+        try ssz.deserialize(T, data, &message, self.allocator);
+        return message;
+    }
+};
+
+test "gossip decoder round trips an attestation without allocating" {
+    const allocator = std.testing.allocator;
+
+    const attestation = interface.GossipMessage{ .attestation = .{
+        .subnet_id = 3,
+        .message = .{
+            .validator_id = 7,
+            .message = .{
+                .slot = 9,
+                .head = .{ .root = [_]u8{1} ** 32, .slot = 9 },
+                .target = .{ .root = [_]u8{2} ** 32, .slot = 8 },
+                .source = .{ .root = [_]u8{3} ** 32, .slot = 4 },
+            },
+            .signature = [_]u8{5} ** types.SIGSIZE,
+        },
+    } };
+    const serialized = try attestation.serialize(allocator);
+    defer allocator.free(serialized);
+    const compressed = try snappyz.encode(allocator, serialized);
+    defer allocator.free(compressed);
+
+    // the long lived allocator fails every allocation, only scratch memory may be used
+    var decoder = GossipDecoder{
+        .allocator = std.testing.failing_allocator,
+        .scratch = std.heap.ArenaAllocator.init(allocator),
+    };
+    defer decoder.deinit();
+
+    for (0..3) |_| {
+        _ = decoder.beginMessage();
+        const uncompressed = try decoder.decompress(compressed);
+        try std.testing.expectEqualSlices(u8, serialized, uncompressed);
+
+        var decoded = try decoder.deserialize(.{ .kind = .attestation, .subnet_id = 3 }, uncompressed);
+        defer decoded.deinit();
+        try std.testing.expectEqual(@as(types.SubnetId, 3), decoded.attestation.subnet_id);
+        try std.testing.expectEqual(@as(types.ValidatorIndex, 7), decoded.attestation.message.validator_id);
+        try std.testing.expectEqual(attestation.attestation.message.message, decoded.attestation.message.message);
+        try std.testing.expectEqualSlices(u8, &attestation.attestation.message.signature, &decoded.attestation.message.signature);
+    }
+
+    try std.testing.expectError(error.MissingSubnetId, decoder.deserialize(.{ .kind = .attestation }, serialized));
+}
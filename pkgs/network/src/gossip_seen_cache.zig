@@ -0,0 +1,189 @@
+const std = @import("std");
+const Allocator = std.mem.Allocator;
+
+const zeam_metrics = @import("@zeam/metrics");
+
+/// Remembers the gossip messages accepted recently so that copies arriving from another peer
+/// are dropped before paying for snappy decode and ssz deserialization. Messages are keyed by
+/// a 64 bit Wyhash of the topic and the compressed bytes, seeded per process so peers can not
+/// aim for collisions. A message is only recorded with `insert` once it was accepted, so a
+/// copy failing validation or dropped by a full queue does not shadow a later valid one.
+///
+/// Entries are kept in a ring of time buckets, a payload is remembered for at least
+/// `bucket_ns * (buckets - 1)`. Rotating the ring forgets the oldest bucket, which touches
+/// only the entries inserted into that bucket, so eviction costs O(1) per message. Not thread
+/// safe, the cache belongs to the thread receiving gossip.
+pub const SeenMessageCache = struct {
+    allocator: Allocator,
+    // message key -> generation of the bucket it was last inserted into
+    seen: std.AutoHashMapUnmanaged(u64, u64),
+    buckets: []std.ArrayListUnmanaged(u64),
+    bucket_ns: u64,
+    max_entries: usize,
+    // absolute index of the current bucket, now / bucket_ns
+    generation: u64,
+    seed: u64,
+
+    const Self = @This();
+
+    pub fn init(allocator: Allocator, num_buckets: usize, bucket_ns: u64, max_entries: usize) !Self {
+        std.debug.assert(num_buckets >= 2 and bucket_ns > 0);
+
+        const buckets = try allocator.alloc(std.ArrayListUnmanaged(u64), num_buckets);
+        for (buckets) |*bucket| bucket.* = .empty;
+
+        var seed: u64 = undefined;
+        std.crypto.random.bytes(std.mem.asBytes(&seed));
+
+        return .{
+            .allocator = allocator,
+            .seen = .empty,
+            .buckets = buckets,
+            .bucket_ns = bucket_ns,
+            .max_entries = max_entries,
+            .generation = 0,
+            .seed = seed,
+        };
+    }
+
+    pub fn deinit(self: *Self) void {
+        for (self.buckets) |*bucket| bucket.deinit(self.allocator);
+        self.allocator.free(self.buckets);
+        self.seen.deinit(self.allocator);
+    }
+
+    pub fn count(self: *const Self) usize {
+        return self.seen.count();
+    }
+
+    /// Key of the message `payload` received on `topic`, the same payload on another topic is
+    /// another message.
+    pub fn key(self: *const Self, topic: []const u8, payload: []const u8) u64 {
+        var hasher = std.hash.Wyhash.init(self.seed);
+        hasher.update(topic);
+        // topics never contain a zero byte, so the split between topic and payload is unique
+        hasher.update(&[_]u8{0});
+        hasher.update(payload);
+        return hasher.final();
+    }
+
+    /// Returns true if the message with `hash` was accepted within the window.
+    pub fn contains(self: *Self, hash: u64, now_ns: u64) bool {
+        self.advance(now_ns / self.bucket_ns);
+
+        if (self.seen.getPtr(hash)) |generation| {
+            // a hit moves the entry to the current bucket, once per bucket
+            if (generation.* != self.generation) {
+                if (self.currentBucket().append(self.allocator, hash)) {
+                    generation.* = self.generation;
+                } else |_| {}
+            }
+            zeam_metrics.metrics.lean_gossip_seen_cache_hits_total.incr();
+            return true;
+        }
+        zeam_metrics.metrics.lean_gossip_seen_cache_misses_total.incr();
+        return false;
+    }
+
+    /// Records the accepted message with `hash`. When the cache is full or out of memory the
+    /// message is not recorded, so its copies are decoded again.
+    pub fn insert(self: *Self, hash: u64, now_ns: u64) void {
+        self.advance(now_ns / self.bucket_ns);
+        if (self.seen.contains(hash) or self.seen.count() >= self.max_entries) return;
+
+        self.currentBucket().append(self.allocator, hash) catch return;
+        self.seen.put(self.allocator, hash, self.generation) catch {
+            _ = self.currentBucket().pop();
+        };
+        zeam_metrics.metrics.lean_gossip_seen_cache_entries.set(self.seen.count());
+    }
+
+    fn currentBucket(self: *Self) *std.ArrayListUnmanaged(u64) {
+        return &self.buckets[self.generation % self.buckets.len];
+    }
+
+    fn advance(self: *Self, generation: u64) void {
+        if (generation <= self.generation) return;
+
+        if (generation - self.generation >= self.buckets.len) {
+            // a full lap or more went by, every entry is stale
+            self.seen.clearRetainingCapacity();
+            for (self.buckets) |*bucket| bucket.clearRetainingCapacity();
+            self.generation = generation;
+        } else {
+            while (self.generation < generation) {
+                self.generation += 1;
+                const bucket = self.currentBucket();
+                // wraps during the first lap, when no entry can be that old
+                const stale_generation = self.generation -% self.buckets.len;
+                for (bucket.items) |hash| {
+                    // entries seen again later moved to a newer bucket and stay
+                    if (self.seen.get(hash)) |inserted| {
+                        if (inserted == stale_generation) _ = self.seen.remove(hash);
+                    }
+                }
+                bucket.clearRetainingCapacity();
+            }
+        }
+        zeam_metrics.metrics.lean_gossip_seen_cache_entries.set(self.seen.count());
+    }
+};
+
+/// Test helper doing what the bridge thread does with a message that gets accepted.
+fn checkAndInsert(cache: *SeenMessageCache, payload: []const u8, now_ns: u64) bool {
+    const hash = cache.key("topic", payload);
+    if (cache.contains(hash, now_ns)) return true;
+    cache.insert(hash, now_ns);
+    return false;
+}
+
+test "seen message cache drops duplicates within the window" {
+    var cache = try SeenMessageCache.init(std.testing.allocator, 3, 100, 1024);
+    defer cache.deinit();
+
+    try std.testing.expect(!checkAndInsert(&cache, "block", 0));
+    try std.testing.expect(!checkAndInsert(&cache, "attestation", 50));
+    try std.testing.expect(checkAndInsert(&cache, "block", 120));
+    try std.testing.expect(checkAndInsert(&cache, "attestation", 250));
+    try std.testing.expectEqual(@as(usize, 2), cache.count());
+
+    // the last sighting of block at 120 is in the bucket rotated out at 400
+    try std.testing.expect(!checkAndInsert(&cache, "block", 400));
+    // attestation was refreshed at 250 so it is still remembered
+    try std.testing.expect(checkAndInsert(&cache, "attestation", 450));
+
+    // jumping far ahead forgets everything
+    try std.testing.expect(!checkAndInsert(&cache, "attestation", 10_000));
+    try std.testing.expectEqual(@as(usize, 1), cache.count());
+}
+
+test "seen message cache lets payloads through once full" {
+    var cache = try SeenMessageCache.init(std.testing.allocator, 2, 100, 2);
+    defer cache.deinit();
+
+    try std.testing.expect(!checkAndInsert(&cache, "a", 0));
+    try std.testing.expect(!checkAndInsert(&cache, "b", 0));
+    try std.testing.expect(!checkAndInsert(&cache, "c", 0));
+    try std.testing.expect(!checkAndInsert(&cache, "c", 0));
+    try std.testing.expect(checkAndInsert(&cache, "a", 0));
+    try std.testing.expectEqual(@as(usize, 2), cache.count());
+}
+
+test "seen message cache keys on the topic and only remembers inserted messages" {
+    var cache = try SeenMessageCache.init(std.testing.allocator, 2, 100, 16);
+    defer cache.deinit();
+
+    const block_key = cache.key("/leanconsensus/devnet0/block/ssz_snappy", "payload");
+    const attestation_key = cache.key("/leanconsensus/devnet0/attestation/ssz_snappy", "payload");
+    try std.testing.expect(block_key != attestation_key);
+
+    // a copy that was rejected is not remembered, the next one is decoded again
+    try std.testing.expect(!cache.contains(block_key, 0));
+    try std.testing.expect(!cache.contains(block_key, 10));
+
+    cache.insert(block_key, 10);
+    try std.testing.expect(cache.contains(block_key, 20));
+    // the same payload on another topic is another message
+    try std.testing.expect(!cache.contains(attestation_key, 20));
+    try std.testing.expectEqual(@as(usize, 1), cache.count());
+}
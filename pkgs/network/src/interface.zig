@@ -36,6 +36,7 @@ pub const DisconnectionReason = enum(u32) {
 const topic_prefix = "leanconsensus";
 const lean_blocks_by_root_protocol = "/leanconsensus/req/blocks_by_root/1/ssz_snappy";
 const lean_status_protocol = "/leanconsensus/req/status/1/ssz_snappy";
+const lean_blocks_by_range_protocol = "/leanconsensus/req/blocks_by_range/1/ssz_snappy";
 
 fn freeJsonValue(val: *json.Value, allocator: Allocator) void {
     switch (val.*) {
@@ -354,14 +355,17 @@ pub const GossipMessage = union(GossipTopicKind) {
     }
 };
 
+// the tag values are the protocol tags of the rust glue, keep the order in sync
 pub const LeanSupportedProtocol = enum {
     blocks_by_root,
     status,
+    blocks_by_range,
 
     pub fn protocolId(self: LeanSupportedProtocol) []const u8 {
         return switch (self) {
             .blocks_by_root => lean_blocks_by_root_protocol,
             .status => lean_status_protocol,
+            .blocks_by_range => lean_blocks_by_range_protocol,
         };
     }
 
@@ -386,6 +390,10 @@ pub const LeanSupportedProtocol = enum {
             return .blocks_by_root;
         }
 
+        if (std.mem.eql(u8, protocol_id, lean_blocks_by_range_protocol)) {
+            return .blocks_by_range;
+        }
+
         return error.UnsupportedProtocol;
     }
 };
@@ -393,6 +401,7 @@ pub const LeanSupportedProtocol = enum {
 pub const ReqRespRequest = union(LeanSupportedProtocol) {
     blocks_by_root: types.BlockByRootRequest,
     status: types.Status,
+    blocks_by_range: types.BlocksByRangeRequest,
 
     const Self = @This();
 
@@ -400,6 +409,7 @@ pub const ReqRespRequest = union(LeanSupportedProtocol) {
         switch (self) {
             .blocks_by_root => try writer.writeAll("ReqRespRequest{ blocks_by_root }"),
             .status => try writer.writeAll("ReqRespRequest{ status }"),
+            .blocks_by_range => |request| try writer.print("ReqRespRequest{{ blocks_by_range start_slot={d} count={d} }}", .{ request.start_slot, request.count }),
         }
     }
 
@@ -407,6 +417,7 @@ pub const ReqRespRequest = union(LeanSupportedProtocol) {
         return switch (self.*) {
             .status => |status| status.toJson(allocator),
             .blocks_by_root => |request| request.toJson(allocator),
+            .blocks_by_range => |request| request.toJson(allocator),
         };
     }
 
@@ -470,13 +481,14 @@ pub const ReqRespRequest = union(LeanSupportedProtocol) {
 pub const ReqRespResponse = union(LeanSupportedProtocol) {
     blocks_by_root: types.SignedBlockWithAttestation,
     status: types.Status,
+    blocks_by_range: types.SignedBlockWithAttestation,
 
     const Self = @This();
 
     pub fn toJson(self: *const ReqRespResponse, allocator: Allocator) !json.Value {
         return switch (self.*) {
             .status => |status| status.toJson(allocator),
-            .blocks_by_root => |block| block.toJson(allocator),
+            .blocks_by_root, .blocks_by_range => |block| block.toJson(allocator),
         };
     }
 
@@ -514,7 +526,7 @@ pub const ReqRespResponse = union(LeanSupportedProtocol) {
     pub fn deinit(self: *ReqRespResponse) void {
         switch (self.*) {
             .status => {},
-            .blocks_by_root => |*block| block.deinit(),
+            .blocks_by_root, .blocks_by_range => |*block| block.deinit(),
         }
     }
 };
@@ -39,6 +39,18 @@ pub const EthLibp2p = ethlibp2pFactory.EthLibp2p;
 const node_registryFactory = @import("./node_registry.zig");
 pub const NodeNameRegistry = node_registryFactory.NodeNameRegistry;
 
+const bridgeIngressFactory = @import("./bridge_ingress.zig");
+pub const BridgeIngress = bridgeIngressFactory.BridgeIngress;
+
+const gossipDecodeFactory = @import("./gossip_decode.zig");
+pub const GossipDecoder = gossipDecodeFactory.GossipDecoder;
+
+const gossipSeenCacheFactory = @import("./gossip_seen_cache.zig");
+pub const SeenMessageCache = gossipSeenCacheFactory.SeenMessageCache;
+
 test "get tests" {
+    _ = @import("./bridge_ingress.zig");
+    _ = @import("./gossip_decode.zig");
+    _ = @import("./gossip_seen_cache.zig");
     @import("std").testing.refAllDeclsRecursive(@This());
 }
@@ -93,7 +93,7 @@ pub const Mock = struct {
                 .status => |status_req| {
                     task.payload = .{ .success = interface.ReqRespResponse{ .status = status_req } };
                 },
-                .blocks_by_root => {
+                .blocks_by_root, .blocks_by_range => {
                     task.payload = .{ .failure = .{ .code = 1, .message = "mock peer has no block data" } };
                 },
             }
@@ -442,6 +442,11 @@ pub const Mock = struct {
                 try types.sszClone(self.allocator, types.SignedBlockWithAttestation, block_resp, &cloned_block);
                 break :blk interface.ReqRespResponse{ .blocks_by_root = cloned_block };
             },
+            .blocks_by_range => |block_resp| blk: {
+                var cloned_block: types.SignedBlockWithAttestation = undefined;
+                try types.sszClone(self.allocator, types.SignedBlockWithAttestation, block_resp, &cloned_block);
+                break :blk interface.ReqRespResponse{ .blocks_by_range = cloned_block };
+            },
         };
     }
 
@@ -453,6 +458,7 @@ pub const Mock = struct {
                 try types.sszClone(self.allocator, types.BlockByRootRequest, block_req, &cloned_request);
                 break :blk interface.ReqRespRequest{ .blocks_by_root = cloned_request };
             },
+            .blocks_by_range => |range_req| interface.ReqRespRequest{ .blocks_by_range = range_req },
         };
     }
 
@@ -904,7 +910,7 @@ test "Mock status RPC between peers" {
                     try stream.sendResponse(&response);
                     try stream.finish();
                 },
-                .blocks_by_root => {
+                .blocks_by_root, .blocks_by_range => {
                     try stream.sendError(1, "unsupported");
                 },
             }
@@ -915,7 +921,7 @@ test "Mock status RPC between peers" {
             switch (event.payload) {
                 .success => |resp| switch (resp) {
                     .status => |status_resp| self.received_status = status_resp,
-                    .blocks_by_root => {
+                    .blocks_by_root, .blocks_by_range => {
                         self.failures += 1;
                     },
                 },
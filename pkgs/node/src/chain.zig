@@ -21,6 +21,10 @@ const xmss = @import("@zeam/xmss");
 pub const fcFactory = @import("./forkchoice.zig");
 const constants = @import("./constants.zig");
 const tree_visualizer = @import("./tree_visualizer.zig");
+const SignatureVerifier = @import("./signature_verifier.zig").SignatureVerifier;
+const GossipAttestationQueue = @import("./gossip_attestation_queue.zig").GossipAttestationQueue;
+const FinalizedStateCache = @import("./finalized_state_cache.zig").FinalizedStateCache;
+const ForkChoiceGraphCache = @import("./forkchoice_graph.zig").ForkChoiceGraphCache;
 
 const networkFactory = @import("./network.zig");
 const PeerInfo = networkFactory.PeerInfo;
@@ -50,6 +54,8 @@ pub const ChainOpts = struct {
     node_registry: *const NodeNameRegistry,
     force_block_production: bool = false,
     is_aggregator: bool = false,
+    // worker threads verifying block signatures, 0 verifies inline on the chain thread
+    signature_verification_workers: usize = 0,
 };
 
 pub const CachedProcessedBlockInfo = struct {
@@ -61,6 +67,9 @@ pub const CachedProcessedBlockInfo = struct {
 pub const GossipProcessingResult = struct {
     processed_block_root: ?types.Root = null,
     missing_attestation_roots: []types.Root = &[_]types.Root{},
+    // the gossip attestation was queued for batched signature verification, it is neither
+    // valid nor invalid until its batch ran
+    attestation_pending: bool = false,
 };
 
 pub const ProducedBlock = struct {
@@ -82,6 +91,8 @@ pub const ProducedBlock = struct {
 pub const BeamChain = struct {
     config: configs.ChainConfig,
     anchor_state: *types.BeamState,
+    // block root of the anchor state, which is not guaranteed to be in the database
+    anchor_root: types.Root,
 
     forkChoice: fcFactory.ForkChoice,
     allocator: Allocator,
@@ -105,11 +116,22 @@ pub const BeamChain = struct {
     is_aggregator_enabled: bool,
     // Cached finalized state loaded from database (separate from states map to avoid affecting pruning)
     cached_finalized_state: ?*types.BeamState = null,
+    // SSZ encoding of the finalized state served to checkpoint syncing peers, dropped on finalization.
+    finalized_state_cache: FinalizedStateCache,
+    // Forkchoice graph rendered for the visualization endpoint, refreshed per forkchoice generation.
+    forkchoice_graph: ForkChoiceGraphCache,
     // Cache for validator public keys to avoid repeated SSZ deserialization during signature verification.
     // Significantly reduces CPU overhead when processing blocks with many attestations.
     public_key_cache: xmss.PublicKeyCache,
     // Cache for root to slot mapping to optimize block processing performance.
     root_to_slot_cache: types.RootToSlotCache,
+    // Merkle cache for state roots so the STF only rehashes the parts of the state a block touched.
+    state_root_cache: types.BeamStateRootCache,
+    // Fans block signature verification out to worker threads, heap allocated as the pool
+    // must not move once its workers are running.
+    signature_verifier: *SignatureVerifier,
+    // Gossip attestations waiting for their signatures to be verified in one batch per interval.
+    gossip_attestation_queue: GossipAttestationQueue,
 
     // Callback for pruning cached blocks after finalization advances
     prune_cached_blocks_ctx: ?*anyopaque = null,
@@ -137,6 +159,11 @@ pub const BeamChain = struct {
             .logger = logger_config.logger(.forkchoice),
         });
 
+        const signature_verifier = try allocator.create(SignatureVerifier);
+        errdefer allocator.destroy(signature_verifier);
+        try signature_verifier.init(allocator, opts.signature_verification_workers);
+        errdefer signature_verifier.deinit();
+
         var states = std.AutoHashMap(types.Root, *types.BeamState).init(allocator);
         const cloned_anchor_state = try allocator.create(types.BeamState);
         // Destroy outer allocation if sszClone fails (interior not yet allocated).
@@ -153,6 +180,7 @@ pub const BeamChain = struct {
             .allocator = allocator,
             .states = states,
             .anchor_state = opts.anchorState,
+            .anchor_root = fork_choice.head.blockRoot,
             .zeam_logger_config = logger_config,
             .logger = logger_config.logger(.chain),
             .stf_logger = logger_config.logger(.state_transition),
@@ -166,7 +194,16 @@ pub const BeamChain = struct {
             .is_aggregator_enabled = opts.is_aggregator,
             .public_key_cache = xmss.PublicKeyCache.init(allocator),
             .root_to_slot_cache = types.RootToSlotCache.init(allocator),
+            .state_root_cache = types.BeamStateRootCache.init(allocator),
+            .signature_verifier = signature_verifier,
+            .gossip_attestation_queue = GossipAttestationQueue.init(
+                allocator,
+                constants.MAX_PENDING_GOSSIP_ATTESTATIONS,
+                constants.MAX_PENDING_GOSSIP_ATTESTATIONS_PER_VALIDATOR,
+            ),
             .pending_blocks = .empty,
+            .finalized_state_cache = FinalizedStateCache.init(allocator, fork_choice.fcStore.latest_finalized),
+            .forkchoice_graph = ForkChoiceGraphCache.init(allocator),
         };
         // Initialize cache with anchor block root and any post-finalized entries from state
         try chain.root_to_slot_cache.put(fork_choice.head.blockRoot, opts.anchorState.slot);
@@ -196,11 +233,18 @@ pub const BeamChain = struct {
             self.allocator.destroy(cached_state);
         }
 
+        self.finalized_state_cache.deinit();
+        self.forkchoice_graph.deinit();
+
         // Clean up public key cache
         self.public_key_cache.deinit();
 
         // Clean up root to slot cache
         self.root_to_slot_cache.deinit();
+        self.state_root_cache.deinit();
+        self.signature_verifier.deinit();
+        self.allocator.destroy(self.signature_verifier);
+        self.gossip_attestation_queue.deinit();
         // Clean up any blocks that were queued waiting for the forkchoice clock
         for (self.pending_blocks.items) |*block| {
             block.deinit();
@@ -290,6 +334,8 @@ pub const BeamChain = struct {
             has_proposal,
         });
 
+        // import the attestations gossiped during the last interval before the forkchoice acts on this one
+        try self.processPendingGossipAttestations();
         try self.forkChoice.onInterval(time_intervals, has_proposal);
         if (interval == 1) {
             // interval to attest so we should put out the chain status information to the user along with
@@ -386,7 +432,7 @@ pub const BeamChain = struct {
             self.allocator.destroy(post_state_ptr);
         };
         const post_state = post_state_opt.?;
-        try types.sszClone(self.allocator, types.BeamState, pre_state.*, post_state);
+        try pre_state.clone(self.allocator, post_state);
 
         // Use the two-phase aggregation algorithm:
         // Phase 1: Collect individual signatures from gossip_signatures
@@ -464,18 +510,19 @@ pub const BeamChain = struct {
             attestation_signatures.deinit();
         }
 
-        const block_str = try block.toJsonString(self.allocator);
-        defer self.allocator.free(block_str);
-
-        self.logger.debug("node-{d}::going for block production opts={f} raw block={s}", .{ self.nodeId, opts, block_str });
+        self.logger.debug("node-{d}::going for block production opts={f} raw block={f}", .{
+            self.nodeId,
+            opts,
+            zeam_utils.LazyJson(types.BeamBlock).init(self.allocator, &block),
+        });
 
         // 2. apply STF to get post state & update post state root & cache it
-        try stf.apply_raw_block(self.allocator, post_state, &block, self.block_building_logger, &self.root_to_slot_cache);
+        try stf.apply_raw_block(self.allocator, post_state, &block, self.block_building_logger, &self.root_to_slot_cache, &self.state_root_cache);
 
-        const block_str_2 = try block.toJsonString(self.allocator);
-        defer self.allocator.free(block_str_2);
-
-        self.logger.debug("applied raw block opts={f} raw block={s}", .{ opts, block_str_2 });
+        self.logger.debug("applied raw block opts={f} raw block={f}", .{
+            opts,
+            zeam_utils.LazyJson(types.BeamBlock).init(self.allocator, &block),
+        });
 
         // 3. cache state to save recompute while adding the block on publish
         var block_root: [32]u8 = undefined;
@@ -526,28 +573,24 @@ pub const BeamChain = struct {
             .root = head_proto.blockRoot,
             .slot = head_proto.slot,
         };
-        const head_str = try head.toJsonString(self.allocator);
-        defer self.allocator.free(head_str);
 
         const safe_target_proto = self.forkChoice.getSafeTarget();
         const safe_target: types.Checkpoint = .{
             .root = safe_target_proto.blockRoot,
             .slot = safe_target_proto.slot,
         };
-        const safe_target_str = try safe_target.toJsonString(self.allocator);
-        defer self.allocator.free(safe_target_str);
 
-        self.logger.info("constructing attestation data at slot={d} with chain head={s} safe_target={s}", .{
+        self.logger.info("constructing attestation data at slot={d} with chain head={f} safe_target={f}", .{
             slot,
-            head_str,
-            safe_target_str,
+            zeam_utils.LazyJson(types.Checkpoint).init(self.allocator, &head),
+            zeam_utils.LazyJson(types.Checkpoint).init(self.allocator, &safe_target),
         });
 
         const target = try self.forkChoice.getAttestationTarget();
-        const target_str = try target.toJsonString(self.allocator);
-        defer self.allocator.free(target_str);
-
-        self.logger.info("calculated target for attestations at slot={d}: {s}", .{ slot, target_str });
+        self.logger.info("calculated target for attestations at slot={d}: {f}", .{
+            slot,
+            zeam_utils.LazyJson(types.Checkpoint).init(self.allocator, &target),
+        });
 
         const attestation_data = types.AttestationData{
             .slot = slot,
@@ -635,6 +678,9 @@ pub const BeamChain = struct {
     }
 
     pub fn onGossip(self: *Self, data: *const networks.GossipMessage, sender_peer_id: []const u8) !GossipProcessingResult {
+        const gossip_span = zeam_metrics.tracing.span(.chain_on_gossip);
+        defer gossip_span.end();
+
         switch (data.*) {
             .block => |signed_block| {
                 const block = signed_block.message.block;
@@ -765,18 +811,45 @@ pub const BeamChain = struct {
                     }
                 };
 
-                // Process validated attestation
-                self.onGossipAttestation(signed_attestation) catch |err| {
-                    zeam_metrics.metrics.lean_attestations_invalid_total.incr(.{ .source = "gossip" }) catch {};
-                    self.logger.err("attestation processing error: {any}", .{err});
-                    return err;
-                };
-                self.logger.info("processed gossip attestation for slot={d} validator={d}{f}", .{
-                    slot,
-                    validator_id,
-                    validator_node_name,
-                });
-                zeam_metrics.metrics.lean_attestations_valid_total.incr(.{ .source = "gossip" }) catch {};
+                // Queue the validated attestation, its signature is verified with the rest of its
+                // batch in processPendingGossipAttestations
+                switch (try self.gossip_attestation_queue.push(signed_attestation.message)) {
+                    .queued => {
+                        zeam_metrics.metrics.lean_gossip_attestation_queue_depth.set(self.gossip_attestation_queue.len());
+                        self.logger.debug("queued gossip attestation for slot={d} validator={d}{f} queue_depth={d}", .{
+                            slot,
+                            validator_id,
+                            validator_node_name,
+                            self.gossip_attestation_queue.len(),
+                        });
+                        // a full batch is verified right away, the interval tick picks up the rest
+                        if (self.gossip_attestation_queue.len() >= constants.GOSSIP_ATTESTATION_BATCH_SIZE) {
+                            self.processPendingGossipAttestations() catch |err| {
+                                self.logger.err("failed to verify gossip attestation batch: {any}", .{err});
+                            };
+                        }
+                        return .{ .attestation_pending = true };
+                    },
+                    .duplicate => {
+                        zeam_metrics.metrics.lean_gossip_attestations_dropped_total.incr(.{ .reason = "duplicate" }) catch {};
+                    },
+                    .validator_limit => {
+                        zeam_metrics.metrics.lean_gossip_attestations_dropped_total.incr(.{ .reason = "validator_limit" }) catch {};
+                        self.logger.debug("too many pending gossip attestations of validator={d}{f}, dropping attestation for slot={d}", .{
+                            validator_id,
+                            validator_node_name,
+                            slot,
+                        });
+                    },
+                    .full => {
+                        zeam_metrics.metrics.lean_gossip_attestations_dropped_total.incr(.{ .reason = "queue_full" }) catch {};
+                        self.logger.warn("gossip attestation queue full, dropping attestation for slot={d} validator={d}{f}", .{
+                            slot,
+                            validator_id,
+                            validator_node_name,
+                        });
+                    },
+                }
                 return .{};
             },
             .aggregation => |signed_aggregation| {
@@ -828,6 +901,8 @@ pub const BeamChain = struct {
     // Returns a list of missing block roots that need to be fetched from the network
     pub fn onBlock(self: *Self, signedBlock: types.SignedBlockWithAttestation, blockInfo: CachedProcessedBlockInfo) ![]types.Root {
         const onblock_timer = zeam_metrics.chain_onblock_duration_seconds.start();
+        const onblock_span = zeam_metrics.tracing.span(.chain_on_block);
+        defer onblock_span.end();
 
         const block = signedBlock.message.block;
 
@@ -842,23 +917,26 @@ pub const BeamChain = struct {
             // 1. get parent state
             const pre_state = self.states.get(block.parent_root) orelse return BlockProcessingError.MissingPreState;
             const cpost_state = try self.allocator.create(types.BeamState);
-            // If sszClone or anything after fails, destroy the outer allocation.
+            // If clone or anything after fails, destroy the outer allocation.
             errdefer self.allocator.destroy(cpost_state);
 
-            try types.sszClone(self.allocator, types.BeamState, pre_state.*, cpost_state);
-            // sszClone succeeded — interior heap fields are now allocated.
+            const clone_span = zeam_metrics.tracing.span(.chain_state_clone);
+            try pre_state.clone(self.allocator, cpost_state);
+            clone_span.end();
+            // clone succeeded — interior heap fields are now allocated.
             // If anything below fails, deinit interior first (LIFO: deinit runs before destroy above).
             errdefer cpost_state.deinit();
 
-            // 2. verify XMSS signatures (independent step; placed before STF for now, parallelizable later)
+            // 2. verify XMSS signatures (independent step; placed before STF), fanned out to the verifier workers
             // Use public key cache to avoid repeated SSZ deserialization of validator public keys
-            try stf.verifySignatures(self.allocator, pre_state, &signedBlock, &self.public_key_cache);
+            try self.signature_verifier.verifyBlock(self.allocator, pre_state, &signedBlock, &self.public_key_cache);
 
             // 3. apply state transition assuming signatures are valid (STF does not re-verify)
             try stf.apply_transition(self.allocator, cpost_state, block, .{
                 .logger = self.stf_logger,
                 .validSignatures = true,
                 .rootToSlotCache = &self.root_to_slot_cache,
+                .stateRootCache = &self.state_root_cache,
             });
             break :computedstate cpost_state;
         };
@@ -1051,6 +1129,7 @@ pub const BeamChain = struct {
         // Update finalized slot indices and cleanup if finalization has advanced
         // note use presaved local last_emitted_finalized as self.last_emitted_finalized has been updated above
         if (latest_finalized.slot > last_emitted_finalized.slot) {
+            self.finalized_state_cache.invalidate(latest_finalized);
             self.processFinalizationAdvancement(last_emitted_finalized, latest_finalized, pruneForkchoice) catch |err| {
                 // Record failed finalization attempt
                 zeam_metrics.metrics.lean_finalizations_total.incr(.{ .result = "error" }) catch {};
@@ -1090,12 +1169,25 @@ pub const BeamChain = struct {
 
     /// Update block database with block, state, and slot indices
     fn updateBlockDb(self: *Self, signedBlock: types.SignedBlockWithAttestation, blockRoot: types.Root, postState: types.BeamState, slot: types.Slot) !void {
+        const db_span = zeam_metrics.tracing.span(.chain_update_block_db);
+        defer db_span.end();
+
         var batch = self.db.initWriteBatch();
         defer batch.deinit();
 
-        // Store block and state
+        // Store block and state, the state as a diff against the parent state unless it starts
+        // a new snapshot interval or the parent state may not be in the database
         batch.putBlock(database.DbBlocksNamespace, blockRoot, signedBlock);
-        batch.putState(database.DbStatesNamespace, blockRoot, postState);
+        const parent_root = signedBlock.message.block.parent_root;
+        const parent_state = if (std.mem.eql(u8, &parent_root, &self.anchor_root)) null else self.states.get(parent_root);
+        if (parent_state != null and !database.isStateSnapshotSlot(parent_state.?.slot, postState.slot)) {
+            var diff: types.BeamStateDiff = undefined;
+            try diff.compute(self.allocator, parent_root, parent_state.?, &postState);
+            defer diff.deinit();
+            batch.putStateDiff(database.DbStateDiffsNamespace, blockRoot, diff);
+        } else {
+            batch.putState(database.DbStatesNamespace, blockRoot, postState);
+        }
 
         // TODO: uncomment this code if there is a need of slot to unfinalized index
         _ = slot;
@@ -1438,6 +1530,81 @@ pub const BeamChain = struct {
         return self.forkChoice.onSignedAttestation(signedAttestation.message);
     }
 
+    /// Verifies the signatures of the gossip attestations queued since the last interval in
+    /// parallel batches and imports the valid ones into the forkchoice.
+    pub fn processPendingGossipAttestations(self: *Self) !void {
+        const pending = try self.gossip_attestation_queue.drain();
+        defer self.allocator.free(pending);
+        zeam_metrics.metrics.lean_gossip_attestation_queue_depth.set(0);
+        if (pending.len == 0) return;
+        zeam_metrics.metrics.lean_gossip_attestation_batch_size.observe(@floatFromInt(pending.len));
+
+        var jobs: std.ArrayList(stf.SingleSignatureJob) = .empty;
+        defer jobs.deinit(self.allocator);
+        try jobs.ensureTotalCapacity(self.allocator, pending.len);
+        var job_attestations: std.ArrayList(*const types.SignedAttestation) = .empty;
+        defer job_attestations.deinit(self.allocator);
+        try job_attestations.ensureTotalCapacity(self.allocator, pending.len);
+
+        for (pending) |*entry| {
+            const attestation = &entry.attestation;
+            // states may have been pruned since the attestation was queued
+            const state = self.states.get(attestation.message.target.root) orelse {
+                zeam_metrics.metrics.lean_attestations_invalid_total.incr(.{ .source = "gossip" }) catch {};
+                self.logger.debug("dropping queued gossip attestation for slot={d} validator={d}: {any}", .{
+                    attestation.message.slot,
+                    attestation.validator_id,
+                    AttestationValidationError.MissingState,
+                });
+                continue;
+            };
+            const validators = state.validators.constSlice();
+            if (attestation.validator_id >= validators.len) {
+                zeam_metrics.metrics.lean_attestations_invalid_total.incr(.{ .source = "gossip" }) catch {};
+                self.logger.debug("dropping queued gossip attestation for slot={d} validator={d}: {any}", .{
+                    attestation.message.slot,
+                    attestation.validator_id,
+                    stf.StateTransitionError.InvalidValidatorId,
+                });
+                continue;
+            }
+
+            // the data root computed when queueing is the signed message
+            jobs.appendAssumeCapacity(.{
+                .pubkey = validators[@intCast(attestation.validator_id)].getPubkey(),
+                .message = entry.data_root,
+                .epoch = @intCast(attestation.message.slot),
+                .signature = &attestation.signature,
+            });
+            job_attestations.appendAssumeCapacity(attestation);
+        }
+
+        const valid = try self.allocator.alloc(bool, jobs.items.len);
+        defer self.allocator.free(valid);
+        self.signature_verifier.verifyEach(jobs.items, valid);
+
+        var imported: usize = 0;
+        for (job_attestations.items, valid) |attestation, is_valid| {
+            if (!is_valid) {
+                zeam_metrics.metrics.lean_attestations_invalid_total.incr(.{ .source = "gossip" }) catch {};
+                self.logger.warn("invalid signature on gossip attestation for slot={d} validator={d}", .{
+                    attestation.message.slot,
+                    attestation.validator_id,
+                });
+                continue;
+            }
+            self.forkChoice.onSignedAttestation(attestation.*) catch |err| {
+                zeam_metrics.metrics.lean_attestations_invalid_total.incr(.{ .source = "gossip" }) catch {};
+                self.logger.err("attestation processing error: {any}", .{err});
+                continue;
+            };
+            zeam_metrics.metrics.lean_attestations_valid_total.incr(.{ .source = "gossip" }) catch {};
+            imported += 1;
+        }
+
+        self.logger.info("processed gossip attestation batch size={d} imported={d}", .{ pending.len, imported });
+    }
+
     pub fn onGossipAggregatedAttestation(self: *Self, signedAggregation: types.SignedAggregatedAttestation) !void {
         try self.verifyAggregatedAttestation(signedAggregation);
 
@@ -1544,6 +1711,30 @@ pub const BeamChain = struct {
         return aggregations;
     }
 
+    /// Roots of the canonical blocks in [start_slot, end_slot) in ascending slot order for serving
+    /// blocks_by_range. Slots before the latest finalized one are read from the finalized slot
+    /// index, the finalized block and its descendants from the forkchoice.
+    pub fn getCanonicalBlockRootsInRange(self: *Self, allocator: Allocator, start_slot: types.Slot, end_slot: types.Slot) ![]types.Root {
+        var roots: std.ArrayList(types.Root) = .empty;
+        errdefer roots.deinit(allocator);
+
+        const finalized_slot = self.forkChoice.getLatestFinalized().slot;
+        var slot = start_slot;
+        while (slot < end_slot and slot < finalized_slot) : (slot += 1) {
+            if (self.db.loadFinalizedSlotIndex(database.DbFinalizedSlotsNamespace, slot)) |root| {
+                try roots.append(allocator, root);
+            }
+        }
+
+        if (slot < end_slot) {
+            const fc_roots = try self.forkChoice.getCanonicalBlockRootsInRange(allocator, slot, end_slot);
+            defer allocator.free(fc_roots);
+            try roots.appendSlice(allocator, fc_roots);
+        }
+
+        return roots.toOwnedSlice(allocator);
+    }
+
     pub fn getStatus(self: *Self) types.Status {
         const finalized = self.forkChoice.getLatestFinalized();
         const head = self.forkChoice.getHead();
@@ -2408,3 +2599,87 @@ test "attestation processing - valid block attestation" {
     const data_root = try valid_attestation.message.sszRoot(allocator);
     try std.testing.expect(beam_chain.forkChoice.attestation_data_by_root.get(data_root) != null);
 }
+
+test "attestation processing - forged gossip copy does not shadow the genuine attestation" {
+    var arena_allocator = std.heap.ArenaAllocator.init(std.testing.allocator);
+    defer arena_allocator.deinit();
+    const allocator = arena_allocator.allocator();
+
+    const mock_chain = try stf.genMockChain(allocator, 3, null);
+    const spec_name = try allocator.dupe(u8, "beamdev");
+    const chain_config = configs.ChainConfig{
+        .id = configs.Chain.custom,
+        .genesis = mock_chain.genesis_config,
+        .spec = .{
+            .preset = params.Preset.mainnet,
+            .name = spec_name,
+            .attestation_committee_count = 1,
+        },
+    };
+    var beam_state = mock_chain.genesis_state;
+    var zeam_logger_config = zeam_utils.getTestLoggerConfig();
+
+    var tmp_dir = std.testing.tmpDir(.{});
+    defer tmp_dir.cleanup();
+    const data_dir = try tmp_dir.dir.realpathAlloc(allocator, ".");
+    defer allocator.free(data_dir);
+
+    var db = try database.Db.open(allocator, zeam_logger_config.logger(.database_test), data_dir);
+    defer db.deinit();
+
+    const connected_peers = try allocator.create(std.StringHashMap(PeerInfo));
+    connected_peers.* = std.StringHashMap(PeerInfo).init(allocator);
+
+    const test_registry = try allocator.create(NodeNameRegistry);
+    defer allocator.destroy(test_registry);
+    test_registry.* = NodeNameRegistry.init(allocator);
+    defer test_registry.deinit();
+
+    var beam_chain = try BeamChain.init(allocator, ChainOpts{ .config = chain_config, .anchorState = &beam_state, .nodeId = 0, .logger_config = &zeam_logger_config, .db = db, .node_registry = test_registry }, connected_peers);
+    defer beam_chain.deinit();
+
+    for (1..mock_chain.blocks.len) |i| {
+        const block = mock_chain.blocks[i];
+        try beam_chain.forkChoice.onInterval(block.message.block.slot * constants.INTERVALS_PER_SLOT, false);
+        const missing_roots = try beam_chain.onBlock(block, .{});
+        allocator.free(missing_roots);
+    }
+
+    const message = types.Attestation{
+        .validator_id = 1,
+        .data = .{
+            .slot = 2,
+            .head = .{ .root = mock_chain.blockRoots[2], .slot = 2 },
+            .source = .{ .root = mock_chain.blockRoots[1], .slot = 1 },
+            .target = .{ .root = mock_chain.blockRoots[2], .slot = 2 },
+        },
+    };
+
+    var key_manager = try keymanager.getTestKeyManager(allocator, 4, 3);
+    defer key_manager.deinit();
+
+    const genuine: types.SignedAttestation = .{
+        .validator_id = message.validator_id,
+        .message = message.data,
+        .signature = try key_manager.signAttestation(&message, allocator),
+    };
+    var forged = genuine;
+    forged.signature[0] ^= 0xff;
+
+    const subnet_id = try types.computeSubnetId(genuine.validator_id, beam_chain.config.spec.attestation_committee_count);
+    const data_root = try genuine.message.sszRoot(allocator);
+
+    // the forged copy alone is queued but never imported
+    const forged_gossip = networks.GossipMessage{ .attestation = .{ .subnet_id = subnet_id, .message = forged } };
+    try std.testing.expect((try beam_chain.onGossip(&forged_gossip, "peer")).attestation_pending);
+    try beam_chain.processPendingGossipAttestations();
+    try std.testing.expect(beam_chain.forkChoice.attestation_data_by_root.get(data_root) == null);
+
+    // arriving first, the forged copy no longer gets the genuine one dropped as a duplicate
+    const genuine_gossip = networks.GossipMessage{ .attestation = .{ .subnet_id = subnet_id, .message = genuine } };
+    _ = try beam_chain.onGossip(&forged_gossip, "peer");
+    try std.testing.expect((try beam_chain.onGossip(&genuine_gossip, "peer")).attestation_pending);
+    try std.testing.expectEqual(@as(usize, 2), beam_chain.gossip_attestation_queue.len());
+    try beam_chain.processPendingGossipAttestations();
+    try std.testing.expect(beam_chain.forkChoice.attestation_data_by_root.get(data_root) != null);
+}
@@ -17,10 +17,60 @@ pub const MAX_BLOCK_FETCH_DEPTH = 512;
 // This prevents unbounded memory growth from malicious peers sending orphaned blocks
 pub const MAX_CACHED_BLOCKS = 1024;
 
+// Estimated memory budget of the fetched (orphan) blocks cache
+pub const MAX_CACHED_BLOCK_BYTES = 256 * 1024 * 1024;
+
+// Maximum number of cached orphan blocks received from a single peer
+pub const MAX_CACHED_BLOCKS_PER_PEER = 256;
+
 // Periodic state pruning interval: prune non-canonical states every N slots
 // Set to 7200 slots (approximately 8 hours in Lean, assuming 4 seconds per slot)
 pub const FORKCHOICE_PRUNING_INTERVAL_SLOTS: u64 = 7200;
 
+// Maximum number of gossip attestations buffered for batched signature verification between
+// two intervals, further attestations are dropped until the queue is drained
+pub const MAX_PENDING_GOSSIP_ATTESTATIONS = 4096;
+
+// Copies of one validator's attestations buffered at once. Signatures are not verified yet, so
+// copies with forged signatures only compete with the validator's own attestations instead of
+// filling the queue for everyone
+pub const MAX_PENDING_GOSSIP_ATTESTATIONS_PER_VALIDATOR = 2;
+
+// Pending gossip attestations are verified as soon as this many are queued rather than waiting
+// for the next interval, enough to keep the verifier workers busy
+pub const GOSSIP_ATTESTATION_BATCH_SIZE = 64;
+
+// Range sync is used instead of recursive parent fetching once a peer's head is more than this
+// many slots ahead of ours
+pub const RANGE_SYNC_MIN_SLOT_GAP = 32;
+
+// Slots requested per blocks_by_range request, bounded by MAX_REQUEST_BLOCKS
+pub const RANGE_SYNC_BATCH_SLOTS: u64 = 64;
+
+// Maximum number of range sync batches in flight or downloaded but not yet imported, i.e. the
+// request pipelining depth across peers
+pub const RANGE_SYNC_MAX_BATCHES = 8;
+
+// A range sync batch is retried this many times (failed or timed out requests, import errors)
+// before range sync is abandoned in favour of parent syncing from the peers' heads
+pub const RANGE_SYNC_MAX_BATCH_ATTEMPTS = 5;
+
+// Maximum number of outstanding req/resp requests per peer, range sync waits for a free peer
+// while one-off lookups fall back to the least loaded peer when every peer is at the limit
+pub const PEER_MAX_IN_FLIGHT_REQUESTS = 8;
+
+// Number of random peers compared when selecting a peer for a request (power of d choices)
+pub const PEER_SELECTION_SAMPLES = 2;
+
+// Weight of the latest sample in the exponentially weighted moving average of peer response latency
+pub const PEER_LATENCY_EWMA_ALPHA: f64 = 0.2;
+
+// Latency assumed for peers that did not answer any request yet
+pub const PEER_DEFAULT_LATENCY_MS: f64 = 500;
+
+// Head lag (behind the best known peer head) at which the selection cost of a peer doubles
+pub const PEER_HEAD_LAG_PENALTY_SLOTS: f64 = 32;
+
 // Forkchoice visualization constants
 pub const MAX_FC_DISPLAY_DEPTH = 100;
 pub const MAX_FC_DISPLAY_BRANCH = 10;
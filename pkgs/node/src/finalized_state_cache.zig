@@ -0,0 +1,251 @@
+const std = @import("std");
+const Allocator = std.mem.Allocator;
+
+const ssz = @import("ssz");
+const snappyframesz = @import("snappyframesz");
+const types = @import("@zeam/types");
+
+/// SSZ encoding of one finalized state, shared between concurrent responses. Holders keep it
+/// alive with `acquire`/`release` so the cache can drop it on finalization while it is sent.
+pub const FinalizedStateBlob = struct {
+    allocator: Allocator,
+    refs: std.atomic.Value(u32),
+    checkpoint: types.Checkpoint,
+    ssz_bytes: []u8,
+    // framed snappy encoding of ssz_bytes, built on first request without any lock held and
+    // installed once, see `snappyBytes`
+    snappy_bytes: std.atomic.Value(?*[]u8),
+    // quoted hex of the finalized block root, the state is fully determined by it
+    etag: [2 + 2 * 32]u8,
+
+    const Self = @This();
+
+    pub fn acquire(self: *Self) *Self {
+        _ = self.refs.fetchAdd(1, .monotonic);
+        return self;
+    }
+
+    pub fn release(self: *Self) void {
+        if (self.refs.fetchSub(1, .acq_rel) != 1) return;
+        self.allocator.free(self.ssz_bytes);
+        if (self.snappy_bytes.load(.acquire)) |bytes| self.destroySnappy(bytes);
+        self.allocator.destroy(self);
+    }
+
+    /// Framed snappy encoding if a request already compressed the blob, never compresses.
+    pub fn cachedSnappyBytes(self: *Self) ?[]const u8 {
+        const bytes = self.snappy_bytes.load(.acquire) orelse return null;
+        return bytes.*;
+    }
+
+    /// Framed snappy encoding of the blob, compressed once and kept with the blob. The caller
+    /// holds a reference, so no lock is needed while compressing, and concurrent first callers
+    /// race to install their encoding with the losers freeing theirs.
+    pub fn snappyBytes(self: *Self) ![]const u8 {
+        if (self.snappy_bytes.load(.acquire)) |bytes| return bytes.*;
+
+        const encoded = try self.allocator.create([]u8);
+        errdefer self.allocator.destroy(encoded);
+        encoded.* = try snappyframesz.encode(self.allocator, self.ssz_bytes);
+
+        if (self.snappy_bytes.cmpxchgStrong(null, encoded, .acq_rel, .acquire)) |installed| {
+            self.destroySnappy(encoded);
+            return installed.?.*;
+        }
+        return encoded.*;
+    }
+
+    fn destroySnappy(self: *Self, bytes: *[]u8) void {
+        self.allocator.free(bytes.*);
+        self.allocator.destroy(bytes);
+    }
+};
+
+/// Formats the ETag the blob for `checkpoint` is served with.
+pub fn finalizedStateEtag(checkpoint: types.Checkpoint) [2 + 2 * 32]u8 {
+    var etag: [2 + 2 * 32]u8 = undefined;
+    _ = std.fmt.bufPrint(&etag, "\"{x}\"", .{&checkpoint.root}) catch unreachable;
+    return etag;
+}
+
+/// Serialized finalized state for the checkpoint sync endpoint. The chain thread only moves
+/// the finalized checkpoint on finalization, which drops the cached blob in O(1). The api
+/// thread serializes the state on the first request after that and every further request is
+/// served from the shared blob without touching chain state. The mutex only guards the
+/// checkpoint and the blob pointer, serialization and compression run outside of it.
+pub const FinalizedStateCache = struct {
+    allocator: Allocator,
+    mutex: std.Thread.Mutex,
+    // finalized checkpoint published by the chain, the blob is valid for it only
+    finalized: types.Checkpoint,
+    blob: ?*FinalizedStateBlob,
+
+    const Self = @This();
+
+    pub fn init(allocator: Allocator, finalized: types.Checkpoint) Self {
+        return .{
+            .allocator = allocator,
+            .mutex = .{},
+            .finalized = finalized,
+            .blob = null,
+        };
+    }
+
+    pub fn deinit(self: *Self) void {
+        if (self.blob) |blob| blob.release();
+        self.blob = null;
+    }
+
+    /// Chain thread: finalization advanced to `finalized`, drop the blob of the previous one.
+    pub fn invalidate(self: *Self, finalized: types.Checkpoint) void {
+        self.mutex.lock();
+        const stale = self.blob;
+        self.finalized = finalized;
+        self.blob = null;
+        self.mutex.unlock();
+
+        if (stale) |blob| blob.release();
+    }
+
+    pub fn finalizedCheckpoint(self: *Self) types.Checkpoint {
+        self.mutex.lock();
+        defer self.mutex.unlock();
+        return self.finalized;
+    }
+
+    /// Returns the blob of the current finalized checkpoint with a reference taken, or null
+    /// if it has not been serialized yet.
+    pub fn acquire(self: *Self) ?*FinalizedStateBlob {
+        self.mutex.lock();
+        defer self.mutex.unlock();
+        const blob = self.blob orelse return null;
+        return blob.acquire();
+    }
+
+    /// Serializes `state`, the finalized state of `checkpoint`, and caches it unless
+    /// finalization moved on meanwhile. Returns the blob with a reference taken either way.
+    pub fn put(self: *Self, checkpoint: types.Checkpoint, state: *const types.BeamState) !*FinalizedStateBlob {
+        var encoded: std.ArrayList(u8) = .empty;
+        errdefer encoded.deinit(self.allocator);
+        try ssz.serialize(types.BeamState, state.*, &encoded, self.allocator);
+
+        const ssz_bytes = try encoded.toOwnedSlice(self.allocator);
+        errdefer self.allocator.free(ssz_bytes);
+
+        const blob = try self.allocator.create(FinalizedStateBlob);
+        blob.* = .{
+            .allocator = self.allocator,
+            .refs = std.atomic.Value(u32).init(1),
+            .checkpoint = checkpoint,
+            .ssz_bytes = ssz_bytes,
+            .snappy_bytes = std.atomic.Value(?*[]u8).init(null),
+            .etag = finalizedStateEtag(checkpoint),
+        };
+
+        self.mutex.lock();
+        defer self.mutex.unlock();
+        if (!std.meta.eql(self.finalized, checkpoint)) return blob;
+        // a concurrent request may have filled the cache first, keep the installed blob
+        if (self.blob) |installed| {
+            blob.release();
+            return installed.acquire();
+        }
+        self.blob = blob.acquire();
+        return blob;
+    }
+};
+
+test "finalized state cache serves one blob until finalization advances" {
+    const allocator = std.testing.allocator;
+
+    var pubkeys: [4]types.Bytes52 = undefined;
+    for (&pubkeys, 0..) |*pubkey, i| @memset(pubkey, @intCast(i + 1));
+    var state: types.BeamState = undefined;
+    try state.genGenesisState(allocator, .{ .genesis_time = 0, .validator_pubkeys = &pubkeys });
+    defer state.deinit();
+
+    const genesis = types.Checkpoint{ .root = [_]u8{1} ** 32, .slot = 0 };
+    var cache = FinalizedStateCache.init(allocator, genesis);
+    defer cache.deinit();
+    try std.testing.expect(cache.acquire() == null);
+
+    const blob = try cache.put(genesis, &state);
+    defer blob.release();
+    const hit = cache.acquire().?;
+    try std.testing.expectEqual(blob, hit);
+
+    var expected: std.ArrayList(u8) = .empty;
+    defer expected.deinit(allocator);
+    try ssz.serialize(types.BeamState, state, &expected, allocator);
+    try std.testing.expectEqualSlices(u8, expected.items, hit.ssz_bytes);
+    try std.testing.expectEqualSlices(u8, &finalizedStateEtag(genesis), &hit.etag);
+
+    const snappy = try hit.snappyBytes();
+    try std.testing.expectEqual(snappy.ptr, (try hit.snappyBytes()).ptr);
+    const decompressed = try snappyframesz.decode(allocator, snappy);
+    defer allocator.free(decompressed);
+    try std.testing.expectEqualSlices(u8, expected.items, decompressed);
+
+    // the blob stays valid for holders after finalization drops it from the cache
+    const finalized = types.Checkpoint{ .root = [_]u8{2} ** 32, .slot = 4 };
+    cache.invalidate(finalized);
+    try std.testing.expect(cache.acquire() == null);
+    try std.testing.expectEqualSlices(u8, expected.items, hit.ssz_bytes);
+    hit.release();
+
+    // a state serialized for a checkpoint that is no longer finalized is not cached
+    const stale = try cache.put(genesis, &state);
+    stale.release();
+    try std.testing.expect(cache.acquire() == null);
+}
+
+test "finalized state cache compresses without blocking invalidation" {
+    const allocator = std.testing.allocator;
+
+    var pubkeys: [64]types.Bytes52 = undefined;
+    for (&pubkeys, 0..) |*pubkey, i| @memset(pubkey, @intCast(i + 1));
+    var state: types.BeamState = undefined;
+    try state.genGenesisState(allocator, .{ .genesis_time = 0, .validator_pubkeys = &pubkeys });
+    defer state.deinit();
+
+    const genesis = types.Checkpoint{ .root = [_]u8{1} ** 32, .slot = 0 };
+    var cache = FinalizedStateCache.init(allocator, genesis);
+    defer cache.deinit();
+    const blob = try cache.put(genesis, &state);
+    defer blob.release();
+
+    const Compressor = struct {
+        fn run(held: *FinalizedStateBlob, out: *?[]const u8) void {
+            out.* = held.snappyBytes() catch null;
+        }
+    };
+
+    // compressions complete while the cache mutex is held, as it is by invalidate
+    var results: [2]?[]const u8 = .{ null, null };
+    var threads: [2]std.Thread = undefined;
+    {
+        cache.mutex.lock();
+        defer cache.mutex.unlock();
+        for (&threads, &results) |*thread, *result| thread.* = try std.Thread.spawn(.{}, Compressor.run, .{ blob, result });
+        for (threads) |thread| thread.join();
+    }
+
+    // racing first compressions install a single encoding
+    try std.testing.expect(results[0] != null and results[1] != null);
+    try std.testing.expectEqual(results[0].?.ptr, results[1].?.ptr);
+
+    // finalization moving on during a compression leaves the holder with a valid encoding
+    var other_cache = FinalizedStateCache.init(allocator, genesis);
+    defer other_cache.deinit();
+    const fresh = try other_cache.put(genesis, &state);
+    defer fresh.release();
+    var fresh_result: ?[]const u8 = null;
+    const thread = try std.Thread.spawn(.{}, Compressor.run, .{ fresh, &fresh_result });
+    other_cache.invalidate(.{ .root = [_]u8{2} ** 32, .slot = 4 });
+    thread.join();
+    try std.testing.expect(other_cache.acquire() == null);
+
+    const decompressed = try snappyframesz.decode(allocator, fresh_result.?);
+    defer allocator.free(decompressed);
+    try std.testing.expectEqualSlices(u8, fresh.ssz_bytes, decompressed);
+}
@@ -44,6 +44,9 @@ pub const ProtoNode = struct {
 
     // info populated lazily for tree visualization in snapshot for efficiency purposes
     numBranches: ?usize = null,
+    // proto array generation of the last change to this node shown in the forkchoice graph:
+    // its weight, its role or whether it is the best child of its parent
+    generation: u64 = 0,
 
     pub fn format(self: ProtoNode, writer: anytype) !void {
         try writer.print("ProtoNode{{ slot={d}, weight={d}, blockRoot=0x{x} }}", .{
@@ -58,6 +61,19 @@ pub const ProtoArray = struct {
     nodes: std.ArrayList(ProtoNode),
     indices: std.AutoHashMap(types.Root, usize),
     allocator: Allocator,
+    // cutoff weight of the last deltas application, null forces the next application to be a
+    // full recompute (e.g. after compaction)
+    last_cutoff_weight: ?u64 = null,
+    // number of nodes at the last deltas application, nodes added after it need visiting
+    applied_len: usize = 0,
+    // bumped on every change to the tree shown in the forkchoice graph, written under the
+    // forkchoice lock and read without it to check cached graph renders
+    generation: std.atomic.Value(u64) = .init(0),
+    // generation of the last change not tracked per node (compaction, finalization), graph
+    // deltas since an older generation need a full render
+    reset_generation: u64 = 0,
+    // nodes were touched since the last published generation
+    generation_dirty: bool = false,
 
     const Self = @This();
     pub fn init(allocator: Allocator, anchorBlock: ProtoBlock) !Self {
@@ -79,6 +95,7 @@ pub const ProtoArray = struct {
         const node_or_null = self.indices.get(block.blockRoot);
         if (node_or_null) |node| {
             _ = node;
+            self.publishGeneration();
             return;
         }
         // index at which node will be inserted
@@ -128,6 +145,118 @@ pub const ProtoArray = struct {
         };
         try self.nodes.append(self.allocator, node);
         try self.indices.put(node.blockRoot, node_index);
+        self.touch(node_index);
+        self.publishGeneration();
+    }
+
+    /// Marks the node as changed in the next published generation.
+    fn touch(self: *Self, node_idx: usize) void {
+        self.nodes.items[node_idx].generation = self.generation.load(.monotonic) + 1;
+        self.generation_dirty = true;
+    }
+
+    fn touchRoot(self: *Self, blockRoot: types.Root) void {
+        if (self.indices.get(blockRoot)) |node_idx| self.touch(node_idx);
+    }
+
+    /// Marks a change which can't be attributed to single nodes, graph consumers have to
+    /// render everything again.
+    fn touchAll(self: *Self) void {
+        self.reset_generation = self.generation.load(.monotonic) + 1;
+        self.generation_dirty = true;
+    }
+
+    /// Publishes the nodes touched so far as a new generation.
+    fn publishGeneration(self: *Self) void {
+        if (!self.generation_dirty) return;
+        self.generation_dirty = false;
+        self.generation.store(self.generation.load(.monotonic) + 1, .release);
+    }
+
+    /// Compacts the proto array in a single order-preserving pass, retaining only the nodes
+    /// flagged in `keep`. `old_to_new` must be as long as `nodes` and is filled with the dense
+    /// old -> new index remap (null for pruned nodes) so that callers can fix up their own
+    /// index references. Kept nodes get their parent, sibling, child and best child/descendant
+    /// indices rewritten from the remap and their depth reduced by `depth_offset`. `deltas`
+    /// is compacted alongside the nodes.
+    ///
+    /// Nodes whose parent is pruned become roots of the compacted tree. Siblings and children
+    /// of a kept node with a kept parent must themselves be kept.
+    // Internal unlocked version - assumes caller holds lock
+    fn compactUnlocked(self: *Self, keep: []const bool, old_to_new: []?usize, depth_offset: usize, deltas: *std.ArrayList(isize)) !void {
+        const old_len = self.nodes.items.len;
+        if (keep.len != old_len or old_to_new.len != old_len) {
+            return ForkChoiceError.InvalidRebaseRemap;
+        }
+
+        // build the dense remap upfront: parents always precede their descendants but children,
+        // siblings and best descendants are forward references that need resolving while moving
+        var new_len: usize = 0;
+        for (keep, 0..) |keep_node, old_idx| {
+            if (keep_node) {
+                old_to_new[old_idx] = new_len;
+                new_len += 1;
+            } else {
+                old_to_new[old_idx] = null;
+            }
+        }
+
+        // new_idx <= old_idx always holds, so nodes can be moved down in place
+        var old_idx: usize = 0;
+        while (old_idx < old_len) : (old_idx += 1) {
+            var node = self.nodes.items[old_idx];
+            const new_idx = old_to_new[old_idx] orelse {
+                _ = self.indices.remove(node.blockRoot);
+                continue;
+            };
+
+            node.depth -= depth_offset;
+            node.parent = if (node.parent) |parent_idx| old_to_new[parent_idx] else null;
+            if (node.parent == null) {
+                // roots of the compacted tree have no siblings
+                node.nextSibling = 0;
+            } else if (node.nextSibling != 0) {
+                node.nextSibling = old_to_new[node.nextSibling] orelse @panic("invalid sibling of compacted node");
+            }
+
+            if (node.latestChild != 0) {
+                node.firstChild = old_to_new[node.firstChild] orelse @panic("invalid first child of compacted node");
+                node.latestChild = old_to_new[node.latestChild] orelse @panic("invalid latest child of compacted node");
+            }
+
+            if (node.bestChild) |old_best_child_idx| {
+                node.bestChild = old_to_new[old_best_child_idx] orelse @panic("invalid best child of compacted node");
+                // bestDescendant can legitimately be null when applyDeltas used a cutoff weight and
+                // the best branch has no node >= cutoff, see issue #545
+                if (node.bestDescendant) |old_best_descendant_idx| {
+                    node.bestDescendant = old_to_new[old_best_descendant_idx] orelse @panic("invalid best descendant of compacted node");
+                }
+            } else if (node.bestDescendant != null) {
+                @panic("invalid forkchoice with non null best descendant but with null best child");
+            }
+
+            self.nodes.items[new_idx] = node;
+            if (self.indices.getPtr(node.blockRoot)) |index_ptr| {
+                index_ptr.* = new_idx;
+            }
+        }
+        self.nodes.shrinkRetainingCapacity(new_len);
+        // indices moved so the next deltas application has to recompute everything
+        self.last_cutoff_weight = null;
+        self.applied_len = 0;
+        // pruned nodes aren't tracked, graph consumers drop them with a full render
+        self.touchAll();
+        self.publishGeneration();
+
+        // deltas can lag behind nodes as they only grow when computed, so compact what's there
+        var new_deltas_len: usize = 0;
+        for (0..@min(deltas.items.len, old_len)) |delta_idx| {
+            if (old_to_new[delta_idx]) |new_idx| {
+                deltas.items[new_idx] = deltas.items[delta_idx];
+                new_deltas_len += 1;
+            }
+        }
+        deltas.shrinkRetainingCapacity(new_deltas_len);
     }
 
     fn getNode(self: *Self, blockRoot: types.Root) ?ProtoNode {
@@ -153,6 +282,7 @@ pub const ProtoArray = struct {
             const node_idx = node_idx_a;
             const node_delta = deltas[node_idx];
             self.nodes.items[node_idx].weight += node_delta;
+            if (node_delta != 0) self.touch(node_idx);
             if (self.nodes.items[node_idx].parent) |parent_idx| {
                 deltas[parent_idx] += node_delta;
             }
@@ -198,11 +328,136 @@ pub const ProtoArray = struct {
                 }
 
                 if (updateBest) {
+                    if (parent.bestChild) |prev_best_child_idx| {
+                        if (prev_best_child_idx != node_idx) {
+                            self.touch(prev_best_child_idx);
+                            self.touch(node_idx);
+                        }
+                    } else {
+                        self.touch(node_idx);
+                    }
                     self.nodes.items[parent_idx].bestChild = node_idx;
                     self.nodes.items[parent_idx].bestDescendant = nodeBestDescendant;
                 }
             }
         }
+
+        self.last_cutoff_weight = cutoff_weight;
+        self.applied_len = self.nodes.items.len;
+        self.publishGeneration();
+    }
+
+    /// Incremental variant of applyDeltasUnlocked which only visits the ancestor paths of the
+    /// nodes in `dirty_indices` and of the nodes added since the last application. Every node
+    /// with a non zero delta must be listed in `dirty_indices`, duplicates are fine.
+    ///
+    /// The best child/descendant of a node depends on the cutoff weight, so this falls back to the
+    /// full recompute whenever the cutoff differs from the one of the previous application.
+    // Internal unlocked version - assumes caller holds lock
+    fn applyDeltasIncrementalUnlocked(self: *Self, deltas: []isize, dirty_indices: []const usize, cutoff_weight: u64) !void {
+        if (deltas.len != self.nodes.items.len) {
+            return ForkChoiceError.InvalidDeltas;
+        }
+        if (self.last_cutoff_weight != cutoff_weight or self.applied_len > self.nodes.items.len) {
+            return self.applyDeltasUnlocked(deltas, cutoff_weight);
+        }
+
+        var visited = try std.DynamicBitSetUnmanaged.initEmpty(self.allocator, self.nodes.items.len);
+        defer visited.deinit(self.allocator);
+        var affected: std.ArrayList(usize) = .empty;
+        defer affected.deinit(self.allocator);
+
+        for (dirty_indices) |node_idx| {
+            try self.collectAncestorPath(node_idx, &visited, &affected);
+        }
+        for (self.applied_len..self.nodes.items.len) |node_idx| {
+            try self.collectAncestorPath(node_idx, &visited, &affected);
+        }
+
+        // descendants always have larger indices than their ancestors, so iterating backwards
+        // processes children before their parents just like the full recompute
+        std.mem.sort(usize, affected.items, {}, std.sort.desc(usize));
+
+        for (affected.items) |node_idx| {
+            const node_delta = deltas[node_idx];
+            self.nodes.items[node_idx].weight += node_delta;
+            if (node_delta != 0) self.touch(node_idx);
+            if (self.nodes.items[node_idx].parent) |parent_idx| {
+                deltas[parent_idx] += node_delta;
+            }
+        }
+
+        // the children of unaffected nodes didn't change weight or best descendant, so only the
+        // affected nodes can have a different best child
+        for (affected.items) |node_idx| {
+            self.updateBestChildUnlocked(node_idx, cutoff_weight);
+        }
+
+        self.last_cutoff_weight = cutoff_weight;
+        self.applied_len = self.nodes.items.len;
+        self.publishGeneration();
+    }
+
+    /// Adds the node and its ancestors to `affected`, stopping as soon as the path joins an
+    /// already visited one.
+    fn collectAncestorPath(self: *Self, start_idx: usize, visited: *std.DynamicBitSetUnmanaged, affected: *std.ArrayList(usize)) !void {
+        var node_idx_or_null: ?usize = start_idx;
+        while (node_idx_or_null) |node_idx| {
+            if (visited.isSet(node_idx)) break;
+            visited.set(node_idx);
+            try affected.append(self.allocator, node_idx);
+            node_idx_or_null = self.nodes.items[node_idx].parent;
+        }
+    }
+
+    /// Best descendant of `node_idx` among the nodes weighing at least `cutoff_weight`, the node
+    /// itself if there is none. Follows the best child links, which must have been applied with a
+    /// zero cutoff. Weights only shrink going down a branch, so the walk stops at the first best
+    /// child below the cutoff, yielding what the links of `cutoff_weight` would point at.
+    fn bestDescendantAtCutoff(self: *const Self, node_idx: usize, cutoff_weight: u64) usize {
+        if (cutoff_weight == 0) return self.nodes.items[node_idx].bestDescendant orelse node_idx;
+
+        var best_idx = node_idx;
+        while (self.nodes.items[best_idx].bestChild) |child_idx| {
+            if (self.nodes.items[child_idx].weight < cutoff_weight) break;
+            best_idx = child_idx;
+        }
+        return best_idx;
+    }
+
+    /// Recomputes the best child and best descendant of a node from all its children. Yields the
+    /// same result as the pairwise updates of the full recompute, i.e. the heaviest child with
+    /// ties broken by lexicographically larger block root (leanSpec-compatible).
+    fn updateBestChildUnlocked(self: *Self, node_idx: usize, cutoff_weight: u64) void {
+        var best_child_or_null: ?usize = null;
+        var child_idx = self.nodes.items[node_idx].firstChild;
+        while (child_idx != 0) : (child_idx = self.nodes.items[child_idx].nextSibling) {
+            const child = self.nodes.items[child_idx];
+            if (best_child_or_null) |best_child_idx| {
+                const best_child = self.nodes.items[best_child_idx];
+                if (best_child.weight < child.weight or
+                    (best_child.weight == child.weight and std.mem.order(u8, &best_child.blockRoot, &child.blockRoot) == .lt))
+                {
+                    best_child_or_null = child_idx;
+                }
+            } else {
+                best_child_or_null = child_idx;
+            }
+        }
+
+        // leaves keep whatever the full recompute would have left them with
+        const best_child_idx = best_child_or_null orelse return;
+        const best_child = self.nodes.items[best_child_idx];
+        if (self.nodes.items[node_idx].bestChild != best_child_idx) {
+            if (self.nodes.items[node_idx].bestChild) |prev_best_child_idx| self.touch(prev_best_child_idx);
+            self.touch(best_child_idx);
+        }
+        self.nodes.items[node_idx].bestChild = best_child_idx;
+        self.nodes.items[node_idx].bestDescendant = best_child.bestDescendant orelse (
+            // by recurssion, we will always have a bestDescendant >= cutoff
+            if (best_child.weight >= cutoff_weight) best_child_idx else null
+            //
+        );
     }
 };
 
@@ -255,6 +510,252 @@ const AttestationTracker = struct {
     latestNew: ?ProtoAttestation = null,
 };
 
+/// Dense, validator indexed attestation trackers laid out as struct of arrays.
+///
+/// Validators whose votes changed since the last delta computation are kept in a dirty list,
+/// and validators whose latest new vote differs from their latest known vote in a divergent
+/// list, so that delta computation and new -> known promotion scale with vote churn rather
+/// than with the size of the validator registry.
+const AttestationTrackers = struct {
+    allocator: Allocator,
+    // prev latest attestation applied index, null if not applied
+    applied_index: std.ArrayList(?usize) = .empty,
+    // latest known on-chain attestation of the validator, index null if there is none
+    known_index: std.ArrayList(?usize) = .empty,
+    known_slot: std.ArrayList(types.Slot) = .empty,
+    known_data: std.ArrayList(?types.AttestationData) = .empty,
+    // latest new attestation of the validator not yet seen on-chain, index null if there is none
+    new_index: std.ArrayList(?usize) = .empty,
+    new_slot: std.ArrayList(types.Slot) = .empty,
+    new_data: std.ArrayList(?types.AttestationData) = .empty,
+    // validators whose known or new vote changed since deltas were last computed
+    dirty: std.ArrayList(usize) = .empty,
+    is_dirty: std.ArrayList(bool) = .empty,
+    // validators whose latest new vote (possibly) differs from their latest known vote
+    divergent: std.ArrayList(usize) = .empty,
+    is_divergent: std.ArrayList(bool) = .empty,
+    // vote source the applied indices were last computed from, null if never computed
+    applied_from_known: ?bool = null,
+
+    const Self = @This();
+
+    pub fn init(allocator: Allocator) Self {
+        return .{ .allocator = allocator };
+    }
+
+    pub fn deinit(self: *Self) void {
+        self.applied_index.deinit(self.allocator);
+        self.known_index.deinit(self.allocator);
+        self.known_slot.deinit(self.allocator);
+        self.known_data.deinit(self.allocator);
+        self.new_index.deinit(self.allocator);
+        self.new_slot.deinit(self.allocator);
+        self.new_data.deinit(self.allocator);
+        self.dirty.deinit(self.allocator);
+        self.is_dirty.deinit(self.allocator);
+        self.divergent.deinit(self.allocator);
+        self.is_divergent.deinit(self.allocator);
+    }
+
+    /// Number of validator slots currently tracked
+    pub fn count(self: *const Self) usize {
+        return self.applied_index.items.len;
+    }
+
+    /// Grows all the arrays so that `validator_id` has a slot, new slots carry no votes.
+    pub fn ensureValidator(self: *Self, validator_id: usize) !void {
+        const old_len = self.count();
+        if (validator_id < old_len) return;
+        const new_len = validator_id + 1;
+
+        // reserve everything first so that the arrays never end up with different lengths
+        try self.applied_index.ensureTotalCapacity(self.allocator, new_len);
+        try self.known_index.ensureTotalCapacity(self.allocator, new_len);
+        try self.known_slot.ensureTotalCapacity(self.allocator, new_len);
+        try self.known_data.ensureTotalCapacity(self.allocator, new_len);
+        try self.new_index.ensureTotalCapacity(self.allocator, new_len);
+        try self.new_slot.ensureTotalCapacity(self.allocator, new_len);
+        try self.new_data.ensureTotalCapacity(self.allocator, new_len);
+        try self.is_dirty.ensureTotalCapacity(self.allocator, new_len);
+        try self.is_divergent.ensureTotalCapacity(self.allocator, new_len);
+
+        const added = new_len - old_len;
+        self.applied_index.appendNTimesAssumeCapacity(null, added);
+        self.known_index.appendNTimesAssumeCapacity(null, added);
+        self.known_slot.appendNTimesAssumeCapacity(0, added);
+        self.known_data.appendNTimesAssumeCapacity(null, added);
+        self.new_index.appendNTimesAssumeCapacity(null, added);
+        self.new_slot.appendNTimesAssumeCapacity(0, added);
+        self.new_data.appendNTimesAssumeCapacity(null, added);
+        self.is_dirty.appendNTimesAssumeCapacity(false, added);
+        self.is_divergent.appendNTimesAssumeCapacity(false, added);
+    }
+
+    fn latestKnown(self: *const Self, validator_id: usize) ?ProtoAttestation {
+        const index = self.known_index.items[validator_id] orelse return null;
+        return .{
+            .index = index,
+            .slot = self.known_slot.items[validator_id],
+            .attestation_data = self.known_data.items[validator_id],
+        };
+    }
+
+    fn latestNew(self: *const Self, validator_id: usize) ?ProtoAttestation {
+        const index = self.new_index.items[validator_id] orelse return null;
+        return .{
+            .index = index,
+            .slot = self.new_slot.items[validator_id],
+            .attestation_data = self.new_data.items[validator_id],
+        };
+    }
+
+    /// Returns a copy of the tracker of the validator, null if the validator was never tracked
+    pub fn get(self: *const Self, validator_id: usize) ?AttestationTracker {
+        if (validator_id >= self.count()) return null;
+        return .{
+            .appliedIndex = self.applied_index.items[validator_id],
+            .latestKnown = self.latestKnown(validator_id),
+            .latestNew = self.latestNew(validator_id),
+        };
+    }
+
+    /// Stores the tracker of the validator, marking it dirty if any of its votes changed
+    pub fn put(self: *Self, validator_id: usize, tracker: AttestationTracker) !void {
+        try self.ensureValidator(validator_id);
+        const votes_changed = !std.meta.eql(self.latestKnown(validator_id), tracker.latestKnown) or
+            !std.meta.eql(self.latestNew(validator_id), tracker.latestNew);
+
+        self.applied_index.items[validator_id] = tracker.appliedIndex;
+        self.setLatestKnown(validator_id, tracker.latestKnown);
+        self.setLatestNew(validator_id, tracker.latestNew);
+        if (votes_changed) {
+            try self.markChanged(validator_id);
+        }
+    }
+
+    fn setLatestKnown(self: *Self, validator_id: usize, attestation: ?ProtoAttestation) void {
+        const vote = attestation orelse ProtoAttestation{};
+        self.known_index.items[validator_id] = if (attestation != null) vote.index else null;
+        self.known_slot.items[validator_id] = vote.slot;
+        self.known_data.items[validator_id] = vote.attestation_data;
+    }
+
+    fn setLatestNew(self: *Self, validator_id: usize, attestation: ?ProtoAttestation) void {
+        const vote = attestation orelse ProtoAttestation{};
+        self.new_index.items[validator_id] = if (attestation != null) vote.index else null;
+        self.new_slot.items[validator_id] = vote.slot;
+        self.new_data.items[validator_id] = vote.attestation_data;
+    }
+
+    /// Queues the validator for the next delta computation and, if its known and new votes
+    /// differ, for the next new -> known promotion
+    fn markChanged(self: *Self, validator_id: usize) !void {
+        if (!self.is_dirty.items[validator_id]) {
+            try self.dirty.append(self.allocator, validator_id);
+            self.is_dirty.items[validator_id] = true;
+        }
+        if (!self.is_divergent.items[validator_id] and
+            !std.meta.eql(self.latestKnown(validator_id), self.latestNew(validator_id)))
+        {
+            try self.divergent.append(self.allocator, validator_id);
+            self.is_divergent.items[validator_id] = true;
+        }
+    }
+
+    /// Accumulates vote deltas of validators whose votes changed since the last call into
+    /// `deltas` and updates their applied indices. When switching between known and new votes
+    /// the diverging validators are also re-applied. Validators at or beyond `num_validators`
+    /// are ignored. Node indices receiving a delta are appended to `delta_nodes` if provided.
+    /// Returns the number of validators touched.
+    pub fn computeDeltas(self: *Self, deltas: []isize, from_known: bool, num_validators: usize, delta_nodes: ?*std.ArrayList(usize)) !usize {
+        // balances are right now same for the dummy chain and each weighing 1
+        const validatorWeight = 1;
+
+        const source_switched = if (self.applied_from_known) |applied_from_known| applied_from_known != from_known else true;
+        const touch_lists = [_][]const usize{
+            self.dirty.items,
+            if (source_switched) self.divergent.items else &[_]usize{},
+        };
+
+        // re-applying a validator twice is a no-op so the two lists don't need deduplication
+        var touched: usize = 0;
+        for (touch_lists) |validator_ids| {
+            for (validator_ids) |validator_id| {
+                if (validator_id >= num_validators) continue;
+                if (self.applied_index.items[validator_id]) |applied_index| {
+                    deltas[applied_index] -= validatorWeight;
+                    if (delta_nodes) |nodes| try nodes.append(self.allocator, applied_index);
+                }
+                const vote_index = if (from_known)
+                    self.known_index.items[validator_id]
+                else
+                    self.new_index.items[validator_id];
+                if (vote_index) |delta_index| {
+                    deltas[delta_index] += validatorWeight;
+                    if (delta_nodes) |nodes| try nodes.append(self.allocator, delta_index);
+                }
+                self.applied_index.items[validator_id] = vote_index;
+                touched += 1;
+            }
+        }
+
+        for (self.dirty.items) |validator_id| {
+            self.is_dirty.items[validator_id] = false;
+        }
+        self.dirty.clearRetainingCapacity();
+        self.applied_from_known = from_known;
+        return touched;
+    }
+
+    /// Promotes latest new votes to latest known votes, i.e. latestKnown = latestNew for every
+    /// validator. Only validators with diverging votes need to be visited.
+    pub fn promoteNewToKnown(self: *Self) !void {
+        for (self.divergent.items) |validator_id| {
+            self.is_divergent.items[validator_id] = false;
+            if (std.meta.eql(self.latestKnown(validator_id), self.latestNew(validator_id))) continue;
+            self.setLatestKnown(validator_id, self.latestNew(validator_id));
+            if (!self.is_dirty.items[validator_id]) {
+                try self.dirty.append(self.allocator, validator_id);
+                self.is_dirty.items[validator_id] = true;
+            }
+        }
+        self.divergent.clearRetainingCapacity();
+    }
+
+    /// Remaps node indices after a proto array compaction, pruned votes are set to null
+    pub fn remapNodeIndices(self: *Self, old_to_new: []const ?usize) !void {
+        for (0..self.count()) |validator_id| {
+            // this simple assignment suffices both for cases where new index is found i.e. is canonical
+            // or not, in which case it needs to point to null
+            if (self.applied_index.items[validator_id]) |applied_index| {
+                self.applied_index.items[validator_id] = old_to_new[applied_index];
+            }
+
+            // if we find the index then update it else change the vote to null as it was non canonical
+            var pruned_vote = false;
+            if (self.known_index.items[validator_id]) |known_index| {
+                if (old_to_new[known_index]) |new_index| {
+                    self.known_index.items[validator_id] = new_index;
+                } else {
+                    self.setLatestKnown(validator_id, null);
+                    pruned_vote = true;
+                }
+            }
+            if (self.new_index.items[validator_id]) |new_vote_index| {
+                if (old_to_new[new_vote_index]) |new_index| {
+                    self.new_index.items[validator_id] = new_index;
+                } else {
+                    self.setLatestNew(validator_id, null);
+                    pruned_vote = true;
+                }
+            }
+            if (pruned_vote) {
+                try self.markChanged(validator_id);
+            }
+        }
+    }
+};
+
 pub const ForkChoiceParams = struct {
     config: configs.ChainConfig,
     anchorState: *const types.BeamState,
@@ -268,6 +769,8 @@ const SignaturesMap = types.SignaturesMap;
 const StoredAggregatedPayload = types.StoredAggregatedPayload;
 const AggregatedPayloadsList = types.AggregatedPayloadsList;
 const AggregatedPayloadsMap = types.AggregatedPayloadsMap;
+const AggregatedProofStore = types.AggregatedProofStore;
+const SharedAggregatedProof = types.SharedAggregatedProof;
 
 /// Tracks whether the forkchoice has observed a real justified checkpoint via onBlock.
 /// For genesis (anchor slot == 0) we start ready; for checkpoint-sync or DB restore we
@@ -280,14 +783,16 @@ pub const ForkChoice = struct {
     config: configs.ChainConfig,
     fcStore: ForkChoiceStore,
     allocator: Allocator,
-    // map of validator ids to attestation tracker, better to have a map instead of array
-    // because of churn in validators
-    attestations: std.AutoHashMap(usize, AttestationTracker),
+    // dense validator indexed attestation trackers, grown on demand as validators vote
+    attestations: AttestationTrackers,
     head: ProtoBlock,
     safeTarget: ProtoBlock,
     // data structure to hold validator deltas, could be grown over time as more validators
     // get added
     deltas: std.ArrayList(isize),
+    // node indices which received a delta in the last computeDeltas, used to apply deltas
+    // incrementally over only their ancestor paths
+    delta_nodes: std.ArrayList(usize) = .empty,
     logger: zeam_utils.ModuleLogger,
     // Thread-safe access protection
     mutex: Thread.RwLock,
@@ -302,6 +807,9 @@ pub const ForkChoice = struct {
     // Aggregated signature proofs that are known and contribute to fork choice weights.
     // Used for recursive signature aggregation when building blocks.
     latest_known_aggregated_payloads: AggregatedPayloadsMap,
+    // Refcounted proofs referenced by both payload maps, every stored payload entry holds one
+    // reference so a proof covering many validators is only kept in memory once.
+    aggregated_proofs: AggregatedProofStore,
     // Mutex to protect concurrent access to signature/payload maps
     signatures_mutex: std.Thread.Mutex,
     // Tracks whether FC has observed a real justified checkpoint via block processing.
@@ -320,6 +828,9 @@ pub const ForkChoice = struct {
         safe_target_root: [32]u8,
         validator_count: u64,
         nodes: []ProtoNode,
+        // proto array generation the nodes were copied at and its last reset, see ProtoArray
+        generation: u64,
+        reset_generation: u64,
 
         pub fn deinit(self: Snapshot, allocator: Allocator) void {
             allocator.free(self.nodes);
@@ -354,12 +865,13 @@ pub const ForkChoice = struct {
             .latest_justified = anchorCP,
             .latest_finalized = anchorCP,
         };
-        const attestations = std.AutoHashMap(usize, AttestationTracker).init(allocator);
+        const attestations = AttestationTrackers.init(allocator);
         const deltas: std.ArrayList(isize) = .empty;
         const gossip_signatures = SignaturesMap.init(allocator);
         const attestation_data_by_root = std.AutoHashMap(types.Root, types.AttestationData).init(allocator);
         const latest_new_aggregated_payloads = AggregatedPayloadsMap.init(allocator);
         const latest_known_aggregated_payloads = AggregatedPayloadsMap.init(allocator);
+        const aggregated_proofs = AggregatedProofStore.init(allocator);
 
         var fc = Self{
             .allocator = allocator,
@@ -377,6 +889,7 @@ pub const ForkChoice = struct {
             .attestation_data_by_root = attestation_data_by_root,
             .latest_new_aggregated_payloads = latest_new_aggregated_payloads,
             .latest_known_aggregated_payloads = latest_known_aggregated_payloads,
+            .aggregated_proofs = aggregated_proofs,
             .signatures_mutex = .{},
             // Genesis (slot == 0) is immediately ready; checkpoint-sync / DB-restore anchors
             // (slot > 0) start in `initing` and become `ready` once the first real justified
@@ -394,14 +907,11 @@ pub const ForkChoice = struct {
     }
 
     /// Thread-safe snapshot for observability
-    /// Holds shared lock only during copy, caller formats JSON lock-free
+    /// Holds shared lock only during copy, branch counts are filled in and JSON is formatted
+    /// by the caller lock-free
     pub fn snapshot(self: *Self, allocator: Allocator) !Snapshot {
-        self.mutex.lockShared();
-        defer self.mutex.unlockShared();
-
-        // Quick copy - ProtoNode has no pointer members, shallow copy is safe
-        const nodes_copy = try allocator.alloc(ProtoNode, self.protoArray.nodes.items.len);
-        @memcpy(nodes_copy, self.protoArray.nodes.items);
+        const snap = try self.copySnapshot(allocator);
+        const nodes_copy = snap.nodes;
 
         // populate numBranches
         var node_natural_idx = nodes_copy.len;
@@ -419,10 +929,29 @@ pub const ForkChoice = struct {
             node_natural_idx -= 1;
         }
 
+        return snap;
+    }
+
+    /// Generation of the forkchoice tree shown in the graph, read without taking the lock.
+    /// Snapshots taken at the same generation render the same graph.
+    pub fn graphGeneration(self: *const Self) u64 {
+        return self.protoArray.generation.load(.acquire);
+    }
+
+    fn copySnapshot(self: *Self, allocator: Allocator) !Snapshot {
+        self.mutex.lockShared();
+        defer self.mutex.unlockShared();
+
+        // Quick copy - ProtoNode has no pointer members, shallow copy is safe
+        const nodes_copy = try allocator.alloc(ProtoNode, self.protoArray.nodes.items.len);
+        @memcpy(nodes_copy, self.protoArray.nodes.items);
+
         // Get the full ProtoNode for head from protoArray
-        const head_idx = self.protoArray.indices.get(self.head.blockRoot) orelse {
+        const head_node = if (self.protoArray.indices.get(self.head.blockRoot)) |head_idx|
+            self.protoArray.nodes.items[head_idx]
+        else
             // Fallback: create a ProtoNode from ProtoBlock if not found
-            const head_node = ProtoNode{
+            ProtoNode{
                 .slot = self.head.slot,
                 .blockRoot = self.head.blockRoot,
                 .parentRoot = self.head.parentRoot,
@@ -440,23 +969,16 @@ pub const ForkChoice = struct {
                 .numChildren = 0,
                 .numBranches = 1,
             };
-            return Snapshot{
-                .head = head_node,
-                .latest_justified = self.fcStore.latest_justified,
-                .latest_finalized = self.fcStore.latest_finalized,
-                .safe_target_root = self.safeTarget.blockRoot,
-                .validator_count = self.config.genesis.numValidators(),
-                .nodes = nodes_copy,
-            };
-        };
 
         return Snapshot{
-            .head = self.protoArray.nodes.items[head_idx],
+            .head = head_node,
             .latest_justified = self.fcStore.latest_justified,
             .latest_finalized = self.fcStore.latest_finalized,
             .safe_target_root = self.safeTarget.blockRoot,
             .validator_count = self.config.genesis.numValidators(),
             .nodes = nodes_copy,
+            .generation = self.protoArray.generation.load(.monotonic),
+            .reset_generation = self.protoArray.reset_generation,
         };
     }
 
@@ -465,30 +987,27 @@ pub const ForkChoice = struct {
         self.protoArray.indices.deinit();
         self.attestations.deinit();
         self.deltas.deinit(self.allocator);
+        self.delta_nodes.deinit(self.allocator);
 
         self.signatures_mutex.lock();
         defer self.signatures_mutex.unlock();
         self.gossip_signatures.deinit();
         self.attestation_data_by_root.deinit();
 
-        // Deinit each list in the aggregated payloads maps
-        var it_known = self.latest_known_aggregated_payloads.iterator();
-        while (it_known.next()) |entry| {
-            for (entry.value_ptr.items) |*stored| {
-                stored.proof.deinit();
-            }
-            entry.value_ptr.deinit(self.allocator);
+        // Deinit each list in the aggregated payloads maps, the proofs they reference are
+        // owned by the proof store and freed with it
+        var it_known = self.latest_known_aggregated_payloads.valueIterator();
+        while (it_known.next()) |list| {
+            list.deinit(self.allocator);
         }
         self.latest_known_aggregated_payloads.deinit();
 
-        var it_new = self.latest_new_aggregated_payloads.iterator();
-        while (it_new.next()) |entry| {
-            for (entry.value_ptr.items) |*stored| {
-                stored.proof.deinit();
-            }
-            entry.value_ptr.deinit(self.allocator);
+        var it_new = self.latest_new_aggregated_payloads.valueIterator();
+        while (it_new.next()) |list| {
+            list.deinit(self.allocator);
         }
         self.latest_new_aggregated_payloads.deinit();
+        self.aggregated_proofs.deinit();
     }
 
     fn isBlockTimely(self: *Self, blockDelayMs: usize) bool {
@@ -610,12 +1129,14 @@ pub const ForkChoice = struct {
 
         // now we can split forkchoice into 3 parts (excluding target anchor)
         // traversing all the way from the bottom to the prev_anchor_idx
+        // per node logging is hoisted out of the traversal, it runs over the whole tree
+        const debug_enabled = self.logger.isEnabled(.debug);
         var current_idx = self.protoArray.nodes.items.len - 1;
         while (current_idx >= prev_anchor_idx) {
             const current_node = self.protoArray.nodes.items[current_idx];
             if (canonical_blocks.contains(current_node.blockRoot)) {
                 if (current_node.slot <= target_anchor_slot) {
-                    self.logger.debug("adding confirmed canonical root={x} slot={d} index={d} parent={any}", .{
+                    if (debug_enabled) self.logger.debug("adding confirmed canonical root={x} slot={d} index={d} parent={any}", .{
                         &current_node.blockRoot,
                         current_node.slot,
                         current_idx,
@@ -675,82 +1196,19 @@ pub const ForkChoice = struct {
 
         // prune, interesting thing to note is the entire subtree of targetAnchorRoot is not affected and is to be
         // preserved as it is, because nothing from there is getting pruned
-        var shifted_left: usize = 0;
-        var old_indices_to_new = std.AutoHashMap(usize, usize).init(self.allocator);
-        defer old_indices_to_new.deinit();
+        const num_nodes = self.protoArray.nodes.items.len;
+        const keep = try self.allocator.alloc(bool, num_nodes);
+        defer self.allocator.free(keep);
+        const old_indices_to_new = try self.allocator.alloc(?usize, num_nodes);
+        defer self.allocator.free(old_indices_to_new);
 
-        var current_idx: usize = 0;
-        while (current_idx < self.protoArray.nodes.items.len) {
-            const current_node = self.protoArray.nodes.items[current_idx];
+        for (self.protoArray.nodes.items, 0..) |node, node_idx| {
             // we preserve the tree all the way down from the target anchor and its unfinalized potential canonical descendants
-            if (canonical_view.contains(current_node.blockRoot) and current_node.slot >= target_anchor_slot) {
-                try self.protoArray.indices.put(current_node.blockRoot, current_idx);
-                try old_indices_to_new.put((current_idx + shifted_left), current_idx);
-
-                // go to the next node
-                current_idx += 1;
-            } else {
-                // remove the node and continue back to the loop with updating current idx
-                // because after removal next node would be referred at the same current idx
-                _ = self.protoArray.nodes.orderedRemove(current_idx);
-                // don't need order preserving on deltas as they are always set to zero before their use
-                _ = self.deltas.swapRemove(current_idx);
-                _ = self.protoArray.indices.remove(current_node.blockRoot);
-                shifted_left += 1;
-            }
+            keep[node_idx] = canonical_view.contains(node.blockRoot) and node.slot >= target_anchor_slot;
         }
 
-        // correct parent, bestChild and bestDescendant indices using the created old to new map
-        current_idx = 0;
-        while (current_idx < self.protoArray.nodes.items.len) {
-            var current_node = self.protoArray.nodes.items[current_idx];
-            // correct depth
-            current_node.depth -= target_anchor_depth;
-
-            // fix parent, anchor i.e. 0rth entry of forkchoice has no parent and no sibling
-            if (current_idx == 0) {
-                current_node.parent = null;
-                current_node.nextSibling = 0;
-            } else {
-                // all other nodes should have parents, otherwise its an irrecoverable error as we have already
-                // modified forkchoice and can't be restored
-                const old_parent_idx = current_node.parent orelse @panic("invalid parent of the rebased unfinalized");
-                const new_parent_idx = old_indices_to_new.get(old_parent_idx);
-                current_node.parent = new_parent_idx;
-
-                if (current_node.nextSibling != 0) {
-                    current_node.nextSibling = old_indices_to_new.get(current_node.nextSibling) orelse @panic("invalid sibling of rebased unfinalized");
-                }
-            }
-
-            // fix firstChild and latestChild
-            if (current_node.latestChild != 0) {
-                current_node.firstChild = old_indices_to_new.get(current_node.firstChild) orelse @panic("invalid first child of rebased tree");
-                current_node.latestChild = old_indices_to_new.get(current_node.latestChild) orelse @panic("invalid latest child of rebaed tree");
-            }
-
-            // fix bestChild and descendant
-            if (current_node.bestChild) |old_best_child_idx| {
-                // we should be able to lookup new index otherwise its an irrecoverable error
-                const new_best_child_idx = old_indices_to_new.get(old_best_child_idx) orelse @panic("invalid old index lookup for rebased best child");
-                current_node.bestChild = new_best_child_idx;
-
-                // If bestDescendant is null, keep it null (can happen when applyDeltas uses cutoff_weight
-                // and the best branch has no node >= cutoff). See issue #545.
-                if (current_node.bestDescendant) |old_best_descendant_idx| {
-                    const new_best_descendant_idx = old_indices_to_new.get(old_best_descendant_idx) orelse @panic("invalid old index lookup for rebase best descendant");
-                    current_node.bestDescendant = new_best_descendant_idx;
-                }
-                // else: bestDescendant remains null
-            } else {
-                // confirm best descendant is also null
-                if (current_node.bestDescendant != null) {
-                    @panic("invalid forkchoice with non null best descendant but with null best child");
-                }
-            }
-            self.protoArray.nodes.items[current_idx] = current_node;
-            current_idx += 1;
-        }
+        // single compaction pass rewriting parent, sibling, child and best child/descendant indices
+        try self.protoArray.compactUnlocked(keep, old_indices_to_new, target_anchor_depth, &self.deltas);
 
         // confirm the first entry in forkchoice is the target anchor
         if (!std.mem.eql(u8, &self.protoArray.nodes.items[0].blockRoot, &targetAnchorRoot)) {
@@ -758,38 +1216,7 @@ pub const ForkChoice = struct {
         }
 
         // cleanup the vote tracker and remove all the entries which are not in canonical
-        var iterator = self.attestations.iterator();
-        while (iterator.next()) |entry| {
-            // fix applied index
-            if (entry.value_ptr.appliedIndex) |applied_index| {
-                const new_index_lookup = old_indices_to_new.get(applied_index);
-                // this simple assignment suffices both for cases where new index is found i.e. is canonical
-                // or not, in which case it needs to point to null
-                entry.value_ptr.appliedIndex = new_index_lookup;
-            }
-
-            // fix latestKnown
-            if (entry.value_ptr.latestKnown) |*latest_known| {
-                const new_index_lookup = old_indices_to_new.get(latest_known.index);
-                // if we find the index then update it else change it to null as it was non canonical
-                if (new_index_lookup) |new_index| {
-                    latest_known.index = new_index;
-                } else {
-                    entry.value_ptr.latestKnown = null;
-                }
-            }
-
-            // fix latestNew
-            if (entry.value_ptr.latestNew) |*latest_new| {
-                const new_index_lookup = old_indices_to_new.get(latest_new.index);
-                // if we find the index then update it else change it to null as it was non canonical
-                if (new_index_lookup) |new_index| {
-                    latest_new.index = new_index;
-                } else {
-                    entry.value_ptr.latestNew = null;
-                }
-            }
-        }
+        try self.attestations.remapNodeIndices(old_indices_to_new);
 
         if (canonicalViewOrNull == null) {
             canonical_view.deinit();
@@ -824,6 +1251,26 @@ pub const ForkChoice = struct {
         return ancestor_at_depth;
     }
 
+    // Roots of the canonical blocks in [start_slot, end_slot) in ascending slot order, collected
+    // by following the parent links down from the head. Skipped slots have no entry.
+    fn getCanonicalBlockRootsInRangeUnlocked(self: *Self, allocator: Allocator, start_slot: types.Slot, end_slot: types.Slot) ![]types.Root {
+        var roots: std.ArrayList(types.Root) = .empty;
+        errdefer roots.deinit(allocator);
+
+        var current_idx: ?usize = self.protoArray.indices.get(self.head.blockRoot) orelse return ForkChoiceError.InvalidHeadIndex;
+        while (current_idx) |idx| {
+            const node = self.protoArray.nodes.items[idx];
+            if (node.slot < start_slot) break;
+            if (node.slot < end_slot) {
+                try roots.append(allocator, node.blockRoot);
+            }
+            current_idx = node.parent;
+        }
+
+        std.mem.reverse(types.Root, roots.items);
+        return roots.toOwnedSlice(allocator);
+    }
+
     // Internal unlocked version - assumes caller holds lock
     fn tickIntervalUnlocked(self: *Self, hasProposal: bool) !void {
         const new_time = self.fcStore.slot_clock.time.fetchAdd(1, .monotonic) + 1;
@@ -892,12 +1339,8 @@ pub const ForkChoice = struct {
 
         // Promote latestNew → latestKnown in attestation tracker.
         // Attestations that were "new" (gossip) are now "known" (accepted).
-        for (0..self.config.genesis.numValidators()) |validator_id| {
-            var tracker = self.attestations.get(validator_id) orelse continue;
-            // latestNew is always ahead of latestKnown (and will be non null if latestknown is not null)
-            tracker.latestKnown = tracker.latestNew;
-            try self.attestations.put(validator_id, tracker);
-        }
+        // latestNew is always ahead of latestKnown (and will be non null if latestknown is not null)
+        try self.attestations.promoteNewToKnown();
 
         return self.updateHeadUnlocked();
     }
@@ -985,27 +1428,10 @@ pub const ForkChoice = struct {
         for (0..self.deltas.items.len) |i| {
             self.deltas.items[i] = 0;
         }
-        // balances are right now same for the dummy chain and each weighing 1
-        const validatorWeight = 1;
-
-        for (0..self.config.genesis.numValidators()) |validator_id| {
-            var attestation_tracker = self.attestations.get(validator_id) orelse AttestationTracker{};
-            if (attestation_tracker.appliedIndex) |applied_index| {
-                self.deltas.items[applied_index] -= validatorWeight;
-            }
-            attestation_tracker.appliedIndex = null;
+        self.delta_nodes.clearRetainingCapacity();
 
-            const latest_attestation = if (from_known)
-                attestation_tracker.latestKnown
-            else
-                attestation_tracker.latestNew;
-
-            if (latest_attestation) |delta_attestation| {
-                self.deltas.items[delta_attestation.index] += validatorWeight;
-                attestation_tracker.appliedIndex = delta_attestation.index;
-            }
-            try self.attestations.put(validator_id, attestation_tracker);
-        }
+        // only validators whose votes changed since the last apply contribute non zero deltas
+        _ = try self.attestations.computeDeltas(self.deltas.items, from_known, @intCast(self.config.genesis.numValidators()), &self.delta_nodes);
 
         return self.deltas.items;
     }
@@ -1013,14 +1439,16 @@ pub const ForkChoice = struct {
     // Internal unlocked version - assumes caller holds lock
     fn computeFCHeadUnlocked(self: *Self, from_known: bool, cutoff_weight: u64) !ProtoBlock {
         const deltas = try self.computeDeltasUnlocked(from_known);
-        try self.protoArray.applyDeltasUnlocked(deltas, cutoff_weight);
+        // the best links are always applied with a zero cutoff, head and safe target updates
+        // alternate and a link cutoff changing between them would force full recomputes
+        try self.protoArray.applyDeltasIncrementalUnlocked(deltas, self.delta_nodes.items, 0);
 
         // head is the best descendant of latest justified
         const justified_idx = self.protoArray.indices.get(self.fcStore.latest_justified.root) orelse return ForkChoiceError.InvalidJustifiedRoot;
         const justified_node = self.protoArray.nodes.items[justified_idx];
 
         // if case of no best descendant latest justified is always best descendant
-        const best_descendant_idx = justified_node.bestDescendant orelse justified_idx;
+        const best_descendant_idx = self.protoArray.bestDescendantAtCutoff(justified_idx, cutoff_weight);
         const best_descendant = self.protoArray.nodes.items[best_descendant_idx];
 
         self.logger.debug("computeFCHead from_known={} cutoff_weight={d} deltas_len={d} justified_node={f} best_descendant_idx={d}", .{
@@ -1045,6 +1473,11 @@ pub const ForkChoice = struct {
 
         // Detect reorg: if head changed and previous head is not an ancestor of new head
         if (!std.mem.eql(u8, &self.head.blockRoot, &previous_head.blockRoot)) {
+            // both blocks change their role in the forkchoice graph
+            self.protoArray.touchRoot(previous_head.blockRoot);
+            self.protoArray.touchRoot(self.head.blockRoot);
+            self.protoArray.publishGeneration();
+
             // Build ancestor map while checking - reused in calculateReorgDepth if reorg detected
             var new_head_ancestors = std.AutoHashMap(types.Root, void).init(self.allocator);
             defer new_head_ancestors.deinit();
@@ -1080,6 +1513,12 @@ pub const ForkChoice = struct {
             return ForkChoiceError.InvalidSafeTargetCompute;
         }
 
+        if (!std.mem.eql(u8, &safe_target.blockRoot, &self.safeTarget.blockRoot)) {
+            // both blocks change their role in the forkchoice graph
+            self.protoArray.touchRoot(self.safeTarget.blockRoot);
+            self.protoArray.touchRoot(safe_target.blockRoot);
+            self.protoArray.publishGeneration();
+        }
         self.safeTarget = safe_target;
         // Update safe target slot metric
         zeam_metrics.metrics.lean_safe_target_slot.set(self.safeTarget.slot);
@@ -1230,28 +1669,43 @@ pub const ForkChoice = struct {
             else
                 &self.latest_new_aggregated_payloads;
 
+            if (validator_ids.len == 0) return;
+
+            // intern the proof once, every validator entry below only takes a reference
+            const shared = try self.aggregated_proofs.acquire(proof);
+            defer self.aggregated_proofs.release(shared);
+
             for (validator_ids) |validator_id| {
                 const sig_key = SignatureKey{
                     .validator_id = validator_id,
                     .data_root = data_root,
                 };
-                const gop = try target_map.getOrPut(sig_key);
-                if (!gop.found_existing) {
-                    gop.value_ptr.* = .empty;
-                }
-
-                var cloned_proof: types.AggregatedSignatureProof = undefined;
-                try types.sszClone(self.allocator, types.AggregatedSignatureProof, proof, &cloned_proof);
-                errdefer cloned_proof.deinit();
-
-                try gop.value_ptr.append(self.allocator, .{
-                    .slot = attestation_data.slot,
-                    .proof = cloned_proof,
-                });
+                try self.appendAggregatedPayloadUnlocked(target_map, sig_key, attestation_data.slot, shared);
             }
         }
     }
 
+    /// Appends a payload entry referencing `shared` under `sig_key`, taking its own reference.
+    /// Assumes caller holds signatures_mutex.
+    fn appendAggregatedPayloadUnlocked(
+        self: *Self,
+        target_map: *AggregatedPayloadsMap,
+        sig_key: SignatureKey,
+        slot: types.Slot,
+        shared: *SharedAggregatedProof,
+    ) !void {
+        const gop = try target_map.getOrPut(sig_key);
+        if (!gop.found_existing) {
+            gop.value_ptr.* = .empty;
+        }
+        // grow first, so a failed append can't leak the reference taken for the entry
+        try gop.value_ptr.ensureUnusedCapacity(self.allocator, 1);
+        gop.value_ptr.appendAssumeCapacity(.{
+            .slot = slot,
+            .shared = self.aggregated_proofs.retain(shared),
+        });
+    }
+
     fn aggregateCommitteeSignaturesUnlocked(self: *Self, state_opt: ?*const types.BeamState) ![]types.SignedAggregatedAttestation {
         const state = state_opt orelse return try self.allocator.alloc(types.SignedAggregatedAttestation, 0);
 
@@ -1314,23 +1768,15 @@ pub const ForkChoice = struct {
             var validator_indices = try types.aggregationBitsToValidatorIndices(&proof.participants, self.allocator);
             defer validator_indices.deinit(self.allocator);
 
+            const shared = try self.aggregated_proofs.acquire(proof);
+            defer self.aggregated_proofs.release(shared);
+
             for (validator_indices.items) |validator_index| {
                 const sig_key = SignatureKey{
                     .validator_id = @intCast(validator_index),
                     .data_root = data_root,
                 };
-                const gop = try self.latest_new_aggregated_payloads.getOrPut(sig_key);
-                if (!gop.found_existing) {
-                    gop.value_ptr.* = .empty;
-                }
-
-                var cloned_proof: types.AggregatedSignatureProof = undefined;
-                try types.sszClone(self.allocator, types.AggregatedSignatureProof, proof, &cloned_proof);
-                errdefer cloned_proof.deinit();
-                try gop.value_ptr.append(self.allocator, .{
-                    .slot = agg_att.data.slot,
-                    .proof = cloned_proof,
-                });
+                try self.appendAggregatedPayloadUnlocked(&self.latest_new_aggregated_payloads, sig_key, agg_att.data.slot, shared);
                 // Align with leanSpec: once this signature is represented by an aggregated
                 // payload, remove it from the gossip signature map to prevent re-aggregation.
                 _ = self.gossip_signatures.remove(sig_key);
@@ -1412,8 +1858,8 @@ pub const ForkChoice = struct {
             _ = self.gossip_signatures.remove(sig_key);
         }
 
-        const removed_known = try prunePayloadMapByRoots(self.allocator, &self.latest_known_aggregated_payloads, &stale_roots);
-        const removed_new = try prunePayloadMapByRoots(self.allocator, &self.latest_new_aggregated_payloads, &stale_roots);
+        const removed_known = try prunePayloadMapByRoots(self.allocator, &self.aggregated_proofs, &self.latest_known_aggregated_payloads, &stale_roots);
+        const removed_new = try prunePayloadMapByRoots(self.allocator, &self.aggregated_proofs, &self.latest_new_aggregated_payloads, &stale_roots);
 
         self.logger.debug(
             "pruned stale attestation data: roots={d} gossip={d} payloads_known={d} payloads_new={d} finalized_slot={d}",
@@ -1429,6 +1875,7 @@ pub const ForkChoice = struct {
 
     fn prunePayloadMapByRoots(
         allocator: Allocator,
+        proofs: *AggregatedProofStore,
         payloads: *AggregatedPayloadsMap,
         stale_roots: *const std.AutoHashMap(types.Root, void),
     ) !usize {
@@ -1440,8 +1887,8 @@ pub const ForkChoice = struct {
         while (it.next()) |entry| {
             if (!stale_roots.contains(entry.key_ptr.data_root)) continue;
 
-            for (entry.value_ptr.items) |*stored| {
-                stored.proof.deinit();
+            for (entry.value_ptr.items) |stored| {
+                proofs.release(stored.shared);
             }
             removed_total += entry.value_ptr.items.len;
             try keys_to_remove.append(allocator, entry.key_ptr.*);
@@ -1480,8 +1927,18 @@ pub const ForkChoice = struct {
 
             const justified = state.latest_justified;
             const finalized = state.latest_finalized;
-            const prev_justified_slot = self.fcStore.latest_justified.slot;
+            const prev_justified = self.fcStore.latest_justified;
+            const prev_justified_slot = prev_justified.slot;
+            const prev_finalized_slot = self.fcStore.latest_finalized.slot;
             self.fcStore.update(justified, finalized);
+            // the finalized role spreads over all ancestors of the finalized block while only the
+            // two justified blocks change role, onBlock below publishes the change
+            if (self.fcStore.latest_finalized.slot != prev_finalized_slot) {
+                self.protoArray.touchAll();
+            } else if (self.fcStore.latest_justified.slot != prev_justified_slot) {
+                self.protoArray.touchRoot(prev_justified.root);
+                self.protoArray.touchRoot(self.fcStore.latest_justified.root);
+            }
             // Transition from initing to ready once we observe a real justified checkpoint
             // that is strictly newer than the anchor (i.e., actual chain progress has been seen).
             if (self.status == .initing and self.fcStore.latest_justified.slot > prev_justified_slot) {
@@ -1550,6 +2007,9 @@ pub const ForkChoice = struct {
     // These methods acquire locks and delegate to unlocked helpers
 
     pub fn updateHead(self: *Self) !ProtoBlock {
+        const update_head_span = zeam_metrics.tracing.span(.forkchoice_update_head);
+        defer update_head_span.end();
+
         self.mutex.lock();
         defer self.mutex.unlock();
         return self.updateHeadUnlocked();
@@ -1643,6 +2103,12 @@ pub const ForkChoice = struct {
         return self.getCanonicalAncestorAtDepthUnlocked(min_depth);
     }
 
+    pub fn getCanonicalBlockRootsInRange(self: *Self, allocator: Allocator, start_slot: types.Slot, end_slot: types.Slot) ![]types.Root {
+        self.mutex.lockShared();
+        defer self.mutex.unlockShared();
+        return self.getCanonicalBlockRootsInRangeUnlocked(allocator, start_slot, end_slot);
+    }
+
     pub fn confirmBlock(self: *Self, blockRoot: types.Root) !void {
         self.mutex.lock();
         defer self.mutex.unlock();
@@ -1758,6 +2224,7 @@ pub const ForkChoiceError = error{
     InvalidCanonicalTraversal,
     InvalidForkchoiceBlock,
     InvalidSafeTargetCompute,
+    InvalidRebaseRemap,
 };
 
 // TODO: Enable and update this test once the keymanager file-reading PR is added
@@ -1904,6 +2371,68 @@ test "aggregateCommitteeSignatures prunes aggregated gossip signatures" {
     }) != null);
 }
 
+test "aggregated payloads share one refcounted proof across validators" {
+    const allocator = std.testing.allocator;
+
+    var mock_chain = try stf.genMockChain(allocator, 1, null);
+    defer mock_chain.deinit(allocator);
+    defer mock_chain.genesis_state.deinit();
+
+    const spec_name = try allocator.dupe(u8, "beamdev");
+    defer allocator.free(spec_name);
+    const chain_config = configs.ChainConfig{
+        .id = configs.Chain.custom,
+        .genesis = mock_chain.genesis_config,
+        .spec = .{
+            .preset = params.Preset.mainnet,
+            .name = spec_name,
+            .attestation_committee_count = 1,
+        },
+    };
+
+    var zeam_logger_config = zeam_utils.getTestLoggerConfig();
+    var fork_choice = try ForkChoice.init(allocator, .{
+        .config = chain_config,
+        .anchorState = &mock_chain.genesis_state,
+        .logger = zeam_logger_config.logger(.forkchoice),
+    });
+    defer fork_choice.deinit();
+
+    const attestation_data = types.AttestationData{
+        .slot = 0,
+        .head = .{ .root = fork_choice.head.blockRoot, .slot = 0 },
+        .target = .{ .root = fork_choice.head.blockRoot, .slot = 0 },
+        .source = .{ .root = fork_choice.head.blockRoot, .slot = 0 },
+    };
+    const data_root = try attestation_data.sszRoot(allocator);
+
+    var proof = try types.AggregatedSignatureProof.init(allocator);
+    defer proof.deinit();
+    const validator_ids = [_]types.ValidatorIndex{ 0, 1, 2, 3 };
+    for (validator_ids) |validator_id| {
+        try types.aggregationBitsSet(&proof.participants, @intCast(validator_id), true);
+    }
+
+    // the same aggregate seen over gossip and then again in a block is interned once
+    try fork_choice.storeAggregatedPayload(&validator_ids, &attestation_data, proof, false);
+    try fork_choice.storeAggregatedPayload(&validator_ids, &attestation_data, proof, true);
+    try std.testing.expectEqual(@as(usize, 1), fork_choice.aggregated_proofs.count());
+
+    const known = fork_choice.latest_known_aggregated_payloads.get(.{ .validator_id = 0, .data_root = data_root }).?;
+    const pending = fork_choice.latest_new_aggregated_payloads.get(.{ .validator_id = 3, .data_root = data_root }).?;
+    try std.testing.expect(known.items[0].shared == pending.items[0].shared);
+    try std.testing.expectEqual(@as(usize, 2 * validator_ids.len), known.items[0].shared.refs);
+
+    // migration moves references without touching the store
+    _ = try fork_choice.acceptNewAttestations();
+    try std.testing.expectEqual(@as(usize, 1), fork_choice.aggregated_proofs.count());
+
+    // pruning releases every reference and frees the proof
+    try fork_choice.pruneStaleAttestationData(0);
+    try std.testing.expectEqual(@as(usize, 0), fork_choice.latest_known_aggregated_payloads.count());
+    try std.testing.expectEqual(@as(usize, 0), fork_choice.aggregated_proofs.count());
+}
+
 // Helper function to create a deterministic test root filled with a specific byte
 fn createTestRoot(fill_byte: u8) types.Root {
     var root: types.Root = undefined;
@@ -1952,6 +2481,223 @@ test "protoarray tie-break aligns with leanSpec hash ordering" {
     try std.testing.expectEqual(@as(types.Slot, 1), best_child.slot);
 }
 
+fn createIndexedTestRoot(idx: usize) types.Root {
+    var root = createTestRoot(0x5A);
+    std.mem.writeInt(u64, root[0..8], @intCast(idx), .little);
+    return root;
+}
+
+test "protoarray incremental deltas match full recompute" {
+    const allocator = std.testing.allocator;
+    var prng = std.Random.DefaultPrng.init(0x5eed);
+    const random = prng.random();
+
+    const anchor_block = ProtoBlock{
+        .slot = 0,
+        .blockRoot = createIndexedTestRoot(0),
+        .parentRoot = createTestRoot(0x00),
+        .stateRoot = createTestRoot(0x00),
+        .timeliness = true,
+        .confirmed = true,
+    };
+    var full = try ProtoArray.init(allocator, anchor_block);
+    defer full.nodes.deinit(full.allocator);
+    defer full.indices.deinit();
+    var incremental = try ProtoArray.init(allocator, anchor_block);
+    defer incremental.nodes.deinit(incremental.allocator);
+    defer incremental.indices.deinit();
+
+    var full_deltas: std.ArrayList(isize) = .empty;
+    defer full_deltas.deinit(allocator);
+    var incremental_deltas: std.ArrayList(isize) = .empty;
+    defer incremental_deltas.deinit(allocator);
+    var dirty: std.ArrayList(usize) = .empty;
+    defer dirty.deinit(allocator);
+
+    var votes = [_]?usize{null} ** 16;
+    for (0..300) |round| {
+        // grow the tree with random forks
+        for (0..random.uintLessThan(usize, 3)) |_| {
+            const node_idx = full.nodes.items.len;
+            const parent_idx = random.uintLessThan(usize, node_idx);
+            const block = ProtoBlock{
+                .slot = node_idx,
+                .blockRoot = createIndexedTestRoot(node_idx),
+                .parentRoot = full.nodes.items[parent_idx].blockRoot,
+                .stateRoot = createTestRoot(0x00),
+                .timeliness = true,
+                .confirmed = true,
+            };
+            try full.onBlock(block, node_idx);
+            try incremental.onBlock(block, node_idx);
+        }
+
+        const num_nodes = full.nodes.items.len;
+        try full_deltas.resize(allocator, num_nodes);
+        @memset(full_deltas.items, 0);
+        try incremental_deltas.resize(allocator, num_nodes);
+        @memset(incremental_deltas.items, 0);
+        dirty.clearRetainingCapacity();
+
+        // move a few votes around
+        for (0..random.uintLessThan(usize, 4)) |_| {
+            const validator_id = random.uintLessThan(usize, votes.len);
+            if (votes[validator_id]) |old_idx| {
+                full_deltas.items[old_idx] -= 1;
+                incremental_deltas.items[old_idx] -= 1;
+                try dirty.append(allocator, old_idx);
+            }
+            const new_idx = random.uintLessThan(usize, num_nodes);
+            full_deltas.items[new_idx] += 1;
+            incremental_deltas.items[new_idx] += 1;
+            try dirty.append(allocator, new_idx);
+            votes[validator_id] = new_idx;
+        }
+
+        // mostly keep the cutoff stable so that the incremental path is exercised
+        const cutoff_weight: u64 = if (round % 10 < 7) 0 else 3;
+        try full.applyDeltasUnlocked(full_deltas.items, cutoff_weight);
+        try incremental.applyDeltasIncrementalUnlocked(incremental_deltas.items, dirty.items, cutoff_weight);
+
+        for (full.nodes.items, incremental.nodes.items) |full_node, incremental_node| {
+            try std.testing.expectEqual(full_node.weight, incremental_node.weight);
+            try std.testing.expectEqual(full_node.bestChild, incremental_node.bestChild);
+            try std.testing.expectEqual(full_node.bestDescendant, incremental_node.bestDescendant);
+        }
+    }
+}
+
+test "head and safe target updates both apply deltas incrementally" {
+    const allocator = std.testing.allocator;
+    var ctx = try RebaseTestContext.init(allocator, 4);
+    defer ctx.deinit();
+    ctx.fork_choice.safeTarget = createTestProtoBlock(0, 0xAA, 0x00);
+
+    // validators 0 and 1 vote for F, 2 for E and 3 for I: D and E weigh 3, F weighs 2
+    try stageAggregatedAttestation(allocator, &ctx.fork_choice, createTestSignedAttestation(0, createTestRoot(0xFF), 8));
+    try stageAggregatedAttestation(allocator, &ctx.fork_choice, createTestSignedAttestation(1, createTestRoot(0xFF), 8));
+    try stageAggregatedAttestation(allocator, &ctx.fork_choice, createTestSignedAttestation(2, createTestRoot(0xEE), 6));
+    try stageAggregatedAttestation(allocator, &ctx.fork_choice, createTestSignedAttestation(3, createTestRoot(0x33), 7));
+    _ = try ctx.fork_choice.acceptNewAttestations();
+
+    for (0..3) |_| {
+        // the links of the previous update were applied with the same cutoff, which is what
+        // lets applyDeltasIncrementalUnlocked skip the full recompute
+        try std.testing.expectEqual(@as(?u64, 0), ctx.fork_choice.protoArray.last_cutoff_weight);
+        const head = try ctx.fork_choice.updateHead();
+        try std.testing.expectEqualSlices(u8, &createTestRoot(0xFF), &head.blockRoot);
+
+        try std.testing.expectEqual(@as(?u64, 0), ctx.fork_choice.protoArray.last_cutoff_weight);
+        // E is the deepest block of the head chain with 2/3 of the 4 votes
+        const safe_target = try ctx.fork_choice.updateSafeTarget();
+        try std.testing.expectEqualSlices(u8, &createTestRoot(0xEE), &safe_target.blockRoot);
+    }
+
+    // the head links are untouched by the safe target cutoff
+    const anchor = ctx.fork_choice.protoArray.nodes.items[0];
+    try std.testing.expectEqual(ctx.fork_choice.protoArray.indices.get(createTestRoot(0xFF)), anchor.bestDescendant);
+}
+
+test "safe target change alone refreshes the cached forkchoice graph" {
+    const allocator = std.testing.allocator;
+    var ctx = try RebaseTestContext.init(allocator, 4);
+    defer ctx.deinit();
+    ctx.fork_choice.safeTarget = createTestProtoBlock(0, 0xAA, 0x00);
+
+    // all votes on F, applied by the head update so the safe target update moves no weight
+    for (0..4) |validator_id| {
+        try stageAggregatedAttestation(allocator, &ctx.fork_choice, createTestSignedAttestation(validator_id, createTestRoot(0xFF), 8));
+    }
+    _ = try ctx.fork_choice.acceptNewAttestations();
+
+    var graph = @import("./forkchoice_graph.zig").ForkChoiceGraphCache.init(allocator);
+    defer graph.deinit();
+    var before: std.ArrayList(u8) = .empty;
+    defer before.deinit(allocator);
+    const before_generation = try graph.writeGraph(&ctx.fork_choice, 64, &before, allocator);
+
+    const safe_target = try ctx.fork_choice.updateSafeTarget();
+    try std.testing.expectEqualSlices(u8, &createTestRoot(0xFF), &safe_target.blockRoot);
+    try std.testing.expect(ctx.fork_choice.graphGeneration() != before_generation);
+
+    var after: std.ArrayList(u8) = .empty;
+    defer after.deinit(allocator);
+    _ = try graph.writeGraph(&ctx.fork_choice, 64, &after, allocator);
+    var expected: [128]u8 = undefined;
+    const safe_target_json = try std.fmt.bufPrint(&expected, "\"safe_target\":{{\"root\":\"0x{x}", .{&createTestRoot(0xFF)});
+    try std.testing.expect(std.mem.indexOf(u8, before.items, safe_target_json) == null);
+    try std.testing.expect(std.mem.indexOf(u8, after.items, safe_target_json) != null);
+}
+
+test "protoarray generation marks the nodes changed for the graph" {
+    const allocator = std.testing.allocator;
+
+    const anchor_block = createTestProtoBlock(0, 0xAA, 0x00);
+    var proto_array = try ProtoArray.init(allocator, anchor_block);
+    defer proto_array.nodes.deinit(proto_array.allocator);
+    defer proto_array.indices.deinit();
+
+    try proto_array.onBlock(createTestProtoBlock(1, 0x10, 0xAA), 1);
+    try proto_array.onBlock(createTestProtoBlock(1, 0x20, 0xAA), 1);
+    const after_blocks = proto_array.generation.load(.monotonic);
+    try std.testing.expectEqual(@as(u64, 3), after_blocks);
+
+    // known blocks and applications without any change don't publish a generation
+    try proto_array.onBlock(createTestProtoBlock(1, 0x10, 0xAA), 1);
+    var deltas = [_]isize{ 0, 0, 0 };
+    try proto_array.applyDeltasUnlocked(&deltas, 0);
+    const settled = proto_array.generation.load(.monotonic);
+    deltas = .{ 0, 0, 0 };
+    try proto_array.applyDeltasIncrementalUnlocked(&deltas, &.{}, 0);
+    try std.testing.expectEqual(settled, proto_array.generation.load(.monotonic));
+
+    // a vote moving to 0x10 changes its weight and makes it the best child over 0x20
+    deltas = .{ 0, 1, 0 };
+    try proto_array.applyDeltasIncrementalUnlocked(&deltas, &.{1}, 0);
+    const voted = proto_array.generation.load(.monotonic);
+    try std.testing.expectEqual(settled + 1, voted);
+    try std.testing.expectEqual(voted, proto_array.nodes.items[1].generation);
+    try std.testing.expectEqual(voted, proto_array.nodes.items[2].generation);
+    // the anchor got the vote propagated
+    try std.testing.expectEqual(voted, proto_array.nodes.items[0].generation);
+    try std.testing.expectEqual(@as(u64, 0), proto_array.reset_generation);
+}
+
+test "attestation trackers only touch validators with changed votes" {
+    const allocator = std.testing.allocator;
+    var trackers = AttestationTrackers.init(allocator);
+    defer trackers.deinit();
+
+    const known_vote = ProtoAttestation{ .index = 1, .slot = 1 };
+    try trackers.put(0, .{ .latestKnown = known_vote, .latestNew = known_vote });
+    try trackers.put(2, .{ .latestNew = .{ .index = 2, .slot = 2 } });
+    try std.testing.expect(trackers.count() == 3);
+    try std.testing.expect(trackers.get(5) == null);
+
+    var deltas = [_]isize{ 0, 0, 0 };
+    _ = try trackers.computeDeltas(&deltas, true, 4, null);
+    try std.testing.expectEqualSlices(isize, &[_]isize{ 0, 1, 0 }, &deltas);
+    try std.testing.expect(trackers.get(0).?.appliedIndex.? == 1);
+    try std.testing.expect(trackers.get(2).?.appliedIndex == null);
+
+    // nothing changed, nothing is touched
+    deltas = .{ 0, 0, 0 };
+    try std.testing.expectEqual(@as(usize, 0), try trackers.computeDeltas(&deltas, true, 4, null));
+    try std.testing.expectEqualSlices(isize, &[_]isize{ 0, 0, 0 }, &deltas);
+
+    // switching to new votes only re-applies the diverging validator
+    try std.testing.expectEqual(@as(usize, 1), try trackers.computeDeltas(&deltas, false, 4, null));
+    try std.testing.expectEqualSlices(isize, &[_]isize{ 0, 0, 1 }, &deltas);
+
+    // promotion makes the votes converge and re-applying them is a no-op on weights
+    try trackers.promoteNewToKnown();
+    try std.testing.expect(trackers.get(2).?.latestKnown.?.index == 2);
+    deltas = .{ 0, 0, 0 };
+    try std.testing.expectEqual(@as(usize, 1), try trackers.computeDeltas(&deltas, false, 4, null));
+    try std.testing.expectEqualSlices(isize, &[_]isize{ 0, 0, 0 }, &deltas);
+    try std.testing.expectEqual(@as(usize, 0), try trackers.computeDeltas(&deltas, true, 4, null));
+}
+
 test "getCanonicalAncestorAtDepth and getCanonicalityAnalysis" {
     // ============================================================================
     // COMPREHENSIVE TEST TREE
@@ -2055,7 +2801,7 @@ test "getCanonicalAncestorAtDepth and getCanonicalityAnalysis" {
         .anchorState = &beam_state,
         .config = chain_config,
         .fcStore = fc_store,
-        .attestations = std.AutoHashMap(usize, AttestationTracker).init(allocator),
+        .attestations = AttestationTrackers.init(allocator),
         .head = createTestProtoBlock(8, 0xFF, 0xEE), // Head is F
         .safeTarget = createTestProtoBlock(8, 0xFF, 0xEE),
         .deltas = .empty,
@@ -2065,15 +2811,18 @@ test "getCanonicalAncestorAtDepth and getCanonicalityAnalysis" {
         .attestation_data_by_root = std.AutoHashMap(types.Root, types.AttestationData).init(allocator),
         .latest_new_aggregated_payloads = AggregatedPayloadsMap.init(allocator),
         .latest_known_aggregated_payloads = AggregatedPayloadsMap.init(allocator),
+        .aggregated_proofs = AggregatedProofStore.init(allocator),
         .signatures_mutex = std.Thread.Mutex{},
         .status = .ready,
     };
     defer fork_choice.attestations.deinit();
     defer fork_choice.deltas.deinit(fork_choice.allocator);
+    defer fork_choice.delta_nodes.deinit(fork_choice.allocator);
     defer fork_choice.gossip_signatures.deinit();
     defer fork_choice.attestation_data_by_root.deinit();
     defer deinitAggregatedPayloadsMap(allocator, &fork_choice.latest_known_aggregated_payloads);
     defer deinitAggregatedPayloadsMap(allocator, &fork_choice.latest_new_aggregated_payloads);
+    defer fork_choice.aggregated_proofs.deinit();
 
     // ========================================
     // TEST getCanonicalAncestorAtDepth
@@ -2346,12 +3095,10 @@ fn stageAggregatedAttestation(
 var rebase_test_logger_config = zeam_utils.getTestLoggerConfig();
 
 fn deinitAggregatedPayloadsMap(allocator: Allocator, map: *AggregatedPayloadsMap) void {
-    var it = map.iterator();
-    while (it.next()) |entry| {
-        for (entry.value_ptr.items) |*stored| {
-            stored.proof.deinit();
-        }
-        entry.value_ptr.deinit(allocator);
+    // referenced proofs are freed by the ForkChoice aggregated_proofs store
+    var it = map.valueIterator();
+    while (it.next()) |list| {
+        list.deinit(allocator);
     }
     map.deinit();
 }
@@ -2408,7 +3155,7 @@ fn buildTestTreeWithMockChain(allocator: Allocator, mock_chain: anytype) !struct
         .anchorState = &mock_chain.genesis_state,
         .config = chain_config,
         .fcStore = fc_store,
-        .attestations = std.AutoHashMap(usize, AttestationTracker).init(allocator),
+        .attestations = AttestationTrackers.init(allocator),
         .head = createTestProtoBlock(8, 0xFF, 0xEE), // Head is F
         .safeTarget = createTestProtoBlock(8, 0xFF, 0xEE),
         .deltas = .{},
@@ -2418,6 +3165,7 @@ fn buildTestTreeWithMockChain(allocator: Allocator, mock_chain: anytype) !struct
         .attestation_data_by_root = std.AutoHashMap(types.Root, types.AttestationData).init(allocator),
         .latest_new_aggregated_payloads = AggregatedPayloadsMap.init(allocator),
         .latest_known_aggregated_payloads = AggregatedPayloadsMap.init(allocator),
+        .aggregated_proofs = AggregatedProofStore.init(allocator),
         .signatures_mutex = std.Thread.Mutex{},
         .status = .ready,
     };
@@ -2451,10 +3199,12 @@ const RebaseTestContext = struct {
         errdefer test_data.fork_choice.protoArray.indices.deinit();
         errdefer test_data.fork_choice.attestations.deinit();
         errdefer test_data.fork_choice.deltas.deinit(test_data.fork_choice.allocator);
+        errdefer test_data.fork_choice.delta_nodes.deinit(test_data.fork_choice.allocator);
         errdefer test_data.fork_choice.gossip_signatures.deinit();
         errdefer test_data.fork_choice.attestation_data_by_root.deinit();
         errdefer test_data.fork_choice.latest_known_aggregated_payloads.deinit();
         errdefer test_data.fork_choice.latest_new_aggregated_payloads.deinit();
+        errdefer test_data.fork_choice.aggregated_proofs.deinit();
 
         return .{
             .mock_chain = mock_chain,
@@ -2470,26 +3220,13 @@ const RebaseTestContext = struct {
         self.fork_choice.protoArray.indices.deinit();
         self.fork_choice.attestations.deinit();
         self.fork_choice.deltas.deinit(self.allocator);
+        self.fork_choice.delta_nodes.deinit(self.allocator);
         self.fork_choice.gossip_signatures.deinit();
         self.fork_choice.attestation_data_by_root.deinit();
-        // Deinit each list in latest_known_aggregated_payloads
-        var it_known = self.fork_choice.latest_known_aggregated_payloads.iterator();
-        while (it_known.next()) |entry| {
-            for (entry.value_ptr.items) |*stored| {
-                stored.proof.deinit();
-            }
-            entry.value_ptr.deinit(self.allocator);
-        }
-        self.fork_choice.latest_known_aggregated_payloads.deinit();
-        // Deinit each list in latest_new_aggregated_payloads
-        var it_new = self.fork_choice.latest_new_aggregated_payloads.iterator();
-        while (it_new.next()) |entry| {
-            for (entry.value_ptr.items) |*stored| {
-                stored.proof.deinit();
-            }
-            entry.value_ptr.deinit(self.allocator);
-        }
-        self.fork_choice.latest_new_aggregated_payloads.deinit();
+        // Deinit each list in the aggregated payloads maps, then the proofs they reference
+        deinitAggregatedPayloadsMap(self.allocator, &self.fork_choice.latest_known_aggregated_payloads);
+        deinitAggregatedPayloadsMap(self.allocator, &self.fork_choice.latest_new_aggregated_payloads);
+        self.fork_choice.aggregated_proofs.deinit();
         self.allocator.free(self.spec_name);
 
         // Cleanup mock_chain genesis_state components
@@ -3385,7 +4122,7 @@ test "rebase: heavy attestation load - all validators tracked correctly" {
         .anchorState = &mock_chain.genesis_state,
         .config = chain_config,
         .fcStore = fc_store,
-        .attestations = std.AutoHashMap(usize, AttestationTracker).init(allocator),
+        .attestations = AttestationTrackers.init(allocator),
         .head = createTestProtoBlock(3, 0xDD, 0xCC),
         .safeTarget = createTestProtoBlock(3, 0xDD, 0xCC),
         .deltas = .empty,
@@ -3395,6 +4132,7 @@ test "rebase: heavy attestation load - all validators tracked correctly" {
         .attestation_data_by_root = std.AutoHashMap(types.Root, types.AttestationData).init(allocator),
         .latest_new_aggregated_payloads = AggregatedPayloadsMap.init(allocator),
         .latest_known_aggregated_payloads = AggregatedPayloadsMap.init(allocator),
+        .aggregated_proofs = AggregatedProofStore.init(allocator),
         .signatures_mutex = std.Thread.Mutex{},
         .status = .ready,
     };
@@ -3402,10 +4140,12 @@ test "rebase: heavy attestation load - all validators tracked correctly" {
     // moved into fork_choice and will be deinitialized separately
     defer fork_choice.attestations.deinit();
     defer fork_choice.deltas.deinit(fork_choice.allocator);
+    defer fork_choice.delta_nodes.deinit(fork_choice.allocator);
     defer fork_choice.gossip_signatures.deinit();
     defer fork_choice.attestation_data_by_root.deinit();
     defer deinitAggregatedPayloadsMap(allocator, &fork_choice.latest_known_aggregated_payloads);
     defer deinitAggregatedPayloadsMap(allocator, &fork_choice.latest_new_aggregated_payloads);
+    defer fork_choice.aggregated_proofs.deinit();
 
     // Setup attestations for all validators
     // Distribute across C and D
@@ -3491,6 +4231,56 @@ test "rebase: deltas array is properly shrunk" {
     try std.testing.expect(ctx.fork_choice.deltas.items.len == 7);
 }
 
+test "rebase: compaction keeps order and tolerates lagging deltas" {
+    // ========================================
+    // Test: compaction produces a dense, order preserving remap
+    // ========================================
+    //
+    // Rebasing to D (slot 5) keeps D, E, F only. Deltas were never computed so the
+    // deltas array is shorter than the node array and must stay consistent.
+
+    const allocator = std.testing.allocator;
+    var ctx = try RebaseTestContext.init(allocator, 4);
+    defer ctx.deinit();
+
+    try std.testing.expect(ctx.fork_choice.deltas.items.len == 0);
+    try ctx.fork_choice.rebase(createTestRoot(0xDD), null);
+
+    const nodes = ctx.fork_choice.protoArray.nodes.items;
+    try std.testing.expect(nodes.len == 3);
+    try std.testing.expect(ctx.fork_choice.deltas.items.len == 0);
+
+    const expected = [_]u8{ 0xDD, 0xEE, 0xFF };
+    for (expected, 0..) |root_byte, idx| {
+        try std.testing.expect(std.mem.eql(u8, &nodes[idx].blockRoot, &createTestRoot(root_byte)));
+        try std.testing.expect(ctx.fork_choice.protoArray.indices.get(createTestRoot(root_byte)).? == idx);
+        try std.testing.expect(nodes[idx].depth == idx);
+        if (idx == 0) {
+            try std.testing.expect(nodes[idx].parent == null);
+        } else {
+            try std.testing.expect(nodes[idx].parent.? == idx - 1);
+        }
+    }
+    try std.testing.expect(nodes[0].firstChild == 1 and nodes[0].latestChild == 1);
+    try std.testing.expect(nodes[2].latestChild == 0);
+    try std.testing.expect(ctx.fork_choice.protoArray.indices.count() == 3);
+}
+
+test "rebase: graph generation resets on compaction" {
+    const allocator = std.testing.allocator;
+    var ctx = try RebaseTestContext.init(allocator, 4);
+    defer ctx.deinit();
+
+    const before = ctx.fork_choice.graphGeneration();
+    try ctx.fork_choice.rebase(createTestRoot(0xDD), null);
+
+    const snapshot = try ctx.fork_choice.snapshot(allocator);
+    defer snapshot.deinit(allocator);
+    try std.testing.expectEqual(before + 1, snapshot.generation);
+    try std.testing.expectEqual(snapshot.generation, snapshot.reset_generation);
+    try std.testing.expectEqual(snapshot.generation, ctx.fork_choice.graphGeneration());
+}
+
 test "rebase: bestChild/bestDescendant null handled in rebase (issue #545)" {
     // ========================================
     // Test: rebase does not panic when a node has bestChild set but bestDescendant null
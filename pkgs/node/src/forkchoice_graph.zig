@@ -0,0 +1,94 @@
+const std = @import("std");
+const Allocator = std.mem.Allocator;
+
+const fcFactory = @import("./forkchoice.zig");
+const tree_visualizer = @import("./tree_visualizer.zig");
+
+const ForkChoice = fcFactory.ForkChoice;
+
+/// Versioned model of the forkchoice graph served to dashboards. It keeps the snapshot of the
+/// last seen forkchoice generation and the graph JSON already rendered from it per slots
+/// window. Requests at an unchanged generation are answered from the renders with one atomic
+/// load and no forkchoice lock. A new generation costs one shared-lock node copy, shared by
+/// every window and delta rendered until the next one.
+pub const ForkChoiceGraphCache = struct {
+    allocator: Allocator,
+    mutex: std.Thread.Mutex,
+    snapshot: ?ForkChoice.Snapshot,
+    // full graph JSON per slots window, rendered from snapshot
+    renders: std.AutoHashMapUnmanaged(usize, []u8),
+
+    const Self = @This();
+
+    pub fn init(allocator: Allocator) Self {
+        return .{
+            .allocator = allocator,
+            .mutex = .{},
+            .snapshot = null,
+            .renders = .empty,
+        };
+    }
+
+    pub fn deinit(self: *Self) void {
+        self.clearRenders();
+        self.renders.deinit(self.allocator);
+        if (self.snapshot) |snapshot| snapshot.deinit(self.allocator);
+        self.snapshot = null;
+    }
+
+    /// Appends the graph of the latest `max_slots` slots to `output` and returns the generation
+    /// it was rendered at.
+    pub fn writeGraph(self: *Self, forkchoice: *ForkChoice, max_slots: usize, output: *std.ArrayList(u8), allocator: Allocator) !u64 {
+        self.mutex.lock();
+        defer self.mutex.unlock();
+        const snapshot = try self.refresh(forkchoice);
+
+        const entry = try self.renders.getOrPut(self.allocator, max_slots);
+        if (!entry.found_existing) {
+            var rendered: std.ArrayList(u8) = .empty;
+            errdefer rendered.deinit(self.allocator);
+            tree_visualizer.writeForkChoiceGraphJSON(snapshot, &rendered, max_slots, null, self.allocator) catch |err| {
+                self.renders.removeByPtr(entry.key_ptr);
+                return err;
+            };
+            entry.value_ptr.* = rendered.toOwnedSlice(self.allocator) catch |err| {
+                self.renders.removeByPtr(entry.key_ptr);
+                return err;
+            };
+        }
+        try output.appendSlice(allocator, entry.value_ptr.*);
+        return snapshot.generation;
+    }
+
+    /// Appends the nodes of the latest `max_slots` slots changed after generation `since` to
+    /// `output`, see `tree_visualizer.writeForkChoiceGraphJSON` for the format. Returns the
+    /// generation the delta leads to.
+    pub fn writeGraphDelta(self: *Self, forkchoice: *ForkChoice, max_slots: usize, since: u64, output: *std.ArrayList(u8), allocator: Allocator) !u64 {
+        self.mutex.lock();
+        defer self.mutex.unlock();
+        const snapshot = try self.refresh(forkchoice);
+
+        try tree_visualizer.writeForkChoiceGraphJSON(snapshot, output, max_slots, since, allocator);
+        return snapshot.generation;
+    }
+
+    /// Replaces the snapshot and drops its renders once the forkchoice moved to a new generation.
+    /// Assumes the caller holds the mutex.
+    fn refresh(self: *Self, forkchoice: *ForkChoice) !ForkChoice.Snapshot {
+        if (self.snapshot) |snapshot| {
+            if (snapshot.generation == forkchoice.graphGeneration()) return snapshot;
+        }
+
+        const snapshot = try forkchoice.snapshot(self.allocator);
+        self.clearRenders();
+        if (self.snapshot) |stale| stale.deinit(self.allocator);
+        self.snapshot = snapshot;
+        return snapshot;
+    }
+
+    fn clearRenders(self: *Self) void {
+        var it = self.renders.valueIterator();
+        while (it.next()) |rendered| self.allocator.free(rendered.*);
+        self.renders.clearRetainingCapacity();
+    }
+};
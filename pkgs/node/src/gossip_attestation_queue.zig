@@ -0,0 +1,176 @@
+const std = @import("std");
+const Allocator = std.mem.Allocator;
+
+const types = @import("@zeam/types");
+const zeam_utils = @import("@zeam/utils");
+
+pub const PendingGossipAttestation = struct {
+    attestation: types.SignedAttestation,
+    // hash tree root of the attestation data, which is also the signed message
+    data_root: types.Root,
+};
+
+/// Bounded ingest queue for gossip attestations awaiting signature verification. Attestations
+/// are deduplicated by (validator_id, data_root, signature) until the queue is drained. The
+/// signature is part of the key since nothing is verified yet, a copy with a forged signature
+/// arriving first must not get the genuine one dropped. For the same reason each validator
+/// only gets `max_per_validator` pending copies, so replaying one attestation with garbage
+/// signatures can not fill the queue for the other validators. The chain drains the queue once
+/// a batch is full or at the next interval and verifies the whole batch at once.
+pub const GossipAttestationQueue = struct {
+    allocator: Allocator,
+    capacity: usize,
+    max_per_validator: usize,
+    pending: std.ArrayList(PendingGossipAttestation),
+    queued_keys: std.AutoHashMap(Key, void),
+    // pending copies per validator
+    queued_per_validator: std.AutoHashMap(types.ValidatorIndex, usize),
+
+    const Key = struct {
+        validator_id: types.ValidatorIndex,
+        data_root: types.Root,
+        signature_digest: [32]u8,
+    };
+
+    pub const PushResult = enum {
+        queued,
+        duplicate,
+        validator_limit,
+        full,
+    };
+
+    const Self = @This();
+
+    pub fn init(allocator: Allocator, capacity: usize, max_per_validator: usize) Self {
+        return .{
+            .allocator = allocator,
+            .capacity = capacity,
+            .max_per_validator = max_per_validator,
+            .pending = .empty,
+            .queued_keys = std.AutoHashMap(Key, void).init(allocator),
+            .queued_per_validator = std.AutoHashMap(types.ValidatorIndex, usize).init(allocator),
+        };
+    }
+
+    pub fn deinit(self: *Self) void {
+        self.pending.deinit(self.allocator);
+        self.queued_keys.deinit();
+        self.queued_per_validator.deinit();
+    }
+
+    pub fn len(self: *const Self) usize {
+        return self.pending.items.len;
+    }
+
+    pub fn push(self: *Self, attestation: types.SignedAttestation) !PushResult {
+        var data_root: types.Root = undefined;
+        try zeam_utils.hashTreeRoot(types.AttestationData, attestation.message, &data_root, self.allocator);
+
+        var key = Key{ .validator_id = attestation.validator_id, .data_root = data_root, .signature_digest = undefined };
+        std.crypto.hash.sha2.Sha256.hash(&attestation.signature, &key.signature_digest, .{});
+        if (self.queued_keys.contains(key)) return .duplicate;
+        const validator_copies = try self.queued_per_validator.getOrPut(attestation.validator_id);
+        if (!validator_copies.found_existing) validator_copies.value_ptr.* = 0;
+        if (validator_copies.value_ptr.* >= self.max_per_validator) return .validator_limit;
+        if (self.pending.items.len >= self.capacity) {
+            if (validator_copies.value_ptr.* == 0) _ = self.queued_per_validator.remove(attestation.validator_id);
+            return .full;
+        }
+
+        try self.pending.ensureUnusedCapacity(self.allocator, 1);
+        self.queued_keys.put(key, {}) catch |err| {
+            if (validator_copies.value_ptr.* == 0) _ = self.queued_per_validator.remove(attestation.validator_id);
+            return err;
+        };
+        validator_copies.value_ptr.* += 1;
+        self.pending.appendAssumeCapacity(.{ .attestation = attestation, .data_root = data_root });
+        return .queued;
+    }
+
+    /// Takes all pending attestations in arrival order, the caller owns the returned slice.
+    pub fn drain(self: *Self) ![]PendingGossipAttestation {
+        self.queued_keys.clearRetainingCapacity();
+        self.queued_per_validator.clearRetainingCapacity();
+        return self.pending.toOwnedSlice(self.allocator);
+    }
+};
+
+fn testAttestation(validator_id: types.ValidatorIndex, slot: types.Slot) types.SignedAttestation {
+    const checkpoint = types.Checkpoint{ .root = types.ZERO_HASH, .slot = 0 };
+    return .{
+        .validator_id = validator_id,
+        .message = .{
+            .slot = slot,
+            .head = checkpoint,
+            .target = checkpoint,
+            .source = checkpoint,
+        },
+        .signature = types.ZERO_SIGBYTES,
+    };
+}
+
+test "gossip attestation queue dedups until drained and stays bounded" {
+    const allocator = std.testing.allocator;
+
+    var queue = GossipAttestationQueue.init(allocator, 3, 2);
+    defer queue.deinit();
+
+    try std.testing.expectEqual(.queued, try queue.push(testAttestation(1, 1)));
+    try std.testing.expectEqual(.duplicate, try queue.push(testAttestation(1, 1)));
+    // same data from another validator, or another data from the same validator, is distinct
+    try std.testing.expectEqual(.queued, try queue.push(testAttestation(2, 1)));
+    try std.testing.expectEqual(.queued, try queue.push(testAttestation(1, 2)));
+    try std.testing.expectEqual(.full, try queue.push(testAttestation(3, 1)));
+    try std.testing.expectEqual(@as(usize, 3), queue.len());
+
+    const drained = try queue.drain();
+    defer allocator.free(drained);
+    try std.testing.expectEqual(@as(usize, 3), drained.len);
+    try std.testing.expectEqual(@as(types.ValidatorIndex, 2), drained[1].attestation.validator_id);
+    try std.testing.expectEqual(@as(usize, 0), queue.len());
+
+    // a drained attestation can be queued again
+    try std.testing.expectEqual(.queued, try queue.push(testAttestation(1, 1)));
+}
+
+test "gossip attestation queue keeps a copy with another signature" {
+    const allocator = std.testing.allocator;
+
+    var queue = GossipAttestationQueue.init(allocator, 8, 2);
+    defer queue.deinit();
+
+    var forged = testAttestation(1, 1);
+    forged.signature[0] = 0xff;
+    try std.testing.expectEqual(.queued, try queue.push(forged));
+    try std.testing.expectEqual(.queued, try queue.push(testAttestation(1, 1)));
+    try std.testing.expectEqual(.duplicate, try queue.push(testAttestation(1, 1)));
+    try std.testing.expectEqual(.duplicate, try queue.push(forged));
+    try std.testing.expectEqual(@as(usize, 2), queue.len());
+}
+
+test "gossip attestation queue keeps room for other validators under forged signatures" {
+    const allocator = std.testing.allocator;
+
+    var queue = GossipAttestationQueue.init(allocator, 8, 2);
+    defer queue.deinit();
+
+    // one attestation replayed with many garbage signatures only takes its validator's copies
+    var queued: usize = 0;
+    for (0..64) |i| {
+        var forged = testAttestation(1, 1);
+        std.mem.writeInt(u64, forged.signature[0..8], i + 1, .little);
+        if (try queue.push(forged) == .queued) queued += 1;
+    }
+    try std.testing.expectEqual(@as(usize, 2), queued);
+    try std.testing.expectEqual(.validator_limit, try queue.push(testAttestation(1, 1)));
+
+    for (2..8) |validator_id| {
+        try std.testing.expectEqual(.queued, try queue.push(testAttestation(@intCast(validator_id), 1)));
+    }
+    try std.testing.expectEqual(@as(usize, 8), queue.len());
+
+    // draining gives the validator its copies back
+    const drained = try queue.drain();
+    defer allocator.free(drained);
+    try std.testing.expectEqual(.queued, try queue.push(testAttestation(1, 1)));
+}
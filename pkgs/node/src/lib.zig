@@ -12,6 +12,20 @@ pub const tree_visualizer = @import("./tree_visualizer.zig");
 pub const constants = @import("./constants.zig");
 pub const utils = @import("./utils.zig");
 
+const signatureVerifierFactory = @import("./signature_verifier.zig");
+pub const SignatureVerifier = signatureVerifierFactory.SignatureVerifier;
+
+const rangeSyncFactory = @import("./range_sync.zig");
+pub const RangeSync = rangeSyncFactory.RangeSync;
+
+const finalizedStateCacheFactory = @import("./finalized_state_cache.zig");
+pub const FinalizedStateCache = finalizedStateCacheFactory.FinalizedStateCache;
+pub const FinalizedStateBlob = finalizedStateCacheFactory.FinalizedStateBlob;
+pub const finalizedStateEtag = finalizedStateCacheFactory.finalizedStateEtag;
+
+const forkChoiceGraphFactory = @import("./forkchoice_graph.zig");
+pub const ForkChoiceGraphCache = forkChoiceGraphFactory.ForkChoiceGraphCache;
+
 const networks = @import("@zeam/network");
 pub const NodeNameRegistry = networks.NodeNameRegistry;
 
@@ -19,5 +33,12 @@ test "get tests" {
     _ = @import("./forkchoice.zig");
     _ = @import("./chain.zig");
     _ = @import("./utils.zig");
+    _ = @import("./signature_verifier.zig");
+    _ = @import("./gossip_attestation_queue.zig");
+    _ = @import("./range_sync.zig");
+    _ = @import("./network.zig");
+    _ = @import("./orphan_block_pool.zig");
+    _ = @import("./finalized_state_cache.zig");
+    _ = @import("./forkchoice_graph.zig");
     @import("std").testing.refAllDeclsRecursive(@This());
 }
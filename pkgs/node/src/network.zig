@@ -4,13 +4,57 @@ const types = @import("@zeam/types");
 const params = @import("@zeam/params");
 const ssz = @import("ssz");
 
+const constants = @import("./constants.zig");
+const orphanPoolFactory = @import("./orphan_block_pool.zig");
+const OrphanBlockPool = orphanPoolFactory.OrphanBlockPool;
+
 const Allocator = std.mem.Allocator;
 const StringHashMap = std.StringHashMap;
 
+/// Request history of a peer used to rank it for req/resp requests.
+pub const PeerScore = struct {
+    // exponentially weighted moving average of the response latency, null until the first response
+    latency_ewma_ms: ?f64 = null,
+    successes: u32 = 0,
+    failures: u32 = 0,
+    timeouts: u32 = 0,
+    in_flight: u32 = 0,
+
+    pub fn recordResponse(self: *PeerScore, latency_ms: f64) void {
+        self.successes +|= 1;
+        self.latency_ewma_ms = if (self.latency_ewma_ms) |ewma|
+            ewma + constants.PEER_LATENCY_EWMA_ALPHA * (latency_ms - ewma)
+        else
+            latency_ms;
+    }
+
+    /// Expected cost of sending one more request to the peer, lower is better. The smoothed
+    /// latency is scaled by the requests already queued on the peer, its failure rate and how
+    /// far its head lags behind the best known peer head (unknown heads count as one penalty
+    /// unit of lag). Timeouts weigh double as they hold a request for the full timeout.
+    pub fn cost(self: *const PeerScore, head_lag_slots: ?u64) f64 {
+        const latency_ms = self.latency_ewma_ms orelse constants.PEER_DEFAULT_LATENCY_MS;
+        const queued: f64 = @floatFromInt(@as(u64, self.in_flight) + 1);
+        const failures: f64 = @floatFromInt(@as(u64, self.failures) + 2 * @as(u64, self.timeouts));
+        const successes: f64 = @floatFromInt(@as(u64, self.successes) + 1);
+        const lag_slots: f64 = if (head_lag_slots) |lag| @floatFromInt(lag) else constants.PEER_HEAD_LAG_PENALTY_SLOTS;
+        return latency_ms * queued * (1 + failures / successes) * (1 + lag_slots / constants.PEER_HEAD_LAG_PENALTY_SLOTS);
+    }
+};
+
 pub const PeerInfo = struct {
     peer_id: []const u8,
     connected_at: i64,
     latest_status: ?types.Status = null,
+    score: PeerScore = .{},
+    // position in Network.peer_ids
+    list_index: usize = 0,
+};
+
+pub const RequestOutcome = enum {
+    success,
+    failure,
+    timeout,
 };
 
 pub const StatusRequestContext = struct {
@@ -31,21 +75,40 @@ pub const BlockByRootContext = struct {
     }
 };
 
+pub const BlocksByRangeContext = struct {
+    peer_id: []const u8,
+    start_slot: types.Slot,
+    count: u64,
+
+    pub fn deinit(self: *BlocksByRangeContext, allocator: Allocator) void {
+        allocator.free(self.peer_id);
+    }
+};
+
 pub const PendingRPC = union(enum) {
     status: StatusRequestContext,
     blocks_by_root: BlockByRootContext,
+    blocks_by_range: BlocksByRangeContext,
 
     pub fn deinit(self: *PendingRPC, allocator: Allocator) void {
         switch (self.*) {
             .status => |*ctx| ctx.deinit(allocator),
             .blocks_by_root => |*ctx| ctx.deinit(allocator),
+            .blocks_by_range => |*ctx| ctx.deinit(allocator),
         }
     }
+
+    pub fn peerId(self: *const PendingRPC) []const u8 {
+        return switch (self.*) {
+            inline else => |*ctx| ctx.peer_id,
+        };
+    }
 };
 
 pub const PendingRPCEntry = struct {
     request: PendingRPC,
     created_at: i64,
+    sent_at_ms: i64,
 
     pub fn deinit(self: *PendingRPCEntry, allocator: Allocator) void {
         self.request.deinit(allocator);
@@ -55,10 +118,6 @@ pub const PendingRPCEntry = struct {
 pub const PendingRPCMap = std.AutoHashMap(u64, PendingRPCEntry);
 // key: block root, value: depth
 pub const PendingBlockRootMap = std.AutoHashMap(types.Root, u32);
-// key: block root, value: pointer to block
-pub const FetchedBlockMap = std.AutoHashMap(types.Root, *types.SignedBlockWithAttestation);
-// key: parent root, value: list of child roots (for O(1) child lookup)
-pub const ChildrenMap = std.AutoHashMap(types.Root, std.ArrayList(types.Root));
 
 pub const BlocksByRootRequestResult = struct {
     peer_id: []const u8,
@@ -69,10 +128,15 @@ pub const Network = struct {
     allocator: Allocator,
     backend: networks.NetworkInterface,
     connected_peers: *StringHashMap(PeerInfo),
+    // connected peer ids in a dense list for constant time random sampling
+    peer_ids: std.ArrayList([]const u8),
+    // highest head slot reported by a connected peer, the reference for the head lag of peers,
+    // recomputed whenever a status changes or a peer leaves
+    max_peer_head_slot: types.Slot,
     pending_rpc_requests: PendingRPCMap,
     pending_block_roots: PendingBlockRootMap,
-    fetched_blocks: FetchedBlockMap,
-    fetched_block_children: ChildrenMap,
+    // blocks fetched or received ahead of their parent, with O(1) child lookup
+    fetched_blocks: OrphanBlockPool,
     timed_out_requests: std.ArrayList(u64),
 
     const Self = @This();
@@ -90,20 +154,21 @@ pub const Network = struct {
         var pending_block_roots = PendingBlockRootMap.init(allocator);
         errdefer pending_block_roots.deinit();
 
-        var fetched_blocks = FetchedBlockMap.init(allocator);
-        errdefer fetched_blocks.deinit();
-
-        var fetched_block_children = ChildrenMap.init(allocator);
-        errdefer fetched_block_children.deinit();
+        const fetched_blocks = OrphanBlockPool.init(allocator, .{
+            .max_blocks = constants.MAX_CACHED_BLOCKS,
+            .max_bytes = constants.MAX_CACHED_BLOCK_BYTES,
+            .max_blocks_per_peer = constants.MAX_CACHED_BLOCKS_PER_PEER,
+        });
 
         return Self{
             .allocator = allocator,
             .backend = backend,
             .connected_peers = connected_peers,
+            .peer_ids = .empty,
+            .max_peer_head_slot = 0,
             .pending_rpc_requests = pending_rpc_requests,
             .pending_block_roots = pending_block_roots,
             .fetched_blocks = fetched_blocks,
-            .fetched_block_children = fetched_block_children,
             .timed_out_requests = .empty,
         };
     }
@@ -119,20 +184,9 @@ pub const Network = struct {
 
         self.pending_block_roots.deinit();
 
-        var fetched_it = self.fetched_blocks.iterator();
-        while (fetched_it.next()) |entry| {
-            var block_ptr = entry.value_ptr.*;
-            block_ptr.deinit();
-            self.allocator.destroy(block_ptr);
-        }
         self.fetched_blocks.deinit();
 
-        var children_it = self.fetched_block_children.iterator();
-        while (children_it.next()) |entry| {
-            entry.value_ptr.deinit(self.allocator);
-        }
-        self.fetched_block_children.deinit();
-
+        self.peer_ids.deinit(self.allocator);
         var peer_it = self.connected_peers.iterator();
         while (peer_it.next()) |entry| {
             self.allocator.free(entry.key_ptr.*);
@@ -182,21 +236,110 @@ pub const Network = struct {
         return request_id;
     }
 
+    pub fn requestBlocksByRange(
+        self: *Self,
+        peer_id: []const u8,
+        start_slot: types.Slot,
+        count: u64,
+        callback: ?networks.OnReqRespResponseCbHandler,
+    ) !u64 {
+        if (count == 0 or count > params.MAX_REQUEST_BLOCKS) return error.InvalidBlocksByRangeCount;
+
+        const request = networks.ReqRespRequest{
+            .blocks_by_range = .{ .start_slot = start_slot, .count = count },
+        };
+        return self.backend.reqresp.sendRequest(peer_id, &request, callback);
+    }
+
+    /// Picks a peer for a one-off request, e.g. a blocks_by_root lookup. Such requests are not
+    /// retried, so when every peer is at its in-flight limit the least loaded one is used anyway.
     pub fn selectPeer(self: *Self) ?[]const u8 {
-        const peer_count = self.connected_peers.count();
+        return self.selectScoredPeer(null) orelse self.selectLeastLoadedPeer();
+    }
+
+    /// Picks a peer whose last reported head is at or beyond `min_head_slot` and which has room
+    /// for another request, null if there is none.
+    pub fn selectPeerWithHeadSlot(self: *Self, min_head_slot: types.Slot) ?[]const u8 {
+        return self.selectScoredPeer(min_head_slot);
+    }
+
+    /// Returns the cheapest eligible peer out of a few random samples (power of d choices),
+    /// which is constant time in the number of peers while still steering load towards fast
+    /// peers. All peers are scanned only when none of the samples is eligible.
+    fn selectScoredPeer(self: *Self, min_head_slot: ?types.Slot) ?[]const u8 {
+        const peer_count = self.peer_ids.items.len;
         if (peer_count == 0) return null;
 
-        const target_index = std.crypto.random.uintLessThan(usize, peer_count);
+        var best_peer: ?*const PeerInfo = null;
+        var best_cost = std.math.inf(f64);
+        for (0..@min(peer_count, constants.PEER_SELECTION_SAMPLES)) |_| {
+            const sample = self.peer_ids.items[std.crypto.random.uintLessThan(usize, peer_count)];
+            const peer_info = self.connected_peers.getPtr(sample) orelse continue;
+            if (!isEligiblePeer(peer_info, min_head_slot)) continue;
+            const peer_cost = self.peerCost(peer_info);
+            if (peer_cost < best_cost) {
+                best_peer = peer_info;
+                best_cost = peer_cost;
+            }
+        }
+        if (best_peer) |peer_info| return peer_info.peer_id;
+
+        var it = self.connected_peers.valueIterator();
+        while (it.next()) |peer_info| {
+            if (!isEligiblePeer(peer_info, min_head_slot)) continue;
+            const peer_cost = self.peerCost(peer_info);
+            if (peer_cost < best_cost) {
+                best_peer = peer_info;
+                best_cost = peer_cost;
+            }
+        }
+        return if (best_peer) |peer_info| peer_info.peer_id else null;
+    }
 
-        var it = self.connected_peers.iterator();
-        var current_index: usize = 0;
-        while (it.next()) |entry| : (current_index += 1) {
-            if (current_index == target_index) {
-                return entry.value_ptr.peer_id;
+    fn selectLeastLoadedPeer(self: *Self) ?[]const u8 {
+        var best_peer: ?*const PeerInfo = null;
+        var it = self.connected_peers.valueIterator();
+        while (it.next()) |peer_info| {
+            if (best_peer == null or peer_info.score.in_flight < best_peer.?.score.in_flight) {
+                best_peer = peer_info;
             }
         }
+        return if (best_peer) |peer_info| peer_info.peer_id else null;
+    }
 
-        return null;
+    fn isEligiblePeer(peer_info: *const PeerInfo, min_head_slot: ?types.Slot) bool {
+        if (peer_info.score.in_flight >= constants.PEER_MAX_IN_FLIGHT_REQUESTS) return false;
+        const slot = min_head_slot orelse return true;
+        const status = peer_info.latest_status orelse return false;
+        return status.head_slot >= slot;
+    }
+
+    fn peerCost(self: *const Self, peer_info: *const PeerInfo) f64 {
+        const head_lag_slots: ?u64 = if (peer_info.latest_status) |status|
+            self.max_peer_head_slot -| status.head_slot
+        else
+            null;
+        return peer_info.score.cost(head_lag_slots);
+    }
+
+    pub fn getPeerScore(self: *Self, peer_id: []const u8) ?PeerScore {
+        const peer_info = self.connected_peers.getPtr(peer_id) orelse return null;
+        return peer_info.score;
+    }
+
+    /// Feeds the outcome of a pending request into the score of the peer serving it, to be
+    /// called before the request is finalized.
+    pub fn recordRequestOutcome(self: *Self, request_id: u64, outcome: RequestOutcome) void {
+        const entry = self.pending_rpc_requests.getPtr(request_id) orelse return;
+        const peer_info = self.connected_peers.getPtr(entry.request.peerId()) orelse return;
+        switch (outcome) {
+            .success => {
+                const latency_ms = @max(std.time.milliTimestamp() - entry.sent_at_ms, 0);
+                peer_info.score.recordResponse(@floatFromInt(latency_ms));
+            },
+            .failure => peer_info.score.failures +|= 1,
+            .timeout => peer_info.score.timeouts +|= 1,
+        }
     }
 
     pub fn getPeerCount(self: *Self) usize {
@@ -210,16 +353,25 @@ pub const Network = struct {
     pub fn setPeerLatestStatus(self: *Self, peer_id: []const u8, status: types.Status) bool {
         if (self.connected_peers.getPtr(peer_id)) |peer_info| {
             peer_info.latest_status = status;
+            // a lowered head may have been the maximum, so it is not just raised
+            self.refreshMaxPeerHeadSlot();
             return true;
         }
         return false;
     }
 
-    pub fn connectPeer(self: *Self, peer_id: []const u8) !void {
-        if (self.connected_peers.fetchRemove(peer_id)) |entry| {
-            self.allocator.free(entry.key);
-            self.allocator.free(entry.value.peer_id);
+    fn refreshMaxPeerHeadSlot(self: *Self) void {
+        var max_head_slot: types.Slot = 0;
+        var it = self.connected_peers.valueIterator();
+        while (it.next()) |peer_info| {
+            const status = peer_info.latest_status orelse continue;
+            max_head_slot = @max(max_head_slot, status.head_slot);
         }
+        self.max_peer_head_slot = max_head_slot;
+    }
+
+    pub fn connectPeer(self: *Self, peer_id: []const u8) !void {
+        _ = self.removePeer(peer_id);
 
         const owned_key = try self.allocator.dupe(u8, peer_id);
         errdefer self.allocator.free(owned_key);
@@ -230,18 +382,33 @@ pub const Network = struct {
         const peer_info = PeerInfo{
             .peer_id = owned_peer_id,
             .connected_at = std.time.timestamp(),
+            .list_index = self.peer_ids.items.len,
         };
 
-        self.connected_peers.put(owned_key, peer_info) catch |err| {
-            self.allocator.free(owned_peer_id);
-            return err;
-        };
+        try self.peer_ids.ensureUnusedCapacity(self.allocator, 1);
+        try self.connected_peers.put(owned_key, peer_info);
+        self.peer_ids.appendAssumeCapacity(owned_peer_id);
+    }
+
+    fn removePeer(self: *Self, peer_id: []const u8) bool {
+        const peer_entry = self.connected_peers.fetchRemove(peer_id) orelse return false;
+
+        const list_index = peer_entry.value.list_index;
+        _ = self.peer_ids.swapRemove(list_index);
+        if (list_index < self.peer_ids.items.len) {
+            if (self.connected_peers.getPtr(self.peer_ids.items[list_index])) |moved_peer| {
+                moved_peer.list_index = list_index;
+            }
+        }
+
+        self.allocator.free(peer_entry.key);
+        self.allocator.free(peer_entry.value.peer_id);
+        if (peer_entry.value.latest_status != null) self.refreshMaxPeerHeadSlot();
+        return true;
     }
 
     pub fn disconnectPeer(self: *Self, peer_id: []const u8) bool {
-        if (self.connected_peers.fetchRemove(peer_id)) |peer_entry| {
-            self.allocator.free(peer_entry.key);
-            self.allocator.free(peer_entry.value.peer_id);
+        if (self.removePeer(peer_id)) {
 
             // Finalize all pending RPC requests for this peer
             var rpc_it = self.pending_rpc_requests.iterator();
@@ -249,10 +416,7 @@ pub const Network = struct {
             defer request_ids_to_remove.deinit(self.allocator);
 
             while (rpc_it.next()) |rpc_entry| {
-                const pending_peer_id = switch (rpc_entry.value_ptr.request) {
-                    .status => |*ctx| ctx.peer_id,
-                    .blocks_by_root => |*ctx| ctx.peer_id,
-                };
+                const pending_peer_id = rpc_entry.value_ptr.request.peerId();
                 if (std.mem.eql(u8, pending_peer_id, peer_id)) {
                     // If we can't allocate, skip this request (should be rare)
                     request_ids_to_remove.append(self.allocator, rpc_entry.key_ptr.*) catch continue;
@@ -294,79 +458,32 @@ pub const Network = struct {
     }
 
     pub fn hasFetchedBlock(self: *Self, root: types.Root) bool {
-        return self.fetched_blocks.get(root) != null;
+        return self.fetched_blocks.contains(root);
     }
 
     pub fn getFetchedBlock(self: *Self, root: types.Root) ?*types.SignedBlockWithAttestation {
         return self.fetched_blocks.get(root);
     }
 
+    /// Caches a block of unknown origin, see `cacheFetchedBlockFromPeer`.
     pub fn cacheFetchedBlock(self: *Self, root: types.Root, block: *types.SignedBlockWithAttestation) !void {
-        const block_gop = try self.fetched_blocks.getOrPut(root);
-
-        // If we already have this block cached, free the duplicate and return early
-        if (block_gop.found_existing) {
-            block.deinit();
-            self.allocator.destroy(block);
-            return;
-        }
-
-        block_gop.value_ptr.* = block;
-        errdefer {
-            _ = self.fetched_blocks.remove(root);
-            block.deinit();
-            self.allocator.destroy(block);
-        }
-
-        const parent_root = block.message.block.parent_root;
-        const gop = try self.fetched_block_children.getOrPut(parent_root);
+        return self.fetched_blocks.insert(root, block, null);
+    }
 
-        const created_new_entry = !gop.found_existing;
-        if (created_new_entry) {
-            gop.value_ptr.* = .empty;
-        }
-        errdefer if (created_new_entry) {
-            gop.value_ptr.deinit(self.allocator);
-            _ = self.fetched_block_children.remove(parent_root);
-        };
-        try gop.value_ptr.append(self.allocator, root);
+    /// Caches a block received from `peer_id` until its parent is known, counted against the
+    /// quota of the peer. Takes ownership of `block` even on error, duplicates are dropped.
+    pub fn cacheFetchedBlockFromPeer(self: *Self, root: types.Root, block: *types.SignedBlockWithAttestation, peer_id: []const u8) !void {
+        return self.fetched_blocks.insert(root, block, peer_id);
     }
 
     pub fn removeFetchedBlock(self: *Self, root: types.Root) bool {
-        if (self.fetched_blocks.fetchRemove(root)) |entry| {
-            var block_ptr = entry.value;
-
-            // Remove this block from its parent's children list
-            const parent_root = block_ptr.message.block.parent_root;
-            if (self.fetched_block_children.getPtr(parent_root)) |children_list| {
-                // Find and remove this root from the parent's children list
-                for (children_list.items, 0..) |child_root, i| {
-                    if (std.mem.eql(u8, child_root[0..], root[0..])) {
-                        _ = children_list.swapRemove(i);
-                        break;
-                    }
-                }
-                // Clean up the parent entry if no children remain
-                if (children_list.items.len == 0) {
-                    children_list.deinit(self.allocator);
-                    _ = self.fetched_block_children.remove(parent_root);
-                }
-            }
-
-            block_ptr.deinit();
-            self.allocator.destroy(block_ptr);
-            return true;
-        }
-        return false;
+        return self.fetched_blocks.remove(root);
     }
 
     /// Returns the cached children of the given parent block root.
     /// This is O(1) lookup instead of iterating over all fetched blocks.
     pub fn getChildrenOfBlock(self: *Self, parent_root: types.Root) []const types.Root {
-        if (self.fetched_block_children.get(parent_root)) |children_list| {
-            return children_list.items;
-        }
-        return &[_]types.Root{};
+        return self.fetched_blocks.getChildren(parent_root);
     }
 
     /// Remove a block and its entire chain: walk up to ancestors (parents)
@@ -454,10 +571,7 @@ pub const Network = struct {
 
         const request_id = try self.sendStatus(peer_id, status, handler);
 
-        self.pending_rpc_requests.put(request_id, PendingRPCEntry{
-            .request = pending,
-            .created_at = std.time.timestamp(),
-        }) catch |err| {
+        self.trackPendingRequest(request_id, pending) catch |err| {
             pending.deinit(self.allocator);
             return err;
         };
@@ -509,10 +623,7 @@ pub const Network = struct {
             return err;
         };
 
-        self.pending_rpc_requests.put(request_id, PendingRPCEntry{
-            .request = pending,
-            .created_at = std.time.timestamp(),
-        }) catch |err| {
+        self.trackPendingRequest(request_id, pending) catch |err| {
             pending.deinit(self.allocator);
             return err;
         };
@@ -530,6 +641,39 @@ pub const Network = struct {
         return request_id;
     }
 
+    pub fn sendBlocksByRangeRequest(
+        self: *Self,
+        peer_id: []const u8,
+        start_slot: types.Slot,
+        count: u64,
+        handler: networks.OnReqRespResponseCbHandler,
+    ) !u64 {
+        const peer_copy = try self.allocator.dupe(u8, peer_id);
+        var pending = PendingRPC{ .blocks_by_range = .{
+            .peer_id = peer_copy,
+            .start_slot = start_slot,
+            .count = count,
+        } };
+        errdefer pending.deinit(self.allocator);
+
+        const request_id = try self.requestBlocksByRange(peer_id, start_slot, count, handler);
+
+        try self.trackPendingRequest(request_id, pending);
+
+        return request_id;
+    }
+
+    fn trackPendingRequest(self: *Self, request_id: u64, pending: PendingRPC) !void {
+        try self.pending_rpc_requests.put(request_id, PendingRPCEntry{
+            .request = pending,
+            .created_at = std.time.timestamp(),
+            .sent_at_ms = std.time.milliTimestamp(),
+        });
+        if (self.connected_peers.getPtr(pending.peerId())) |peer_info| {
+            peer_info.score.in_flight += 1;
+        }
+    }
+
     pub fn ensureBlocksByRootRequest(
         self: *Self,
         roots: []const types.Root,
@@ -568,15 +712,91 @@ pub const Network = struct {
     pub fn finalizePendingRequest(self: *Self, request_id: u64) void {
         if (self.pending_rpc_requests.fetchRemove(request_id)) |entry| {
             var rpc_entry = entry.value;
+            if (self.connected_peers.getPtr(rpc_entry.request.peerId())) |peer_info| {
+                peer_info.score.in_flight -|= 1;
+            }
             switch (rpc_entry.request) {
                 .blocks_by_root => |block_ctx| {
                     for (block_ctx.requested_roots) |root| {
                         _ = self.removePendingBlockRoot(root);
                     }
                 },
-                .status => {},
+                .status, .blocks_by_range => {},
             }
             rpc_entry.deinit(self.allocator);
         }
     }
 };
+
+fn testStatus(head_slot: types.Slot) types.Status {
+    return .{
+        .finalized_root = types.ZERO_HASH,
+        .finalized_slot = 0,
+        .head_root = types.ZERO_HASH,
+        .head_slot = head_slot,
+    };
+}
+
+test "peer selection honours head slot and in-flight limits" {
+    const allocator = std.testing.allocator;
+
+    // requests are never sent, selection only looks at the peer bookkeeping
+    var network = try Network.init(allocator, undefined);
+    defer network.deinit();
+
+    try network.connectPeer("peer-a");
+    try network.connectPeer("peer-b");
+    try network.connectPeer("peer-c");
+    try std.testing.expect(network.setPeerLatestStatus("peer-a", testStatus(100)));
+    try std.testing.expect(network.setPeerLatestStatus("peer-b", testStatus(10)));
+    try std.testing.expect(network.setPeerLatestStatus("peer-c", testStatus(120)));
+    try std.testing.expectEqual(@as(types.Slot, 120), network.max_peer_head_slot);
+
+    // the maximum follows peers lowering their head or leaving
+    try std.testing.expect(network.setPeerLatestStatus("peer-c", testStatus(1_000_000)));
+    try std.testing.expectEqual(@as(types.Slot, 1_000_000), network.max_peer_head_slot);
+    try std.testing.expect(network.setPeerLatestStatus("peer-c", testStatus(120)));
+    try std.testing.expectEqual(@as(types.Slot, 120), network.max_peer_head_slot);
+    try network.connectPeer("peer-d");
+    try std.testing.expect(network.setPeerLatestStatus("peer-d", testStatus(500)));
+    try std.testing.expect(network.disconnectPeer("peer-d"));
+    try std.testing.expectEqual(@as(types.Slot, 120), network.max_peer_head_slot);
+
+    // removing a peer keeps the dense list in sync with the map
+    try std.testing.expect(network.disconnectPeer("peer-a"));
+    try std.testing.expectEqual(@as(usize, 2), network.peer_ids.items.len);
+    for (network.peer_ids.items, 0..) |peer_id, index| {
+        try std.testing.expectEqual(index, network.connected_peers.getPtr(peer_id).?.list_index);
+    }
+
+    for (0..16) |_| {
+        try std.testing.expectEqualStrings("peer-c", network.selectPeerWithHeadSlot(50).?);
+    }
+
+    network.connected_peers.getPtr("peer-c").?.score.in_flight = constants.PEER_MAX_IN_FLIGHT_REQUESTS;
+    try std.testing.expect(network.selectPeerWithHeadSlot(50) == null);
+    for (0..16) |_| {
+        try std.testing.expectEqualStrings("peer-b", network.selectPeer().?);
+    }
+
+    // with every peer at the limit one-off lookups still go to the least loaded peer
+    network.connected_peers.getPtr("peer-b").?.score.in_flight = constants.PEER_MAX_IN_FLIGHT_REQUESTS + 1;
+    try std.testing.expectEqualStrings("peer-c", network.selectPeer().?);
+}
+
+test "peer cost prefers fast reliable peers close to the best head" {
+    var fast: PeerScore = .{};
+    fast.recordResponse(50);
+    var slow: PeerScore = .{};
+    slow.recordResponse(400);
+    try std.testing.expect(fast.cost(0) < slow.cost(0));
+
+    var flaky = fast;
+    flaky.timeouts = 3;
+    try std.testing.expect(fast.cost(0) < flaky.cost(0));
+    try std.testing.expect(fast.cost(0) < fast.cost(64));
+
+    // the moving average follows new samples gradually
+    fast.recordResponse(150);
+    try std.testing.expectApproxEqAbs(@as(f64, 70), fast.latency_ewma_ms.?, 1e-9);
+}
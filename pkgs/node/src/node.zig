@@ -24,6 +24,8 @@ const constants = @import("./constants.zig");
 const forkchoice = @import("./forkchoice.zig");
 
 const BlockByRootContext = networkFactory.BlockByRootContext;
+const rangeSyncFactory = @import("./range_sync.zig");
+const RangeSync = rangeSyncFactory.RangeSync;
 pub const NodeNameRegistry = networks.NodeNameRegistry;
 
 const ZERO_HASH = types.ZERO_HASH;
@@ -40,6 +42,7 @@ const NodeOpts = struct {
     logger_config: *zeam_utils.ZeamLoggerConfig,
     node_registry: *const NodeNameRegistry,
     is_aggregator: bool = false,
+    signature_verification_workers: usize = 0,
 };
 
 pub const BeamNode = struct {
@@ -52,6 +55,7 @@ pub const BeamNode = struct {
     last_interval: isize,
     logger: zeam_utils.ModuleLogger,
     node_registry: *const NodeNameRegistry,
+    range_sync: RangeSync,
 
     const Self = @This();
 
@@ -75,6 +79,7 @@ pub const BeamNode = struct {
                 .logger_config = opts.logger_config,
                 .node_registry = opts.node_registry,
                 .is_aggregator = opts.is_aggregator,
+                .signature_verification_workers = opts.signature_verification_workers,
             },
             network.connected_peers,
         );
@@ -108,6 +113,7 @@ pub const BeamNode = struct {
             .last_interval = -1,
             .logger = opts.logger_config.logger(.node),
             .node_registry = opts.node_registry,
+            .range_sync = RangeSync.init(allocator, .{}),
         };
 
         chain.setPruneCachedBlocksCallback(self, pruneCachedBlocksCallback);
@@ -116,6 +122,7 @@ pub const BeamNode = struct {
     }
 
     pub fn deinit(self: *Self) void {
+        self.range_sync.deinit();
         self.network.deinit();
         self.chain.deinit();
         self.allocator.destroy(self.chain);
@@ -150,7 +157,7 @@ pub const BeamNode = struct {
 
                 if (!hasParentBlock) {
                     // Cache this block for later processing when parent arrives
-                    if (self.cacheBlockAndFetchParent(block_root, signed_block, 0)) |_| {
+                    if (self.cacheBlockAndFetchParent(block_root, signed_block, 0, sender_peer_id)) |_| {
                         self.logger.debug(
                             "Cached gossip block 0x{x} at slot {d}, fetching parent 0x{x}",
                             .{
@@ -249,7 +256,7 @@ pub const BeamNode = struct {
                         const signed_block = data.block;
                         var block_root: types.Root = undefined;
                         if (zeam_utils.hashTreeRoot(types.BeamBlock, signed_block.message.block, &block_root, self.allocator)) |_| {
-                            if (self.cacheFutureBlock(block_root, signed_block)) |_| {
+                            if (self.cacheFutureBlock(block_root, signed_block, sender_peer_id)) |_| {
                                 self.logger.debug(
                                     "cached future gossip block 0x{s} at slot {d}",
                                     .{ std.fmt.bytesToHex(block_root, .lower)[0..], signed_block.message.block.slot },
@@ -312,6 +319,10 @@ pub const BeamNode = struct {
     }
 
     fn handleGossipProcessingResult(self: *Self, result: chainFactory.GossipProcessingResult) void {
+        if (result.attestation_pending) {
+            self.logger.debug("gossip attestation queued, valid once its signature batch is verified", .{});
+        }
+
         // Process successfully imported blocks to retry any cached descendants
         if (result.processed_block_root) |processed_root| {
             self.logger.debug(
@@ -343,9 +354,9 @@ pub const BeamNode = struct {
         var roots_to_prune: std.ArrayList(types.Root) = .empty;
         defer roots_to_prune.deinit(self.allocator);
 
-        var it = self.network.fetched_blocks.iterator();
+        var it = self.network.fetched_blocks.entries.iterator();
         while (it.next()) |entry| {
-            const block_slot = entry.value_ptr.*.message.block.slot;
+            const block_slot = entry.value_ptr.block.message.block.slot;
             if (block_slot <= finalized.slot) {
                 roots_to_prune.append(self.allocator, entry.key_ptr.*) catch continue;
             }
@@ -463,9 +474,9 @@ pub const BeamNode = struct {
         var parent_roots = std.AutoHashMap(types.Root, void).init(self.allocator);
         defer parent_roots.deinit();
 
-        var it = self.network.fetched_blocks.iterator();
+        var it = self.network.fetched_blocks.entries.valueIterator();
         while (it.next()) |entry| {
-            const block = entry.value_ptr.*.message.block;
+            const block = entry.block.message.block;
             if (block.slot <= current_slot) {
                 const parent_root = block.parent_root;
                 if (self.chain.forkChoice.hasBlock(parent_root)) {
@@ -496,6 +507,8 @@ pub const BeamNode = struct {
     /// - `block_root`: The root hash of the block to cache
     /// - `signed_block`: The block to cache (will be cloned)
     /// - `depth`: The depth for parent fetch (0 for gossip, current_depth+1 for req-resp)
+    /// - `source_peer_id`: The gossip peer the block came from, charged against its orphan quota.
+    ///   Null for blocks we requested by root, those are parents of blocks already cached.
     ///
     /// Returns the parent root on success so caller can log it.
     fn cacheBlockAndFetchParent(
@@ -503,6 +516,7 @@ pub const BeamNode = struct {
         block_root: types.Root,
         signed_block: types.SignedBlockWithAttestation,
         depth: u32,
+        source_peer_id: ?[]const u8,
     ) CacheBlockError!types.Root {
         const finalized_slot = self.chain.forkChoice.fcStore.latest_finalized.slot;
         const block_slot = signed_block.message.block.slot;
@@ -518,16 +532,6 @@ pub const BeamNode = struct {
             return CacheBlockError.AlreadyCached;
         }
 
-        // If cache is full, reject - proactive pruning on finalization keeps the cache bounded
-        if (self.network.fetched_blocks.count() >= constants.MAX_CACHED_BLOCKS) {
-            self.logger.warn("Cache full ({d} blocks), rejecting block 0x{x} at slot {d}", .{
-                self.network.fetched_blocks.count(),
-                &block_root,
-                block_slot,
-            });
-            return CacheBlockError.CachingFailed;
-        }
-
         // Allocate and clone the block
         const block_ptr = self.allocator.create(types.SignedBlockWithAttestation) catch {
             return CacheBlockError.AllocationFailed;
@@ -540,11 +544,11 @@ pub const BeamNode = struct {
         };
         errdefer if (block_owned) block_ptr.deinit();
 
-        self.network.cacheFetchedBlock(block_root, block_ptr) catch {
+        // Ownership transferred to the network cache, which frees the block if it rejects it
+        block_owned = false;
+        self.cacheInOrphanPool(block_root, block_ptr, source_peer_id) catch {
             return CacheBlockError.CachingFailed;
         };
-        // Ownership transferred to the network cache — disable errdefers
-        block_owned = false;
 
         // Fetch the parent block
         const parent_root = signed_block.message.block.parent_root;
@@ -562,6 +566,7 @@ pub const BeamNode = struct {
         self: *Self,
         block_root: types.Root,
         signed_block: types.SignedBlockWithAttestation,
+        source_peer_id: []const u8,
     ) CacheBlockError!void {
         const finalized_slot = self.chain.forkChoice.fcStore.latest_finalized.slot;
         const block_slot = signed_block.message.block.slot;
@@ -574,15 +579,6 @@ pub const BeamNode = struct {
             return CacheBlockError.AlreadyCached;
         }
 
-        if (self.network.fetched_blocks.count() >= constants.MAX_CACHED_BLOCKS) {
-            self.logger.warn("Cache full ({d} blocks), rejecting future block 0x{s} at slot {d}", .{
-                self.network.fetched_blocks.count(),
-                std.fmt.bytesToHex(block_root, .lower)[0..],
-                block_slot,
-            });
-            return CacheBlockError.CachingFailed;
-        }
-
         const block_ptr = self.allocator.create(types.SignedBlockWithAttestation) catch {
             return CacheBlockError.AllocationFailed;
         };
@@ -594,10 +590,34 @@ pub const BeamNode = struct {
         };
         errdefer if (block_owned) block_ptr.deinit();
 
-        self.network.cacheFetchedBlock(block_root, block_ptr) catch {
+        block_owned = false;
+        self.cacheInOrphanPool(block_root, block_ptr, source_peer_id) catch {
             return CacheBlockError.CachingFailed;
         };
-        block_owned = false;
+    }
+
+    fn cacheInOrphanPool(
+        self: *Self,
+        block_root: types.Root,
+        block_ptr: *types.SignedBlockWithAttestation,
+        source_peer_id: ?[]const u8,
+    ) !void {
+        const block_slot = block_ptr.message.block.slot;
+        const result = if (source_peer_id) |peer_id|
+            self.network.cacheFetchedBlockFromPeer(block_root, block_ptr, peer_id)
+        else
+            self.network.cacheFetchedBlock(block_root, block_ptr);
+        result catch |err| {
+            // block_ptr is already freed by the pool here
+            self.logger.warn("orphan pool rejected block 0x{x} at slot {d} from peer {s} ({d} blocks cached): {any}", .{
+                &block_root,
+                block_slot,
+                source_peer_id orelse "unknown",
+                self.network.fetched_blocks.count(),
+                err,
+            });
+            return err;
+        };
     }
 
     fn processBlockByRootChunk(self: *Self, block_ctx: *const BlockByRootContext, signed_block: *const types.SignedBlockWithAttestation) !void {
@@ -640,7 +660,7 @@ pub const BeamNode = struct {
                     }
 
                     // Cache this block and fetch parent
-                    if (self.cacheBlockAndFetchParent(block_root, signed_block.*, current_depth + 1)) |parent_root| {
+                    if (self.cacheBlockAndFetchParent(block_root, signed_block.*, current_depth + 1, null)) |parent_root| {
                         self.logger.debug(
                             "Cached block 0x{x} at depth {d}, fetching parent 0x{x}",
                             .{
@@ -721,11 +741,9 @@ pub const BeamNode = struct {
             return;
         };
         const ctx_ptr = &entry_ptr.request;
-        const peer_id = switch (ctx_ptr.*) {
-            .status => |*ctx| ctx.peer_id,
-            .blocks_by_root => |*ctx| ctx.peer_id,
-        };
+        const peer_id = ctx_ptr.peerId();
         const node_name = self.node_registry.getNodeNameFromPeerId(peer_id);
+        const is_range_request = ctx_ptr.* == .blocks_by_range;
 
         switch (event.payload) {
             .success => |resp| switch (resp) {
@@ -752,7 +770,23 @@ pub const BeamNode = struct {
                             switch (sync_status) {
                                 .behind_peers => |info| {
                                     // Only sync from this peer if their finalized slot is ahead of ours
-                                    if (status_resp.finalized_slot > self.chain.forkChoice.fcStore.latest_finalized.slot) {
+                                    const our_finalized_slot = self.chain.forkChoice.fcStore.latest_finalized.slot;
+                                    if (status_resp.finalized_slot > our_finalized_slot and
+                                        status_resp.head_slot > info.head_slot + constants.RANGE_SYNC_MIN_SLOT_GAP)
+                                    {
+                                        // Far behind: download the peer's chain forward from our finalized slot in
+                                        // pipelined batches instead of walking parents back from its head one by one
+                                        self.logger.info("peer {s}{f} is ahead (peer_head_slot={d} > our_head_slot={d}), range syncing slots {d}..{d}", .{
+                                            status_ctx.peer_id,
+                                            self.node_registry.getNodeNameFromPeerId(status_ctx.peer_id),
+                                            status_resp.head_slot,
+                                            info.head_slot,
+                                            our_finalized_slot + 1,
+                                            status_resp.head_slot,
+                                        });
+                                        self.range_sync.extendTarget(our_finalized_slot + 1, status_resp.head_slot);
+                                        self.scheduleRangeSyncRequests();
+                                    } else if (status_resp.finalized_slot > our_finalized_slot) {
                                         self.logger.info("peer {s}{f} is ahead (peer_finalized_slot={d} > our_head_slot={d}), initiating sync by requesting head block 0x{x}", .{
                                             status_ctx.peer_id,
                                             self.node_registry.getNodeNameFromPeerId(status_ctx.peer_id),
@@ -793,6 +827,31 @@ pub const BeamNode = struct {
                         },
                     }
                 },
+                .blocks_by_range => |block_resp| {
+                    if (!is_range_request) {
+                        self.logger.warn("blocks-by-range response did not match tracked request_id={d} from peer={s}{f}", .{ request_id, peer_id, node_name });
+                        return;
+                    }
+
+                    // buffered until the whole batch and the batches before it are downloaded
+                    const buffered = self.range_sync.onBlock(request_id, &block_resp) catch |err| {
+                        self.logger.warn("invalid blocks-by-range chunk slot={d} for request_id={d} from peer {s}{f}: {any}", .{
+                            block_resp.message.block.slot,
+                            request_id,
+                            peer_id,
+                            node_name,
+                            err,
+                        });
+                        // drop the rest of the response, the batch is downloaded again
+                        self.network.recordRequestOutcome(request_id, .failure);
+                        self.network.finalizePendingRequest(request_id);
+                        self.onRangeSyncRequestFailed(request_id);
+                        return;
+                    };
+                    if (!buffered) {
+                        self.logger.debug("ignoring blocks-by-range chunk for request_id={d} no longer tracked by range sync", .{request_id});
+                    }
+                },
             },
             .failure => |err_payload| {
                 switch (ctx_ptr.*) {
@@ -812,11 +871,25 @@ pub const BeamNode = struct {
                             err_payload.message,
                         });
                     },
+                    .blocks_by_range => |range_ctx| {
+                        self.logger.warn("blocks-by-range request for slots {d}..{d} to peer {s}{f} failed ({d}): {s}", .{
+                            range_ctx.start_slot,
+                            range_ctx.start_slot + range_ctx.count - 1,
+                            range_ctx.peer_id,
+                            self.node_registry.getNodeNameFromPeerId(range_ctx.peer_id),
+                            err_payload.code,
+                            err_payload.message,
+                        });
+                    },
                 }
+                self.network.recordRequestOutcome(request_id, .failure);
                 self.network.finalizePendingRequest(request_id);
+                if (is_range_request) self.onRangeSyncRequestFailed(request_id);
             },
             .completed => {
+                self.network.recordRequestOutcome(request_id, .success);
                 self.network.finalizePendingRequest(request_id);
+                if (is_range_request) self.onRangeSyncRequestCompleted(request_id);
             },
         }
     }
@@ -865,6 +938,34 @@ pub const BeamNode = struct {
 
                 try responder.finish();
             },
+            .blocks_by_range => |request| {
+                const count = @min(request.count, params.MAX_REQUEST_BLOCKS);
+                const end_slot = request.start_slot +| count;
+
+                self.logger.debug(
+                    "node-{d}:: Handling blocks_by_range request start_slot={d} count={d}",
+                    .{ self.nodeId, request.start_slot, request.count },
+                );
+
+                const roots = try self.chain.getCanonicalBlockRootsInRange(self.allocator, request.start_slot, end_slot);
+                defer self.allocator.free(roots);
+
+                for (roots) |root| {
+                    if (self.chain.db.loadBlock(database.DbBlocksNamespace, root)) |signed_block| {
+                        var response = networks.ReqRespResponse{ .blocks_by_range = signed_block };
+                        defer response.deinit();
+
+                        try responder.sendResponse(&response);
+                    } else {
+                        self.logger.warn(
+                            "node-{d}:: Canonical block root=0x{x} not found for blocks_by_range request",
+                            .{ self.nodeId, &root },
+                        );
+                    }
+                }
+
+                try responder.finish();
+            },
             .status => {
                 var response = networks.ReqRespResponse{ .status = self.chain.getStatus() };
                 try responder.sendResponse(&response);
@@ -879,6 +980,139 @@ pub const BeamNode = struct {
         };
     }
 
+    /// Sends blocks_by_range requests for range sync batches until the pipeline is full, spreading
+    /// them over the peers whose head covers the batch.
+    fn scheduleRangeSyncRequests(self: *Self) void {
+        const handler = self.getReqRespResponseHandler();
+        while (self.range_sync.nextBatch() catch |err| {
+            self.logger.warn("failed to schedule range sync batch: {any}", .{err});
+            return;
+        }) |range| {
+            const peer_id = self.network.selectPeerWithHeadSlot(range.start_slot) orelse {
+                self.range_sync.releaseBatch(range.start_slot);
+                self.logger.debug("no peer with head at or beyond slot={d} to range sync from", .{range.start_slot});
+                return;
+            };
+
+            const request_id = self.network.sendBlocksByRangeRequest(peer_id, range.start_slot, range.count, handler) catch |err| {
+                self.range_sync.releaseBatch(range.start_slot);
+                self.logger.warn("failed to send blocks-by-range request to peer {s}{f}: {any}", .{
+                    peer_id,
+                    self.node_registry.getNodeNameFromPeerId(peer_id),
+                    err,
+                });
+                return;
+            };
+
+            self.range_sync.setBatchRequest(range.start_slot, peer_id, request_id) catch |err| {
+                self.logger.warn("failed to track blocks-by-range request_id={d}: {any}", .{ request_id, err });
+                self.network.finalizePendingRequest(request_id);
+                self.range_sync.releaseBatch(range.start_slot);
+                return;
+            };
+
+            self.logger.debug("requested slots {d}..{d} by range from peer {s}{f}, request_id={d}", .{
+                range.start_slot,
+                range.start_slot + range.count - 1,
+                peer_id,
+                self.node_registry.getNodeNameFromPeerId(peer_id),
+                request_id,
+            });
+        }
+    }
+
+    fn onRangeSyncRequestCompleted(self: *Self, request_id: u64) void {
+        if (!self.range_sync.onRequestCompleted(request_id)) return;
+        self.importRangeSyncBatches();
+        self.scheduleRangeSyncRequests();
+    }
+
+    fn onRangeSyncRequestFailed(self: *Self, request_id: u64) void {
+        switch (self.range_sync.onRequestFailed(request_id)) {
+            .untracked => {},
+            .retrying => self.scheduleRangeSyncRequests(),
+            .aborted => self.fallbackToParentSync(),
+        }
+    }
+
+    /// Imports the downloaded range sync batches that are next in slot order.
+    fn importRangeSyncBatches(self: *Self) void {
+        while (self.range_sync.popReadyBatch()) |ready_batch| {
+            var batch = ready_batch;
+            self.importRangeSyncBatch(&batch) catch |err| {
+                self.logger.warn("failed to import range sync batch for slots {d}..{d} from peer {s}: {any}", .{
+                    batch.start_slot,
+                    batch.endSlot() - 1,
+                    batch.peer_id orelse "unknown",
+                    err,
+                });
+                switch (self.range_sync.onBatchImportFailed(&batch)) {
+                    .aborted => self.fallbackToParentSync(),
+                    .retrying, .untracked => {},
+                }
+                return;
+            };
+
+            self.logger.info("range sync imported {d} block(s) for slots {d}..{d}", .{
+                batch.blocks.items.len,
+                batch.start_slot,
+                batch.endSlot() - 1,
+            });
+            self.range_sync.onBatchImported(&batch);
+            if (!self.range_sync.isActive()) {
+                self.logger.info("range sync reached its target slot", .{});
+            }
+        }
+    }
+
+    fn importRangeSyncBatch(self: *Self, batch: *const rangeSyncFactory.Batch) !void {
+        for (batch.blocks.items) |*signed_block| {
+            var block_root: types.Root = undefined;
+            try zeam_utils.hashTreeRoot(types.BeamBlock, signed_block.message.block, &block_root, self.allocator);
+            if (self.chain.forkChoice.hasBlock(block_root)) continue;
+
+            const missing_roots = self.chain.onBlock(signed_block.*, .{}) catch |err| {
+                // finalization moved past the block while the batch was downloading
+                if (err == forkchoice.ForkChoiceError.PreFinalizedSlot) continue;
+                return err;
+            };
+            defer self.allocator.free(missing_roots);
+
+            self.chain.onBlockFollowup(true, signed_block);
+            self.processCachedDescendants(block_root);
+
+            self.fetchBlockByRoots(missing_roots, 0) catch |err| {
+                self.logger.warn("failed to fetch {d} missing block(s): {any}", .{ missing_roots.len, err });
+            };
+        }
+    }
+
+    /// Range sync gave up, e.g. because the peers do not serve blocks_by_range. Falls back to
+    /// fetching the best known peer head by root and syncing its parents.
+    fn fallbackToParentSync(self: *Self) void {
+        var best_status: ?types.Status = null;
+        var it = self.network.connected_peers.iterator();
+        while (it.next()) |entry| {
+            const status = entry.value_ptr.latest_status orelse continue;
+            if (best_status == null or status.head_slot > best_status.?.head_slot) {
+                best_status = status;
+            }
+        }
+
+        const status = best_status orelse {
+            self.logger.warn("range sync aborted and no peer status known to fall back to parent sync", .{});
+            return;
+        };
+        self.logger.warn("range sync aborted, falling back to parent sync from head block 0x{x} at slot={d}", .{
+            &status.head_root,
+            status.head_slot,
+        });
+        const roots = [_]types.Root{status.head_root};
+        self.fetchBlockByRoots(&roots, 0) catch |err| {
+            self.logger.warn("failed to fetch head block for parent sync: {any}", .{err});
+        };
+    }
+
     fn fetchBlockByRoots(
         self: *Self,
         roots: []const types.Root,
@@ -976,6 +1210,12 @@ pub const BeamNode = struct {
                 self.network.getPeerCount(),
             });
 
+            // Batches downloading from this peer would never complete
+            if (self.range_sync.isActive()) {
+                self.range_sync.onPeerDisconnected(peer_id);
+                self.scheduleRangeSyncRequests();
+            }
+
             // Record metrics
             zeam_metrics.metrics.lean_peer_disconnection_events_total.incr(.{ .direction = @tagName(direction), .reason = @tagName(reason) }) catch {};
             zeam_metrics.metrics.lean_connected_peers.set(@intCast(self.network.getPeerCount()));
@@ -1067,6 +1307,8 @@ pub const BeamNode = struct {
 
             // Sweep timed-out RPC requests to prevent sync stalls from non-responsive peers.
             self.sweepTimedOutRequests();
+            // Range sync batches that found no peer to download from are retried every interval
+            if (self.range_sync.isActive()) self.scheduleRangeSyncRequests();
 
             const slot: types.Slot = @intCast(@divFloor(interval, constants.INTERVALS_PER_SLOT));
             self.processReadyCachedBlocks(slot);
@@ -1133,6 +1375,7 @@ pub const BeamNode = struct {
 
         for (timed_out) |request_id| {
             const entry_ptr = self.network.getPendingRequestPtr(request_id) orelse continue;
+            self.network.recordRequestOutcome(request_id, .timeout);
 
             switch (entry_ptr.request) {
                 .blocks_by_root => |block_ctx| {
@@ -1164,6 +1407,18 @@ pub const BeamNode = struct {
                         };
                     }
                 },
+                .blocks_by_range => |range_ctx| {
+                    self.logger.warn("blocks-by-range RPC request_id={d} to peer {s}{f} timed out after {d}s, retrying slots {d}..{d}", .{
+                        request_id,
+                        range_ctx.peer_id,
+                        self.node_registry.getNodeNameFromPeerId(range_ctx.peer_id),
+                        constants.RPC_REQUEST_TIMEOUT_SECONDS,
+                        range_ctx.start_slot,
+                        range_ctx.start_slot + range_ctx.count - 1,
+                    });
+                    self.network.finalizePendingRequest(request_id);
+                    self.onRangeSyncRequestFailed(request_id);
+                },
                 .status => |status_ctx| {
                     self.logger.warn("status RPC request_id={d} to peer {s}{f} timed out, finalizing", .{
                         request_id,
@@ -1817,8 +2072,8 @@ test "Node: pruneCachedBlocks removes entire chain including ancestors" {
     try std.testing.expect(!node.network.hasFetchedBlock(root_d));
 
     // ChildrenMap cleanup: all entries removed
-    try std.testing.expect(node.network.fetched_block_children.get(root_a) == null);
-    try std.testing.expect(node.network.fetched_block_children.get(root_b) == null);
+    try std.testing.expect(node.network.fetched_blocks.children.get(root_a) == null);
+    try std.testing.expect(node.network.fetched_blocks.children.get(root_b) == null);
 
     // Pending cleared for entire chain
     try std.testing.expect(!node.network.hasPendingBlockRoot(root_a));
@@ -2061,7 +2316,7 @@ test "Node: cacheFetchedBlock deduplicates children entries on repeated caching"
     try std.testing.expectEqual(@as(usize, 0), children_after.len);
 
     // The parent entry should be fully cleaned up from the children map
-    try std.testing.expect(node.network.fetched_block_children.get(parent_root) == null);
+    try std.testing.expect(node.network.fetched_blocks.children.get(parent_root) == null);
 }
 
 test "Node: publishBlock persists locally produced blocks for blocks-by-root sync" {
@@ -0,0 +1,353 @@
+const std = @import("std");
+const Allocator = std.mem.Allocator;
+
+const types = @import("@zeam/types");
+const zeam_metrics = @import("@zeam/metrics");
+
+pub const OrphanBlockPoolOpts = struct {
+    max_blocks: usize,
+    max_bytes: usize,
+    max_blocks_per_peer: usize,
+};
+
+pub const OrphanBlockPoolError = error{
+    OrphanPoolFull,
+    PeerOrphanQuotaExceeded,
+};
+
+/// Blocks whose parent is not known yet, waiting for the parent to be fetched or for their
+/// slot to arrive. The pool is bounded by a block count, an estimated byte budget and a per
+/// peer quota. When full, the orphans with the highest slots are evicted first, as they are
+/// the furthest from the head and the most likely to be junk from a misbehaving peer.
+///
+/// All lookups and removals are constant time, eviction uses a slot ordered index whose
+/// entries are invalidated lazily on removal.
+pub const OrphanBlockPool = struct {
+    allocator: Allocator,
+    opts: OrphanBlockPoolOpts,
+    entries: std.AutoHashMap(types.Root, Entry),
+    // key: parent root, value: roots of the pooled children
+    children: std.AutoHashMap(types.Root, std.ArrayList(types.Root)),
+    // key: owned peer id, value: number of pooled blocks received from the peer
+    peer_counts: std.StringHashMap(usize),
+    slot_index: SlotIndex,
+    total_bytes: usize,
+
+    pub const Entry = struct {
+        block: *types.SignedBlockWithAttestation,
+        size_bytes: usize,
+        // position in the children list of the parent
+        child_index: usize,
+        // key of peer_counts, null for blocks of unknown origin
+        peer_id: ?[]const u8,
+    };
+
+    const SlotKey = struct {
+        slot: types.Slot,
+        root: types.Root,
+    };
+
+    fn compareSlotKeys(_: void, a: SlotKey, b: SlotKey) std.math.Order {
+        return switch (std.math.order(a.slot, b.slot)) {
+            .eq => std.mem.order(u8, &a.root, &b.root),
+            else => |order| order,
+        };
+    }
+
+    const SlotIndex = std.PriorityDequeue(SlotKey, void, compareSlotKeys);
+
+    const Self = @This();
+
+    pub fn init(allocator: Allocator, opts: OrphanBlockPoolOpts) Self {
+        return .{
+            .allocator = allocator,
+            .opts = opts,
+            .entries = std.AutoHashMap(types.Root, Entry).init(allocator),
+            .children = std.AutoHashMap(types.Root, std.ArrayList(types.Root)).init(allocator),
+            .peer_counts = std.StringHashMap(usize).init(allocator),
+            .slot_index = SlotIndex.init(allocator, {}),
+            .total_bytes = 0,
+        };
+    }
+
+    pub fn deinit(self: *Self) void {
+        var it = self.entries.valueIterator();
+        while (it.next()) |entry| {
+            entry.block.deinit();
+            self.allocator.destroy(entry.block);
+        }
+        self.entries.deinit();
+
+        var children_it = self.children.valueIterator();
+        while (children_it.next()) |children_list| {
+            children_list.deinit(self.allocator);
+        }
+        self.children.deinit();
+
+        var peer_it = self.peer_counts.keyIterator();
+        while (peer_it.next()) |peer_id| {
+            self.allocator.free(peer_id.*);
+        }
+        self.peer_counts.deinit();
+
+        self.slot_index.deinit();
+    }
+
+    pub fn count(self: *const Self) usize {
+        return self.entries.count();
+    }
+
+    pub fn contains(self: *const Self, root: types.Root) bool {
+        return self.entries.contains(root);
+    }
+
+    pub fn get(self: *const Self, root: types.Root) ?*types.SignedBlockWithAttestation {
+        const entry = self.entries.get(root) orelse return null;
+        return entry.block;
+    }
+
+    pub fn getChildren(self: *const Self, parent_root: types.Root) []const types.Root {
+        if (self.children.getPtr(parent_root)) |children_list| {
+            return children_list.items;
+        }
+        return &[_]types.Root{};
+    }
+
+    /// Adds a block, the pool takes ownership of `block` in every case and frees it right away
+    /// when it is a duplicate or cannot be admitted.
+    pub fn insert(self: *Self, root: types.Root, block: *types.SignedBlockWithAttestation, peer_id: ?[]const u8) !void {
+        var block_owned = true;
+        errdefer if (block_owned) {
+            block.deinit();
+            self.allocator.destroy(block);
+        };
+
+        if (self.entries.contains(root)) {
+            block.deinit();
+            self.allocator.destroy(block);
+            return;
+        }
+
+        if (peer_id) |pid| {
+            const peer_count = self.peer_counts.get(pid) orelse 0;
+            if (peer_count >= self.opts.max_blocks_per_peer) {
+                zeam_metrics.metrics.lean_orphan_blocks_rejected_total.incr(.{ .reason = "peer_quota" }) catch {};
+                return OrphanBlockPoolError.PeerOrphanQuotaExceeded;
+            }
+        }
+
+        const slot = block.message.block.slot;
+        const size_bytes = estimateBlockSize(block);
+        while (self.entries.count() >= self.opts.max_blocks or self.total_bytes + size_bytes > self.opts.max_bytes) {
+            // only make room by dropping orphans further away than the new one
+            const victim = self.peekHighestSlot() orelse break;
+            if (victim.slot <= slot) break;
+            _ = self.remove(victim.root);
+            zeam_metrics.metrics.lean_orphan_blocks_evicted_total.incr();
+        }
+        if (self.entries.count() >= self.opts.max_blocks or self.total_bytes + size_bytes > self.opts.max_bytes) {
+            zeam_metrics.metrics.lean_orphan_blocks_rejected_total.incr(.{ .reason = "pool_full" }) catch {};
+            return OrphanBlockPoolError.OrphanPoolFull;
+        }
+
+        // reserve everything up front so the insertion below cannot fail half way
+        try self.entries.ensureUnusedCapacity(1);
+        try self.slot_index.ensureTotalCapacity(self.slot_index.count() + 1);
+        if (peer_id != null) try self.peer_counts.ensureUnusedCapacity(1);
+
+        const parent_root = block.message.block.parent_root;
+        const children_gop = try self.children.getOrPut(parent_root);
+        if (!children_gop.found_existing) children_gop.value_ptr.* = .empty;
+        children_gop.value_ptr.append(self.allocator, root) catch |err| {
+            if (children_gop.value_ptr.items.len == 0) {
+                children_gop.value_ptr.deinit(self.allocator);
+                _ = self.children.remove(parent_root);
+            }
+            return err;
+        };
+        const child_index = children_gop.value_ptr.items.len - 1;
+
+        var owned_peer_id: ?[]const u8 = null;
+        if (peer_id) |pid| {
+            const peer_gop = self.peer_counts.getOrPutAssumeCapacity(pid);
+            if (!peer_gop.found_existing) {
+                peer_gop.key_ptr.* = self.allocator.dupe(u8, pid) catch |err| {
+                    self.peer_counts.removeByPtr(peer_gop.key_ptr);
+                    self.removeChild(parent_root, child_index);
+                    return err;
+                };
+                peer_gop.value_ptr.* = 0;
+            }
+            peer_gop.value_ptr.* += 1;
+            owned_peer_id = peer_gop.key_ptr.*;
+        }
+
+        self.entries.putAssumeCapacity(root, .{
+            .block = block,
+            .size_bytes = size_bytes,
+            .child_index = child_index,
+            .peer_id = owned_peer_id,
+        });
+        self.slot_index.add(.{ .slot = slot, .root = root }) catch unreachable;
+        self.total_bytes += size_bytes;
+        block_owned = false;
+
+        self.updateGauges();
+    }
+
+    /// Removes a block and frees it, returns false if it was not pooled.
+    pub fn remove(self: *Self, root: types.Root) bool {
+        const kv = self.entries.fetchRemove(root) orelse return false;
+        const entry = kv.value;
+
+        self.removeChild(entry.block.message.block.parent_root, entry.child_index);
+
+        if (entry.peer_id) |pid| {
+            if (self.peer_counts.getEntry(pid)) |peer_entry| {
+                peer_entry.value_ptr.* -= 1;
+                if (peer_entry.value_ptr.* == 0) {
+                    const owned_key = peer_entry.key_ptr.*;
+                    self.peer_counts.removeByPtr(peer_entry.key_ptr);
+                    self.allocator.free(owned_key);
+                }
+            }
+        }
+
+        self.total_bytes -= entry.size_bytes;
+        entry.block.deinit();
+        self.allocator.destroy(entry.block);
+
+        // the slot index entry is left behind and skipped on eviction, compact once the
+        // stale entries dominate
+        if (self.slot_index.count() > 2 * self.entries.count() + 64) {
+            self.rebuildSlotIndex();
+        }
+
+        self.updateGauges();
+        return true;
+    }
+
+    fn removeChild(self: *Self, parent_root: types.Root, child_index: usize) void {
+        const children_list = self.children.getPtr(parent_root) orelse return;
+        _ = children_list.swapRemove(child_index);
+        if (child_index < children_list.items.len) {
+            if (self.entries.getPtr(children_list.items[child_index])) |moved_entry| {
+                moved_entry.child_index = child_index;
+            }
+        }
+        if (children_list.items.len == 0) {
+            children_list.deinit(self.allocator);
+            _ = self.children.remove(parent_root);
+        }
+    }
+
+    fn peekHighestSlot(self: *Self) ?SlotKey {
+        while (self.slot_index.peekMax()) |key| {
+            if (self.entries.contains(key.root)) return key;
+            _ = self.slot_index.removeMax();
+        }
+        return null;
+    }
+
+    fn rebuildSlotIndex(self: *Self) void {
+        // shrinking cannot fail, the dequeue keeps its capacity for the live entries
+        self.slot_index.len = 0;
+        var it = self.entries.iterator();
+        while (it.next()) |kv| {
+            self.slot_index.add(.{ .slot = kv.value_ptr.block.message.block.slot, .root = kv.key_ptr.* }) catch unreachable;
+        }
+    }
+
+    fn updateGauges(self: *const Self) void {
+        zeam_metrics.metrics.lean_orphan_blocks.set(self.entries.count());
+        zeam_metrics.metrics.lean_orphan_blocks_bytes.set(self.total_bytes);
+    }
+};
+
+/// Approximate heap footprint of a block, dominated by the attestation bitlists and the
+/// aggregated signature proofs.
+pub fn estimateBlockSize(block: *const types.SignedBlockWithAttestation) usize {
+    var size: usize = @sizeOf(types.SignedBlockWithAttestation);
+    for (block.message.block.body.attestations.constSlice()) |*attestation| {
+        size += @sizeOf(types.AggregatedAttestation) + attestation.aggregation_bits.len() / 8 + 1;
+    }
+    for (block.signature.attestation_signatures.constSlice()) |*proof| {
+        size += @sizeOf(types.AggregatedSignatureProof) + proof.participants.len() / 8 + 1 + proof.proof_data.len();
+    }
+    return size;
+}
+
+fn makeTestBlock(allocator: Allocator, slot: types.Slot, parent_root: types.Root) !*types.SignedBlockWithAttestation {
+    const block_ptr = try allocator.create(types.SignedBlockWithAttestation);
+    errdefer allocator.destroy(block_ptr);
+
+    block_ptr.* = .{
+        .message = .{
+            .block = .{
+                .slot = slot,
+                .parent_root = parent_root,
+                .proposer_index = 0,
+                .state_root = types.ZERO_HASH,
+                .body = .{
+                    .attestations = try types.AggregatedAttestations.init(allocator),
+                },
+            },
+            .proposer_attestation = .{
+                .validator_id = 0,
+                .data = .{
+                    .slot = slot,
+                    .head = .{ .root = types.ZERO_HASH, .slot = 0 },
+                    .target = .{ .root = types.ZERO_HASH, .slot = 0 },
+                    .source = .{ .root = types.ZERO_HASH, .slot = 0 },
+                },
+            },
+        },
+        .signature = try types.createBlockSignatures(allocator, 0),
+    };
+    return block_ptr;
+}
+
+test "orphan pool evicts the highest slots and enforces peer quotas" {
+    const allocator = std.testing.allocator;
+
+    var pool = OrphanBlockPool.init(allocator, .{
+        .max_blocks = 3,
+        .max_bytes = std.math.maxInt(usize),
+        .max_blocks_per_peer = 2,
+    });
+    defer pool.deinit();
+
+    const parent = [_]u8{0xaa} ** 32;
+    const roots = [_]types.Root{ [_]u8{1} ** 32, [_]u8{2} ** 32, [_]u8{3} ** 32, [_]u8{4} ** 32, [_]u8{5} ** 32 };
+
+    try pool.insert(roots[0], try makeTestBlock(allocator, 10, parent), "peer-a");
+    try pool.insert(roots[1], try makeTestBlock(allocator, 30, parent), "peer-a");
+    try std.testing.expectError(
+        OrphanBlockPoolError.PeerOrphanQuotaExceeded,
+        pool.insert(roots[2], try makeTestBlock(allocator, 5, parent), "peer-a"),
+    );
+    try pool.insert(roots[2], try makeTestBlock(allocator, 20, parent), "peer-b");
+    try std.testing.expectEqual(@as(usize, 3), pool.getChildren(parent).len);
+
+    // a full pool drops the slot 30 orphan for a lower one, but not for a higher one
+    try pool.insert(roots[3], try makeTestBlock(allocator, 15, parent), null);
+    try std.testing.expect(!pool.contains(roots[1]));
+    try std.testing.expectError(
+        OrphanBlockPoolError.OrphanPoolFull,
+        pool.insert(roots[4], try makeTestBlock(allocator, 40, parent), null),
+    );
+
+    // removal keeps the children list and the peer accounting consistent
+    try std.testing.expect(pool.remove(roots[0]));
+    try std.testing.expect(pool.peer_counts.get("peer-a") == null);
+    const children = pool.getChildren(parent);
+    try std.testing.expectEqual(@as(usize, 2), children.len);
+    for (children, 0..) |child_root, index| {
+        try std.testing.expectEqual(index, pool.entries.get(child_root).?.child_index);
+    }
+
+    try std.testing.expect(pool.remove(roots[2]));
+    try std.testing.expect(pool.remove(roots[3]));
+    try std.testing.expect(pool.children.get(parent) == null);
+    try std.testing.expectEqual(@as(usize, 0), pool.total_bytes);
+}
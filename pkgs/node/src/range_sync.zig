@@ -0,0 +1,352 @@
+const std = @import("std");
+const Allocator = std.mem.Allocator;
+
+const types = @import("@zeam/types");
+const params = @import("@zeam/params");
+
+const constants = @import("./constants.zig");
+
+pub const RangeSyncOpts = struct {
+    batch_slots: u64 = constants.RANGE_SYNC_BATCH_SLOTS,
+    max_batches: usize = constants.RANGE_SYNC_MAX_BATCHES,
+    max_batch_attempts: u8 = constants.RANGE_SYNC_MAX_BATCH_ATTEMPTS,
+};
+
+pub const BatchRange = struct {
+    start_slot: types.Slot,
+    count: u64,
+};
+
+pub const Batch = struct {
+    start_slot: types.Slot,
+    count: u64,
+    state: State = .pending,
+    request_id: u64 = 0,
+    peer_id: ?[]const u8 = null,
+    attempts: u8 = 0,
+    blocks: std.ArrayList(types.SignedBlockWithAttestation) = .empty,
+
+    pub const State = enum {
+        pending,
+        downloading,
+        downloaded,
+    };
+
+    pub fn endSlot(self: *const Batch) types.Slot {
+        return self.start_slot + self.count;
+    }
+
+    fn clearDownload(self: *Batch, allocator: Allocator) void {
+        if (self.peer_id) |peer_id| allocator.free(peer_id);
+        self.peer_id = null;
+        self.request_id = 0;
+        for (self.blocks.items) |*signed_block| {
+            signed_block.deinit();
+        }
+        self.blocks.clearRetainingCapacity();
+    }
+
+    pub fn deinit(self: *Batch, allocator: Allocator) void {
+        self.clearDownload(allocator);
+        self.blocks.deinit(allocator);
+    }
+};
+
+pub const FailureResult = enum {
+    untracked,
+    retrying,
+    aborted,
+};
+
+/// Download scheduler for syncing a long range of slots with blocks_by_range requests. The range
+/// is split into batches of `batch_slots` which are requested concurrently, up to `max_batches`
+/// in flight or buffered, possibly from different peers. Batches complete in any order but are
+/// handed out for import strictly in slot order so every block finds its parent.
+///
+/// The scheduler does no networking itself, the node sends the requests for the batches it
+/// reserves and reports their responses back by request id.
+pub const RangeSync = struct {
+    allocator: Allocator,
+    opts: RangeSyncOpts,
+    active: bool = false,
+    target_slot: types.Slot = 0,
+    // start slot of the next batch that has not been created yet
+    next_batch_slot: types.Slot = 0,
+    // batches in slot order, the first one is the next to import
+    batches: std.ArrayList(Batch) = .empty,
+
+    const Self = @This();
+
+    pub fn init(allocator: Allocator, opts: RangeSyncOpts) Self {
+        std.debug.assert(opts.batch_slots > 0 and opts.batch_slots <= params.MAX_REQUEST_BLOCKS);
+        std.debug.assert(opts.max_batches > 0);
+        return .{
+            .allocator = allocator,
+            .opts = opts,
+        };
+    }
+
+    pub fn deinit(self: *Self) void {
+        self.reset();
+        self.batches.deinit(self.allocator);
+    }
+
+    pub fn reset(self: *Self) void {
+        for (self.batches.items) |*batch| {
+            batch.deinit(self.allocator);
+        }
+        self.batches.clearRetainingCapacity();
+        self.active = false;
+        self.target_slot = 0;
+        self.next_batch_slot = 0;
+    }
+
+    pub fn isActive(self: *const Self) bool {
+        return self.active;
+    }
+
+    /// Syncs up to and including `target_slot`. A sync that is not running yet starts at
+    /// `start_slot`, a running one only has its target raised.
+    pub fn extendTarget(self: *Self, start_slot: types.Slot, target_slot: types.Slot) void {
+        if (!self.active) {
+            if (target_slot < start_slot) return;
+            self.active = true;
+            self.next_batch_slot = start_slot;
+            self.target_slot = target_slot;
+            return;
+        }
+        self.target_slot = @max(self.target_slot, target_slot);
+    }
+
+    /// Reserves the next batch to download, batches to retry come first. Returns null once the
+    /// window of in flight and buffered batches is full or the whole range is scheduled.
+    pub fn nextBatch(self: *Self) !?BatchRange {
+        if (!self.active) return null;
+
+        for (self.batches.items) |*batch| {
+            if (batch.state == .pending) {
+                batch.state = .downloading;
+                return .{ .start_slot = batch.start_slot, .count = batch.count };
+            }
+        }
+
+        if (self.batches.items.len >= self.opts.max_batches) return null;
+        if (self.next_batch_slot > self.target_slot) return null;
+
+        const count = @min(self.opts.batch_slots, self.target_slot - self.next_batch_slot + 1);
+        try self.batches.append(self.allocator, .{
+            .start_slot = self.next_batch_slot,
+            .count = count,
+            .state = .downloading,
+        });
+        self.next_batch_slot += count;
+        return .{ .start_slot = self.next_batch_slot - count, .count = count };
+    }
+
+    /// Records the request downloading a batch reserved with `nextBatch`.
+    pub fn setBatchRequest(self: *Self, start_slot: types.Slot, peer_id: []const u8, request_id: u64) !void {
+        const batch = self.findBatch(start_slot) orelse return error.UnknownBatch;
+        std.debug.assert(batch.state == .downloading and batch.peer_id == null);
+        batch.peer_id = try self.allocator.dupe(u8, peer_id);
+        batch.request_id = request_id;
+    }
+
+    /// Hands a reserved batch back when no request could be sent for it.
+    pub fn releaseBatch(self: *Self, start_slot: types.Slot) void {
+        const batch = self.findBatch(start_slot) orelse return;
+        batch.clearDownload(self.allocator);
+        batch.state = .pending;
+    }
+
+    pub fn isTrackedRequest(self: *Self, request_id: u64) bool {
+        return self.findRequest(request_id) != null;
+    }
+
+    /// Buffers a copy of a block received for `request_id`, returns false if the request does
+    /// not belong to range sync. Blocks outside the requested range or out of slot order are
+    /// rejected as a protocol violation of the serving peer.
+    pub fn onBlock(self: *Self, request_id: u64, signed_block: *const types.SignedBlockWithAttestation) !bool {
+        const batch = self.findRequest(request_id) orelse return false;
+
+        const slot = signed_block.message.block.slot;
+        if (slot < batch.start_slot or slot >= batch.endSlot()) return error.BlockOutsideRequestedRange;
+        if (batch.blocks.items.len > 0 and slot <= batch.blocks.items[batch.blocks.items.len - 1].message.block.slot) {
+            return error.BlocksNotInSlotOrder;
+        }
+
+        var cloned_block: types.SignedBlockWithAttestation = undefined;
+        try types.sszClone(self.allocator, types.SignedBlockWithAttestation, signed_block.*, &cloned_block);
+        errdefer cloned_block.deinit();
+        try batch.blocks.append(self.allocator, cloned_block);
+        return true;
+    }
+
+    /// Marks the batch of `request_id` downloaded, returns false for untracked requests.
+    pub fn onRequestCompleted(self: *Self, request_id: u64) bool {
+        const batch = self.findRequest(request_id) orelse return false;
+        batch.state = .downloaded;
+        return true;
+    }
+
+    /// Puts the batch of a failed or timed out request back for download, aborting the whole
+    /// sync once the batch ran out of attempts.
+    pub fn onRequestFailed(self: *Self, request_id: u64) FailureResult {
+        const batch = self.findRequest(request_id) orelse return .untracked;
+        batch.clearDownload(self.allocator);
+        batch.attempts += 1;
+        if (batch.attempts >= self.opts.max_batch_attempts) {
+            self.reset();
+            return .aborted;
+        }
+        batch.state = .pending;
+        return .retrying;
+    }
+
+    /// Requests of a disconnected peer will never complete, their batches are downloaded again
+    /// without counting it as an attempt.
+    pub fn onPeerDisconnected(self: *Self, peer_id: []const u8) void {
+        for (self.batches.items) |*batch| {
+            if (batch.state == .downloaded) continue;
+            const batch_peer_id = batch.peer_id orelse continue;
+            if (std.mem.eql(u8, batch_peer_id, peer_id)) {
+                batch.clearDownload(self.allocator);
+                batch.state = .pending;
+            }
+        }
+    }
+
+    /// Takes the lowest batch once its download finished, the caller owns it until it is
+    /// returned with `onBatchImported` or `onBatchImportFailed`.
+    pub fn popReadyBatch(self: *Self) ?Batch {
+        if (self.batches.items.len == 0 or self.batches.items[0].state != .downloaded) return null;
+        return self.batches.orderedRemove(0);
+    }
+
+    pub fn onBatchImported(self: *Self, batch: *Batch) void {
+        batch.deinit(self.allocator);
+        if (self.batches.items.len == 0 and self.next_batch_slot > self.target_slot) {
+            self.active = false;
+        }
+    }
+
+    /// Queues a batch whose blocks failed to import for download again, e.g. when its peer
+    /// served blocks of another fork.
+    pub fn onBatchImportFailed(self: *Self, batch: *Batch) FailureResult {
+        var failed = batch.*;
+        failed.clearDownload(self.allocator);
+        failed.attempts += 1;
+        if (failed.attempts >= self.opts.max_batch_attempts) {
+            failed.deinit(self.allocator);
+            self.reset();
+            return .aborted;
+        }
+
+        failed.state = .pending;
+        self.batches.insert(self.allocator, 0, failed) catch {
+            failed.deinit(self.allocator);
+            self.reset();
+            return .aborted;
+        };
+        return .retrying;
+    }
+
+    pub fn numDownloading(self: *const Self) usize {
+        var num_downloading: usize = 0;
+        for (self.batches.items) |batch| {
+            if (batch.state == .downloading) num_downloading += 1;
+        }
+        return num_downloading;
+    }
+
+    fn findBatch(self: *Self, start_slot: types.Slot) ?*Batch {
+        for (self.batches.items) |*batch| {
+            if (batch.start_slot == start_slot) return batch;
+        }
+        return null;
+    }
+
+    fn findRequest(self: *Self, request_id: u64) ?*Batch {
+        for (self.batches.items) |*batch| {
+            if (batch.state == .downloading and batch.peer_id != null and batch.request_id == request_id) return batch;
+        }
+        return null;
+    }
+};
+
+test "range sync pipelines batches and imports them in slot order" {
+    const allocator = std.testing.allocator;
+
+    var range_sync = RangeSync.init(allocator, .{ .batch_slots = 4, .max_batches = 3, .max_batch_attempts = 2 });
+    defer range_sync.deinit();
+
+    range_sync.extendTarget(1, 10);
+    try std.testing.expect(range_sync.isActive());
+
+    // the window holds three batches: 1-4, 5-8 and 9-10
+    var request_id: u64 = 1;
+    while (try range_sync.nextBatch()) |range| : (request_id += 1) {
+        try range_sync.setBatchRequest(range.start_slot, "peer", request_id);
+    }
+    try std.testing.expectEqual(@as(usize, 3), range_sync.numDownloading());
+    try std.testing.expectEqual(@as(u64, 2), range_sync.batches.items[2].count);
+
+    // a later batch completing first is buffered until the ones before it are imported
+    try std.testing.expect(range_sync.onRequestCompleted(2));
+    try std.testing.expect(range_sync.popReadyBatch() == null);
+
+    // a failed request is retried from the start of its batch
+    try std.testing.expectEqual(FailureResult.retrying, range_sync.onRequestFailed(1));
+    const retry = (try range_sync.nextBatch()).?;
+    try std.testing.expectEqual(@as(types.Slot, 1), retry.start_slot);
+    try range_sync.setBatchRequest(retry.start_slot, "peer", 4);
+    try std.testing.expect(range_sync.onRequestCompleted(4));
+
+    var first = range_sync.popReadyBatch().?;
+    try std.testing.expectEqual(@as(types.Slot, 1), first.start_slot);
+    range_sync.onBatchImported(&first);
+    var second = range_sync.popReadyBatch().?;
+    try std.testing.expectEqual(@as(types.Slot, 5), second.start_slot);
+    range_sync.onBatchImported(&second);
+
+    // raising the target while syncing schedules further batches
+    range_sync.extendTarget(1, 12);
+    const extension = (try range_sync.nextBatch()).?;
+    try std.testing.expectEqual(@as(types.Slot, 11), extension.start_slot);
+    try range_sync.setBatchRequest(extension.start_slot, "other", 5);
+
+    try std.testing.expect(range_sync.onRequestCompleted(3));
+    var third = range_sync.popReadyBatch().?;
+    range_sync.onBatchImported(&third);
+    try std.testing.expect(range_sync.isActive());
+
+    try std.testing.expect(range_sync.onRequestCompleted(5));
+    var last = range_sync.popReadyBatch().?;
+    range_sync.onBatchImported(&last);
+    try std.testing.expect(!range_sync.isActive());
+}
+
+test "range sync aborts after repeated failures of a batch" {
+    const allocator = std.testing.allocator;
+
+    var range_sync = RangeSync.init(allocator, .{ .batch_slots = 4, .max_batches = 2, .max_batch_attempts = 2 });
+    defer range_sync.deinit();
+
+    range_sync.extendTarget(1, 100);
+    const range = (try range_sync.nextBatch()).?;
+    try range_sync.setBatchRequest(range.start_slot, "peer", 1);
+
+    // a disconnect does not count as an attempt
+    range_sync.onPeerDisconnected("peer");
+    try std.testing.expect(!range_sync.isTrackedRequest(1));
+    const retry = (try range_sync.nextBatch()).?;
+    try std.testing.expectEqual(range.start_slot, retry.start_slot);
+    try range_sync.setBatchRequest(retry.start_slot, "peer", 2);
+
+    try std.testing.expectEqual(FailureResult.retrying, range_sync.onRequestFailed(2));
+    const last_attempt = (try range_sync.nextBatch()).?;
+    try range_sync.setBatchRequest(last_attempt.start_slot, "peer", 3);
+    try std.testing.expectEqual(FailureResult.aborted, range_sync.onRequestFailed(3));
+    try std.testing.expect(!range_sync.isActive());
+    try std.testing.expectEqual(@as(usize, 0), range_sync.batches.items.len);
+    try std.testing.expectEqual(FailureResult.untracked, range_sync.onRequestFailed(3));
+}
@@ -0,0 +1,146 @@
+const std = @import("std");
+const Allocator = std.mem.Allocator;
+
+const types = @import("@zeam/types");
+const stf = @import("@zeam/state-transition");
+const xmss = @import("@zeam/xmss");
+const zeam_metrics = @import("@zeam/metrics");
+
+/// Verifies the XMSS signatures of a block on a pool of worker threads. Every aggregated
+/// attestation proof and the proposer signature is an independent job, the calling thread
+/// prepares them (public key cache, message hashes) and then helps the workers drain them.
+///
+/// With zero workers verification runs inline on the calling thread, same as
+/// `stf.verifySignatures`. The allocator must be thread safe as the pool frees its task
+/// closures on the worker threads.
+pub const SignatureVerifier = struct {
+    pool: std.Thread.Pool,
+    num_workers: usize,
+
+    const Self = @This();
+
+    pub fn init(self: *Self, allocator: Allocator, num_workers: usize) !void {
+        self.* = .{
+            .pool = undefined,
+            .num_workers = num_workers,
+        };
+        if (num_workers > 0) {
+            try self.pool.init(.{ .allocator = allocator, .n_jobs = num_workers });
+        }
+    }
+
+    pub fn deinit(self: *Self) void {
+        if (self.num_workers > 0) {
+            self.pool.deinit();
+        }
+    }
+
+    /// Verifies all signatures of `signed_block` against `state`, returning the error of the
+    /// first invalid signature found. Pending jobs are skipped once one of them failed.
+    pub fn verifyBlock(
+        self: *Self,
+        allocator: Allocator,
+        state: *const types.BeamState,
+        signed_block: *const types.SignedBlockWithAttestation,
+        pubkey_cache: ?*xmss.PublicKeyCache,
+    ) !void {
+        const verify_span = zeam_metrics.tracing.span(.verify_signatures);
+        defer verify_span.end();
+
+        var jobs = try stf.BlockSignatureJobs.init(allocator, state, signed_block, pubkey_cache);
+        defer jobs.deinit();
+
+        // nothing to fan out for a lone proposer signature
+        if (self.num_workers == 0 or jobs.aggregated.items.len == 0) {
+            return jobs.verifyAll();
+        }
+
+        var batch: VerificationBatch = .{};
+        var wait_group: std.Thread.WaitGroup = .{};
+        for (jobs.aggregated.items) |*job| {
+            self.pool.spawnWg(&wait_group, runAggregatedJob, .{ &batch, job });
+        }
+        self.pool.spawnWg(&wait_group, runSingleJob, .{ &batch, &jobs.proposer });
+        self.pool.waitAndWork(&wait_group);
+
+        if (batch.first_error) |err| return err;
+    }
+
+    /// Verifies unrelated signatures, e.g. a batch of gossip attestations, recording every
+    /// outcome in `valid` rather than stopping at the first failure.
+    pub fn verifyEach(self: *Self, jobs: []const stf.SingleSignatureJob, valid: []bool) void {
+        std.debug.assert(jobs.len == valid.len);
+        if (self.num_workers == 0 or jobs.len < 2) {
+            return runSingleJobs(jobs, valid);
+        }
+
+        // one task per chunk rather than per signature keeps the pool overhead per FFI call low
+        const num_chunks = @min(jobs.len, self.num_workers + 1);
+        const chunk_len = std.math.divCeil(usize, jobs.len, num_chunks) catch unreachable;
+        var wait_group: std.Thread.WaitGroup = .{};
+        var start: usize = 0;
+        while (start < jobs.len) : (start += chunk_len) {
+            const end = @min(start + chunk_len, jobs.len);
+            self.pool.spawnWg(&wait_group, runSingleJobs, .{ jobs[start..end], valid[start..end] });
+        }
+        self.pool.waitAndWork(&wait_group);
+    }
+};
+
+/// Shared outcome of the jobs of one block.
+const VerificationBatch = struct {
+    failed: std.atomic.Value(bool) = std.atomic.Value(bool).init(false),
+    mutex: std.Thread.Mutex = .{},
+    first_error: ?anyerror = null,
+
+    fn fail(self: *VerificationBatch, err: anyerror) void {
+        self.mutex.lock();
+        defer self.mutex.unlock();
+        if (self.first_error == null) self.first_error = err;
+        self.failed.store(true, .release);
+    }
+
+    fn hasFailed(self: *const VerificationBatch) bool {
+        return self.failed.load(.acquire);
+    }
+};
+
+fn runAggregatedJob(batch: *VerificationBatch, job: *const stf.AggregatedSignatureJob) void {
+    // one invalid signature rejects the block, no point verifying the rest
+    if (batch.hasFailed()) return;
+    job.verify() catch |err| batch.fail(err);
+}
+
+fn runSingleJob(batch: *VerificationBatch, job: *const stf.SingleSignatureJob) void {
+    if (batch.hasFailed()) return;
+    job.verify() catch |err| batch.fail(err);
+}
+
+fn runSingleJobs(jobs: []const stf.SingleSignatureJob, valid: []bool) void {
+    for (jobs, valid) |*job, *is_valid| {
+        is_valid.* = if (job.verify()) |_| true else |_| false;
+    }
+}
+
+test "parallel verification matches sequential verification of mock chain blocks" {
+    const allocator = std.testing.allocator;
+
+    var mock_chain = try stf.genMockChain(allocator, 4, null);
+    defer mock_chain.deinit(allocator);
+    defer mock_chain.genesis_state.deinit();
+
+    var verifier: SignatureVerifier = undefined;
+    try verifier.init(allocator, 2);
+    defer verifier.deinit();
+
+    const state = &mock_chain.genesis_state;
+    for (mock_chain.blocks[1..]) |*signed_block| {
+        try stf.verifySignatures(allocator, state, signed_block, null);
+        try verifier.verifyBlock(allocator, state, signed_block, null);
+    }
+
+    // a corrupted proposer signature fails the block
+    var tampered = mock_chain.blocks[mock_chain.blocks.len - 1];
+    tampered.signature.proposer_signature[0] ^= 0xff;
+    try std.testing.expect(std.meta.isError(verifier.verifyBlock(allocator, state, &tampered, null)));
+}
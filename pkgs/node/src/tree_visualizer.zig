@@ -201,7 +201,28 @@ pub fn buildForkChoiceGraphJSON(
     const snapshot = try forkchoice.snapshot(allocator);
     defer snapshot.deinit(allocator);
 
+    try writeForkChoiceGraphJSON(snapshot, output, max_slots, null, allocator);
+}
+
+/// Renders the fork choice graph of `snapshot` in Grafana node-graph JSON format. With
+/// `since` set only the nodes changed after that generation and their edges are written,
+/// wrapped as `{"generation":..,"full":false,"min_slot":..,"nodes":[..],"edges":[..]}`.
+/// Nodes below `min_slot` fell out of the window. A delta can't be formed across a rebase or
+/// finalization, or from a generation this snapshot doesn't know, and then the whole window is
+/// written with `"full":true`. Arc values are relative to the heaviest node of the window at
+/// the snapshot generation.
+pub fn writeForkChoiceGraphJSON(
+    snapshot: fcFactory.ForkChoice.Snapshot,
+    output: *std.ArrayList(u8),
+    max_slots: usize,
+    since: ?u64,
+    allocator: Allocator,
+) !void {
     const proto_nodes = snapshot.nodes;
+    const delta_since: ?u64 = if (since) |generation|
+        if (generation >= snapshot.reset_generation and generation <= snapshot.generation) generation else null
+    else
+        null;
 
     // Determine the slot threshold (show only recent slots)
     const current_slot = snapshot.head.slot;
@@ -236,6 +257,9 @@ pub fn buildForkChoiceGraphJSON(
 
     for (proto_nodes, 0..) |pnode, idx| {
         if (pnode.slot < min_slot) continue;
+        if (delta_since) |generation| {
+            if (pnode.generation <= generation) continue;
+        }
 
         // Determine node role and color
         const is_head = std.mem.eql(u8, &pnode.blockRoot, &snapshot.head.blockRoot);
@@ -347,10 +371,11 @@ pub fn buildForkChoiceGraphJSON(
                     try edges_list.appendSlice(allocator, ",");
                 }
 
+                // keyed by the child, which has a single parent, so deltas can replace edges
                 const edge_json = try std.fmt.allocPrint(allocator,
-                    \\{{"id":"edge_{d}","source":"{s}","target":"{s}","mainStat":"","detail__is_best_child":{}}}
+                    \\{{"id":"edge_{s}","source":"{s}","target":"{s}","mainStat":"","detail__is_best_child":{}}}
                 , .{
-                    edge_count,
+                    full_root,
                     parent_root,
                     full_root,
                     is_best_child,
@@ -364,11 +389,16 @@ pub fn buildForkChoiceGraphJSON(
     }
 
     // Write final JSON
-    const final_json = try std.fmt.allocPrint(allocator,
-        \\{{"nodes":[{s}],"edges":[{s}]}}
+    if (since != null) {
+        try output.print(allocator,
+            \\{{"generation":{d},"full":{},"min_slot":{d},
+        , .{ snapshot.generation, delta_since == null, min_slot });
+    } else {
+        try output.append(allocator, '{');
+    }
+    try output.print(allocator,
+        \\"nodes":[{s}],"edges":[{s}]}}
     , .{ nodes_list.items, edges_list.items });
-    defer allocator.free(final_json);
-    try output.appendSlice(allocator, final_json);
 }
 
 // ============================================================================
@@ -830,3 +860,49 @@ test "buildTreeVisualization: big tree with many branches and depth (max_depth=1
     // Verify tree structure characters are used
     try std.testing.expect(std.mem.indexOf(u8, result, "├──") != null);
 }
+
+test "writeForkChoiceGraphJSON: delta lists only nodes changed since the generation" {
+    const allocator = std.testing.allocator;
+
+    // A(0) -> B(1) -> C(2), B and C changed at generation 5, C again at 7
+    var nodes = [_]fcFactory.ProtoNode{
+        createTestProtoNode(0, 0xAA, 0x00, null, 0, 1, 1, 0, 1, 2),
+        createTestProtoNode(1, 0xBB, 0xAA, 0, 1, 2, 2, 0, 1, 2),
+        createTestProtoNode(2, 0xCC, 0xBB, 1, 2, 0, 0, 0, 0, null),
+    };
+    nodes[0].generation = 1;
+    nodes[1].generation = 5;
+    nodes[2].generation = 7;
+    const snapshot = fcFactory.ForkChoice.Snapshot{
+        .head = nodes[2],
+        .latest_justified = .{ .root = createTestRoot(0xAA), .slot = 0 },
+        .latest_finalized = .{ .root = createTestRoot(0xAA), .slot = 0 },
+        .safe_target_root = createTestRoot(0xAA),
+        .validator_count = 4,
+        .nodes = &nodes,
+        .generation = 7,
+        .reset_generation = 3,
+    };
+
+    var full: std.ArrayList(u8) = .empty;
+    defer full.deinit(allocator);
+    try writeForkChoiceGraphJSON(snapshot, &full, 50, null, allocator);
+    try std.testing.expect(std.mem.startsWith(u8, full.items, "{\"nodes\":["));
+    try std.testing.expectEqual(@as(usize, 3), std.mem.count(u8, full.items, "\"title\""));
+    try std.testing.expectEqual(@as(usize, 2), std.mem.count(u8, full.items, "\"source\""));
+
+    var delta: std.ArrayList(u8) = .empty;
+    defer delta.deinit(allocator);
+    try writeForkChoiceGraphJSON(snapshot, &delta, 50, 5, allocator);
+    try std.testing.expect(std.mem.startsWith(u8, delta.items, "{\"generation\":7,\"full\":false,\"min_slot\":0,"));
+    try std.testing.expectEqual(@as(usize, 1), std.mem.count(u8, delta.items, "\"title\""));
+    try std.testing.expect(std.mem.indexOf(u8, delta.items, "\"title\":\"Slot 2\"") != null);
+    // the edge is keyed by its child so clients can replace it
+    try std.testing.expect(std.mem.indexOf(u8, delta.items, "\"id\":\"edge_cccc") != null);
+
+    // generations before the last reset need the whole window again
+    delta.clearRetainingCapacity();
+    try writeForkChoiceGraphJSON(snapshot, &delta, 50, 2, allocator);
+    try std.testing.expect(std.mem.startsWith(u8, delta.items, "{\"generation\":7,\"full\":true,"));
+    try std.testing.expectEqual(@as(usize, 3), std.mem.count(u8, delta.items, "\"title\""));
+}
@@ -698,7 +698,7 @@ fn processBlockStep(
         new_state_ptr.deinit();
         ctx.allocator.destroy(new_state_ptr);
     }
-    try types.sszClone(ctx.allocator, types.BeamState, parent_state_ptr.*, new_state_ptr);
+    try parent_state_ptr.clone(ctx.allocator, new_state_ptr);
 
     state_transition.apply_transition(ctx.allocator, new_state_ptr, block, .{ .logger = ctx.fork_logger, .validateResult = false }) catch |err| {
         std.debug.print(
@@ -829,7 +829,7 @@ fn processBlockStep(
         );
         return FixtureError.InvalidFixture;
     };
-    errdefer proposer_proof.deinit();
+    defer proposer_proof.deinit();
 
     types.aggregationBitsSet(&proposer_proof.participants, proposer_attestation.validator_id, true) catch |err| {
         std.debug.print(
@@ -839,18 +839,8 @@ fn processBlockStep(
         return FixtureError.InvalidFixture;
     };
 
-    const sig_key = types.SignatureKey{
-        .validator_id = proposer_attestation.validator_id,
-        .data_root = proposer_data_root,
-    };
-    const gop = try ctx.fork_choice.latest_new_aggregated_payloads.getOrPut(sig_key);
-    if (!gop.found_existing) {
-        gop.value_ptr.* = .empty;
-    }
-    try gop.value_ptr.append(ctx.allocator, .{
-        .slot = proposer_attestation.data.slot,
-        .proof = proposer_proof,
-    });
+    const proposer_ids = [_]types.ValidatorIndex{proposer_attestation.validator_id};
+    try ctx.fork_choice.storeAggregatedPayload(&proposer_ids, &proposer_attestation.data, proposer_proof, false);
 
     if (block_wrapper_obj) |wrapper_obj| {
         if (wrapper_obj.get("blockRootLabel")) |label_value| {
@@ -13,6 +13,9 @@ pub const StateTransitionError = transition.StateTransitionError;
 pub const StateTransitionOpts = transition.StateTransitionOpts;
 pub const verifySignatures = transition.verifySignatures;
 pub const verifySingleAttestation = transition.verifySingleAttestation;
+pub const BlockSignatureJobs = transition.BlockSignatureJobs;
+pub const AggregatedSignatureJob = transition.AggregatedSignatureJob;
+pub const SingleSignatureJob = transition.SingleSignatureJob;
 
 const mockImport = @import("./mock.zig");
 pub const genMockChain = mockImport.genMockChain;
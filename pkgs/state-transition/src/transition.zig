@@ -20,6 +20,7 @@ pub const StateTransitionOpts = struct {
     validateResult: bool = true,
     logger: zeam_utils.ModuleLogger,
     rootToSlotCache: ?*types.RootToSlotCache = null,
+    stateRootCache: ?*types.BeamStateRootCache = null,
 };
 
 // pub fn process_epoch(state: types.BeamState) void {
@@ -36,13 +37,13 @@ fn process_execution_payload_header(state: *types.BeamState, block: types.BeamBl
     }
 }
 
-pub fn apply_raw_block(allocator: Allocator, state: *types.BeamState, block: *types.BeamBlock, logger: zeam_utils.ModuleLogger, cache: ?*types.RootToSlotCache) !void {
+pub fn apply_raw_block(allocator: Allocator, state: *types.BeamState, block: *types.BeamBlock, logger: zeam_utils.ModuleLogger, cache: ?*types.RootToSlotCache, root_cache: ?*types.BeamStateRootCache) !void {
     // prepare pre state to process block for that slot, may be rename prepare_pre_stateCollapse comment
     const transition_timer = zeam_metrics.lean_state_transition_time_seconds.start();
     defer _ = transition_timer.observe();
 
     // prepare pre state to process block for that slot, may be rename prepare_pre_state
-    try state.process_slots(allocator, block.slot, logger);
+    try state.process_slots(allocator, block.slot, logger, root_cache);
 
     // process block and modify the pre state to post state
     try state.process_block(allocator, block.*, logger, cache);
@@ -50,116 +51,213 @@ pub fn apply_raw_block(allocator: Allocator, state: *types.BeamState, block: *ty
     logger.debug("extracting state root\n", .{});
     // extract the post state root
     var state_root: [32]u8 = undefined;
-    try zeam_utils.hashTreeRoot(*types.BeamState, state, &state_root, allocator);
+    try state.hashTreeRoot(allocator, root_cache, &state_root);
     block.state_root = state_root;
 }
 
-// Verify aggregated signatures using AggregatedSignatureProof
-// If pubkey_cache is provided, public keys are cached to avoid repeated SSZ deserialization.
-// This can significantly reduce CPU overhead when processing many blocks.
-pub fn verifySignatures(
-    allocator: Allocator,
-    state: *const types.BeamState,
-    signed_block: *const types.SignedBlockWithAttestation,
-    pubkey_cache: ?*xmss.PublicKeyCache,
-) !void {
-    const attestations = signed_block.message.block.body.attestations.constSlice();
-    const signature_proofs = signed_block.signature.attestation_signatures.constSlice();
+/// An aggregated attestation proof with its public keys and message resolved, verifiable
+/// without access to the state or the public key cache.
+pub const AggregatedSignatureJob = struct {
+    proof: *const types.AggregatedSignatureProof,
+    public_keys: std.ArrayList(*const xmss.HashSigPublicKey),
+    message_hash: [32]u8,
+    epoch: u64,
 
-    if (attestations.len != signature_proofs.len) {
-        return StateTransitionError.InvalidBlockSignatures;
+    pub fn verify(self: *const AggregatedSignatureJob) !void {
+        const agg_verification_timer = zeam_metrics.lean_pq_sig_aggregated_signatures_verification_time_seconds.start();
+        self.proof.verify(self.public_keys.items, &self.message_hash, self.epoch) catch |err| {
+            _ = agg_verification_timer.observe();
+            zeam_metrics.metrics.lean_pq_sig_aggregated_signatures_invalid_total.incr();
+            return err;
+        };
+        _ = agg_verification_timer.observe();
+        zeam_metrics.metrics.lean_pq_sig_aggregated_signatures_valid_total.incr();
     }
+};
 
-    const validators = state.validators.constSlice();
+/// A single validator signature with its message resolved. The public key bytes are borrowed
+/// from the state the job was prepared against.
+pub const SingleSignatureJob = struct {
+    pubkey: []const u8,
+    message: [32]u8,
+    epoch: u32,
+    signature: *const types.SIGBYTES,
+
+    pub fn init(
+        allocator: Allocator,
+        state: *const types.BeamState,
+        validator_index: usize,
+        attestation_data: *const types.AttestationData,
+        signatureBytes: *const types.SIGBYTES,
+    ) !SingleSignatureJob {
+        const validators = state.validators.constSlice();
+        if (validator_index >= validators.len) {
+            return StateTransitionError.InvalidValidatorId;
+        }
 
-    for (attestations, signature_proofs) |aggregated_attestation, signature_proof| {
-        // Get validator indices from the attestation's aggregation bits
-        var validator_indices = try types.aggregationBitsToValidatorIndices(&aggregated_attestation.aggregation_bits, allocator);
-        defer validator_indices.deinit(allocator);
+        var job = SingleSignatureJob{
+            .pubkey = validators[validator_index].getPubkey(),
+            .message = undefined,
+            .epoch = @intCast(attestation_data.slot),
+            .signature = signatureBytes,
+        };
+        try zeam_utils.hashTreeRoot(types.AttestationData, attestation_data.*, &job.message, allocator);
+        return job;
+    }
 
-        // Get validator indices from the signature proof's participants
-        var participant_indices = try types.aggregationBitsToValidatorIndices(&signature_proof.participants, allocator);
-        defer participant_indices.deinit(allocator);
+    pub fn verify(self: *const SingleSignatureJob) !void {
+        const verification_timer = zeam_metrics.lean_pq_signature_attestation_verification_time_seconds.start();
+        try xmss.verifySsz(self.pubkey, &self.message, self.epoch, self.signature);
+        _ = verification_timer.observe();
+    }
+};
 
-        // Verify that the participants EXACTLY match the attestation aggregation bits.
-        if (validator_indices.items.len != participant_indices.items.len) {
+/// All signature checks of a block, prepared on the calling thread: participants are matched
+/// against the aggregation bits, public keys resolved and messages hashed. The jobs themselves
+/// only read their own data (and the signed block and state they point into), so they can be
+/// verified in any order or concurrently.
+pub const BlockSignatureJobs = struct {
+    allocator: Allocator,
+    aggregated: std.ArrayList(AggregatedSignatureJob),
+    proposer: SingleSignatureJob,
+    // deserialized public keys owned by the jobs when no cache is provided
+    owned_public_keys: std.ArrayList(xmss.PublicKey),
+
+    const Self = @This();
+
+    // If pubkey_cache is provided, public keys are cached to avoid repeated SSZ deserialization.
+    // This can significantly reduce CPU overhead when processing many blocks.
+    pub fn init(
+        allocator: Allocator,
+        state: *const types.BeamState,
+        signed_block: *const types.SignedBlockWithAttestation,
+        pubkey_cache: ?*xmss.PublicKeyCache,
+    ) !Self {
+        const attestations = signed_block.message.block.body.attestations.constSlice();
+        const signature_proofs = signed_block.signature.attestation_signatures.constSlice();
+
+        if (attestations.len != signature_proofs.len) {
             return StateTransitionError.InvalidBlockSignatures;
         }
-        for (validator_indices.items, participant_indices.items) |att_idx, proof_idx| {
-            if (att_idx != proof_idx) {
+
+        var jobs = Self{
+            .allocator = allocator,
+            .aggregated = .empty,
+            .proposer = undefined,
+            .owned_public_keys = .empty,
+        };
+        errdefer jobs.deinit();
+        try jobs.aggregated.ensureTotalCapacity(allocator, attestations.len);
+
+        const validators = state.validators.constSlice();
+
+        for (attestations, signature_proofs) |*aggregated_attestation, *signature_proof| {
+            // Get validator indices from the attestation's aggregation bits
+            var validator_indices = try types.aggregationBitsToValidatorIndices(&aggregated_attestation.aggregation_bits, allocator);
+            defer validator_indices.deinit(allocator);
+
+            // Get validator indices from the signature proof's participants
+            var participant_indices = try types.aggregationBitsToValidatorIndices(&signature_proof.participants, allocator);
+            defer participant_indices.deinit(allocator);
+
+            // Verify that the participants EXACTLY match the attestation aggregation bits.
+            if (validator_indices.items.len != participant_indices.items.len) {
                 return StateTransitionError.InvalidBlockSignatures;
             }
-        }
-
-        // Convert validator pubkey bytes to HashSigPublicKey handles
-        var public_keys: std.ArrayList(*const xmss.HashSigPublicKey) = .empty;
-        try public_keys.ensureTotalCapacity(allocator, validator_indices.items.len);
-        defer public_keys.deinit(allocator);
-
-        // Store the PublicKey wrappers so we can free the Rust handles after verification
-        // Only used when cache is not provided
-        var pubkey_wrappers: std.ArrayList(xmss.PublicKey) = .empty;
-        try pubkey_wrappers.ensureTotalCapacity(allocator, validator_indices.items.len);
-        defer {
-            // Only free wrappers if we're not using a cache
-            // When using cache, the cache owns the handles
-            if (pubkey_cache == null) {
-                for (pubkey_wrappers.items) |*wrapper| {
-                    wrapper.deinit();
+            for (validator_indices.items, participant_indices.items) |att_idx, proof_idx| {
+                if (att_idx != proof_idx) {
+                    return StateTransitionError.InvalidBlockSignatures;
                 }
             }
-            pubkey_wrappers.deinit(allocator);
-        }
 
-        for (validator_indices.items) |validator_index| {
-            if (validator_index >= validators.len) {
-                return StateTransitionError.InvalidValidatorId;
-            }
-            const validator = &validators[validator_index];
-            const pubkey_bytes = validator.getPubkey();
+            // Convert validator pubkey bytes to HashSigPublicKey handles
+            var public_keys: std.ArrayList(*const xmss.HashSigPublicKey) = .empty;
+            errdefer public_keys.deinit(allocator);
+            try public_keys.ensureTotalCapacity(allocator, validator_indices.items.len);
 
-            if (pubkey_cache) |cache| {
-                // Use cached public key (deserialize on first access, reuse on subsequent)
-                const pk_handle = cache.getOrPut(validator_index, pubkey_bytes) catch {
-                    return StateTransitionError.InvalidBlockSignatures;
-                };
-                try public_keys.append(allocator, pk_handle);
-            } else {
-                // No cache - deserialize each time (legacy behavior)
-                const pubkey = xmss.PublicKey.fromBytes(pubkey_bytes) catch {
-                    return StateTransitionError.InvalidBlockSignatures;
-                };
-                try public_keys.append(allocator, pubkey.handle);
-                try pubkey_wrappers.append(allocator, pubkey);
+            for (validator_indices.items) |validator_index| {
+                if (validator_index >= validators.len) {
+                    return StateTransitionError.InvalidValidatorId;
+                }
+                const validator = &validators[validator_index];
+                const pubkey_bytes = validator.getPubkey();
+
+                if (pubkey_cache) |cache| {
+                    // Use cached public key (deserialize on first access, reuse on subsequent)
+                    const pk_handle = cache.getOrPut(validator_index, pubkey_bytes) catch {
+                        return StateTransitionError.InvalidBlockSignatures;
+                    };
+                    public_keys.appendAssumeCapacity(pk_handle);
+                } else {
+                    // No cache - deserialize each time, the jobs own the handles until deinit
+                    try jobs.owned_public_keys.ensureUnusedCapacity(allocator, 1);
+                    const pubkey = xmss.PublicKey.fromBytes(pubkey_bytes) catch {
+                        return StateTransitionError.InvalidBlockSignatures;
+                    };
+                    jobs.owned_public_keys.appendAssumeCapacity(pubkey);
+                    public_keys.appendAssumeCapacity(pubkey.handle);
+                }
             }
+
+            // Compute message hash from attestation data
+            var message_hash: [32]u8 = undefined;
+            try zeam_utils.hashTreeRoot(types.AttestationData, aggregated_attestation.data, &message_hash, allocator);
+
+            jobs.aggregated.appendAssumeCapacity(.{
+                .proof = signature_proof,
+                .public_keys = public_keys,
+                .message_hash = message_hash,
+                .epoch = aggregated_attestation.data.slot,
+            });
         }
 
-        // Compute message hash from attestation data
-        var message_hash: [32]u8 = undefined;
-        try zeam_utils.hashTreeRoot(types.AttestationData, aggregated_attestation.data, &message_hash, allocator);
+        // Proposer signature (still individual)
+        const proposer_attestation = signed_block.message.proposer_attestation;
+        jobs.proposer = try SingleSignatureJob.init(
+            allocator,
+            state,
+            @intCast(proposer_attestation.validator_id),
+            &signed_block.message.proposer_attestation.data,
+            &signed_block.signature.proposer_signature,
+        );
+        return jobs;
+    }
 
-        const epoch: u64 = aggregated_attestation.data.slot;
+    pub fn deinit(self: *Self) void {
+        for (self.aggregated.items) |*job| {
+            job.public_keys.deinit(self.allocator);
+        }
+        self.aggregated.deinit(self.allocator);
+        for (self.owned_public_keys.items) |*pubkey| {
+            pubkey.deinit();
+        }
+        self.owned_public_keys.deinit(self.allocator);
+    }
 
-        // Verify the aggregated signature proof
-        const agg_verification_timer = zeam_metrics.lean_pq_sig_aggregated_signatures_verification_time_seconds.start();
-        signature_proof.verify(public_keys.items, &message_hash, epoch) catch |err| {
-            _ = agg_verification_timer.observe();
-            zeam_metrics.metrics.lean_pq_sig_aggregated_signatures_invalid_total.incr();
-            return err;
-        };
-        _ = agg_verification_timer.observe();
-        zeam_metrics.metrics.lean_pq_sig_aggregated_signatures_valid_total.incr();
+    /// Verifies every job in block order on the calling thread, stopping at the first failure.
+    pub fn verifyAll(self: *const Self) !void {
+        for (self.aggregated.items) |*job| {
+            try job.verify();
+        }
+        try self.proposer.verify();
     }
+};
 
-    // Verify proposer signature (still individual)
-    const proposer_attestation = signed_block.message.proposer_attestation;
-    try verifySingleAttestation(
-        allocator,
-        state,
-        @intCast(proposer_attestation.validator_id),
-        &proposer_attestation.data,
-        &signed_block.signature.proposer_signature,
-    );
+// Verify aggregated signatures using AggregatedSignatureProof
+// If pubkey_cache is provided, public keys are cached to avoid repeated SSZ deserialization.
+// This can significantly reduce CPU overhead when processing many blocks.
+pub fn verifySignatures(
+    allocator: Allocator,
+    state: *const types.BeamState,
+    signed_block: *const types.SignedBlockWithAttestation,
+    pubkey_cache: ?*xmss.PublicKeyCache,
+) !void {
+    const verify_span = zeam_metrics.tracing.span(.verify_signatures);
+    defer verify_span.end();
+
+    var jobs = try BlockSignatureJobs.init(allocator, state, signed_block, pubkey_cache);
+    defer jobs.deinit();
+    try jobs.verifyAll();
 }
 
 pub fn verifySingleAttestation(
@@ -169,23 +267,8 @@ pub fn verifySingleAttestation(
     attestation_data: *const types.AttestationData,
     signatureBytes: *const types.SIGBYTES,
 ) !void {
-    const validatorIndex = validator_index;
-    const validators = state.validators.constSlice();
-    if (validatorIndex >= validators.len) {
-        return StateTransitionError.InvalidValidatorId;
-    }
-
-    const validator = &validators[validatorIndex];
-    const pubkey = validator.getPubkey();
-
-    const verification_timer = zeam_metrics.lean_pq_signature_attestation_verification_time_seconds.start();
-    var message: [32]u8 = undefined;
-    try zeam_utils.hashTreeRoot(types.AttestationData, attestation_data.*, &message, allocator);
-
-    const epoch: u32 = @intCast(attestation_data.slot);
-
-    try xmss.verifySsz(pubkey, &message, epoch, signatureBytes);
-    _ = verification_timer.observe();
+    const job = try SingleSignatureJob.init(allocator, state, validator_index, attestation_data, signatureBytes);
+    try job.verify();
 }
 
 // TODO(gballet) check if beam block needs to be a pointer
@@ -194,6 +277,8 @@ pub fn apply_transition(allocator: Allocator, state: *types.BeamState, block: ty
 
     const transition_timer = zeam_metrics.lean_state_transition_time_seconds.start();
     defer _ = transition_timer.observe();
+    const transition_span = zeam_metrics.tracing.span(.stf_apply_transition);
+    defer transition_span.end();
 
     // client is supposed to call verify_signatures outside STF to make STF prover friendly
     const validSignatures = opts.validSignatures;
@@ -202,7 +287,7 @@ pub fn apply_transition(allocator: Allocator, state: *types.BeamState, block: ty
     }
 
     // prepare the pre state for this block slot
-    try state.process_slots(allocator, block.slot, opts.logger);
+    try state.process_slots(allocator, block.slot, opts.logger, opts.stateRootCache);
 
     // process the block
     try state.process_block(allocator, block, opts.logger, opts.rootToSlotCache);
@@ -211,7 +296,9 @@ pub fn apply_transition(allocator: Allocator, state: *types.BeamState, block: ty
     if (validateResult) {
         // verify the post state root
         var state_root: [32]u8 = undefined;
-        try zeam_utils.hashTreeRoot(*types.BeamState, state, &state_root, allocator);
+        const state_root_span = zeam_metrics.tracing.span(.stf_state_root);
+        try state.hashTreeRoot(allocator, opts.stateRootCache, &state_root);
+        state_root_span.end();
         if (!std.mem.eql(u8, &state_root, &block.state_root)) {
             opts.logger.debug("state root={x} block root={x}\n", .{ &state_root, &block.state_root });
             return StateTransitionError.InvalidPostState;
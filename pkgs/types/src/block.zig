@@ -48,10 +48,92 @@ pub const StoredSignature = struct {
 /// Map type for signatures_map: SignatureKey -> individual XMSS signature bytes + slot metadata
 pub const SignaturesMap = std.AutoHashMap(SignatureKey, StoredSignature);
 
-/// Stored aggregated payload entry
+/// Aggregated proof interned in an AggregatedProofStore. A single entry is shared by the
+/// payload lists of every validator the proof covers.
+pub const SharedAggregatedProof = struct {
+    proof: aggregation.AggregatedSignatureProof,
+    proof_hash: Root,
+    refs: usize,
+};
+
+/// Stored aggregated payload entry, holds one reference on the shared proof
 pub const StoredAggregatedPayload = struct {
     slot: Slot,
-    proof: aggregation.AggregatedSignatureProof,
+    shared: *SharedAggregatedProof,
+};
+
+/// Refcounted store of aggregated proofs keyed by the sha256 of their ssz encoding, so a
+/// proof covering N validators is stored once instead of once per SignatureKey.
+pub const AggregatedProofStore = struct {
+    allocator: Allocator,
+    proofs: std.AutoHashMap(Root, *SharedAggregatedProof),
+
+    const Self = @This();
+
+    pub fn init(allocator: Allocator) Self {
+        return .{
+            .allocator = allocator,
+            .proofs = std.AutoHashMap(Root, *SharedAggregatedProof).init(allocator),
+        };
+    }
+
+    /// Frees every interned proof irrespective of outstanding references
+    pub fn deinit(self: *Self) void {
+        var it = self.proofs.valueIterator();
+        while (it.next()) |shared| {
+            shared.*.proof.deinit();
+            self.allocator.destroy(shared.*);
+        }
+        self.proofs.deinit();
+    }
+
+    pub fn count(self: *const Self) usize {
+        return self.proofs.count();
+    }
+
+    /// Returns the interned copy of `proof` with one more reference taken. The proof is only
+    /// cloned the first time it is seen, the caller keeps ownership of `proof`.
+    pub fn acquire(self: *Self, proof: aggregation.AggregatedSignatureProof) !*SharedAggregatedProof {
+        var bytes: std.ArrayList(u8) = .empty;
+        defer bytes.deinit(self.allocator);
+        try ssz.serialize(aggregation.AggregatedSignatureProof, proof, &bytes, self.allocator);
+
+        var proof_hash: Root = undefined;
+        std.crypto.hash.sha2.Sha256.hash(bytes.items, &proof_hash, .{});
+
+        const gop = try self.proofs.getOrPut(proof_hash);
+        if (gop.found_existing) {
+            gop.value_ptr.*.refs += 1;
+            return gop.value_ptr.*;
+        }
+        errdefer _ = self.proofs.remove(proof_hash);
+
+        const shared = try self.allocator.create(SharedAggregatedProof);
+        errdefer self.allocator.destroy(shared);
+        shared.* = .{ .proof = undefined, .proof_hash = proof_hash, .refs = 1 };
+        try ssz.deserialize(aggregation.AggregatedSignatureProof, bytes.items, &shared.proof, self.allocator);
+
+        gop.value_ptr.* = shared;
+        return shared;
+    }
+
+    /// Takes an additional reference on an already interned proof
+    pub fn retain(self: *Self, shared: *SharedAggregatedProof) *SharedAggregatedProof {
+        _ = self;
+        shared.refs += 1;
+        return shared;
+    }
+
+    /// Drops a reference, freeing the proof once no payload entry refers to it anymore
+    pub fn release(self: *Self, shared: *SharedAggregatedProof) void {
+        std.debug.assert(shared.refs > 0);
+        shared.refs -= 1;
+        if (shared.refs > 0) return;
+
+        _ = self.proofs.remove(shared.proof_hash);
+        shared.proof.deinit();
+        self.allocator.destroy(shared);
+    }
 };
 
 /// List of aggregated payloads for a single key
@@ -490,8 +572,8 @@ pub const AggregatedAttestationsResult = struct {
                     var best_proof: ?*const aggregation.AggregatedSignatureProof = null;
                     var max_coverage: usize = 0;
 
-                    for (candidates.items) |*stored| {
-                        const proof = &stored.proof;
+                    for (candidates.items) |stored| {
+                        const proof = &stored.shared.proof;
                         const max_participants = proof.participants.len();
 
                         // Reset and populate proof_bits from participants
@@ -656,6 +738,24 @@ pub const BlockByRootRequest = struct {
     }
 };
 
+pub const BlocksByRangeRequest = struct {
+    start_slot: Slot,
+    count: u64,
+
+    pub fn toJson(self: *const BlocksByRangeRequest, allocator: Allocator) !json.Value {
+        var obj = json.ObjectMap.init(allocator);
+        try obj.put("start_slot", json.Value{ .integer = @as(i64, @intCast(self.start_slot)) });
+        try obj.put("count", json.Value{ .integer = @as(i64, @intCast(self.count)) });
+        return json.Value{ .object = obj };
+    }
+
+    pub fn toJsonString(self: *const BlocksByRangeRequest, allocator: Allocator) ![]const u8 {
+        var json_value = try self.toJson(allocator);
+        defer freeJsonValue(&json_value, allocator);
+        return utils.jsonToString(allocator, json_value);
+    }
+};
+
 /// Canonical lightweight forkchoice proto block used across modules
 pub const ProtoBlock = struct {
     slot: Slot,
@@ -873,3 +973,38 @@ test "encode decode signed block with non-empty attestation signatures" {
     const decoded_group = try decoded.signature.attestation_signatures.get(0);
     try std.testing.expect(decoded_group.participants.len() == 2);
 }
+
+test "aggregated proof store interns proofs and frees them on last release" {
+    var store = AggregatedProofStore.init(std.testing.allocator);
+    defer store.deinit();
+
+    var proof_a = try aggregation.AggregatedSignatureProof.init(std.testing.allocator);
+    defer proof_a.deinit();
+    try attestation.aggregationBitsSet(&proof_a.participants, 0, true);
+    try attestation.aggregationBitsSet(&proof_a.participants, 3, true);
+
+    var proof_b = try aggregation.AggregatedSignatureProof.init(std.testing.allocator);
+    defer proof_b.deinit();
+    try attestation.aggregationBitsSet(&proof_b.participants, 1, true);
+
+    const shared_a = try store.acquire(proof_a);
+    const shared_a_again = try store.acquire(proof_a);
+    const shared_b = try store.acquire(proof_b);
+
+    // identical proofs resolve to the same interned entry
+    try std.testing.expect(shared_a == shared_a_again);
+    try std.testing.expect(shared_a != shared_b);
+    try std.testing.expectEqual(@as(usize, 2), shared_a.refs);
+    try std.testing.expectEqual(@as(usize, 2), store.count());
+    try std.testing.expect(try shared_a.proof.participants.get(3));
+
+    _ = store.retain(shared_b);
+    store.release(shared_b);
+    try std.testing.expectEqual(@as(usize, 2), store.count());
+    store.release(shared_b);
+    try std.testing.expectEqual(@as(usize, 1), store.count());
+
+    store.release(shared_a);
+    store.release(shared_a_again);
+    try std.testing.expectEqual(@as(usize, 0), store.count());
+}
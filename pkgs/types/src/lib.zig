@@ -14,6 +14,7 @@ pub const aggregationBitsToValidatorIndices = attestation.aggregationBitsToValid
 
 const block = @import("./block.zig");
 pub const BlockByRootRequest = block.BlockByRootRequest;
+pub const BlocksByRangeRequest = block.BlocksByRangeRequest;
 pub const ProtoBlock = block.ProtoBlock;
 pub const BeamBlock = block.BeamBlock;
 pub const ExecutionPayloadHeader = block.ExecutionPayloadHeader;
@@ -29,18 +30,27 @@ pub const createBlockSignatures = block.createBlockSignatures;
 pub const SignatureKey = block.SignatureKey;
 pub const StoredSignature = block.StoredSignature;
 pub const SignaturesMap = block.SignaturesMap;
+pub const SharedAggregatedProof = block.SharedAggregatedProof;
 pub const StoredAggregatedPayload = block.StoredAggregatedPayload;
+pub const AggregatedProofStore = block.AggregatedProofStore;
 pub const AggregatedPayloadsList = block.AggregatedPayloadsList;
 pub const AggregatedPayloadsMap = block.AggregatedPayloadsMap;
 
 const state = @import("./state.zig");
 pub const BeamStateConfig = state.BeamStateConfig;
 pub const BeamState = state.BeamState;
+pub const BeamStateRootCache = state.BeamStateRootCache;
 pub const HistoricalBlockHashes = state.HistoricalBlockHashes;
 pub const JustificationRoots = state.JustificationRoots;
 pub const JustifiedSlots = state.JustifiedSlots;
 pub const JustificationValidators = state.JustificationValidators;
 
+const shared_list = @import("./shared_list.zig");
+pub const SharedList = shared_list.SharedList;
+
+const state_diff = @import("./state_diff.zig");
+pub const BeamStateDiff = state_diff.BeamStateDiff;
+
 const validator = @import("./validator.zig");
 pub const Validator = validator.Validator;
 pub const Validators = validator.Validators;
@@ -0,0 +1,291 @@
+const std = @import("std");
+const ssz = @import("ssz");
+
+const Allocator = std.mem.Allocator;
+
+// source of backing list generations, shared by every SharedList instantiation
+var next_generation = std.atomic.Value(u64).init(1);
+
+fn newGeneration() u64 {
+    return next_generation.fetchAdd(1, .monotonic);
+}
+
+/// Identifies the elements of a SharedList for incremental consumers like merkle caches
+/// without comparing them. Elements of a generation are only ever appended to, so the first
+/// `len` elements of a generation never change. A list copied on write gets a new generation
+/// that records the generation and length it was copied from as its base.
+pub const Lineage = struct {
+    generation: u64 = 0,
+    len: usize = 0,
+    base_generation: u64 = 0,
+    base_len: usize = 0,
+
+    /// Number of leading elements `a` and `b` are known to share, null when they are not
+    /// related and have to be compared
+    pub fn commonPrefix(a: Lineage, b: Lineage) ?usize {
+        if (a.generation == b.generation) return @min(a.len, b.len);
+        if (a.base_generation == b.generation) return @min(a.base_len, b.len);
+        if (a.generation == b.base_generation) return @min(a.len, b.base_len);
+        if (a.base_generation == b.base_generation) return @min(a.base_len, b.base_len);
+        return null;
+    }
+};
+
+/// ssz `List[T, N]` with a reference counted backing list, so `share` hands out another
+/// handle to the same elements without copying them. Reads go straight to the backing list,
+/// the first mutation through a handle whose backing is still shared copies the elements into
+/// a backing of its own. Encodes, decodes and hashes exactly like `ssz.utils.List(T, N)`.
+///
+/// Handles are not synchronized with each other beyond the reference count: a single handle
+/// must not be mutated from two threads at once, just like a plain ssz list.
+pub fn SharedList(comptime T: type, comptime N: usize) type {
+    return struct {
+        // null for an empty list that was never written to, so `init` does not allocate
+        backing: ?*Backing,
+        // allocates the copy on first write, may differ from the backing's allocator
+        allocator: Allocator,
+
+        pub const Inner = ssz.utils.List(T, N);
+
+        const Backing = struct {
+            allocator: Allocator,
+            refs: std.atomic.Value(u32),
+            list: Inner,
+            generation: u64,
+            // the first base_len elements are those of base_generation
+            base_generation: u64,
+            base_len: usize,
+        };
+
+        const Self = @This();
+
+        pub fn init(allocator: Allocator) !Self {
+            return .{ .backing = null, .allocator = allocator };
+        }
+
+        pub fn fromSlice(allocator: Allocator, items: []const T) !Self {
+            return wrap(allocator, try Inner.fromSlice(allocator, items));
+        }
+
+        fn wrap(allocator: Allocator, list: Inner) !Self {
+            var owned = list;
+            errdefer owned.deinit();
+            const backing = try allocator.create(Backing);
+            const generation = newGeneration();
+            backing.* = .{
+                .allocator = allocator,
+                .refs = std.atomic.Value(u32).init(1),
+                .list = owned,
+                .generation = generation,
+                .base_generation = generation,
+                .base_len = 0,
+            };
+            return .{ .backing = backing, .allocator = allocator };
+        }
+
+        /// Another handle on the same elements, copies made on write by the new handle are
+        /// allocated with `allocator`. Release it with `deinit` like any other list.
+        pub fn share(self: *const Self, allocator: Allocator) Self {
+            if (self.backing) |backing| {
+                _ = backing.refs.fetchAdd(1, .monotonic);
+            }
+            return .{ .backing = self.backing, .allocator = allocator };
+        }
+
+        pub fn isShared(self: *const Self) bool {
+            const backing = self.backing orelse return false;
+            return backing.refs.load(.acquire) > 1;
+        }
+
+        pub fn deinit(self: *Self) void {
+            const backing = self.backing orelse return;
+            self.backing = null;
+            if (backing.refs.fetchSub(1, .acq_rel) != 1) return;
+            backing.list.deinit();
+            backing.allocator.destroy(backing);
+        }
+
+        /// The backing list owned by this handle alone, copying the elements first if it is
+        /// shared
+        fn mutableList(self: *Self) !*Inner {
+            if (self.backing) |backing| {
+                if (backing.refs.load(.acquire) == 1) return &backing.list;
+                var unique = try Self.fromSlice(self.allocator, backing.list.constSlice());
+                unique.backing.?.base_generation = backing.generation;
+                unique.backing.?.base_len = backing.list.len();
+                self.deinit();
+                self.* = unique;
+            } else {
+                self.* = try wrap(self.allocator, try Inner.init(self.allocator));
+            }
+            return &self.backing.?.list;
+        }
+
+        pub fn len(self: *const Self) usize {
+            const backing = self.backing orelse return 0;
+            return backing.list.len();
+        }
+
+        pub fn get(self: *const Self, index: usize) !T {
+            const backing = self.backing orelse return error.IndexOutOfBounds;
+            return backing.list.get(index);
+        }
+
+        pub fn constSlice(self: *const Self) []const T {
+            const backing = self.backing orelse return &.{};
+            return backing.list.constSlice();
+        }
+
+        pub fn append(self: *Self, item: T) !void {
+            const list = try self.mutableList();
+            try list.append(item);
+        }
+
+        /// Mutable view of the elements, copies them first if the backing is shared. The
+        /// elements may be rewritten, so the list starts a new generation without a base.
+        pub fn slice(self: *Self) ![]T {
+            const list = try self.mutableList();
+            const backing = self.backing.?;
+            backing.generation = newGeneration();
+            backing.base_generation = backing.generation;
+            backing.base_len = 0;
+            return list.slice();
+        }
+
+        pub fn lineage(self: *const Self) Lineage {
+            const backing = self.backing orelse return .{};
+            return .{
+                .generation = backing.generation,
+                .len = backing.list.len(),
+                .base_generation = backing.base_generation,
+                .base_len = backing.base_len,
+            };
+        }
+
+        pub fn sszEncode(self: *const Self, l: anytype, allocator: Allocator) !void {
+            // an empty list encodes to no bytes
+            const backing = self.backing orelse return;
+            try ssz.serialize(Inner, backing.list, l, allocator);
+        }
+
+        pub fn sszDecode(serialized: []const u8, out: *Self, allocator: ?Allocator) !void {
+            const list_allocator = allocator orelse return error.AllocatorRequired;
+            var list: Inner = undefined;
+            try ssz.deserialize(Inner, serialized, &list, list_allocator);
+            out.* = try wrap(list_allocator, list);
+        }
+
+        pub fn isFixedSizeObject() !bool {
+            return false;
+        }
+
+        pub fn serializedSize(self: *const Self) !usize {
+            const backing = self.backing orelse return 0;
+            return ssz.serializedSize(Inner, backing.list);
+        }
+
+        pub fn hashTreeRoot(self: *const Self, comptime Hasher: type, out: *[32]u8, allocator: Allocator) !void {
+            if (self.backing) |backing| {
+                try ssz.hashTreeRoot(Hasher, Inner, backing.list, out, allocator);
+            } else {
+                var empty = try Inner.init(allocator);
+                defer empty.deinit();
+                try ssz.hashTreeRoot(Hasher, Inner, empty, out, allocator);
+            }
+        }
+    };
+}
+
+test "shared list copies on the first write through a shared handle" {
+    const allocator = std.testing.allocator;
+    const Roots = SharedList([32]u8, 64);
+
+    var list = try Roots.init(allocator);
+    defer list.deinit();
+    try std.testing.expectEqual(@as(usize, 0), list.len());
+    for (0..4) |i| try list.append([_]u8{@intCast(i)} ** 32);
+    try std.testing.expect(!list.isShared());
+
+    var shared = list.share(allocator);
+    defer shared.deinit();
+    try std.testing.expect(list.isShared());
+    try std.testing.expectEqual(list.constSlice().ptr, shared.constSlice().ptr);
+
+    try shared.append([_]u8{9} ** 32);
+    try std.testing.expect(!list.isShared());
+    try std.testing.expect(!shared.isShared());
+    try std.testing.expectEqual(@as(usize, 4), list.len());
+    try std.testing.expectEqual(@as(usize, 5), shared.len());
+    try std.testing.expectEqualSlices([32]u8, list.constSlice(), shared.constSlice()[0..4]);
+
+    // a unique handle mutates in place
+    const before = list.constSlice().ptr;
+    (try list.slice())[0][0] = 0xff;
+    try std.testing.expectEqual(before, list.constSlice().ptr);
+    try std.testing.expectEqual(@as(u8, 0), (try shared.get(0))[0]);
+}
+
+test "shared list lineage tracks the prefix shared with the list it was copied from" {
+    const allocator = std.testing.allocator;
+    const Roots = SharedList([32]u8, 64);
+
+    var parent = try Roots.init(allocator);
+    defer parent.deinit();
+    for (0..4) |i| try parent.append([_]u8{@intCast(i)} ** 32);
+    const parent_lineage = parent.lineage();
+
+    // appending in place keeps the generation
+    try parent.append([_]u8{4} ** 32);
+    try std.testing.expectEqual(@as(?usize, 4), Lineage.commonPrefix(parent.lineage(), parent_lineage));
+
+    var left = parent.share(allocator);
+    defer left.deinit();
+    var right = parent.share(allocator);
+    defer right.deinit();
+    try left.append([_]u8{0xa} ** 32);
+    try right.append([_]u8{0xb} ** 32);
+    try std.testing.expectEqual(@as(?usize, 5), Lineage.commonPrefix(left.lineage(), parent.lineage()));
+    try std.testing.expectEqual(@as(?usize, 5), Lineage.commonPrefix(left.lineage(), right.lineage()));
+
+    // a rewrite through the mutable slice cuts the lineage
+    (try left.slice())[0][0] = 0xff;
+    try std.testing.expectEqual(@as(?usize, null), Lineage.commonPrefix(left.lineage(), right.lineage()));
+
+    var unrelated = try Roots.fromSlice(allocator, parent.constSlice());
+    defer unrelated.deinit();
+    try std.testing.expectEqual(@as(?usize, null), Lineage.commonPrefix(unrelated.lineage(), parent.lineage()));
+}
+
+test "shared list encodes and hashes like the plain ssz list" {
+    const allocator = std.testing.allocator;
+    const Roots = SharedList([32]u8, 64);
+
+    var list = try Roots.init(allocator);
+    defer list.deinit();
+    var plain = try Roots.Inner.init(allocator);
+    defer plain.deinit();
+    for (0..5) |i| {
+        try list.append([_]u8{@intCast(i + 1)} ** 32);
+        try plain.append([_]u8{@intCast(i + 1)} ** 32);
+    }
+
+    var encoded: std.ArrayList(u8) = .empty;
+    defer encoded.deinit(allocator);
+    try ssz.serialize(Roots, list, &encoded, allocator);
+    var plain_encoded: std.ArrayList(u8) = .empty;
+    defer plain_encoded.deinit(allocator);
+    try ssz.serialize(Roots.Inner, plain, &plain_encoded, allocator);
+    try std.testing.expectEqualSlices(u8, plain_encoded.items, encoded.items);
+
+    var decoded: Roots = undefined;
+    try ssz.deserialize(Roots, encoded.items, &decoded, allocator);
+    defer decoded.deinit();
+    try std.testing.expectEqualSlices([32]u8, list.constSlice(), decoded.constSlice());
+
+    const Sha256 = std.crypto.hash.sha2.Sha256;
+    var root: [32]u8 = undefined;
+    var plain_root: [32]u8 = undefined;
+    try ssz.hashTreeRoot(Sha256, Roots, list, &root, allocator);
+    try ssz.hashTreeRoot(Sha256, Roots.Inner, plain, &plain_root, allocator);
+    try std.testing.expectEqualSlices(u8, &plain_root, &root);
+}
@@ -9,6 +9,7 @@ const block = @import("./block.zig");
 const attestation = @import("./attestation.zig");
 const utils = @import("./utils.zig");
 const mini_3sf = @import("./mini_3sf.zig");
+const shared_list = @import("./shared_list.zig");
 const validator = @import("./validator.zig");
 
 const Allocator = std.mem.Allocator;
@@ -47,11 +48,196 @@ pub const BeamStateConfig = struct {
 };
 
 // Types
-pub const HistoricalBlockHashes = ssz.utils.List(Root, params.HISTORICAL_ROOTS_LIMIT);
+// only ever appended to, so clones share it until their first block appends
+pub const HistoricalBlockHashes = shared_list.SharedList(Root, params.HISTORICAL_ROOTS_LIMIT);
 pub const JustificationRoots = ssz.utils.List(Root, params.HISTORICAL_ROOTS_LIMIT);
 pub const JustifiedSlots = ssz.utils.Bitlist(params.HISTORICAL_ROOTS_LIMIT);
 pub const JustificationValidators = ssz.utils.Bitlist(params.HISTORICAL_ROOTS_LIMIT * params.VALIDATOR_REGISTRY_LIMIT);
 
+/// Votes for a pending justification target: one bit per validator in a word packed bitset
+/// plus the running number of set bits, so merging an attestation never rescans the votes.
+pub const JustificationVotes = struct {
+    bits: std.DynamicBitSetUnmanaged,
+    count: usize,
+
+    const MaskInt = std.DynamicBitSetUnmanaged.MaskInt;
+
+    pub fn init(allocator: Allocator, num_validators: usize) !JustificationVotes {
+        return .{
+            .bits = try std.DynamicBitSetUnmanaged.initEmpty(allocator, num_validators),
+            .count = 0,
+        };
+    }
+
+    pub fn deinit(self: *JustificationVotes, allocator: Allocator) void {
+        self.bits.deinit(allocator);
+    }
+
+    /// ORs `votes` in word by word, adding only the newly set bits to the count
+    pub fn merge(self: *JustificationVotes, votes: *const std.DynamicBitSetUnmanaged) void {
+        std.debug.assert(votes.bit_length == self.bits.bit_length);
+        const num_masks = (self.bits.bit_length + @bitSizeOf(MaskInt) - 1) / @bitSizeOf(MaskInt);
+        for (self.bits.masks[0..num_masks], votes.masks[0..num_masks]) |*mask, vote_mask| {
+            const added = vote_mask & ~mask.*;
+            self.count += @popCount(added);
+            mask.* |= added;
+        }
+    }
+};
+
+pub const JustificationsMap = std.AutoHashMapUnmanaged(Root, JustificationVotes);
+
+pub fn deinitJustifications(allocator: Allocator, justifications: *JustificationsMap) void {
+    var iterator = justifications.valueIterator();
+    while (iterator.next()) |votes| {
+        votes.deinit(allocator);
+    }
+    justifications.deinit(allocator);
+}
+
+/// Merkle cache for BeamState hash tree roots, held next to the state the same way
+/// RootToSlotCache is. The leaf and inner layers of the large list fields are kept so only
+/// chunks that changed since the previous root are rehashed, the small fields are hashed
+/// directly. For the shared lists the lineage of the list last hashed tells how many leading
+/// elements are unchanged without looking at them, so a block that appends historical hashes
+/// only hashes the appended tail and an untouched validator registry is skipped. Lists without
+/// a known relation to the cached one are diffed against the cached leaves instead, so one
+/// cache can be used for sibling and unrelated states as well.
+pub const BeamStateRootCache = struct {
+    allocator: Allocator,
+    historical_block_hashes: zeam_utils.MerkleListCache(params.HISTORICAL_ROOTS_LIMIT),
+    justifications_roots: zeam_utils.MerkleListCache(params.HISTORICAL_ROOTS_LIMIT),
+    validators: zeam_utils.MerkleListCache(params.VALIDATOR_REGISTRY_LIMIT),
+    // lineage of the lists currently held in the caches above, null when unknown
+    historical_block_hashes_lineage: ?shared_list.Lineage,
+    validators_lineage: ?shared_list.Lineage,
+    // validators whose hash tree roots are currently held in validator_roots
+    validator_entries: std.ArrayList(validator.Validator),
+    validator_roots: std.ArrayList(Root),
+
+    const Self = @This();
+
+    pub fn init(allocator: Allocator) Self {
+        return Self{
+            .allocator = allocator,
+            .historical_block_hashes = zeam_utils.MerkleListCache(params.HISTORICAL_ROOTS_LIMIT).init(allocator),
+            .justifications_roots = zeam_utils.MerkleListCache(params.HISTORICAL_ROOTS_LIMIT).init(allocator),
+            .validators = zeam_utils.MerkleListCache(params.VALIDATOR_REGISTRY_LIMIT).init(allocator),
+            .historical_block_hashes_lineage = null,
+            .validators_lineage = null,
+            .validator_entries = .empty,
+            .validator_roots = .empty,
+        };
+    }
+
+    pub fn deinit(self: *Self) void {
+        self.historical_block_hashes.deinit();
+        self.justifications_roots.deinit();
+        self.validators.deinit();
+        self.validator_entries.deinit(self.allocator);
+        self.validator_roots.deinit(self.allocator);
+    }
+
+    /// Computes the same root as `zeam_utils.hashTreeRoot(BeamState, state.*, ...)`
+    pub fn hashTreeRoot(self: *Self, state: *const BeamState, out: *Root) !void {
+        const fields = std.meta.fields(BeamState);
+        // field roots in BeamState declaration order
+        var field_roots: [fields.len]Root = undefined;
+        inline for (fields, 0..) |field, i| {
+            const field_root = &field_roots[i];
+            if (comptime std.mem.eql(u8, field.name, "historical_block_hashes")) {
+                try self.updateHistoricalBlockHashes(&state.historical_block_hashes);
+                self.historical_block_hashes.listRoot(state.historical_block_hashes.len(), field_root);
+            } else if (comptime std.mem.eql(u8, field.name, "validators")) {
+                try self.updateValidators(&state.validators);
+                self.validators.listRoot(state.validators.len(), field_root);
+            } else if (comptime std.mem.eql(u8, field.name, "justifications_roots")) {
+                // rebuilt by every block and bounded by the pending justifications
+                try self.justifications_roots.update(state.justifications_roots.constSlice());
+                self.justifications_roots.listRoot(state.justifications_roots.len(), field_root);
+            } else {
+                try zeam_utils.hashTreeRoot(field.type, @field(state, field.name), field_root, self.allocator);
+            }
+        }
+
+        zeam_utils.merkleizeChunks(fields.len, field_roots, out);
+    }
+
+    fn updateHistoricalBlockHashes(self: *Self, hashes: *const HistoricalBlockHashes) !void {
+        const lineage = hashes.lineage();
+        const unchanged = if (self.historical_block_hashes_lineage) |cached| lineage.commonPrefix(cached) else null;
+        // the cache is out of sync with any lineage until the update completes
+        self.historical_block_hashes_lineage = null;
+        if (unchanged) |prefix| {
+            try self.historical_block_hashes.updateTail(hashes.constSlice(), prefix);
+        } else {
+            try self.historical_block_hashes.update(hashes.constSlice());
+        }
+        self.historical_block_hashes_lineage = lineage;
+    }
+
+    fn updateValidators(self: *Self, validators: *const Validators) !void {
+        const lineage = validators.lineage();
+        const unchanged = if (self.validators_lineage) |cached| lineage.commonPrefix(cached) else null;
+        self.validators_lineage = null;
+        const entries = validators.constSlice();
+        const cached_len = self.validator_entries.items.len;
+        try self.validator_entries.resize(self.allocator, entries.len);
+        try self.validator_roots.resize(self.allocator, entries.len);
+        const start = unchanged orelse 0;
+        for (entries[start..], start..) |val, i| {
+            if (unchanged == null and i < cached_len and std.meta.eql(self.validator_entries.items[i], val)) continue;
+            try zeam_utils.hashTreeRoot(validator.Validator, val, &self.validator_roots.items[i], self.allocator);
+            self.validator_entries.items[i] = val;
+        }
+        if (unchanged) |prefix| {
+            try self.validators.updateTail(self.validator_roots.items, prefix);
+        } else {
+            try self.validators.update(self.validator_roots.items);
+        }
+        self.validators_lineage = lineage;
+    }
+};
+
+/// Serialized size of a fixed size ssz type.
+fn sszFixedSize(comptime T: type) usize {
+    return switch (@typeInfo(T)) {
+        .int => @divExact(@bitSizeOf(T), 8),
+        .bool => 1,
+        .array => |info| info.len * sszFixedSize(info.child),
+        .@"struct" => |info| blk: {
+            var size: usize = 0;
+            inline for (info.fields) |field| size += sszFixedSize(field.type);
+            break :blk size;
+        },
+        else => @compileError("not a fixed size ssz type: " ++ @typeName(T)),
+    };
+}
+
+// BeamState fields of variable ssz size in declaration order, the fixed part holds their offsets
+const beam_state_variable_fields = [_][]const u8{
+    "historical_block_hashes",
+    "justified_slots",
+    "validators",
+    "justifications_roots",
+    "justifications_validators",
+};
+
+fn beamStateVariableFieldIndex(comptime name: []const u8) ?usize {
+    for (beam_state_variable_fields, 0..) |variable, index| {
+        if (std.mem.eql(u8, name, variable)) return index;
+    }
+    return null;
+}
+
+const beam_state_fixed_part_size = blk: {
+    var size: usize = 0;
+    for (std.meta.fields(BeamState)) |field| {
+        size += if (beamStateVariableFieldIndex(field.name) != null) 4 else sszFixedSize(field.type);
+    }
+    break :blk size;
+};
+
 pub const BeamState = struct {
     config: BeamStateConfig,
     slot: Slot,
@@ -122,7 +308,8 @@ pub const BeamState = struct {
         };
     }
 
-    pub fn getJustification(self: *const Self, allocator: Allocator, justifications: *std.AutoHashMapUnmanaged(Root, []u8)) !void {
+    /// Unpacks the flat ssz justifications into per root packed vote bitsets
+    pub fn getJustification(self: *const Self, allocator: Allocator, justifications: *JustificationsMap) !void {
         // need to cast to usize for slicing ops but does this makes the STF target arch dependent?
         const num_validators = self.validatorCount();
         // Initialize justifications from state
@@ -130,18 +317,22 @@ pub const BeamState = struct {
             if (std.mem.eql(u8, &blockRoot, &utils.ZERO_HASH)) {
                 return StateTransitionError.InvalidJustificationRoot;
             }
-            const validator_data = try allocator.alloc(u8, num_validators);
-            errdefer allocator.free(validator_data);
+            var votes = try JustificationVotes.init(allocator, num_validators);
+            errdefer votes.deinit(allocator);
             // Copy existing justification data if available, otherwise return error
-            for (validator_data, 0..) |*byte, j| {
+            for (0..num_validators) |j| {
                 const bit_index = i * num_validators + j;
-                byte.* = if (try self.justifications_validators.get(bit_index)) 1 else 0;
+                if (try self.justifications_validators.get(bit_index)) {
+                    votes.bits.set(j);
+                    votes.count += 1;
+                }
             }
-            try justifications.put(allocator, blockRoot, validator_data);
+            try justifications.put(allocator, blockRoot, votes);
         }
     }
 
-    pub fn withJustifications(self: *Self, allocator: Allocator, justifications: *const std.AutoHashMapUnmanaged(Root, []u8)) !void {
+    /// Flattens the packed vote bitsets back into the sorted ssz justifications form
+    pub fn withJustifications(self: *Self, allocator: Allocator, justifications: *const JustificationsMap) !void {
         var new_justifications_roots = try JustificationRoots.init(allocator);
         errdefer new_justifications_roots.deinit();
 
@@ -151,7 +342,7 @@ pub const BeamState = struct {
         // First, collect all keys
         var iterator = justifications.iterator();
         while (iterator.next()) |kv| {
-            if (kv.value_ptr.*.len != self.validatorCount()) {
+            if (kv.value_ptr.bits.bit_length != self.validatorCount()) {
                 return error.InvalidJustificationLength;
             }
             try new_justifications_roots.append(kv.key_ptr.*);
@@ -166,12 +357,12 @@ pub const BeamState = struct {
 
         // Now iterate over sorted roots and flatten validators in order
         for (new_justifications_roots.constSlice()) |root| {
-            const rootSlice = justifications.get(root) orelse unreachable;
+            const votes = justifications.getPtr(root) orelse unreachable;
             // append individual bits for validator justifications
             // have a batch set method to set it since eventual num vals are div by 8
             // and hence the vector can be fully appeneded as bytes
-            for (rootSlice) |validator_bit| {
-                try new_justifications_validators.append(validator_bit == 1);
+            for (0..votes.bits.bit_length) |validator_index| {
+                try new_justifications_validators.append(votes.bits.isSet(validator_index));
             }
         }
 
@@ -239,7 +430,16 @@ pub const BeamState = struct {
         self.justified_slots = new_justified_slots;
     }
 
-    fn process_slot(self: *Self, allocator: Allocator) !void {
+    /// Hash tree root of the state, served from `root_cache` when one is provided
+    pub fn hashTreeRoot(self: *const Self, allocator: Allocator, root_cache: ?*BeamStateRootCache, out: *Root) !void {
+        if (root_cache) |cache| {
+            try cache.hashTreeRoot(self, out);
+        } else {
+            try zeam_utils.hashTreeRoot(BeamState, self.*, out, allocator);
+        }
+    }
+
+    fn process_slot(self: *Self, allocator: Allocator, root_cache: ?*BeamStateRootCache) !void {
 
         // update state root in latest block header if its zero hash
         // i.e. just after processing the latest block of latest block header
@@ -247,12 +447,12 @@ pub const BeamState = struct {
 
         if (std.mem.eql(u8, &self.latest_block_header.state_root, &utils.ZERO_HASH)) {
             var prev_state_root: [32]u8 = undefined;
-            try zeam_utils.hashTreeRoot(*BeamState, self, &prev_state_root, allocator);
+            try self.hashTreeRoot(allocator, root_cache, &prev_state_root);
             self.latest_block_header.state_root = prev_state_root;
         }
     }
 
-    pub fn process_slots(self: *Self, allocator: Allocator, slot: Slot, logger: zeam_utils.ModuleLogger) !void {
+    pub fn process_slots(self: *Self, allocator: Allocator, slot: Slot, logger: zeam_utils.ModuleLogger, root_cache: ?*BeamStateRootCache) !void {
         if (slot <= self.slot) {
             logger.err("Invalid block slot={d} >= pre-state slot={d}\n", .{ slot, self.slot });
             return StateTransitionError.InvalidPreState;
@@ -261,9 +461,11 @@ pub const BeamState = struct {
         const start_slot = self.slot;
         const slots_timer = zeam_metrics.lean_state_transition_slots_processing_time_seconds.start();
         defer _ = slots_timer.observe();
+        const slots_span = zeam_metrics.tracing.span(.stf_process_slots);
+        defer slots_span.end();
 
         while (self.slot < slot) {
-            try self.process_slot(allocator);
+            try self.process_slot(allocator, root_cache);
             self.slot += 1;
         }
 
@@ -330,6 +532,8 @@ pub const BeamState = struct {
     pub fn process_block(self: *Self, allocator: Allocator, staged_block: BeamBlock, logger: zeam_utils.ModuleLogger, cache: ?*utils.RootToSlotCache) !void {
         const block_timer = zeam_metrics.lean_state_transition_block_processing_time_seconds.start();
         defer _ = block_timer.observe();
+        const block_span = zeam_metrics.tracing.span(.stf_process_block);
+        defer block_span.end();
 
         // start block processing
         try self.process_block_header(allocator, staged_block, logger);
@@ -347,6 +551,8 @@ pub const BeamState = struct {
     fn process_attestations(self: *Self, allocator: Allocator, attestations: AggregatedAttestations, logger: zeam_utils.ModuleLogger, cache: ?*utils.RootToSlotCache) !void {
         const attestations_timer = zeam_metrics.lean_state_transition_attestations_processing_time_seconds.start();
         defer _ = attestations_timer.observe();
+        const attestations_span = zeam_metrics.tracing.span(.stf_process_attestations);
+        defer attestations_span.end();
 
         if (comptime !zeam_metrics.isZKVM()) {
             const attestation_count: u64 = @intCast(attestations.constSlice().len);
@@ -354,24 +560,16 @@ pub const BeamState = struct {
         }
 
         logger.debug("process attestations slot={d} \n prestate:historical hashes={d} justified slots={d} attestations={d}, ", .{ self.slot, self.historical_block_hashes.len(), self.justified_slots.len(), attestations.constSlice().len });
-        const justified_str = try self.latest_justified.toJsonString(allocator);
-        defer allocator.free(justified_str);
-        const finalized_str = try self.latest_finalized.toJsonString(allocator);
-        defer allocator.free(finalized_str);
-
-        logger.debug("prestate justified={s} finalized={s}", .{ justified_str, finalized_str });
+        logger.debug("prestate justified={f} finalized={f}", .{
+            zeam_utils.LazyJson(Checkpoint).init(allocator, &self.latest_justified),
+            zeam_utils.LazyJson(Checkpoint).init(allocator, &self.latest_finalized),
+        });
 
         // work directly with SSZ types
         // historical_block_hashes and justified_slots are already SSZ types in state
 
-        var justifications: std.AutoHashMapUnmanaged(Root, []u8) = .empty;
-        defer {
-            var iterator = justifications.iterator();
-            while (iterator.next()) |entry| {
-                allocator.free(entry.value_ptr.*);
-            }
-            justifications.deinit(allocator);
-        }
+        var justifications: JustificationsMap = .empty;
+        defer deinitJustifications(allocator, &justifications);
         try self.getJustification(allocator, &justifications);
 
         var finalized_slot: Slot = self.latest_finalized.slot;
@@ -387,11 +585,27 @@ pub const BeamState = struct {
 
         // need to cast to usize for slicing ops but does this makes the STF target arch dependent?
         const num_validators: usize = @intCast(self.validatorCount());
+        // packed votes of the attestation being processed, reused across attestations
+        var attestation_votes = try std.DynamicBitSetUnmanaged.initEmpty(allocator, num_validators);
+        defer attestation_votes.deinit(allocator);
+
         for (attestations.constSlice()) |aggregated_attestation| {
-            var validator_indices = try attestation.aggregationBitsToValidatorIndices(&aggregated_attestation.aggregation_bits, allocator);
-            defer validator_indices.deinit(allocator);
+            attestation_votes.unsetAll();
+            var participants_count: usize = 0;
+            // unknown validators only invalidate the block if the attestation is counted
+            var has_unknown_validator = false;
+            const aggregation_bits = &aggregated_attestation.aggregation_bits;
+            for (0..aggregation_bits.len()) |validator_index| {
+                if (!(try aggregation_bits.get(validator_index))) continue;
+                participants_count += 1;
+                if (validator_index >= num_validators) {
+                    has_unknown_validator = true;
+                    continue;
+                }
+                attestation_votes.set(validator_index);
+            }
 
-            if (validator_indices.items.len == 0) {
+            if (participants_count == 0) {
                 continue;
             }
 
@@ -399,10 +613,10 @@ pub const BeamState = struct {
             // check if attestation is sane
             const source_slot: Slot = attestation_data.source.slot;
             const target_slot: Slot = attestation_data.target.slot;
-            const attestation_str = try attestation_data.toJsonString(allocator);
-            defer allocator.free(attestation_str);
-
-            logger.debug("processing attestation={s} validators_count={d}\n", .{ attestation_str, validator_indices.items.len });
+            logger.debug("processing attestation={f} validators_count={d}\n", .{
+                zeam_utils.LazyJson(attestation.AttestationData).init(allocator, &attestation_data),
+                participants_count,
+            });
 
             const historical_len: Slot = @intCast(self.historical_block_hashes.len());
             if (source_slot >= historical_len) {
@@ -450,27 +664,20 @@ pub const BeamState = struct {
                 continue;
             }
 
-            var target_justifications = justifications.get(attestation_data.target.root) orelse targetjustifications: {
-                const targetjustifications = try allocator.alloc(u8, num_validators);
-                @memset(targetjustifications, 0);
-                try justifications.put(allocator, attestation_data.target.root, targetjustifications);
-                break :targetjustifications targetjustifications;
-            };
-
-            for (validator_indices.items) |validator_index| {
-                if (validator_index >= num_validators) {
-                    return StateTransitionError.InvalidValidatorId;
-                }
-                target_justifications[validator_index] = 1;
+            if (has_unknown_validator) {
+                return StateTransitionError.InvalidValidatorId;
             }
-            try justifications.put(allocator, attestation_data.target.root, target_justifications);
-            var target_justifications_count: usize = 0;
-            for (target_justifications) |justified| {
-                if (justified == 1) {
-                    target_justifications_count += 1;
-                }
+            const target_gop = try justifications.getOrPut(allocator, attestation_data.target.root);
+            if (!target_gop.found_existing) {
+                target_gop.value_ptr.* = JustificationVotes.init(allocator, num_validators) catch |err| {
+                    justifications.removeByPtr(target_gop.key_ptr);
+                    return err;
+                };
             }
-            logger.debug("target jcount={d} target_root=0x{x} justifications_len={d}\n", .{ target_justifications_count, &attestation_data.target.root, target_justifications.len });
+            const target_justifications = target_gop.value_ptr;
+            target_justifications.merge(&attestation_votes);
+            const target_justifications_count = target_justifications.count;
+            logger.debug("target jcount={d} target_root=0x{x} justifications_len={d}\n", .{ target_justifications_count, &attestation_data.target.root, target_justifications.bits.bit_length });
 
             // as soon as we hit the threshold do justifications
             // note that this simplification works if weight of each validator is 1
@@ -480,9 +687,10 @@ pub const BeamState = struct {
             if (3 * target_justifications_count >= 2 * num_validators) {
                 self.latest_justified = attestation_data.target;
                 try utils.setSlotJustified(finalized_slot, &self.justified_slots, target_slot, true);
-                // Free the removed justifications array before removing from map
+                // Free the removed justification votes before removing from map
                 if (justifications.fetchRemove(attestation_data.target.root)) |kv| {
-                    allocator.free(kv.value);
+                    var votes = kv.value;
+                    votes.deinit(allocator);
                 }
                 logger.debug(
                     "\n\n\n-----------------HURRAY JUSTIFICATION ------------\nroot=0x{x} slot={d}\n--------------\n---------------\n-------------------------\n\n\n",
@@ -522,14 +730,14 @@ pub const BeamState = struct {
                         }
                         for (roots_to_remove.items) |root| {
                             if (justifications.fetchRemove(root)) |kv| {
-                                allocator.free(kv.value);
+                                var votes = kv.value;
+                                votes.deinit(allocator);
                             }
                         }
                     }
-                    const finalized_str_new = try self.latest_finalized.toJsonString(allocator);
-                    defer allocator.free(finalized_str_new);
-
-                    logger.debug("\n\n\n-----------------DOUBLE HURRAY FINALIZATION ------------\n{s}\n--------------\n---------------\n-------------------------\n\n\n", .{finalized_str_new});
+                    logger.debug("\n\n\n-----------------DOUBLE HURRAY FINALIZATION ------------\n{f}\n--------------\n---------------\n-------------------------\n\n\n", .{
+                        zeam_utils.LazyJson(Checkpoint).init(allocator, &self.latest_finalized),
+                    });
                 }
             }
         }
@@ -537,12 +745,10 @@ pub const BeamState = struct {
         try self.withJustifications(allocator, &justifications);
 
         logger.debug("poststate:historical hashes={d} justified slots={d}\n justifications_roots:{d}\n justifications_validators={d}\n", .{ self.historical_block_hashes.len(), self.justified_slots.len(), self.justifications_roots.len(), self.justifications_validators.len() });
-        const justified_str_final = try self.latest_justified.toJsonString(allocator);
-        defer allocator.free(justified_str_final);
-        const finalized_str_final = try self.latest_finalized.toJsonString(allocator);
-        defer allocator.free(finalized_str_final);
-
-        logger.debug("poststate: justified={s} finalized={s}", .{ justified_str_final, finalized_str_final });
+        logger.debug("poststate: justified={f} finalized={f}", .{
+            zeam_utils.LazyJson(Checkpoint).init(allocator, &self.latest_justified),
+            zeam_utils.LazyJson(Checkpoint).init(allocator, &self.latest_finalized),
+        });
     }
 
     pub fn genGenesisBlock(self: *const Self, allocator: Allocator, genesis_block: *block.BeamBlock) !void {
@@ -573,6 +779,108 @@ pub const BeamState = struct {
         return beam_block_header;
     }
 
+    /// Copies the state into `cloned` without going through an ssz serialize/deserialize
+    /// round trip. `historical_block_hashes` and `validators` dominate the state size and are
+    /// shared with the source rather than copied: the clone holds another reference to their
+    /// backing lists and copies one only when it first writes to it, which for the historical
+    /// hashes is the append in `process_block_header` and for the validators never happens in
+    /// the state transition. The justifications and justified slots are rewritten by most
+    /// blocks anyway and are copied. Equivalent to `utils.sszClone(BeamState, ...)`.
+    pub fn clone(self: *const Self, allocator: Allocator, cloned: *Self) !void {
+        var justifications_roots = try JustificationRoots.fromSlice(allocator, self.justifications_roots.constSlice());
+        errdefer justifications_roots.deinit();
+
+        var justified_slots: JustifiedSlots = undefined;
+        try utils.sszClone(allocator, JustifiedSlots, self.justified_slots, &justified_slots);
+        errdefer justified_slots.deinit();
+
+        var justifications_validators: JustificationValidators = undefined;
+        try utils.sszClone(allocator, JustificationValidators, self.justifications_validators, &justifications_validators);
+        errdefer justifications_validators.deinit();
+
+        cloned.* = .{
+            .config = self.config,
+            .slot = self.slot,
+            .latest_block_header = self.latest_block_header,
+            .latest_justified = self.latest_justified,
+            .latest_finalized = self.latest_finalized,
+            .historical_block_hashes = self.historical_block_hashes.share(allocator),
+            .justified_slots = justified_slots,
+            .validators = self.validators.share(allocator),
+            .justifications_roots = justifications_roots,
+            .justifications_validators = justifications_validators,
+        };
+    }
+
+    /// Decodes an ssz encoded state from `reader` as the bytes arrive instead of buffering the
+    /// whole encoding first. The fixed part is decoded up front, then every variable size field
+    /// is read into a reused scratch buffer, deserialized straight into `allocator` and hashed
+    /// while the rest of the stream is still in flight. Peak memory is the decoded state plus
+    /// the largest field encoding. `state_root` receives the hash tree root of the state.
+    pub fn sszDecodeStream(self: *Self, allocator: Allocator, reader: *std.Io.Reader, max_size: usize, state_root: *Root) !void {
+        const fields = std.meta.fields(Self);
+        var field_roots: [fields.len]Root = undefined;
+
+        var fixed_part: [beam_state_fixed_part_size]u8 = undefined;
+        try reader.readSliceAll(&fixed_part);
+
+        var decoded: Self = undefined;
+        var offsets: [beam_state_variable_fields.len]usize = undefined;
+        var pos: usize = 0;
+        inline for (fields, 0..) |field, i| {
+            if (comptime beamStateVariableFieldIndex(field.name)) |j| {
+                offsets[j] = std.mem.readInt(u32, fixed_part[pos..][0..4], .little);
+                pos += 4;
+            } else {
+                const size = comptime sszFixedSize(field.type);
+                try ssz.deserialize(field.type, fixed_part[pos..][0..size], &@field(decoded, field.name), allocator);
+                try zeam_utils.hashTreeRoot(field.type, @field(decoded, field.name), &field_roots[i], allocator);
+                pos += size;
+            }
+        }
+        if (offsets[0] != fixed_part.len) return error.InvalidOffset;
+
+        var scratch: std.ArrayList(u8) = .empty;
+        defer scratch.deinit(allocator);
+
+        var num_decoded: usize = 0;
+        errdefer {
+            inline for (beam_state_variable_fields, 0..) |name, j| {
+                if (j < num_decoded) @field(decoded, name).deinit();
+            }
+        }
+
+        var consumed: usize = fixed_part.len;
+        inline for (fields, 0..) |field, i| {
+            if (comptime beamStateVariableFieldIndex(field.name)) |j| {
+                if (j + 1 < offsets.len) {
+                    const end = offsets[j + 1];
+                    if (end < consumed or end > max_size) return error.InvalidOffset;
+                    try scratch.resize(allocator, end - consumed);
+                    try reader.readSliceAll(scratch.items);
+                } else {
+                    // the last field runs to the end of the stream
+                    scratch.clearRetainingCapacity();
+                    while (true) {
+                        try scratch.ensureUnusedCapacity(allocator, 64 * 1024);
+                        const read = try reader.readSliceShort(scratch.unusedCapacitySlice());
+                        if (read == 0) break;
+                        scratch.items.len += read;
+                        if (consumed + scratch.items.len > max_size) return error.StateTooLarge;
+                    }
+                }
+
+                try ssz.deserialize(field.type, scratch.items, &@field(decoded, field.name), allocator);
+                num_decoded += 1;
+                consumed += scratch.items.len;
+                try zeam_utils.hashTreeRoot(field.type, @field(decoded, field.name), &field_roots[i], allocator);
+            }
+        }
+
+        zeam_utils.merkleizeChunks(fields.len, field_roots, state_root);
+        self.* = decoded;
+    }
+
     pub fn deinit(self: *Self) void {
         // Deinit heap allocated ArrayLists
         self.historical_block_hashes.deinit();
@@ -808,12 +1116,12 @@ test "process_attestations invalid justifiable slot returns error without panic"
     var state = try makeGenesisState(std.testing.allocator, 3);
     defer state.deinit();
 
-    try state.process_slots(std.testing.allocator, 1, logger);
+    try state.process_slots(std.testing.allocator, 1, logger, null);
     var block_1 = try makeBlock(std.testing.allocator, &state, state.slot, &[_]attestation.AggregatedAttestation{});
     defer block_1.deinit();
     try state.process_block(std.testing.allocator, block_1, logger, null);
 
-    try state.process_slots(std.testing.allocator, 2, logger);
+    try state.process_slots(std.testing.allocator, 2, logger, null);
     var block_2 = try makeBlock(std.testing.allocator, &state, state.slot, &[_]attestation.AggregatedAttestation{});
     defer block_2.deinit();
     try state.process_block_header(std.testing.allocator, block_2, logger);
@@ -871,14 +1179,14 @@ test "justified_slots do not include finalized boundary" {
     var state = try makeGenesisState(std.testing.allocator, 4);
     defer state.deinit();
 
-    try state.process_slots(std.testing.allocator, 1, logger);
+    try state.process_slots(std.testing.allocator, 1, logger, null);
     var block_1 = try makeBlock(std.testing.allocator, &state, state.slot, &[_]attestation.AggregatedAttestation{});
     defer block_1.deinit();
     try state.process_block_header(std.testing.allocator, block_1, logger);
 
     try std.testing.expectEqual(@as(usize, 0), state.justified_slots.len());
 
-    try state.process_slots(std.testing.allocator, 2, logger);
+    try state.process_slots(std.testing.allocator, 2, logger, null);
     var block_2 = try makeBlock(std.testing.allocator, &state, state.slot, &[_]attestation.AggregatedAttestation{});
     defer block_2.deinit();
     try state.process_block_header(std.testing.allocator, block_2, logger);
@@ -893,12 +1201,12 @@ test "justified_slots rebases when finalization advances" {
     var state = try makeGenesisState(std.testing.allocator, 3);
     defer state.deinit();
 
-    try state.process_slots(std.testing.allocator, 1, logger);
+    try state.process_slots(std.testing.allocator, 1, logger, null);
     var block_1 = try makeBlock(std.testing.allocator, &state, state.slot, &[_]attestation.AggregatedAttestation{});
     defer block_1.deinit();
     try state.process_block(std.testing.allocator, block_1, logger, null);
 
-    try state.process_slots(std.testing.allocator, 2, logger);
+    try state.process_slots(std.testing.allocator, 2, logger, null);
     var block_2_parent_root: Root = undefined;
     try zeam_utils.hashTreeRoot(block.BeamBlockHeader, state.latest_block_header, &block_2_parent_root, std.testing.allocator);
 
@@ -917,7 +1225,7 @@ test "justified_slots rebases when finalization advances" {
     defer block_2.deinit();
     try state.process_block(std.testing.allocator, block_2, logger, null);
 
-    try state.process_slots(std.testing.allocator, 3, logger);
+    try state.process_slots(std.testing.allocator, 3, logger, null);
     var block_3_parent_root: Root = undefined;
     try zeam_utils.hashTreeRoot(block.BeamBlockHeader, state.latest_block_header, &block_3_parent_root, std.testing.allocator);
 
@@ -961,12 +1269,12 @@ test "pruning keeps pending justifications" {
     defer state.deinit();
 
     // Phase 1: Build a chain and justify slot 1.
-    try state.process_slots(std.testing.allocator, 1, logger);
+    try state.process_slots(std.testing.allocator, 1, logger, null);
     var block_1 = try makeBlock(std.testing.allocator, &state, state.slot, &[_]attestation.AggregatedAttestation{});
     defer block_1.deinit();
     try state.process_block(std.testing.allocator, block_1, logger, null);
 
-    try state.process_slots(std.testing.allocator, 2, logger);
+    try state.process_slots(std.testing.allocator, 2, logger, null);
     var block_2_parent_root: Root = undefined;
     try zeam_utils.hashTreeRoot(block.BeamBlockHeader, state.latest_block_header, &block_2_parent_root, std.testing.allocator);
 
@@ -989,17 +1297,17 @@ test "pruning keeps pending justifications" {
     try std.testing.expectEqual(@as(Slot, 1), state.latest_justified.slot);
 
     // Phase 2: Extend chain to populate more history entries.
-    try state.process_slots(std.testing.allocator, 3, logger);
+    try state.process_slots(std.testing.allocator, 3, logger, null);
     var block_3 = try makeBlock(std.testing.allocator, &state, state.slot, &[_]attestation.AggregatedAttestation{});
     defer block_3.deinit();
     try state.process_block(std.testing.allocator, block_3, logger, null);
 
-    try state.process_slots(std.testing.allocator, 4, logger);
+    try state.process_slots(std.testing.allocator, 4, logger, null);
     var block_4 = try makeBlock(std.testing.allocator, &state, state.slot, &[_]attestation.AggregatedAttestation{});
     defer block_4.deinit();
     try state.process_block(std.testing.allocator, block_4, logger, null);
 
-    try state.process_slots(std.testing.allocator, 5, logger);
+    try state.process_slots(std.testing.allocator, 5, logger, null);
     var block_5 = try makeBlock(std.testing.allocator, &state, state.slot, &[_]attestation.AggregatedAttestation{});
     defer block_5.deinit();
     try state.process_block_header(std.testing.allocator, block_5, logger);
@@ -1073,7 +1381,7 @@ test "root_to_slot_cache lifecycle" {
     try state.initRootToSlotCache(&cache);
 
     // Phase 1: Build chain and justify slot 1.
-    try state.process_slots(std.testing.allocator, 1, logger);
+    try state.process_slots(std.testing.allocator, 1, logger, null);
     var block_1 = try makeBlock(std.testing.allocator, &state, state.slot, &[_]attestation.AggregatedAttestation{});
     defer block_1.deinit();
 
@@ -1085,7 +1393,7 @@ test "root_to_slot_cache lifecycle" {
     try std.testing.expectEqual(@as(usize, 1), cache.count());
     try std.testing.expectEqual(@as(Slot, 0), cache.get(block_1.parent_root).?);
 
-    try state.process_slots(std.testing.allocator, 2, logger);
+    try state.process_slots(std.testing.allocator, 2, logger, null);
     var block_2_parent_root: Root = undefined;
     try zeam_utils.hashTreeRoot(block.BeamBlockHeader, state.latest_block_header, &block_2_parent_root, std.testing.allocator);
 
@@ -1112,7 +1420,7 @@ test "root_to_slot_cache lifecycle" {
     try std.testing.expectEqual(@as(Slot, 1), cache.get(block_2_parent_root).?);
 
     // Phase 2: Extend chain.
-    try state.process_slots(std.testing.allocator, 3, logger);
+    try state.process_slots(std.testing.allocator, 3, logger, null);
     var block_3 = try makeBlock(std.testing.allocator, &state, state.slot, &[_]attestation.AggregatedAttestation{});
     defer block_3.deinit();
 
@@ -1122,7 +1430,7 @@ test "root_to_slot_cache lifecycle" {
     try cache.put(block_3_parent_root, 2);
     try state.process_block(std.testing.allocator, block_3, logger, &cache);
 
-    try state.process_slots(std.testing.allocator, 4, logger);
+    try state.process_slots(std.testing.allocator, 4, logger, null);
     var block_4 = try makeBlock(std.testing.allocator, &state, state.slot, &[_]attestation.AggregatedAttestation{});
     defer block_4.deinit();
 
@@ -1132,7 +1440,7 @@ test "root_to_slot_cache lifecycle" {
     try cache.put(block_4_parent_root, 3);
     try state.process_block(std.testing.allocator, block_4, logger, &cache);
 
-    try state.process_slots(std.testing.allocator, 5, logger);
+    try state.process_slots(std.testing.allocator, 5, logger, null);
     var block_5 = try makeBlock(std.testing.allocator, &state, state.slot, &[_]attestation.AggregatedAttestation{});
     defer block_5.deinit();
     try state.process_block_header(std.testing.allocator, block_5, logger);
@@ -1258,6 +1566,175 @@ test "encode decode state roundtrip" {
     try std.testing.expect(decoded.validators.len() == state.validators.len());
 }
 
+test "clone matches ssz clone and does not alias the source" {
+    var logger_config = zeam_utils.getTestLoggerConfig();
+    const logger = logger_config.logger(null);
+    var state = try makeGenesisState(std.testing.allocator, 4);
+    defer state.deinit();
+
+    // grow the lists past genesis so there is something to copy
+    try state.process_slots(std.testing.allocator, 1, logger, null);
+    var empty_block = try makeBlock(std.testing.allocator, &state, state.slot, &[_]attestation.AggregatedAttestation{});
+    defer empty_block.deinit();
+    try state.process_block(std.testing.allocator, empty_block, logger, null);
+    try state.process_slots(std.testing.allocator, 3, logger, null);
+
+    var cloned: BeamState = undefined;
+    try state.clone(std.testing.allocator, &cloned);
+    defer cloned.deinit();
+
+    var ssz_cloned: BeamState = undefined;
+    try utils.sszClone(std.testing.allocator, BeamState, state, &ssz_cloned);
+    defer ssz_cloned.deinit();
+
+    var cloned_root: Root = undefined;
+    try zeam_utils.hashTreeRoot(BeamState, cloned, &cloned_root, std.testing.allocator);
+    var ssz_cloned_root: Root = undefined;
+    try zeam_utils.hashTreeRoot(BeamState, ssz_cloned, &ssz_cloned_root, std.testing.allocator);
+    try std.testing.expectEqualSlices(u8, &ssz_cloned_root, &cloned_root);
+
+    // the large lists are shared until the clone first writes to them
+    try std.testing.expect(cloned.validators.isShared());
+    try std.testing.expectEqual(state.historical_block_hashes.constSlice().ptr, cloned.historical_block_hashes.constSlice().ptr);
+
+    try cloned.historical_block_hashes.append(utils.ZERO_HASH);
+    try std.testing.expect(cloned.historical_block_hashes.len() == state.historical_block_hashes.len() + 1);
+    try std.testing.expect(!state.historical_block_hashes.isShared());
+    try std.testing.expect(state.historical_block_hashes.constSlice().ptr != cloned.historical_block_hashes.constSlice().ptr);
+}
+
+test "streaming decode matches ssz deserialize and hash tree root" {
+    const allocator = std.testing.allocator;
+    var logger_config = zeam_utils.getTestLoggerConfig();
+    const logger = logger_config.logger(null);
+    var state = try makeGenesisState(allocator, 4);
+    defer state.deinit();
+
+    try state.process_slots(allocator, 1, logger, null);
+    var empty_block = try makeBlock(allocator, &state, state.slot, &[_]attestation.AggregatedAttestation{});
+    defer empty_block.deinit();
+    try state.process_block(allocator, empty_block, logger, null);
+    try state.process_slots(allocator, 3, logger, null);
+
+    var encoded: std.ArrayList(u8) = .empty;
+    defer encoded.deinit(allocator);
+    try ssz.serialize(BeamState, state, &encoded, allocator);
+
+    var expected_root: Root = undefined;
+    try zeam_utils.hashTreeRoot(BeamState, state, &expected_root, allocator);
+
+    var reader = std.Io.Reader.fixed(encoded.items);
+    var decoded: BeamState = undefined;
+    var decoded_root: Root = undefined;
+    try decoded.sszDecodeStream(allocator, &reader, encoded.items.len, &decoded_root);
+    defer decoded.deinit();
+    try std.testing.expectEqualSlices(u8, &expected_root, &decoded_root);
+
+    var reencoded: std.ArrayList(u8) = .empty;
+    defer reencoded.deinit(allocator);
+    try ssz.serialize(BeamState, decoded, &reencoded, allocator);
+    try std.testing.expectEqualSlices(u8, encoded.items, reencoded.items);
+
+    // cut inside the validators, the fields decoded before them must be released
+    const validators_end_pos = comptime blk: {
+        var pos: usize = 0;
+        for (std.meta.fields(BeamState)) |field| {
+            if (std.mem.eql(u8, field.name, "justifications_roots")) break;
+            pos += if (beamStateVariableFieldIndex(field.name) != null) 4 else sszFixedSize(field.type);
+        }
+        break :blk pos;
+    };
+    const validators_end = std.mem.readInt(u32, encoded.items[validators_end_pos..][0..4], .little);
+    var truncated_reader = std.Io.Reader.fixed(encoded.items[0 .. validators_end - 1]);
+    var truncated: BeamState = undefined;
+    try std.testing.expectError(error.EndOfStream, truncated.sszDecodeStream(allocator, &truncated_reader, encoded.items.len, &decoded_root));
+
+    var oversized_reader = std.Io.Reader.fixed(encoded.items);
+    var oversized: BeamState = undefined;
+    try std.testing.expectError(error.StateTooLarge, oversized.sszDecodeStream(allocator, &oversized_reader, encoded.items.len - 1, &decoded_root));
+}
+
+test "state root cache matches full hash tree root across blocks and forks" {
+    var logger_config = zeam_utils.getTestLoggerConfig();
+    const logger = logger_config.logger(null);
+    var root_cache = BeamStateRootCache.init(std.testing.allocator);
+    defer root_cache.deinit();
+
+    var state = try makeGenesisState(std.testing.allocator, 4);
+    defer state.deinit();
+
+    var expected: Root = undefined;
+    var actual: Root = undefined;
+    for (1..6) |slot| {
+        try state.process_slots(std.testing.allocator, slot, logger, &root_cache);
+        var next_block = try makeBlock(std.testing.allocator, &state, state.slot, &[_]attestation.AggregatedAttestation{});
+        defer next_block.deinit();
+        try state.process_block(std.testing.allocator, next_block, logger, null);
+
+        try zeam_utils.hashTreeRoot(BeamState, state, &expected, std.testing.allocator);
+        try root_cache.hashTreeRoot(&state, &actual);
+        try std.testing.expectEqualSlices(u8, &expected, &actual);
+    }
+
+    // a sibling state diverging at the tail is served by the same cache
+    var sibling: BeamState = undefined;
+    try state.clone(std.testing.allocator, &sibling);
+    defer sibling.deinit();
+    (try sibling.historical_block_hashes.slice())[sibling.historical_block_hashes.len() - 1][0] ^= 0xff;
+    try sibling.validators.append(.{ .pubkey = [_]u8{0xab} ** 52, .index = 4 });
+
+    try zeam_utils.hashTreeRoot(BeamState, sibling, &expected, std.testing.allocator);
+    try root_cache.hashTreeRoot(&sibling, &actual);
+    try std.testing.expectEqualSlices(u8, &expected, &actual);
+
+    try zeam_utils.hashTreeRoot(BeamState, state, &expected, std.testing.allocator);
+    try root_cache.hashTreeRoot(&state, &actual);
+    try std.testing.expectEqualSlices(u8, &expected, &actual);
+
+    // forks cloned from the same parent only rehash the hashes appended after it
+    var forks: [2]BeamState = undefined;
+    for (&forks, 0..) |*fork, i| {
+        try state.clone(std.testing.allocator, fork);
+        try fork.process_slots(std.testing.allocator, state.slot + 1 + i, logger, &root_cache);
+        var fork_block = try makeBlock(std.testing.allocator, fork, fork.slot, &[_]attestation.AggregatedAttestation{});
+        defer fork_block.deinit();
+        try fork.process_block(std.testing.allocator, fork_block, logger, null);
+    }
+    defer for (&forks) |*fork| fork.deinit();
+    try std.testing.expect(forks[0].validators.isShared());
+    for ([_]usize{ 0, 1, 0 }) |i| {
+        try zeam_utils.hashTreeRoot(BeamState, forks[i], &expected, std.testing.allocator);
+        try root_cache.hashTreeRoot(&forks[i], &actual);
+        try std.testing.expectEqualSlices(u8, &expected, &actual);
+    }
+}
+
+test "justification votes merge word wise with a running count" {
+    const allocator = std.testing.allocator;
+    // span more than one mask word
+    const num_validators = 130;
+
+    var votes = try JustificationVotes.init(allocator, num_validators);
+    defer votes.deinit(allocator);
+
+    var attestation_votes = try std.DynamicBitSetUnmanaged.initEmpty(allocator, num_validators);
+    defer attestation_votes.deinit(allocator);
+    for ([_]usize{ 0, 63, 64, 129 }) |validator_index| {
+        attestation_votes.set(validator_index);
+    }
+    votes.merge(&attestation_votes);
+    try std.testing.expectEqual(@as(usize, 4), votes.count);
+
+    // overlapping votes only count once
+    attestation_votes.unsetAll();
+    for ([_]usize{ 1, 63, 129 }) |validator_index| {
+        attestation_votes.set(validator_index);
+    }
+    votes.merge(&attestation_votes);
+    try std.testing.expectEqual(@as(usize, 5), votes.count);
+    try std.testing.expectEqual(votes.bits.count(), votes.count);
+}
+
 test "genesis block hash comparison" {
     var arena_allocator = std.heap.ArenaAllocator.init(std.testing.allocator);
     defer arena_allocator.deinit();
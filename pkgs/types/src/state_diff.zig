@@ -0,0 +1,293 @@
+const std = @import("std");
+const ssz = @import("ssz");
+
+const params = @import("@zeam/params");
+
+const block = @import("./block.zig");
+const mini_3sf = @import("./mini_3sf.zig");
+const state = @import("./state.zig");
+const utils = @import("./utils.zig");
+const validator = @import("./validator.zig");
+
+const Allocator = std.mem.Allocator;
+const BeamBlockHeader = block.BeamBlockHeader;
+const BeamState = state.BeamState;
+const Checkpoint = mini_3sf.Checkpoint;
+const HistoricalBlockHashes = state.HistoricalBlockHashes;
+const JustificationRoots = state.JustificationRoots;
+const JustificationValidators = state.JustificationValidators;
+const JustifiedSlots = state.JustifiedSlots;
+const Root = utils.Root;
+const Slot = utils.Slot;
+const Validators = validator.Validators;
+
+pub const JustifiedSlotFlips = ssz.utils.List(u64, params.HISTORICAL_ROOTS_LIMIT);
+
+/// Compact encoding of a BeamState against the state it was derived from, usually the post
+/// state of the parent block. The small fixed fields are stored whole. The list fields only
+/// grow at the end between two blocks, so each is stored as the length of the prefix shared
+/// with the base plus the elements after it. `justified_slots` is relative to the finalized
+/// slot and moves to the left when finalization advances, so it is stored as that shift, the
+/// bits that flipped in the part kept from the base, and the appended bits.
+pub const BeamStateDiff = struct {
+    // block root of the state the diff applies to
+    base_root: Root,
+
+    slot: Slot,
+    latest_block_header: BeamBlockHeader,
+    latest_justified: Checkpoint,
+    latest_finalized: Checkpoint,
+
+    historical_block_hashes_keep: u64,
+    historical_block_hashes_append: HistoricalBlockHashes,
+
+    justified_slots_shift: u64,
+    justified_slots_keep: u64,
+    justified_slots_flips: JustifiedSlotFlips,
+    justified_slots_append: JustifiedSlots,
+
+    validators_keep: u64,
+    validators_append: Validators,
+
+    justifications_roots_keep: u64,
+    justifications_roots_append: JustificationRoots,
+
+    justifications_validators_keep: u64,
+    justifications_validators_append: JustificationValidators,
+
+    const Self = @This();
+
+    /// Encodes `target` against `base`, the state at `base_root`.
+    pub fn compute(self: *Self, allocator: Allocator, base_root: Root, base: *const BeamState, target: *const BeamState) !void {
+        self.* = .{
+            .base_root = base_root,
+            .slot = target.slot,
+            .latest_block_header = target.latest_block_header,
+            .latest_justified = target.latest_justified,
+            .latest_finalized = target.latest_finalized,
+            .historical_block_hashes_keep = 0,
+            .historical_block_hashes_append = try HistoricalBlockHashes.init(allocator),
+            .justified_slots_shift = 0,
+            .justified_slots_keep = 0,
+            .justified_slots_flips = try JustifiedSlotFlips.init(allocator),
+            .justified_slots_append = try JustifiedSlots.init(allocator),
+            .validators_keep = 0,
+            .validators_append = try Validators.init(allocator),
+            .justifications_roots_keep = 0,
+            .justifications_roots_append = try JustificationRoots.init(allocator),
+            .justifications_validators_keep = 0,
+            .justifications_validators_append = try JustificationValidators.init(allocator),
+        };
+        errdefer self.deinit();
+
+        self.historical_block_hashes_keep = try diffList(
+            base.historical_block_hashes.constSlice(),
+            target.historical_block_hashes.constSlice(),
+            &self.historical_block_hashes_append,
+        );
+        self.validators_keep = try diffList(
+            base.validators.constSlice(),
+            target.validators.constSlice(),
+            &self.validators_append,
+        );
+        self.justifications_roots_keep = try diffList(
+            base.justifications_roots.constSlice(),
+            target.justifications_roots.constSlice(),
+            &self.justifications_roots_append,
+        );
+        self.justifications_validators_keep = try diffBitlist(
+            &base.justifications_validators,
+            &target.justifications_validators,
+            &self.justifications_validators_append,
+        );
+
+        const base_len = base.justified_slots.len();
+        const target_len = target.justified_slots.len();
+        const shift: usize = if (target.latest_finalized.slot > base.latest_finalized.slot)
+            @intCast(@min(target.latest_finalized.slot - base.latest_finalized.slot, base_len))
+        else
+            0;
+        const keep = @min(base_len - shift, target_len);
+        for (0..keep) |i| {
+            if (try base.justified_slots.get(shift + i) != try target.justified_slots.get(i)) {
+                try self.justified_slots_flips.append(i);
+            }
+        }
+        for (keep..target_len) |i| {
+            try self.justified_slots_append.append(try target.justified_slots.get(i));
+        }
+        self.justified_slots_shift = shift;
+        self.justified_slots_keep = keep;
+    }
+
+    /// Rebuilds the encoded state from `base` into `out`, allocated with `allocator`.
+    pub fn apply(self: *const Self, allocator: Allocator, base: *const BeamState, out: *BeamState) !void {
+        var historical_block_hashes = try patchList(
+            HistoricalBlockHashes,
+            allocator,
+            base.historical_block_hashes.constSlice(),
+            self.historical_block_hashes_keep,
+            self.historical_block_hashes_append.constSlice(),
+        );
+        errdefer historical_block_hashes.deinit();
+        var validators = try patchList(
+            Validators,
+            allocator,
+            base.validators.constSlice(),
+            self.validators_keep,
+            self.validators_append.constSlice(),
+        );
+        errdefer validators.deinit();
+        var justifications_roots = try patchList(
+            JustificationRoots,
+            allocator,
+            base.justifications_roots.constSlice(),
+            self.justifications_roots_keep,
+            self.justifications_roots_append.constSlice(),
+        );
+        errdefer justifications_roots.deinit();
+        var justifications_validators = try patchBitlist(
+            JustificationValidators,
+            allocator,
+            &base.justifications_validators,
+            0,
+            self.justifications_validators_keep,
+            &self.justifications_validators_append,
+        );
+        errdefer justifications_validators.deinit();
+        var justified_slots = try patchBitlist(
+            JustifiedSlots,
+            allocator,
+            &base.justified_slots,
+            self.justified_slots_shift,
+            self.justified_slots_keep,
+            &self.justified_slots_append,
+        );
+        errdefer justified_slots.deinit();
+        for (self.justified_slots_flips.constSlice()) |index| {
+            if (index >= self.justified_slots_keep) return error.InvalidStateDiff;
+            const i: usize = @intCast(index);
+            try justified_slots.set(i, !(try justified_slots.get(i)));
+        }
+
+        out.* = .{
+            .config = base.config,
+            .slot = self.slot,
+            .latest_block_header = self.latest_block_header,
+            .latest_justified = self.latest_justified,
+            .latest_finalized = self.latest_finalized,
+            .historical_block_hashes = historical_block_hashes,
+            .justified_slots = justified_slots,
+            .validators = validators,
+            .justifications_roots = justifications_roots,
+            .justifications_validators = justifications_validators,
+        };
+    }
+
+    pub fn deinit(self: *Self) void {
+        self.historical_block_hashes_append.deinit();
+        self.justified_slots_flips.deinit();
+        self.justified_slots_append.deinit();
+        self.validators_append.deinit();
+        self.justifications_roots_append.deinit();
+        self.justifications_validators_append.deinit();
+    }
+};
+
+/// Appends the elements of `target` after its common prefix with `base` to `tail` and
+/// returns the prefix length.
+fn diffList(base: anytype, target: @TypeOf(base), tail: anytype) !u64 {
+    const n = @min(base.len, target.len);
+    var keep: usize = 0;
+    while (keep < n and std.meta.eql(base[keep], target[keep])) : (keep += 1) {}
+    for (target[keep..]) |item| try tail.append(item);
+    return keep;
+}
+
+fn diffBitlist(base: anytype, target: @TypeOf(base), tail: anytype) !u64 {
+    const n = @min(base.len(), target.len());
+    var keep: usize = 0;
+    while (keep < n and try base.get(keep) == try target.get(keep)) : (keep += 1) {}
+    for (keep..target.len()) |i| try tail.append(try target.get(i));
+    return keep;
+}
+
+fn patchList(comptime L: type, allocator: Allocator, base: anytype, keep: u64, tail: @TypeOf(base)) !L {
+    if (keep > base.len) return error.InvalidStateDiff;
+    var list = try L.init(allocator);
+    errdefer list.deinit();
+    for (base[0..@intCast(keep)]) |item| try list.append(item);
+    for (tail) |item| try list.append(item);
+    return list;
+}
+
+fn patchBitlist(comptime B: type, allocator: Allocator, base: anytype, shift: u64, keep: u64, tail: anytype) !B {
+    if (shift + keep > base.len()) return error.InvalidStateDiff;
+    var bits = try B.init(allocator);
+    errdefer bits.deinit();
+    const start: usize = @intCast(shift);
+    for (start..start + @as(usize, @intCast(keep))) |i| try bits.append(try base.get(i));
+    for (0..tail.len()) |i| try bits.append(try tail.get(i));
+    return bits;
+}
+
+test "state diff rebuilds the next state across a finalization shift" {
+    const allocator = std.testing.allocator;
+
+    var pubkeys: [4]utils.Bytes52 = undefined;
+    for (&pubkeys, 0..) |*pubkey, i| @memset(pubkey, @intCast(i + 1));
+    var base: BeamState = undefined;
+    try base.genGenesisState(allocator, .{ .genesis_time = 0, .validator_pubkeys = &pubkeys });
+    defer base.deinit();
+    for (0..6) |i| {
+        try base.historical_block_hashes.append([_]u8{@intCast(i + 1)} ** 32);
+        try base.justified_slots.append(i % 2 == 0);
+    }
+    try base.justifications_roots.append([_]u8{9} ** 32);
+    for (0..pubkeys.len) |i| try base.justifications_validators.append(i == 1);
+
+    var target: BeamState = undefined;
+    try utils.sszClone(allocator, BeamState, base, &target);
+    defer target.deinit();
+    target.slot = 7;
+    target.latest_block_header.slot = 7;
+    target.latest_finalized = .{ .root = [_]u8{2} ** 32, .slot = base.latest_finalized.slot + 2 };
+    try target.historical_block_hashes.append([_]u8{7} ** 32);
+    // finalization drops two bits from the front, one kept bit flips and one is appended
+    target.justified_slots.deinit();
+    target.justified_slots = try JustifiedSlots.init(allocator);
+    for (2..6) |i| try target.justified_slots.append(if (i == 3) true else i % 2 == 0);
+    try target.justified_slots.append(true);
+    target.justifications_roots.deinit();
+    target.justifications_roots = try JustificationRoots.init(allocator);
+    target.justifications_validators.deinit();
+    target.justifications_validators = try JustificationValidators.init(allocator);
+
+    const base_root = [_]u8{1} ** 32;
+    var diff: BeamStateDiff = undefined;
+    try diff.compute(allocator, base_root, &base, &target);
+    defer diff.deinit();
+    try std.testing.expectEqual(@as(u64, 6), diff.historical_block_hashes_keep);
+    try std.testing.expectEqual(@as(usize, 1), diff.historical_block_hashes_append.len());
+    try std.testing.expectEqual(@as(u64, pubkeys.len), diff.validators_keep);
+    try std.testing.expectEqual(@as(u64, 2), diff.justified_slots_shift);
+    try std.testing.expectEqual(@as(usize, 1), diff.justified_slots_flips.len());
+
+    // the diff survives an ssz round trip the way it is stored
+    var encoded: std.ArrayList(u8) = .empty;
+    defer encoded.deinit(allocator);
+    try ssz.serialize(BeamStateDiff, diff, &encoded, allocator);
+    var decoded: BeamStateDiff = undefined;
+    try ssz.deserialize(BeamStateDiff, encoded.items, &decoded, allocator);
+    defer decoded.deinit();
+
+    var rebuilt: BeamState = undefined;
+    try decoded.apply(allocator, &base, &rebuilt);
+    defer rebuilt.deinit();
+
+    var expected_root: Root = undefined;
+    try target.hashTreeRoot(allocator, null, &expected_root);
+    var rebuilt_root: Root = undefined;
+    try rebuilt.hashTreeRoot(allocator, null, &rebuilt_root);
+    try std.testing.expectEqualSlices(u8, &expected_root, &rebuilt_root);
+}
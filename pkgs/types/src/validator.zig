@@ -1,9 +1,9 @@
 const std = @import("std");
-const ssz = @import("ssz");
 
 const params = @import("@zeam/params");
 
 const attestation = @import("./attestation.zig");
+const shared_list = @import("./shared_list.zig");
 const utils = @import("./utils.zig");
 
 const Attestation = attestation.Attestation;
@@ -16,7 +16,8 @@ const bytesToHex = utils.BytesToHex;
 const json = std.json;
 
 // Types
-pub const Validators = ssz.utils.List(Validator, params.VALIDATOR_REGISTRY_LIMIT);
+// not modified by the state transition, so clones keep sharing it
+pub const Validators = shared_list.SharedList(Validator, params.VALIDATOR_REGISTRY_LIMIT);
 
 pub const Validator = struct {
     pubkey: Bytes52,
@@ -25,6 +25,10 @@ pub const getTestLoggerConfig = logFactory.getTestLoggerConfig;
 pub const getFormattedTimestamp = logFactory.getFormattedTimestamp;
 pub const getFile = logFactory.getFile;
 
+const log_sink_factory = @import("./log_sink.zig");
+pub const LogSink = log_sink_factory.LogSink;
+pub const LogSinkOptions = log_sink_factory.Options;
+
 const yaml_factory = @import("./yaml.zig");
 // Avoid to use `usingnamespace` to make upgrade easier in the future.
 pub const loadFromYAMLFile = yaml_factory.loadFromYAMLFile;
@@ -40,11 +44,18 @@ pub const jsonToString = json_factory.jsonToString;
 
 const ssz_factory = @import("./ssz.zig");
 pub const hashTreeRoot = ssz_factory.hashTreeRoot;
+pub const SszChunk = ssz_factory.Chunk;
+pub const MerkleListCache = ssz_factory.MerkleListCache;
+pub const merkleizeChunks = ssz_factory.merkleizeChunks;
+pub const mixInLength = ssz_factory.mixInLength;
 
 const fmt_factory = @import("./fmt.zig");
 // Avoid to use `usingnamespace` to make upgrade easier in the future.
 pub const LazyJson = fmt_factory.LazyJson;
 
+const mpsc_ring_factory = @import("./mpsc_ring.zig");
+pub const MpscRing = mpsc_ring_factory.MpscRing;
+
 test {
     @import("std").testing.refAllDeclsRecursive(@This());
 }
@@ -2,6 +2,8 @@ const std = @import("std");
 const builtin = @import("builtin");
 const datetime = @import("datetime");
 
+const log_sink = @import("./log_sink.zig");
+
 const Colors = struct {
     const reset = "\x1b[0m";
 
@@ -57,8 +59,11 @@ pub fn compTimeLog(comptime scope: LoggerScope, activeLevel: std.log.Level, comp
         const print_str = std.fmt.bufPrint(buf[0..], prefix ++ fmt ++ "\n", args) catch @panic("error formatting log\n");
         io.print_str(print_str);
     } else {
-        std.debug.lockStdErr();
-        defer std.debug.unlockStdErr();
+        // with a log sink running, lines are staged for its flusher thread instead of written
+        // here under the stderr lock
+        const sink = log_sink.active();
+        if (sink == null) std.debug.lockStdErr();
+        defer if (sink == null) std.debug.unlockStdErr();
         const stderr = std.fs.File.stderr();
 
         var ts_buf: [64]u8 = undefined;
@@ -94,7 +99,11 @@ pub fn compTimeLog(comptime scope: LoggerScope, activeLevel: std.log.Level, comp
             ) catch return;
 
         // Print to stderr
-        if (@intFromEnum(activeLevel) >= @intFromEnum(level)) {
+        if (@intFromEnum(activeLevel) >= @intFromEnum(level)) stderr_blk: {
+            if (sink) |s| {
+                s.submit(level, log_sink.stderr_output, print_str);
+                break :stderr_blk;
+            }
             var stderr_write_buf: [4096]u8 = undefined;
             var stderr_writer = stderr.writer(&stderr_write_buf);
             nosuspend stderr_writer.interface.writeAll(print_str) catch return;
@@ -111,8 +120,13 @@ pub fn compTimeLog(comptime scope: LoggerScope, activeLevel: std.log.Level, comp
                 ) catch return;
             }
 
+            if (fileLogParams.?.output) |output| {
+                if (sink) |s| s.submit(level, output, print_str);
+                return;
+            }
+            const file = fileLogParams.?.file orelse return;
             var file_write_buf: [4096]u8 = undefined;
-            var file_writer = fileLogParams.?.file.writer(&file_write_buf);
+            var file_writer = file.writer(&file_write_buf);
             nosuspend file_writer.interface.writeAll(print_str) catch |err| {
                 std.debug.print("{s}{s}{s} {s}[ERROR]{s} {s}{s}{s}Failed to write to log file: {any}\n", .{ timestamp_color, timestamp_str, reset_color, Colors.err, reset_color, scope_color, scope_prefix, reset_color, err });
                 return;
@@ -126,8 +140,8 @@ pub fn compTimeLog(comptime scope: LoggerScope, activeLevel: std.log.Level, comp
 
 pub fn log(scope: LoggerScope, activeLevel: std.log.Level, comptime level: std.log.Level, comptime fmt: []const u8, args: anytype, fileParams: ?FileParams, moduleTag: ?ModuleTag, slot_clock: ?*const SlotTimeClock) void {
     // Convert FileParams to FileLogParams - only create if file exists
-    const fileLogParams: ?FileLogParams = if ((fileParams != null) and (fileParams.?.file != null))
-        FileLogParams{ .fileActiveLevel = fileParams.?.fileBehaviour.fileActiveLevel, .file = fileParams.?.file.?, .monocolorFile = fileParams.?.fileBehaviour.monocolorFile }
+    const fileLogParams: ?FileLogParams = if ((fileParams != null) and (fileParams.?.file != null or fileParams.?.output != null))
+        FileLogParams{ .fileActiveLevel = fileParams.?.fileBehaviour.fileActiveLevel, .file = fileParams.?.file, .output = fileParams.?.output, .monocolorFile = fileParams.?.fileBehaviour.monocolorFile }
     else
         null;
 
@@ -140,7 +154,7 @@ pub fn log(scope: LoggerScope, activeLevel: std.log.Level, comptime level: std.l
     }
 }
 
-const LoggerScope = enum {
+pub const LoggerScope = enum {
     default,
     n1,
     n2,
@@ -181,7 +195,9 @@ pub const ModuleTag = enum {
 
 pub const FileLogParams = struct {
     fileActiveLevel: std.log.Level,
-    file: std.fs.File,
+    file: ?std.fs.File = null,
+    // set instead of file when the log sink owns the file
+    output: ?log_sink.OutputId = null,
     monocolorFile: bool,
 };
 
@@ -194,6 +210,8 @@ pub const FileBehaviourParams = struct {
 
 pub const FileParams = struct {
     file: ?std.fs.File = null,
+    // set instead of file when the log sink owns the file, it writes and rotates it off-thread
+    output: ?log_sink.OutputId = null,
     fileBehaviour: FileBehaviourParams,
     mutex: std.Thread.Mutex,
     last_rotation_day: i64 = 0,
@@ -212,11 +230,20 @@ pub const ZeamLoggerConfig = struct {
     const Self = @This();
     pub fn init(scope: LoggerScope, activeLevel: std.log.Level, fileBehaviourParams: ?FileBehaviourParams) Self {
         const fileParams: ?FileParams = if (fileBehaviourParams) |params| blk: {
+            if (comptime builtin.target.os.tag != .freestanding) {
+                if (log_sink.active()) |sink| {
+                    if (sink.openFile(scope, params)) |output| {
+                        break :blk FileParams{ .output = output, .fileBehaviour = params, .mutex = std.Thread.Mutex{} };
+                    } else |err| {
+                        std.debug.print("WARNING: log sink failed to open the log file, writing it synchronously: {any}\n", .{err});
+                    }
+                }
+            }
             break :blk FileParams{
                 .file = getFile(scope, params.filePath, params.fileName),
                 .fileBehaviour = params,
                 .mutex = std.Thread.Mutex{},
-                .last_rotation_day = if (builtin.target.os.tag == .freestanding) 0 else @as(i64, @intCast(@divFloor(std.time.timestamp(), 24 * 60 * 60))), // Set in FileParams
+                .last_rotation_day = if (builtin.target.os.tag == .freestanding) 0 else currentEpochDay(), // Set in FileParams
             };
         } else null;
 
@@ -236,56 +263,39 @@ pub const ZeamLoggerConfig = struct {
         }
     }
 
+    /// Rotates the log file once a day. Files owned by a log sink are rotated by its flusher
+    /// thread instead, for them this returns right away.
     pub fn maybeRotate(self: *Self) !void {
         if (self.fileParams == null) return;
         if (self.fileParams.?.file == null) return;
 
         if (self.fileParams.?.file) |file| {
-            const now = std.time.timestamp();
-            const sec_per_day = 24 * 60 * 60;
-            const current_epoch_day = @as(i64, @intCast(@divFloor(now, sec_per_day)));
-
+            const current_epoch_day = currentEpochDay();
             if (current_epoch_day == self.fileParams.?.last_rotation_day) {
                 return;
             }
-            const date = datetime.datetime.Datetime.fromTimestamp(self.fileParams.?.last_rotation_day * sec_per_day * 1000);
-
-            var ts_buf: [128]u8 = undefined;
-            const date_ext = try std.fmt.bufPrint(
-                &ts_buf,
-                "{d:0>4}{d:0>2}{d:0>2}",
-                .{
-                    date.date.year,
-                    date.date.month,
-                    date.date.day,
-                },
-            );
-
-            var name_buf: [64]u8 = undefined;
-            const base_name = switch (self.scope) {
-                .default => try std.fmt.bufPrint(&name_buf, "{s}.log", .{self.fileParams.?.fileBehaviour.fileName}),
-                else => try std.fmt.bufPrint(&name_buf, "{s}-{s}.log", .{ self.fileParams.?.fileBehaviour.fileName, @tagName(self.scope) }),
-            };
-
-            var new_buf: [128]u8 = undefined;
-            const rotated_name = switch (self.scope) {
-                .default => try std.fmt.bufPrint(&new_buf, "{s}-{s}.log", .{ self.fileParams.?.fileBehaviour.fileName, date_ext }),
-                else => try std.fmt.bufPrint(&new_buf, "{s}-{s}-{s}.log", .{ self.fileParams.?.fileBehaviour.fileName, @tagName(self.scope), date_ext }),
-            };
 
             self.fileParams.?.mutex.lock();
             defer self.fileParams.?.mutex.unlock();
 
             file.close();
-            var dir = std.fs.cwd().openDir(self.fileParams.?.fileBehaviour.filePath, .{}) catch return;
-            defer dir.close();
-            try dir.rename(base_name, rotated_name);
-
-            self.fileParams.?.file = getFile(self.scope, self.fileParams.?.fileBehaviour.filePath, self.fileParams.?.fileBehaviour.fileName);
+            self.fileParams.?.file = null;
+            const behaviour = self.fileParams.?.fileBehaviour;
+            self.fileParams.?.file = try rotateFile(self.scope, behaviour.filePath, behaviour.fileName, self.fileParams.?.last_rotation_day);
             self.fileParams.?.last_rotation_day = current_epoch_day;
         }
     }
 
+    /// Whether a line at `level` would be emitted to the console or the log file. Cheap enough
+    /// to guard argument preparation that allocates or walks large structures.
+    pub fn isEnabled(self: *const Self, level: std.log.Level) bool {
+        if (@intFromEnum(level) <= @intFromEnum(self.activeLevel)) return true;
+        if (self.fileParams) |params| {
+            if (params.file != null or params.output != null) return @intFromEnum(level) <= @intFromEnum(params.fileBehaviour.fileActiveLevel);
+        }
+        return false;
+    }
+
     /// Create a module logger with a specific module tag
     pub fn logger(self: *const Self, moduleTag: ?ModuleTag) ModuleLogger {
         return ModuleLogger{
@@ -302,6 +312,10 @@ pub const ModuleLogger = struct {
 
     const Self = @This();
 
+    pub fn isEnabled(self: *const Self, level: std.log.Level) bool {
+        return self.config.isEnabled(level);
+    }
+
     pub fn err(
         self: *const Self,
         comptime fmt: []const u8,
@@ -422,6 +436,46 @@ pub fn getFormattedTimestamp(buf: []u8) []const u8 {
     }) catch return buf[0..0];
 }
 
+pub fn currentEpochDay() i64 {
+    return @intCast(@divFloor(std.time.timestamp(), 24 * 60 * 60));
+}
+
+/// Renames the closed log file of `scope` to carry the date of `last_rotation_day` and opens
+/// a fresh one in its place.
+pub fn rotateFile(scope: LoggerScope, filePath: []const u8, fileName: []const u8, last_rotation_day: i64) !?std.fs.File {
+    const sec_per_day = 24 * 60 * 60;
+    const date = datetime.datetime.Datetime.fromTimestamp(last_rotation_day * sec_per_day * 1000);
+
+    var ts_buf: [128]u8 = undefined;
+    const date_ext = try std.fmt.bufPrint(
+        &ts_buf,
+        "{d:0>4}{d:0>2}{d:0>2}",
+        .{
+            date.date.year,
+            date.date.month,
+            date.date.day,
+        },
+    );
+
+    var name_buf: [64]u8 = undefined;
+    const base_name = switch (scope) {
+        .default => try std.fmt.bufPrint(&name_buf, "{s}.log", .{fileName}),
+        else => try std.fmt.bufPrint(&name_buf, "{s}-{s}.log", .{ fileName, @tagName(scope) }),
+    };
+
+    var new_buf: [128]u8 = undefined;
+    const rotated_name = switch (scope) {
+        .default => try std.fmt.bufPrint(&new_buf, "{s}-{s}.log", .{ fileName, date_ext }),
+        else => try std.fmt.bufPrint(&new_buf, "{s}-{s}-{s}.log", .{ fileName, @tagName(scope), date_ext }),
+    };
+
+    var dir = std.fs.cwd().openDir(filePath, .{}) catch return getFile(scope, filePath, fileName);
+    defer dir.close();
+    try dir.rename(base_name, rotated_name);
+
+    return getFile(scope, filePath, fileName);
+}
+
 pub fn getFile(scope: LoggerScope, filePath: []const u8, fileName: []const u8) ?std.fs.File {
     // try to create/open a file
     // do not close here .. will be closed when log file is rotated and new log file is created
@@ -582,3 +636,15 @@ test "OptionalNode formatter" {
         try testing.expectEqualStrings("(" ++ Colors.peer ++ Colors.reset ++ ") Message", buffer.items);
     }
 }
+
+test "ModuleLogger isEnabled follows the console level" {
+    var config = getLoggerConfig(.info, null);
+    const logger = config.logger(.chain);
+
+    try std.testing.expect(logger.isEnabled(.err));
+    try std.testing.expect(logger.isEnabled(.info));
+    try std.testing.expect(!logger.isEnabled(.debug));
+
+    config.activeLevel = .debug;
+    try std.testing.expect(logger.isEnabled(.debug));
+}
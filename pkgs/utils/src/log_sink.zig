@@ -0,0 +1,457 @@
+const std = @import("std");
+const Allocator = std.mem.Allocator;
+
+const logFactory = @import("./log.zig");
+const LoggerScope = logFactory.LoggerScope;
+const FileBehaviourParams = logFactory.FileBehaviourParams;
+
+/// Where a staged line is written, `stderr_output` or a file opened with `LogSink.openFile`.
+pub const OutputId = u8;
+pub const stderr_output: OutputId = 0;
+
+// stderr plus one log file per logger scope, with room to spare
+const max_outputs = 8;
+// staged lines handed to one writev per output
+const max_iovecs = 64;
+// every record starts on a header boundary, so the space left before the end of a buffer
+// always holds a skip header
+const record_align = @sizeOf(RecordHeader);
+
+const RecordHeader = extern struct {
+    // line bytes following the header, the record is padded to record_align
+    len: u32,
+    output: OutputId,
+    // fills the end of the buffer when the next record did not fit before it
+    skip: bool,
+    _reserved: u16 = 0,
+};
+
+pub const Options = struct {
+    /// Staging buffer per logging thread, rounded up to a power of two.
+    staging_bytes: usize = 256 * 1024,
+    /// Longest time a staged line waits for the flusher.
+    flush_interval_ns: u64 = 20 * std.time.ns_per_ms,
+    /// Debug lines are dropped once a staging buffer is this full, leaving the rest to
+    /// info and more severe lines.
+    debug_limit_percent: u8 = 50,
+    /// Info lines are dropped once a staging buffer is this full, warnings and errors may
+    /// use all of it.
+    info_limit_percent: u8 = 90,
+};
+
+/// Log lines of one thread waiting for the flusher. The owning thread appends records at
+/// `head` and the flusher consumes them from `tail`, neither side takes a lock.
+const Staging = struct {
+    buffer: []align(record_align) u8,
+    // byte positions, never wrapped, the buffer index is `position & (buffer.len - 1)`
+    head: std.atomic.Value(usize) align(std.atomic.cache_line),
+    tail: std.atomic.Value(usize) align(std.atomic.cache_line),
+
+    fn header(self: *Staging, position: usize) *RecordHeader {
+        return @ptrCast(@alignCast(self.buffer[position & (self.buffer.len - 1) ..].ptr));
+    }
+};
+
+const Output = struct {
+    // null when a log file could not be reopened after rotation
+    file: ?std.fs.File,
+    // rotation state of log files, stderr is never rotated
+    scope: LoggerScope = .default,
+    file_path: []const u8 = "",
+    file_name: []const u8 = "",
+    last_rotation_day: i64 = 0,
+};
+
+/// Asynchronous sink for the zeam loggers. Logging threads format a line as before but only
+/// copy it into a staging buffer of their own, without locks or syscalls. A flusher thread
+/// collects the staged lines every `flush_interval_ns`, writes them with one writev per
+/// output, and rotates the log files it owns once a day. When a thread logs faster than the
+/// flusher drains, debug lines are dropped first, then info lines, and the flusher reports
+/// the count of dropped lines per level.
+///
+/// Lines of one thread keep their order, lines of different threads may interleave out of
+/// timestamp order within one flush.
+pub const LogSink = struct {
+    allocator: Allocator,
+    options: Options,
+    id: u64,
+    stagings: std.ArrayList(*Staging),
+    stagings_mutex: std.Thread.Mutex,
+    outputs: [max_outputs]Output,
+    output_count: usize,
+    outputs_mutex: std.Thread.Mutex,
+    // indexed by std.log.Level
+    dropped: [4]std.atomic.Value(u64),
+    // flusher thread state
+    batches: [max_outputs]std.ArrayList(std.posix.iovec_const),
+    reported_dropped: [4]u64,
+    wake: std.Thread.ResetEvent,
+    stopped: std.atomic.Value(bool),
+    thread: ?std.Thread,
+
+    const Self = @This();
+
+    pub fn init(allocator: Allocator, options: Options) !Self {
+        var batches: [max_outputs]std.ArrayList(std.posix.iovec_const) = @splat(.empty);
+        errdefer for (&batches) |*batch| batch.deinit(allocator);
+        for (&batches) |*batch| try batch.ensureTotalCapacity(allocator, max_iovecs);
+
+        var outputs: [max_outputs]Output = undefined;
+        outputs[stderr_output] = .{ .file = std.fs.File.stderr() };
+        return Self{
+            .allocator = allocator,
+            .options = options,
+            .id = next_sink_id.fetchAdd(1, .monotonic),
+            .stagings = .empty,
+            .stagings_mutex = .{},
+            .outputs = outputs,
+            .output_count = 1,
+            .outputs_mutex = .{},
+            .dropped = @splat(std.atomic.Value(u64).init(0)),
+            .batches = batches,
+            .reported_dropped = @splat(0),
+            .wake = .{},
+            .stopped = std.atomic.Value(bool).init(false),
+            .thread = null,
+        };
+    }
+
+    pub fn deinit(self: *Self) void {
+        self.stop();
+        for (self.stagings.items) |staging| {
+            self.allocator.free(staging.buffer);
+            self.allocator.destroy(staging);
+        }
+        self.stagings.deinit(self.allocator);
+        for (self.outputs[1..self.output_count]) |output| {
+            if (output.file) |file| file.close();
+            self.allocator.free(output.file_path);
+            self.allocator.free(output.file_name);
+        }
+        for (&self.batches) |*batch| batch.deinit(self.allocator);
+    }
+
+    /// Spawns the flusher and routes the zeam loggers through this sink. Loggers created from
+    /// here on hand their log files to the sink. The sink must not move afterwards.
+    pub fn start(self: *Self) !void {
+        self.thread = try std.Thread.spawn(.{}, runFlusher, .{self});
+        active_sink.store(self, .release);
+    }
+
+    /// Writes out the staged lines and stops the flusher. Lines logged afterwards are dropped,
+    /// stop the sink once the threads that log are done.
+    pub fn stop(self: *Self) void {
+        const thread = self.thread orelse return;
+        _ = active_sink.cmpxchgStrong(self, null, .acq_rel, .monotonic);
+        self.stopped.store(true, .release);
+        self.wake.set();
+        thread.join();
+        self.thread = null;
+    }
+
+    /// Opens the log file of `scope` for loggers routed through this sink, loggers of the
+    /// same scope and file share one output.
+    pub fn openFile(self: *Self, scope: LoggerScope, behaviour: FileBehaviourParams) !OutputId {
+        self.outputs_mutex.lock();
+        defer self.outputs_mutex.unlock();
+
+        for (self.outputs[1..self.output_count], 1..) |output, id| {
+            if (output.scope == scope and std.mem.eql(u8, output.file_path, behaviour.filePath) and std.mem.eql(u8, output.file_name, behaviour.fileName)) {
+                return @intCast(id);
+            }
+        }
+        if (self.output_count == max_outputs) return error.TooManyLogOutputs;
+
+        const file_path = try self.allocator.dupe(u8, behaviour.filePath);
+        errdefer self.allocator.free(file_path);
+        const file_name = try self.allocator.dupe(u8, behaviour.fileName);
+        errdefer self.allocator.free(file_name);
+        const file = logFactory.getFile(scope, behaviour.filePath, behaviour.fileName) orelse return error.LogFileUnavailable;
+
+        self.outputs[self.output_count] = .{
+            .file = file,
+            .scope = scope,
+            .file_path = file_path,
+            .file_name = file_name,
+            .last_rotation_day = logFactory.currentEpochDay(),
+        };
+        self.output_count += 1;
+        return @intCast(self.output_count - 1);
+    }
+
+    /// Stages `line` for `output` on the calling thread's buffer, or drops it when the buffer
+    /// is filled past the limit of `level`.
+    pub fn submit(self: *Self, level: std.log.Level, output: OutputId, line: []const u8) void {
+        const staging = self.threadStaging() orelse {
+            _ = self.dropped[@intFromEnum(level)].fetchAdd(1, .monotonic);
+            return;
+        };
+
+        const size = staging.buffer.len;
+        const record_len = @sizeOf(RecordHeader) + std.mem.alignForward(usize, line.len, record_align);
+        const head = staging.head.load(.monotonic);
+        const used = head - staging.tail.load(.acquire);
+        const offset = head & (size - 1);
+        // records never wrap, a record that does not fit before the end starts over at zero
+        const skip_len = if (record_len > size - offset) size - offset else 0;
+
+        const limit_percent: usize = switch (level) {
+            .debug => self.options.debug_limit_percent,
+            .info => self.options.info_limit_percent,
+            .warn, .err => 100,
+        };
+        if (used + skip_len + record_len > size * limit_percent / 100) {
+            _ = self.dropped[@intFromEnum(level)].fetchAdd(1, .monotonic);
+            return;
+        }
+
+        var position = head;
+        if (skip_len > 0) {
+            staging.header(position).* = .{ .len = @intCast(skip_len - @sizeOf(RecordHeader)), .output = output, .skip = true };
+            position += skip_len;
+        }
+        staging.header(position).* = .{ .len = @intCast(line.len), .output = output, .skip = false };
+        const start = (position & (size - 1)) + @sizeOf(RecordHeader);
+        @memcpy(staging.buffer[start..][0..line.len], line);
+        staging.head.store(position + record_len, .release);
+
+        // errors go out without waiting for the next interval, as does a buffer filling up
+        if (@intFromEnum(level) <= @intFromEnum(std.log.Level.warn) or used + record_len > size / 2) {
+            self.wake.set();
+        }
+    }
+
+    /// Lines dropped so far at `level`.
+    pub fn droppedCount(self: *Self, level: std.log.Level) u64 {
+        return self.dropped[@intFromEnum(level)].load(.monotonic);
+    }
+
+    /// Blocks until every line staged before the call is written.
+    pub fn flush(self: *Self) void {
+        self.stagings_mutex.lock();
+        const stagings = self.allocator.dupe(*Staging, self.stagings.items) catch &.{};
+        self.stagings_mutex.unlock();
+        defer self.allocator.free(stagings);
+
+        for (stagings) |staging| {
+            const head = staging.head.load(.acquire);
+            while (staging.tail.load(.acquire) < head and self.thread != null) {
+                self.wake.set();
+                std.Thread.sleep(std.time.ns_per_ms);
+            }
+        }
+    }
+
+    fn threadStaging(self: *Self) ?*Staging {
+        if (thread_staging_sink == self.id) return thread_staging;
+
+        const size = std.math.ceilPowerOfTwo(usize, @max(self.options.staging_bytes, 4096)) catch return null;
+        const staging = self.allocator.create(Staging) catch return null;
+        staging.* = .{
+            .buffer = self.allocator.alignedAlloc(u8, .fromByteUnits(record_align), size) catch {
+                self.allocator.destroy(staging);
+                return null;
+            },
+            .head = std.atomic.Value(usize).init(0),
+            .tail = std.atomic.Value(usize).init(0),
+        };
+
+        self.stagings_mutex.lock();
+        defer self.stagings_mutex.unlock();
+        self.stagings.append(self.allocator, staging) catch {
+            self.allocator.free(staging.buffer);
+            self.allocator.destroy(staging);
+            return null;
+        };
+        thread_staging = staging;
+        thread_staging_sink = self.id;
+        return staging;
+    }
+
+    fn runFlusher(self: *Self) void {
+        while (true) {
+            // reset before collecting, a wake from here on cuts the wait below short
+            self.wake.reset();
+            const stopping = self.stopped.load(.acquire);
+            self.collectStagings();
+            self.reportDropped();
+            self.rotateFiles();
+            if (stopping) break;
+            self.wake.timedWait(self.options.flush_interval_ns) catch {};
+        }
+    }
+
+    fn collectStagings(self: *Self) void {
+        // threads register a staging on their first line, collect the ones known right now
+        self.stagings_mutex.lock();
+        const count = self.stagings.items.len;
+        self.stagings_mutex.unlock();
+
+        for (0..count) |i| {
+            self.stagings_mutex.lock();
+            const staging = self.stagings.items[i];
+            self.stagings_mutex.unlock();
+            self.collectStaging(staging);
+        }
+    }
+
+    fn collectStaging(self: *Self, staging: *Staging) void {
+        const head = staging.head.load(.acquire);
+        var position = staging.tail.load(.monotonic);
+        while (position < head) {
+            const record = staging.header(position);
+            const record_len = @sizeOf(RecordHeader) + std.mem.alignForward(usize, record.len, record_align);
+            if (!record.skip) {
+                const batch = &self.batches[record.output];
+                // the lines referenced by full batches are written before the space is released
+                if (batch.items.len == max_iovecs) {
+                    self.writeBatches();
+                    staging.tail.store(position, .release);
+                }
+                const start = (position & (staging.buffer.len - 1)) + @sizeOf(RecordHeader);
+                batch.appendAssumeCapacity(.{ .base = staging.buffer[start..].ptr, .len = record.len });
+            }
+            position += record_len;
+        }
+        self.writeBatches();
+        staging.tail.store(position, .release);
+    }
+
+    fn writeBatches(self: *Self) void {
+        self.outputs_mutex.lock();
+        defer self.outputs_mutex.unlock();
+        for (self.outputs[0..self.output_count], self.batches[0..self.output_count]) |output, *batch| {
+            if (batch.items.len == 0) continue;
+            defer batch.clearRetainingCapacity();
+            const file = output.file orelse continue;
+            file.writevAll(batch.items) catch |err| {
+                std.debug.print("ERROR: log sink failed to write {d} lines: {any}\n", .{ batch.items.len, err });
+            };
+        }
+    }
+
+    fn reportDropped(self: *Self) void {
+        var dropped: [4]u64 = undefined;
+        var changed = false;
+        for (&dropped, &self.dropped, self.reported_dropped) |*count, *total, reported| {
+            count.* = total.load(.monotonic) - reported;
+            changed = changed or count.* > 0;
+        }
+        if (!changed) return;
+        for (&self.reported_dropped, dropped) |*reported, count| reported.* += count;
+
+        var ts_buf: [64]u8 = undefined;
+        var line_buf: [256]u8 = undefined;
+        const line = std.fmt.bufPrint(&line_buf, "{s} [warning] (zeam): log sink dropped debug={d} info={d} warn={d} err={d} lines, logging outpaced the flusher\n", .{
+            logFactory.getFormattedTimestamp(&ts_buf),
+            dropped[@intFromEnum(std.log.Level.debug)],
+            dropped[@intFromEnum(std.log.Level.info)],
+            dropped[@intFromEnum(std.log.Level.warn)],
+            dropped[@intFromEnum(std.log.Level.err)],
+        }) catch return;
+
+        self.outputs_mutex.lock();
+        defer self.outputs_mutex.unlock();
+        for (self.outputs[0..self.output_count]) |output| {
+            const file = output.file orelse continue;
+            file.writeAll(line) catch {};
+        }
+    }
+
+    fn rotateFiles(self: *Self) void {
+        const current_epoch_day = logFactory.currentEpochDay();
+        self.outputs_mutex.lock();
+        defer self.outputs_mutex.unlock();
+
+        for (self.outputs[1..self.output_count]) |*output| {
+            if (output.last_rotation_day == current_epoch_day) continue;
+            if (output.file) |file| file.close();
+            output.file = logFactory.rotateFile(output.scope, output.file_path, output.file_name, output.last_rotation_day) catch |err| blk: {
+                std.debug.print("ERROR: log sink failed to rotate log file {s}: {any}\n", .{ output.file_name, err });
+                break :blk logFactory.getFile(output.scope, output.file_path, output.file_name);
+            };
+            output.last_rotation_day = current_epoch_day;
+        }
+    }
+};
+
+var active_sink = std.atomic.Value(?*LogSink).init(null);
+var next_sink_id = std.atomic.Value(u64).init(1);
+// staging buffer of the calling thread and the sink it belongs to
+threadlocal var thread_staging: ?*Staging = null;
+threadlocal var thread_staging_sink: u64 = 0;
+
+/// The sink the zeam loggers write through, null when they write synchronously.
+pub fn active() ?*LogSink {
+    return active_sink.load(.acquire);
+}
+
+test "log sink writes staged lines of every thread to their outputs" {
+    const allocator = std.testing.allocator;
+
+    var tmp_dir = std.testing.tmpDir(.{});
+    defer tmp_dir.cleanup();
+    const dir_path = try tmp_dir.dir.realpathAlloc(allocator, ".");
+    defer allocator.free(dir_path);
+
+    var sink = try LogSink.init(allocator, .{});
+    defer sink.deinit();
+    const output = try sink.openFile(.n1, .{ .filePath = dir_path, .fileName = "sink" });
+    try std.testing.expectEqual(output, try sink.openFile(.n1, .{ .filePath = dir_path, .fileName = "sink" }));
+    try sink.start();
+
+    const num_threads = 4;
+    const per_thread = 500;
+    const Producer = struct {
+        fn run(s: *LogSink, out: OutputId, id: usize) void {
+            var buf: [64]u8 = undefined;
+            for (0..per_thread) |i| {
+                const line = std.fmt.bufPrint(&buf, "thread={d} line={d}\n", .{ id, i }) catch unreachable;
+                s.submit(.info, out, line);
+            }
+        }
+    };
+    var threads: [num_threads]std.Thread = undefined;
+    for (&threads, 0..) |*thread, id| thread.* = try std.Thread.spawn(.{}, Producer.run, .{ &sink, output, id });
+    for (threads) |thread| thread.join();
+    sink.flush();
+    sink.stop();
+
+    const contents = try tmp_dir.dir.readFileAlloc(allocator, "sink-n1.log", 1024 * 1024);
+    defer allocator.free(contents);
+    // lines of one thread arrive in order
+    var next_line = [_]usize{0} ** num_threads;
+    var lines = std.mem.tokenizeScalar(u8, contents, '\n');
+    while (lines.next()) |line| {
+        var fields = std.mem.tokenizeAny(u8, line, "= ");
+        _ = fields.next();
+        const id = try std.fmt.parseInt(usize, fields.next().?, 10);
+        _ = fields.next();
+        try std.testing.expectEqual(next_line[id], try std.fmt.parseInt(usize, fields.next().?, 10));
+        next_line[id] += 1;
+    }
+    for (next_line) |count| try std.testing.expectEqual(@as(usize, per_thread), count);
+    try std.testing.expectEqual(@as(u64, 0), sink.droppedCount(.info));
+}
+
+test "log sink drops debug lines before info lines" {
+    const allocator = std.testing.allocator;
+
+    // not started, nothing drains the staging buffer
+    var sink = try LogSink.init(allocator, .{ .staging_bytes = 4096 });
+    defer sink.deinit();
+
+    const line = "x" ** 120 ++ "\n";
+    const record_len = @sizeOf(RecordHeader) + std.mem.alignForward(usize, line.len, record_align);
+    const debug_fit = 4096 / 2 / record_len;
+    for (0..debug_fit + 4) |_| sink.submit(.debug, stderr_output, line);
+    try std.testing.expectEqual(@as(u64, 4), sink.droppedCount(.debug));
+
+    // info lines still find room above the debug limit
+    sink.submit(.info, stderr_output, line);
+    try std.testing.expectEqual(@as(u64, 0), sink.droppedCount(.info));
+    for (0..4096 / record_len) |_| sink.submit(.info, stderr_output, line);
+    try std.testing.expect(sink.droppedCount(.info) > 0);
+    sink.submit(.err, stderr_output, line);
+    try std.testing.expectEqual(@as(u64, 0), sink.droppedCount(.err));
+}
@@ -0,0 +1,155 @@
+const std = @import("std");
+const Allocator = std.mem.Allocator;
+
+/// Bounded lock-free queue for any number of producer threads and a single consumer thread,
+/// after Dmitry Vyukov's bounded MPMC queue. Every slot carries a sequence number telling
+/// producers and the consumer whose turn it is, so neither side ever takes a lock.
+pub fn MpscRing(comptime T: type) type {
+    return struct {
+        allocator: Allocator,
+        slots: []Slot,
+        mask: usize,
+        // next position to claim, shared by the producers
+        head: std.atomic.Value(usize) align(std.atomic.cache_line),
+        // next position to read, only touched by the consumer
+        tail: usize align(std.atomic.cache_line),
+
+        const Slot = struct {
+            sequence: std.atomic.Value(usize),
+            value: T,
+        };
+
+        const Self = @This();
+
+        /// The capacity is rounded up to the next power of two.
+        pub fn init(allocator: Allocator, capacity: usize) !Self {
+            const size = try std.math.ceilPowerOfTwo(usize, @max(capacity, 2));
+            const slots = try allocator.alloc(Slot, size);
+            for (slots, 0..) |*slot, index| {
+                slot.* = .{ .sequence = std.atomic.Value(usize).init(index), .value = undefined };
+            }
+            return .{
+                .allocator = allocator,
+                .slots = slots,
+                .mask = size - 1,
+                .head = std.atomic.Value(usize).init(0),
+                .tail = 0,
+            };
+        }
+
+        pub fn deinit(self: *Self) void {
+            self.allocator.free(self.slots);
+        }
+
+        pub fn capacity(self: *const Self) usize {
+            return self.slots.len;
+        }
+
+        /// Safe to call from any thread, returns false when the ring is full.
+        pub fn push(self: *Self, value: T) bool {
+            var pos = self.head.load(.monotonic);
+            while (true) {
+                const slot = &self.slots[pos & self.mask];
+                const sequence = slot.sequence.load(.acquire);
+                const diff: isize = @bitCast(sequence -% pos);
+                if (diff == 0) {
+                    if (self.head.cmpxchgWeak(pos, pos +% 1, .monotonic, .monotonic)) |current| {
+                        pos = current;
+                    } else {
+                        slot.value = value;
+                        slot.sequence.store(pos +% 1, .release);
+                        return true;
+                    }
+                } else if (diff < 0) {
+                    // the consumer has not released this slot from the previous lap yet
+                    return false;
+                } else {
+                    pos = self.head.load(.monotonic);
+                }
+            }
+        }
+
+        /// Consumer thread only.
+        pub fn pop(self: *Self) ?T {
+            const slot = &self.slots[self.tail & self.mask];
+            const sequence = slot.sequence.load(.acquire);
+            if (sequence != self.tail +% 1) return null;
+
+            const value = slot.value;
+            slot.sequence.store(self.tail +% self.slots.len, .release);
+            self.tail +%= 1;
+            return value;
+        }
+
+        /// Consumer thread only, includes entries still being written by producers.
+        pub fn len(self: *const Self) usize {
+            return self.head.load(.monotonic) -% self.tail;
+        }
+    };
+}
+
+test "mpsc ring delivers every item once under concurrent producers" {
+    const allocator = std.testing.allocator;
+    const num_producers = 4;
+    const per_producer = 10_000;
+
+    var ring = try MpscRing(u64).init(allocator, 64);
+    defer ring.deinit();
+    try std.testing.expectEqual(@as(usize, 64), ring.capacity());
+
+    const Producer = struct {
+        fn run(r: *MpscRing(u64), id: u64) void {
+            var i: u64 = 0;
+            while (i < per_producer) {
+                if (r.push(id * per_producer + i)) {
+                    i += 1;
+                } else {
+                    std.Thread.yield() catch {};
+                }
+            }
+        }
+    };
+
+    var threads: [num_producers]std.Thread = undefined;
+    for (&threads, 0..) |*thread, id| {
+        thread.* = try std.Thread.spawn(.{}, Producer.run, .{ &ring, @as(u64, id) });
+    }
+
+    const seen = try allocator.alloc(bool, num_producers * per_producer);
+    defer allocator.free(seen);
+    @memset(seen, false);
+    // items of one producer arrive in the order it pushed them
+    var next_expected = [_]u64{0} ** num_producers;
+
+    var received: usize = 0;
+    while (received < seen.len) {
+        const value = ring.pop() orelse {
+            std.Thread.yield() catch {};
+            continue;
+        };
+        try std.testing.expect(!seen[value]);
+        seen[value] = true;
+        const producer = value / per_producer;
+        try std.testing.expectEqual(next_expected[producer], value % per_producer);
+        next_expected[producer] += 1;
+        received += 1;
+    }
+    for (threads) |thread| thread.join();
+
+    try std.testing.expect(ring.pop() == null);
+    try std.testing.expectEqual(@as(usize, 0), ring.len());
+}
+
+test "mpsc ring reports full and reuses slots" {
+    var ring = try MpscRing(u32).init(std.testing.allocator, 3);
+    defer ring.deinit();
+
+    for (0..4) |i| try std.testing.expect(ring.push(@intCast(i)));
+    try std.testing.expect(!ring.push(4));
+
+    for (0..3) |lap| {
+        for (0..4) |i| try std.testing.expectEqual(@as(u32, @intCast(lap * 4 + i)), ring.pop().?);
+        try std.testing.expect(ring.pop() == null);
+        for (0..4) |i| try std.testing.expect(ring.push(@intCast((lap + 1) * 4 + i)));
+    }
+}
@@ -26,3 +26,191 @@ pub fn hashTreeRoot(
 ) !void {
     try ssz.hashTreeRoot(Hasher, T, value, out, allocator);
 }
+
+pub const Chunk = [Hasher.digest_length]u8;
+
+fn hashPair(left: *const Chunk, right: *const Chunk, out: *Chunk) void {
+    var hasher = Hasher.init(.{});
+    hasher.update(left);
+    hasher.update(right);
+    hasher.final(out);
+}
+
+/// ssz mix_in_length: hash of `root` with the list length as a little endian uint256 chunk
+pub fn mixInLength(root: *const Chunk, length: usize, out: *Chunk) void {
+    var length_chunk = std.mem.zeroes(Chunk);
+    std.mem.writeInt(u64, length_chunk[0..8], @intCast(length), .little);
+    hashPair(root, &length_chunk, out);
+}
+
+/// ssz merkleize of a fixed number of chunks, padded with zero chunks to the next power of two
+pub fn merkleizeChunks(comptime n: usize, chunks: [n]Chunk, out: *Chunk) void {
+    const width = comptime std.math.ceilPowerOfTwoAssert(usize, @max(n, 1));
+    var layer: [width]Chunk = [_]Chunk{std.mem.zeroes(Chunk)} ** width;
+    @memcpy(layer[0..n], &chunks);
+
+    var len: usize = width;
+    while (len > 1) : (len /= 2) {
+        for (0..len / 2) |i| {
+            hashPair(&layer[2 * i], &layer[2 * i + 1], &layer[i]);
+        }
+    }
+    out.* = layer[0];
+}
+
+/// Incrementally maintained ssz merkle tree over a list of chunks bounded by `chunk_limit`.
+/// Every inner layer is kept, so `update` only rehashes the chunks that differ from the
+/// previous call and their ancestors, which makes append-mostly lists cheap to re-root.
+pub fn MerkleListCache(comptime chunk_limit: usize) type {
+    return struct {
+        allocator: Allocator,
+        // layers[0] are the leaf chunks, layers[i + 1] the parents of layers[i]
+        layers: [depth + 1]std.ArrayList(Chunk),
+        // zero_hashes[i] is the root of a zeroed subtree of height i
+        zero_hashes: [depth + 1]Chunk,
+
+        pub const depth = std.math.log2_int_ceil(usize, @max(chunk_limit, 1));
+        const Self = @This();
+
+        pub fn init(allocator: Allocator) Self {
+            var self = Self{
+                .allocator = allocator,
+                .layers = [_]std.ArrayList(Chunk){.empty} ** (depth + 1),
+                .zero_hashes = undefined,
+            };
+            self.zero_hashes[0] = std.mem.zeroes(Chunk);
+            for (1..depth + 1) |i| {
+                hashPair(&self.zero_hashes[i - 1], &self.zero_hashes[i - 1], &self.zero_hashes[i]);
+            }
+            return self;
+        }
+
+        pub fn deinit(self: *Self) void {
+            for (&self.layers) |*layer| {
+                layer.deinit(self.allocator);
+            }
+        }
+
+        pub fn len(self: *const Self) usize {
+            return self.layers[0].items.len;
+        }
+
+        /// Brings the tree in sync with `chunks`, rehashing only the changed paths
+        pub fn update(self: *Self, chunks: []const Chunk) !void {
+            const common_len = @min(self.layers[0].items.len, chunks.len);
+
+            // dirty leaf range [lo, hi)
+            var lo: usize = chunks.len;
+            var hi: usize = 0;
+            for (chunks[0..common_len], self.layers[0].items[0..common_len], 0..) |*chunk, *cached, i| {
+                if (!std.mem.eql(u8, chunk, cached)) {
+                    lo = @min(lo, i);
+                    hi = i + 1;
+                }
+            }
+            try self.rehash(chunks, lo, hi);
+        }
+
+        /// Like `update` for callers that know the first `unchanged` chunks are the ones of
+        /// the previous update, the prefix is not compared and only the tail is rehashed
+        pub fn updateTail(self: *Self, chunks: []const Chunk, unchanged: usize) !void {
+            std.debug.assert(unchanged <= @min(self.layers[0].items.len, chunks.len));
+            try self.rehash(chunks, unchanged, chunks.len);
+        }
+
+        fn rehash(self: *Self, chunks: []const Chunk, dirty_lo: usize, dirty_hi: usize) !void {
+            if (chunks.len > chunk_limit) return error.ListTooLong;
+
+            const old_len = self.layers[0].items.len;
+            var lo = dirty_lo;
+            var hi = dirty_hi;
+            if (chunks.len != old_len) {
+                // appended leaves, or the new last leaf now pairs with a zero sibling
+                lo = @min(lo, if (chunks.len > old_len) old_len else chunks.len -| 1);
+                hi = chunks.len;
+            }
+            if (lo >= hi and chunks.len == old_len) return;
+
+            try self.layers[0].resize(self.allocator, chunks.len);
+            if (hi > lo) {
+                @memcpy(self.layers[0].items[lo..hi], chunks[lo..hi]);
+            }
+
+            for (0..depth) |level| {
+                const children = self.layers[level].items;
+                const parents = &self.layers[level + 1];
+                const parents_len = (children.len + 1) / 2;
+                try parents.resize(self.allocator, parents_len);
+
+                const parent_lo = lo / 2;
+                const parent_hi = @min((hi + 1) / 2, parents_len);
+                for (parent_lo..parent_hi) |p| {
+                    const right = if (2 * p + 1 < children.len) &children[2 * p + 1] else &self.zero_hashes[level];
+                    hashPair(&children[2 * p], right, &parents.items[p]);
+                }
+                lo = parent_lo;
+                hi = parent_hi;
+            }
+        }
+
+        /// Merkle root of the chunks from the last `update`, without the length mix in
+        pub fn root(self: *const Self) Chunk {
+            const top = self.layers[depth].items;
+            return if (top.len == 0) self.zero_hashes[depth] else top[0];
+        }
+
+        /// ssz List hash tree root of the chunks from the last `update` holding `length` elements
+        pub fn listRoot(self: *const Self, length: usize, out: *Chunk) void {
+            const tree_root = self.root();
+            mixInLength(&tree_root, length, out);
+        }
+    };
+}
+
+test "merkle list cache matches ssz list hash tree root" {
+    const limit = 64;
+    const RootList = ssz.utils.List([32]u8, limit);
+    const allocator = std.testing.allocator;
+
+    var list = try RootList.init(allocator);
+    defer list.deinit();
+    var cache = MerkleListCache(limit).init(allocator);
+    defer cache.deinit();
+
+    var expected: Chunk = undefined;
+    var actual: Chunk = undefined;
+    for (0..limit) |i| {
+        var item = std.mem.zeroes([32]u8);
+        item[0] = @intCast(i + 1);
+        try list.append(item);
+
+        // rewrite an earlier element every few appends to exercise in place updates
+        if (i % 5 == 4) {
+            list.slice()[i / 2][1] +%= 1;
+        }
+
+        try cache.update(list.constSlice());
+        cache.listRoot(list.len(), &actual);
+        try hashTreeRoot(RootList, list, &expected, allocator);
+        try std.testing.expectEqualSlices(u8, &expected, &actual);
+    }
+
+    // shrinking re-pairs the new tail with zero subtrees
+    var shorter = try RootList.init(allocator);
+    defer shorter.deinit();
+    for (list.constSlice()[0..37]) |item| {
+        try shorter.append(item);
+    }
+    try cache.update(shorter.constSlice());
+    cache.listRoot(shorter.len(), &actual);
+    try hashTreeRoot(RootList, shorter, &expected, allocator);
+    try std.testing.expectEqualSlices(u8, &expected, &actual);
+
+    // a tail update with a known unchanged prefix matches a full update
+    var tail_cache = MerkleListCache(limit).init(allocator);
+    defer tail_cache.deinit();
+    try tail_cache.update(shorter.constSlice()[0..20]);
+    try tail_cache.updateTail(shorter.constSlice(), 20);
+    tail_cache.listRoot(shorter.len(), &actual);
+    try std.testing.expectEqualSlices(u8, &expected, &actual);
+}
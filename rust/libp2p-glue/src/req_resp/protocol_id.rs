@@ -6,11 +6,13 @@ use std::hash::{Hash, Hasher};
 
 const LEAN_BLOCKS_BY_ROOT_V1: &str = "/leanconsensus/req/blocks_by_root/1/ssz_snappy";
 const LEAN_STATUS_V1: &str = "/leanconsensus/req/status/1/ssz_snappy";
+const LEAN_BLOCKS_BY_RANGE_V1: &str = "/leanconsensus/req/blocks_by_range/1/ssz_snappy";
 
 #[derive(Debug, Clone, Copy, PartialEq, Eq)]
 pub enum LeanSupportedProtocol {
     BlocksByRootV1,
     StatusV1,
+    BlocksByRangeV1,
 }
 
 impl LeanSupportedProtocol {
@@ -18,6 +20,7 @@ impl LeanSupportedProtocol {
         match self {
             LeanSupportedProtocol::BlocksByRootV1 => "blocks_by_root",
             LeanSupportedProtocol::StatusV1 => "status",
+            LeanSupportedProtocol::BlocksByRangeV1 => "blocks_by_range",
         }
     }
 
@@ -25,6 +28,7 @@ impl LeanSupportedProtocol {
         match self {
             LeanSupportedProtocol::BlocksByRootV1 => "1",
             LeanSupportedProtocol::StatusV1 => "1",
+            LeanSupportedProtocol::BlocksByRangeV1 => "1",
         }
     }
 
@@ -32,6 +36,7 @@ impl LeanSupportedProtocol {
         match self {
             LeanSupportedProtocol::BlocksByRootV1 => false,
             LeanSupportedProtocol::StatusV1 => false,
+            LeanSupportedProtocol::BlocksByRangeV1 => false,
         }
     }
 
@@ -39,6 +44,7 @@ impl LeanSupportedProtocol {
         match self {
             LeanSupportedProtocol::BlocksByRootV1 => LEAN_BLOCKS_BY_ROOT_V1,
             LeanSupportedProtocol::StatusV1 => LEAN_STATUS_V1,
+            LeanSupportedProtocol::BlocksByRangeV1 => LEAN_BLOCKS_BY_RANGE_V1,
         }
     }
 }
@@ -50,6 +56,7 @@ impl TryFrom<u32> for LeanSupportedProtocol {
         match value {
             0 => Ok(LeanSupportedProtocol::BlocksByRootV1),
             1 => Ok(LeanSupportedProtocol::StatusV1),
+            2 => Ok(LeanSupportedProtocol::BlocksByRangeV1),
             _ => Err(()),
         }
     }